@@ -0,0 +1,105 @@
+# SPDX-License-Identifier: Apache-2.0
+# Licensed to the Ed-Fi Alliance under one or more agreements.
+# The Ed-Fi Alliance licenses this file to you under the Apache License, Version 2.0.
+# See the LICENSE and NOTICES files in the project root for more information.
+
+"""
+Measures grade extraction time as the number of enrollments grows.
+
+Each run builds synthetic enrollments spread evenly over sections, with the
+sync dates of every enrollment by section, then extracts the grades of every
+section. The time per enrollment should stay flat as the enrollments grow.
+
+Usage: python benchmarks/grades_benchmark.py --enrollments 10000 50000 200000 --section-size 25
+"""
+
+import argparse
+from time import perf_counter
+from typing import Dict, List, Tuple
+
+from canvasapi.enrollment import Enrollment
+from canvasapi.section import Section
+from pandas import DataFrame
+
+from edfi_canvas_extractor.client_facade import extract_grades
+
+SYNC_DATE = "2021-03-01 12:00:00"
+
+
+def _generate(
+    enrollment_count: int, section_size: int
+) -> Tuple[List[Enrollment], Dict[str, DataFrame], List[Section]]:
+    section_count: int = max(enrollment_count // section_size, 1)
+    sections: List[Section] = [
+        Section(None, {"id": section_id}) for section_id in range(section_count)
+    ]
+    enrollments: List[Enrollment] = [
+        Enrollment(
+            None,
+            {
+                "id": enrollment_id,
+                "type": "StudentEnrollment",
+                "course_section_id": enrollment_id % section_count,
+                "grades": {"final_score": enrollment_id % 100, "current_score": 0},
+            },
+        )
+        for enrollment_id in range(enrollment_count)
+    ]
+
+    ids_by_section: Dict[str, List[str]] = {}
+    for enrollment in enrollments:
+        ids_by_section.setdefault(str(enrollment.course_section_id), []).append(
+            str(enrollment.id)
+        )
+    udm_enrollments: Dict[str, DataFrame] = {
+        section_id: DataFrame(
+            {
+                "SourceSystemIdentifier": ids,
+                "CreateDate": SYNC_DATE,
+                "LastModifiedDate": SYNC_DATE,
+            }
+        )
+        for section_id, ids in ids_by_section.items()
+    }
+    return (enrollments, udm_enrollments, sections)
+
+
+def run(enrollment_counts: List[int], section_size: int):
+    print(f"{'enrollments':>12} {'sections':>9} {'seconds':>9} {'us/enrollment':>14}")
+
+    for enrollment_count in enrollment_counts:
+        (enrollments, udm_enrollments, sections) = _generate(
+            enrollment_count, section_size
+        )
+
+        start = perf_counter()
+        grades = sum(
+            len(grades_df)
+            for (_, grades_df) in extract_grades(enrollments, udm_enrollments, sections)
+        )
+        elapsed = perf_counter() - start
+
+        assert grades == enrollment_count
+        print(
+            f"{enrollment_count:>12} {len(sections):>9} {elapsed:>9.2f} "
+            f"{elapsed / enrollment_count * 1_000_000:>14.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--enrollments",
+        type=int,
+        nargs="+",
+        default=[10_000, 50_000, 200_000],
+        help="the enrollment counts to benchmark",
+    )
+    parser.add_argument(
+        "--section-size",
+        type=int,
+        default=25,
+        help="the number of enrollments in each section",
+    )
+    arguments = parser.parse_args()
+    run(arguments.enrollments, arguments.section_size)
@@ -4,82 +4,186 @@
 # See the LICENSE and NOTICES files in the project root for more information.
 
 import logging
-from typing import List
+from typing import Any, Dict, Iterator, List, Optional, Set
 import re
+from urllib.parse import urlparse
 
-from pandas import DataFrame
-import sqlalchemy
+from pandas import DataFrame, Series, concat
 from canvasapi.authentication_event import AuthenticationEvent
 from canvasapi.user import User
 from canvasapi.paginated_list import PaginatedList
+from canvasapi.util import combine_kwargs
 from opnieuw import retry
 
 from .canvas_helper import to_df
+from edfi_lms_extractor_lib.api.sync_store import SyncDb
+from edfi_lms_extractor_lib.api.fetch_pool import (
+    fetch_concurrently,
+    get_fetch_workers,
+    get_host_limiter,
+)
 from edfi_lms_extractor_lib.api.resource_sync import (
     cleanup_after_sync,
-    sync_to_db_without_cleanup,
+    read_synced_records,
+    read_synced_source_ids,
+    sync_chunks_to_db_without_cleanup,
 )
 from edfi_canvas_extractor.config import RETRY_CONFIG
 
 
 AUTH_EVENTS_RESOURCE_NAME = "Authentication_Events"
 
+# number of events converted to a DataFrame and staged for sync at a time
+AUTH_EVENTS_SYNC_CHUNK_SIZE = 10000
+
 logger = logging.getLogger(__name__)
 
 
-def _authentication_event_get_next_page(self: PaginatedList):
+class AuthenticationEventList(PaginatedList):
     """
-    This is a monkeypatched version of the CanvasAPI 2.2.0
-    PaginatedList._get_next_page function, modified to handle
-    the fact that authentication events are in the response
-    under "events".
+    A CanvasAPI 2.2.0 PaginatedList of authentication events. The authentication
+    events API returns each page under "events" rather than as a list, which the
+    PaginatedList of User.get_authentication_events does not handle. Unlike
+    patching PaginatedList itself, this is safe to use from several threads.
     """
-    response = self._requester.request(
-        self._request_method, self._next_url, **self._next_params
-    )
-    data = response.json()
-    self._next_url = None
 
-    next_link = response.links.get("next")
-    regex = r"{}(.*)".format(re.escape(self._requester.base_url))
+    # set by PaginatedList, which canvasapi does not annotate
+    _next_url: Optional[str]
+    _next_params: Dict[str, Any]
 
-    self._next_url = (
-        re.search(regex, next_link["url"]).group(1) if next_link else None  # type: ignore
-    )
+    def _get_next_page(self) -> List[AuthenticationEvent]:
+        response = self._requester.request(
+            self._request_method, self._next_url, **self._next_params
+        )
+        data = response.json()
+        self._next_url = None
+
+        next_link = response.links.get("next")
+        regex = r"{}(.*)".format(re.escape(self._requester.base_url))
+
+        self._next_url = (
+            re.search(regex, next_link["url"]).group(1) if next_link else None  # type: ignore
+        )
+
+        self._next_params = {}
+
+        content = []
+
+        if self._root:
+            try:
+                data = data[self._root]
+            except KeyError:
+                raise ValueError("Invalid root value specified.")
+
+        # This is the change to the code, added to get to the events object in the response
+        if "events" in data:
+            data = data["events"]
+
+        for element in data:
+            if element is not None:
+                element.update(self._extra_attribs)
+                content.append(self._content_class(self._requester, element))
+
+        return content
+
+
+def event_user_and_date(source_ids: Series) -> DataFrame:
+    """
+    Split the ids given to authentication events, {in|out}#{user id}#{created at},
+    into their user id and creation date
 
-    self._next_params = {}
+    Parameters
+    ----------
+    source_ids: Series
+        authentication event ids
 
-    content = []
+    Returns
+    -------
+    DataFrame
+        a DataFrame with user_id and created_at columns
+    """
+    parts: DataFrame = source_ids.str.split("#", n=2, expand=True)
+    if parts.empty:
+        return DataFrame({"user_id": [], "created_at": []}, dtype="string")
+    return DataFrame({"user_id": parts[1], "created_at": parts[2]})
 
-    if self._root:
-        try:
-            data = data[self._root]
-        except KeyError:
-            raise ValueError("Invalid root value specified.")
 
-    # This is the change to the code, added to get to the events object in the response
-    if "events" in data:
-        data = data["events"]
+def last_event_dates(sync_db: SyncDb) -> Dict[str, str]:
+    """
+    Get the creation date of the latest authentication event previously synced
+    for each user, to resume fetching from
 
-    for element in data:
-        if element is not None:
-            element.update(self._extra_attribs)
-            content.append(self._content_class(self._requester, element))
+    Parameters
+    ----------
+    sync_db: SyncDb
+        the sync store, or an Engine instance for creating database connections
 
-    return content
+    Returns
+    -------
+    Dict[str, str]
+        the latest creation date by user id
+    """
+    events_df: DataFrame = event_user_and_date(
+        read_synced_source_ids(AUTH_EVENTS_RESOURCE_NAME, sync_db)
+    )
+    return events_df.groupby("user_id")["created_at"].max().to_dict()
 
 
 @retry(**RETRY_CONFIG)  # type: ignore
+def request_user_events(
+    user: User, start_date: str, end_date: str
+) -> List[AuthenticationEvent]:
+    """
+    Fetch every page of AuthenticationEvent API data for a user, within the
+    per-host request limit
+
+    Parameters
+    ----------
+    user: User
+        a Canvas User object
+    start_date: str
+        fetch events created on or after this date
+    end_date: str
+        fetch events created before this date
+
+    Returns
+    -------
+    List[AuthenticationEvent]
+        a list of AuthenticationEvent API objects
+    """
+    events = AuthenticationEventList(
+        AuthenticationEvent,
+        user._requester,
+        "GET",
+        f"audit/authentication/users/{user.id}",
+        _kwargs=combine_kwargs(start_time=start_date, end_time=end_date),
+    )
+    with get_host_limiter().limit(urlparse(user._requester.base_url).netloc):
+        return list(events)
+
+
 def request_events(
-    users: List[User], start_date: str, end_date: str
+    users: List[User],
+    start_date: str,
+    end_date: str,
+    start_dates_by_user: Optional[Dict[str, str]] = None,
 ) -> List[AuthenticationEvent]:
     """
-    Fetch AuthenticationEvent API data for a range of users and return a list of AuthenticationEvent API objects
+    Fetch AuthenticationEvent API data for a range of users and return a list of
+    AuthenticationEvent API objects. Users are fetched concurrently on the fetch
+    workers.
 
     Parameters
     ----------
     users: List[User]
         a list of Canvas User objects
+    start_date: str
+        fetch events created on or after this date
+    end_date: str
+        fetch events created before this date
+    start_dates_by_user: Optional[Dict[str, str]]
+        a later start date for some users by user id, such as the date of the
+        latest event already synced, see last_event_dates
 
     Returns
     -------
@@ -88,26 +192,26 @@ def request_events(
     """
     logger.info("Pulling authentication events data")
 
-    # enable monkeypatch of CanvasApi's PaginatedList._get_next_page
-    original_get_next_page = PaginatedList._get_next_page
-    PaginatedList._get_next_page = _authentication_event_get_next_page
+    start_dates_by_user = start_dates_by_user or {}
 
-    events: List[AuthenticationEvent] = []
-    for user in users:
-        local_events = user.get_authentication_events(
-            start_time=start_date, end_time=end_date
+    def _request_user_events(user: User) -> List[AuthenticationEvent]:
+        user_start_date: str = max(
+            start_date, start_dates_by_user.get(str(user.id), start_date)
         )
-        events.extend(local_events)
+        return request_user_events(user, user_start_date, end_date)
 
-    # revert monkeypatch
-    PaginatedList._get_next_page = original_get_next_page
+    events: List[AuthenticationEvent] = []
+    for (_, user_events) in fetch_concurrently(
+        users, _request_user_events, get_fetch_workers()
+    ):
+        events.extend(user_events)
 
     return events
 
 
 def authentication_events_synced_as_df(
     auth_events: List[AuthenticationEvent],
-    sync_db: sqlalchemy.engine.base.Engine,
+    sync_db: SyncDb,
 ) -> DataFrame:
     """
     Fetch AuthenticationEvent API data for a range of courses and return a AuthenticationEvent API DataFrame
@@ -117,42 +221,90 @@ def authentication_events_synced_as_df(
     ----------
     auth_events: List[AuthenticationEvent]
         a list of Canvas AuthenticationEvent objects
-    sync_db: sqlalchemy.engine.base.Engine
-        an Engine instance for creating database connections
+    sync_db: SyncDb
+        the sync store, or an Engine instance for creating database connections
 
     Returns
     -------
     DataFrame
         an AuthenticationEvent API DataFrame with the current and previously fetched data
     """
-    auth_events_df: DataFrame = _sync_without_cleanup(to_df(auth_events), sync_db)
+    auth_events_chunks: Iterator[DataFrame] = (
+        to_df(auth_events[i : i + AUTH_EVENTS_SYNC_CHUNK_SIZE])
+        for i in range(0, len(auth_events), AUTH_EVENTS_SYNC_CHUNK_SIZE)
+    )
+    synced_chunks: List[DataFrame] = list(
+        _sync_chunks_without_cleanup(auth_events_chunks, sync_db)
+    )
     cleanup_after_sync(AUTH_EVENTS_RESOURCE_NAME, sync_db)
 
-    return auth_events_df
+    if len(synced_chunks) == 0:
+        return DataFrame()
+    return concat(synced_chunks, ignore_index=True)
 
 
-def _sync_without_cleanup(
-    resource_df: DataFrame, sync_db: sqlalchemy.engine.base.Engine
+def stored_events_as_df(
+    user_ids: Set[str],
+    start_date: str,
+    end_date: str,
+    sync_db: SyncDb,
 ) -> DataFrame:
     """
-    Take fetched API data and sync with database. Creates tables when necessary,
-    but ok if temporary tables are there to start. Doesn't delete temporary tables when finished.
+    Read the AuthenticationEvent API data previously synced for a range of users
+    within a date range, as an AuthenticationEvent API DataFrame. Used when only
+    the events after the last synced event of each user were fetched, so that the
+    output still holds every event in the date range.
 
     Parameters
     ----------
-    resource_df: DataFrame
-        an AuthenticationEvent API DataFrame with the current fetched data which
-        will be mutated, adding Hash and CreateDate/LastModifiedDate
-    sync_db: sqlalchemy.engine.base.Engine
-        an Engine instance for creating database connections
+    user_ids: Set[str]
+        the ids of the users to read the events of
+    start_date: str
+        read events created on or after this date
+    end_date: str
+        read events created on or before this date
+    sync_db: SyncDb
+        the sync store, or an Engine instance for creating database connections
 
     Returns
     -------
     DataFrame
-        a DataFrame with current fetched data and reconciled CreateDate/LastModifiedDate
+        an AuthenticationEvent API DataFrame with CreateDate/LastModifiedDate
+    """
+
+    def _in_range(source_ids: Series) -> Series:
+        events_df: DataFrame = event_user_and_date(source_ids)
+        return (
+            events_df["user_id"].isin(user_ids)
+            & (events_df["created_at"] >= start_date)
+            & (events_df["created_at"] <= end_date)
+        )
+
+    return read_synced_records(AUTH_EVENTS_RESOURCE_NAME, sync_db, _in_range)
+
+
+def _sync_chunks_without_cleanup(
+    resource_chunks: Iterator[DataFrame], sync_db: SyncDb
+) -> Iterator[DataFrame]:
+    """
+    Take fetched API data in chunks and sync with database, so that only one chunk of
+    events is converted to a DataFrame at a time. Creates tables when necessary,
+    but ok if temporary tables are there to start. Doesn't delete temporary tables when finished.
+
+    Parameters
+    ----------
+    resource_chunks: Iterator[DataFrame]
+        AuthenticationEvent API DataFrames with the current fetched data
+    sync_db: SyncDb
+        the sync store, or an Engine instance for creating database connections
+
+    Returns
+    -------
+    Iterator[DataFrame]
+        DataFrames with current fetched data and reconciled CreateDate/LastModifiedDate
     """
-    return sync_to_db_without_cleanup(
-        resource_df=resource_df,
+    return sync_chunks_to_db_without_cleanup(
+        resource_chunks=resource_chunks,
         identity_columns=["id"],
         resource_name=AUTH_EVENTS_RESOURCE_NAME,
         sync_db=sync_db,
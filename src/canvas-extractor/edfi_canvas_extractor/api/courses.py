@@ -6,12 +6,12 @@ import logging
 from typing import List
 
 from pandas import DataFrame
-import sqlalchemy
 from opnieuw import retry
 
 from canvasapi import Canvas
 from canvasapi.account import Account
 from canvasapi.course import Course
+from edfi_lms_extractor_lib.api.sync_store import SyncDb
 from edfi_lms_extractor_lib.api.resource_sync import (
     cleanup_after_sync,
     sync_to_db_without_cleanup,
@@ -57,7 +57,7 @@ def request_courses(canvas: Canvas, start_date: str, end_date: str) -> List[Cour
 
 
 def courses_synced_as_df(
-    courses: List[Course], sync_db: sqlalchemy.engine.base.Engine
+    courses: List[Course], sync_db: SyncDb
 ) -> DataFrame:
     """
     Using Course API data, return a Courses API DataFrame
@@ -66,8 +66,8 @@ def courses_synced_as_df(
     ----------
     courses: List[Course]
         a list of Canvas Course SDK objects
-    sync_db: sqlalchemy.engine.base.Engine
-        an Engine instance for creating database connections
+    sync_db: SyncDb
+        the sync store, or an Engine instance for creating database connections
 
     Returns
     -------
@@ -81,7 +81,7 @@ def courses_synced_as_df(
 
 
 def _sync_without_cleanup(
-    resource_df: DataFrame, sync_db: sqlalchemy.engine.base.Engine
+    resource_df: DataFrame, sync_db: SyncDb
 ) -> DataFrame:
     """
     Take fetched API data and sync with database. Creates tables when necessary,
@@ -92,8 +92,8 @@ def _sync_without_cleanup(
     resource_df: DataFrame
         a Courses API DataFrame with the current fetched data which
         will be mutated, adding Hash and CreateDate/LastModifiedDate
-    sync_db: sqlalchemy.engine.base.Engine
-        an Engine instance for creating database connections
+    sync_db: SyncDb
+        the sync store, or an Engine instance for creating database connections
 
     Returns
     -------
@@ -4,18 +4,19 @@
 # See the LICENSE and NOTICES files in the project root for more information.
 
 import logging
-from typing import List
+from typing import List, Optional
 
 from pandas import DataFrame
-import sqlalchemy
 from opnieuw import retry
 
 from canvasapi.section import Section
 from canvasapi.enrollment import Enrollment
+from edfi_lms_extractor_lib.api.sync_store import SyncDb
 from edfi_lms_extractor_lib.api.resource_sync import (
     cleanup_after_sync,
     sync_to_db_without_cleanup,
 )
+from edfi_lms_extractor_lib.api.sync_session import SyncSession
 from .canvas_helper import to_df
 from edfi_canvas_extractor.config import RETRY_CONFIG
 
@@ -47,7 +48,8 @@ def request_enrollments_for_section(section: Section) -> List[Enrollment]:
 
 def enrollments_synced_as_df(
     enrollments: List[Enrollment],
-    sync_db: sqlalchemy.engine.base.Engine,
+    sync_db: SyncDb,
+    partition_key: Optional[str] = None,
 ) -> DataFrame:
     """
     Fetch Enrollments API data for a range of students and return a Enrollments API DataFrame
@@ -57,22 +59,61 @@ def enrollments_synced_as_df(
     ----------
     enrollments: List[Enrollment]
         a list of Canvas Enrollments objects
-    sync_db: sqlalchemy.engine.base.Engine
-        an Engine instance for creating database connections
+    sync_db: SyncDb
+        the sync store, or an Engine instance for creating database connections
+    partition_key: Optional[str]
+        an optional key, such as a section id, limiting the sync comparison to the
+        records previously synced with the same key
 
     Returns
     -------
     DataFrame
         a Enrollments API DataFrame with the current and previously fetched data
     """
-    enrollments_df: DataFrame = _sync_without_cleanup(to_df(enrollments), sync_db)
+    enrollments_df: DataFrame = _sync_without_cleanup(
+        to_df(enrollments), sync_db, partition_key
+    )
     cleanup_after_sync(ENROLLMENTS_RESOURCE_NAME, sync_db)
 
     return enrollments_df
 
 
+def enrollments_synced_in_session(
+    enrollments: List[Enrollment],
+    session: SyncSession,
+    partition_key: Optional[str] = None,
+) -> DataFrame:
+    """
+    Sync Enrollments API data as part of a SyncSession, which commits and cleans up
+    once for every section synced in the session
+
+    Parameters
+    ----------
+    enrollments: List[Enrollment]
+        a list of Canvas Enrollments objects
+    session: SyncSession
+        an open SyncSession
+    partition_key: Optional[str]
+        an optional key, such as a section id, limiting the sync comparison to the
+        records previously synced with the same key
+
+    Returns
+    -------
+    DataFrame
+        a Enrollments API DataFrame with the current and previously fetched data
+    """
+    return session.sync(
+        resource_df=to_df(enrollments),
+        identity_columns=["id"],
+        resource_name=ENROLLMENTS_RESOURCE_NAME,
+        partition_key=partition_key,
+    )
+
+
 def _sync_without_cleanup(
-    resource_df: DataFrame, sync_db: sqlalchemy.engine.base.Engine
+    resource_df: DataFrame,
+    sync_db: SyncDb,
+    partition_key: Optional[str] = None,
 ) -> DataFrame:
     """
     Take fetched API data and sync with database. Creates tables when necessary,
@@ -83,8 +124,10 @@ def _sync_without_cleanup(
     resource_df: DataFrame
         a Enrollments API DataFrame with the current fetched data which
         will be mutated, adding Hash and CreateDate/LastModifiedDate
-    sync_db: sqlalchemy.engine.base.Engine
-        an Engine instance for creating database connections
+    sync_db: SyncDb
+        the sync store, or an Engine instance for creating database connections
+    partition_key: Optional[str]
+        an optional key limiting the sync comparison to records synced with the same key
 
     Returns
     -------
@@ -96,4 +139,5 @@ def _sync_without_cleanup(
         identity_columns=["id"],
         resource_name=ENROLLMENTS_RESOURCE_NAME,
         sync_db=sync_db,
+        partition_key=partition_key,
     )
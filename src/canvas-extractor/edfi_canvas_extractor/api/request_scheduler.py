@@ -0,0 +1,236 @@
+# SPDX-License-Identifier: Apache-2.0
+# Licensed to the Ed-Fi Alliance under one or more agreements.
+# The Ed-Fi Alliance licenses this file to you under the Apache License, Version 2.0.
+# See the LICENSE and NOTICES files in the project root for more information.
+
+from contextlib import contextmanager
+import logging
+from threading import Condition
+from time import monotonic
+from typing import Callable, Iterator, Optional
+from urllib.parse import urlparse
+
+from canvasapi import Canvas
+from requests import PreparedRequest, Response
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_REMAINING_HEADER = "X-Rate-Limit-Remaining"
+REQUEST_COST_HEADER = "X-Request-Cost"
+RATE_LIMIT_EXCEEDED_CONTENT = b"Rate Limit Exceeded"
+
+# Canvas throttles with a leaky bucket, which refills the rate limit remaining of
+# an access token at about this many units a second
+RATE_LIMIT_REFILL_PER_SECOND = 10.0
+
+# Below this rate limit remaining, net of the expected cost of the requests in
+# flight, the concurrent requests are halved and new requests wait for the
+# bucket to refill. Above the high mark, one more concurrent request is allowed.
+LOW_RATE_LIMIT_REMAINING = 300.0
+HIGH_RATE_LIMIT_REMAINING = 500.0
+
+# The cost of a request expected before any X-Request-Cost is seen, and the
+# weight of each new cost in the running average
+DEFAULT_REQUEST_COST = 1.0
+REQUEST_COST_SMOOTHING = 0.2
+
+
+class RequestScheduler:
+    """
+    Adapts the number of concurrent requests to an API host, and their pace, to
+    the rate limit remaining reported by each response, so that concurrent
+    fetches run as fast as the host allows without being throttled.
+
+    Usage
+    -----
+        with scheduler.slot():
+            response = session.get(url)
+        scheduler.record_response(remaining, cost, throttled=False)
+    """
+
+    def __init__(
+        self, max_concurrency: int, clock: Callable[[], float] = monotonic
+    ):
+        """
+        Parameters
+        ----------
+        max_concurrency: int
+            the most requests made at a time, which is also the starting number
+        clock: Callable[[], float]
+            a monotonic clock, in seconds
+        """
+        assert max_concurrency > 0, "The max concurrency must be positive"
+
+        self._max_concurrency = max_concurrency
+        self._concurrency = max_concurrency
+        self._clock = clock
+        self._condition = Condition()
+        self._in_flight = 0
+        self._request_cost = DEFAULT_REQUEST_COST
+        self._not_before = 0.0
+
+    @property
+    def concurrency(self) -> int:
+        return self._concurrency
+
+    @property
+    def request_cost(self) -> float:
+        return self._request_cost
+
+    def pause_remaining(self) -> float:
+        """
+        Get the seconds left before new requests are allowed to start
+
+        Returns
+        -------
+        float
+            the seconds left, 0 when requests are not paused
+        """
+        return max(0.0, self._not_before - self._clock())
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """
+        Block until a request is allowed, then hold one of the concurrent requests
+        for the with block
+        """
+        with self._condition:
+            while True:
+                pause: float = self.pause_remaining()
+                if pause <= 0 and self._in_flight < self._concurrency:
+                    break
+                self._condition.wait(timeout=pause if pause > 0 else None)
+            self._in_flight += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._in_flight -= 1
+                self._condition.notify_all()
+
+    def record_response(
+        self,
+        remaining: Optional[float],
+        cost: Optional[float],
+        throttled: bool = False,
+    ):
+        """
+        Adjust the concurrency and pace of requests to the rate limit reported by a
+        response
+
+        Parameters
+        ----------
+        remaining: Optional[float]
+            the X-Rate-Limit-Remaining of the response, if any
+        cost: Optional[float]
+            the X-Request-Cost of the response, if any
+        throttled: bool
+            whether the request was refused for exceeding the rate limit
+        """
+        with self._condition:
+            if cost is not None:
+                self._request_cost += REQUEST_COST_SMOOTHING * (cost - self._request_cost)
+
+            if throttled:
+                self._concurrency = 1
+                self._pause_until_refilled(remaining or 0.0)
+                logger.warning(
+                    "Canvas API rate limit exceeded - pausing requests for %.1f seconds",
+                    self.pause_remaining(),
+                )
+            elif remaining is not None:
+                # the requests still in flight will draw on the remaining rate limit too
+                expected_remaining: float = remaining - self._in_flight * self._request_cost
+                if expected_remaining < LOW_RATE_LIMIT_REMAINING:
+                    self._concurrency = max(1, self._concurrency // 2)
+                    self._pause_until_refilled(expected_remaining)
+                    logger.debug(
+                        "Canvas API rate limit remaining %.0f - %d concurrent requests, paused for %.1f seconds",
+                        remaining,
+                        self._concurrency,
+                        self.pause_remaining(),
+                    )
+                elif (
+                    expected_remaining > HIGH_RATE_LIMIT_REMAINING
+                    and self._concurrency < self._max_concurrency
+                ):
+                    self._concurrency += 1
+
+            self._condition.notify_all()
+
+    def _pause_until_refilled(self, remaining: float):
+        """
+        Pause new requests until the rate limit remaining refills to the low mark
+        """
+        self._not_before = max(
+            self._not_before,
+            self._clock()
+            + (LOW_RATE_LIMIT_REMAINING - remaining) / RATE_LIMIT_REFILL_PER_SECOND,
+        )
+
+
+def _header_value(headers: CaseInsensitiveDict, name: str) -> Optional[float]:
+    try:
+        return float(headers[name])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class SchedulingAdapter(HTTPAdapter):
+    """
+    A requests transport adapter sending each request through a RequestScheduler,
+    which is told the rate limit reported by each response
+    """
+
+    def __init__(self, scheduler: RequestScheduler):
+        """
+        Parameters
+        ----------
+        scheduler: RequestScheduler
+            the scheduler of the requests sent by this adapter
+        """
+        super().__init__()
+        self._scheduler = scheduler
+
+    def send(self, request: PreparedRequest, *args, **kwargs) -> Response:
+        with self._scheduler.slot():
+            response: Response = super().send(request, *args, **kwargs)
+
+        self._scheduler.record_response(
+            _header_value(response.headers, RATE_LIMIT_REMAINING_HEADER),
+            _header_value(response.headers, REQUEST_COST_HEADER),
+            throttled=response.status_code == 403
+            and RATE_LIMIT_EXCEEDED_CONTENT in response.content,
+        )
+        return response
+
+
+def schedule_requests(canvas: Canvas, max_concurrency: int) -> RequestScheduler:
+    """
+    Send every request of a Canvas API object, and of the API objects it returns,
+    through a RequestScheduler adapting to the Canvas rate limit
+
+    Parameters
+    ----------
+    canvas: Canvas
+        a Canvas API object
+    max_concurrency: int
+        the most requests made at a time
+
+    Returns
+    -------
+    RequestScheduler
+        the scheduler of the requests
+    """
+    # canvasapi keeps no public reference to the Requester, which every API
+    # object fetched through the Canvas object shares
+    requester = canvas._Canvas__requester  # type: ignore
+    base_url = urlparse(requester.base_url)
+
+    scheduler = RequestScheduler(max_concurrency)
+    requester._session.mount(
+        f"{base_url.scheme}://{base_url.netloc}/", SchedulingAdapter(scheduler)
+    )
+    return scheduler
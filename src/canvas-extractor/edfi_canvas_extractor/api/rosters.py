@@ -0,0 +1,77 @@
+# SPDX-License-Identifier: Apache-2.0
+# Licensed to the Ed-Fi Alliance under one or more agreements.
+# The Ed-Fi Alliance licenses this file to you under the Apache License, Version 2.0.
+# See the LICENSE and NOTICES files in the project root for more information.
+
+import logging
+from typing import Dict, Iterable, List, Tuple
+
+from opnieuw import retry
+
+from canvasapi.course import Course
+from canvasapi.enrollment import Enrollment
+from canvasapi.user import User
+from .canvas_helper import remove_duplicates
+from edfi_canvas_extractor.config import RETRY_CONFIG
+
+
+STUDENT_ENROLLMENT_TYPE = "StudentEnrollment"
+
+logger = logging.getLogger(__name__)
+
+
+@retry(**RETRY_CONFIG)  # type: ignore
+def request_course_roster(course: Course) -> List[User]:
+    """
+    Fetch every user of a course, of every enrollment type, with their enrollments
+    in the course embedded, and return a list of User API objects. One roster
+    holds both the students of the course and the enrollments of its sections.
+
+    Parameters
+    ----------
+    course: Course
+        a Canvas Course object
+
+    Returns
+    -------
+    List[User]
+        a list of User API objects, each with an enrollments list of dicts
+    """
+    return list(course.get_users(include=["enrollments"]))
+
+
+def split_rosters(
+    rosters: Iterable[List[User]],
+) -> Tuple[List[User], Dict[int, List[Enrollment]]]:
+    """
+    Split course rosters into the students and the section enrollments which are
+    otherwise requested separately, per course and per section
+
+    Parameters
+    ----------
+    rosters: Iterable[List[User]]
+        the roster of each course, see request_course_roster
+
+    Returns
+    -------
+    Tuple[List[User], Dict[int, List[Enrollment]]]
+        the students, without the embedded enrollments and without duplicates, and
+        the Enrollment API objects by section id
+    """
+    students: List[User] = []
+    enrollments_by_section: Dict[int, List[Enrollment]] = {}
+    for roster in rosters:
+        for user in roster:
+            user_enrollments: List[dict] = vars(user).pop("enrollments", None) or []
+            for enrollment in user_enrollments:
+                enrollments_by_section.setdefault(
+                    enrollment["course_section_id"], []
+                ).append(Enrollment(user._requester, enrollment))
+
+            if any(
+                enrollment["type"] == STUDENT_ENROLLMENT_TYPE
+                for enrollment in user_enrollments
+            ):
+                students.append(user)
+
+    return (remove_duplicates(students, "id"), enrollments_by_section)
@@ -7,11 +7,11 @@ import logging
 from typing import List
 
 from pandas import DataFrame
-import sqlalchemy
 from opnieuw import retry
 
 from canvasapi.course import Course
 from canvasapi.section import Section
+from edfi_lms_extractor_lib.api.sync_store import SyncDb
 from edfi_lms_extractor_lib.api.resource_sync import (
     cleanup_after_sync,
     sync_to_db_without_cleanup,
@@ -51,7 +51,7 @@ def request_sections(courses: List[Course]) -> List[Section]:
 
 def sections_synced_as_df(
     sections: List[Section],
-    sync_db: sqlalchemy.engine.base.Engine,
+    sync_db: SyncDb,
 ) -> DataFrame:
     """
     Fetch Sections API data for a range of courses and return a Sections API DataFrame
@@ -61,8 +61,8 @@ def sections_synced_as_df(
     ----------
     sections: List[Section]
         a list of Canvas Sections objects
-    sync_db: sqlalchemy.engine.base.Engine
-        an Engine instance for creating database connections
+    sync_db: SyncDb
+        the sync store, or an Engine instance for creating database connections
 
     Returns
     -------
@@ -77,7 +77,7 @@ def sections_synced_as_df(
 
 
 def _sync_without_cleanup(
-    resource_df: DataFrame, sync_db: sqlalchemy.engine.base.Engine
+    resource_df: DataFrame, sync_db: SyncDb
 ) -> DataFrame:
     """
     Take fetched API data and sync with database. Creates tables when necessary,
@@ -88,8 +88,8 @@ def _sync_without_cleanup(
     resource_df: DataFrame
         a Sections API DataFrame with the current fetched data which
         will be mutated, adding Hash and CreateDate/LastModifiedDate
-    sync_db: sqlalchemy.engine.base.Engine
-        an Engine instance for creating database connections
+    sync_db: SyncDb
+        the sync store, or an Engine instance for creating database connections
 
     Returns
     -------
@@ -7,11 +7,11 @@ import logging
 from typing import List
 
 from pandas import DataFrame
-import sqlalchemy
 from opnieuw import retry
 
 from canvasapi.course import Course
 from canvasapi.user import User
+from edfi_lms_extractor_lib.api.sync_store import SyncDb
 from edfi_lms_extractor_lib.api.resource_sync import (
     cleanup_after_sync,
     sync_to_db_without_cleanup,
@@ -51,7 +51,7 @@ def request_students(courses: List[Course]) -> List[User]:
 
 def students_synced_as_df(
     students: List[User],
-    sync_db: sqlalchemy.engine.base.Engine,
+    sync_db: SyncDb,
 ) -> DataFrame:
     """
     Fetch Students API data for a range of courses and return a Students API DataFrame
@@ -61,8 +61,8 @@ def students_synced_as_df(
     ----------
     students: List[User]
         a list of Canvas Users objects
-    sync_db: sqlalchemy.engine.base.Engine
-        an Engine instance for creating database connections
+    sync_db: SyncDb
+        the sync store, or an Engine instance for creating database connections
 
     Returns
     -------
@@ -76,7 +76,7 @@ def students_synced_as_df(
 
 
 def _sync_without_cleanup(
-    resource_df: DataFrame, sync_db: sqlalchemy.engine.base.Engine
+    resource_df: DataFrame, sync_db: SyncDb
 ) -> DataFrame:
     """
     Take fetched API data and sync with database. Creates tables when necessary,
@@ -87,8 +87,8 @@ def _sync_without_cleanup(
     resource_df: DataFrame
         a Students API DataFrame with the current fetched data which
         will be mutated, adding Hash and CreateDate/LastModifiedDate
-    sync_db: sqlalchemy.engine.base.Engine
-        an Engine instance for creating database connections
+    sync_db: SyncDb
+        the sync store, or an Engine instance for creating database connections
 
     Returns
     -------
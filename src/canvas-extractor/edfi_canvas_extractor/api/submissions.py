@@ -4,24 +4,31 @@
 # See the LICENSE and NOTICES files in the project root for more information.
 
 import logging
-from typing import List
+from typing import List, Optional, Tuple, Union
 
 from pandas import DataFrame
-import sqlalchemy
 from opnieuw import retry
 
+from canvasapi.course import Course
 from canvasapi.section import Section
 from canvasapi.submission import Submission
+from edfi_lms_extractor_lib.api.sync_store import SyncDb
 from edfi_lms_extractor_lib.api.resource_sync import (
     cleanup_after_sync,
     sync_to_db_without_cleanup,
 )
-from .canvas_helper import to_df
+from edfi_lms_extractor_lib.api.sync_session import SyncSession
+from .canvas_helper import remove_duplicates, to_df
 from edfi_canvas_extractor.config import RETRY_CONFIG
 
 
 SUBMISSIONS_RESOURCE_NAME = "Submissions"
 
+# submissions synced by section, which are keyed by section and submission id, as
+# a submission can belong to more than one section, e.g. of a cross-listed course
+SECTION_SUBMISSIONS_RESOURCE_NAME = "Section_Submissions"
+SECTION_ID_COLUMN = "section_id"
+
 logger = logging.getLogger(__name__)
 
 
@@ -43,9 +50,64 @@ def request_submissions(section: Section) -> List[Submission]:
     return section.get_multiple_submissions(student_ids="all")
 
 
+@retry(**RETRY_CONFIG)  # type: ignore
+def request_course_submissions(course: Course) -> List[Submission]:
+    """
+    Fetch Submissions API data for every assignment and student of a course, once
+    for all of its sections, and return a list of submissions as Submission API objects
+
+    Parameters
+    ----------
+    course: Course
+        a Canvas Course object
+
+    Returns
+    -------
+    List[Submission]
+        a list of Submission API objects
+    """
+    return course.get_multiple_submissions(student_ids="all")
+
+
+@retry(**RETRY_CONFIG)  # type: ignore
+def request_submissions_since(
+    section_or_course: Union[Section, Course], since: str
+) -> List[Submission]:
+    """
+    Fetch the Submissions API data of a section or course which was submitted or
+    graded since a date time, and return a list of submissions as Submission API
+    objects. The submitted_since and graded_since filters narrow each other when
+    combined, so each is requested separately.
+
+    Parameters
+    ----------
+    section_or_course: Union[Section, Course]
+        a Canvas Section or Course object
+    since: str
+        an ISO 8601 date time, e.g. 2021-03-01T11:50:00Z
+
+    Returns
+    -------
+    List[Submission]
+        a list of Submission API objects, without duplicates
+    """
+    return remove_duplicates(
+        [
+            *section_or_course.get_multiple_submissions(
+                student_ids="all", submitted_since=since
+            ),
+            *section_or_course.get_multiple_submissions(
+                student_ids="all", graded_since=since
+            ),
+        ],
+        "id",
+    )
+
+
 def submissions_synced_as_df(
     submissions: List[Submission],
-    sync_db: sqlalchemy.engine.base.Engine,
+    sync_db: SyncDb,
+    partition_key: Optional[str] = None,
 ) -> DataFrame:
     """
     Fetch Submissions API data for a range of assignments and return a Submissions API DataFrame
@@ -55,22 +117,93 @@ def submissions_synced_as_df(
     ----------
     submissions: List[Submission]
         a list of Canvas Submissions objects
-    sync_db: sqlalchemy.engine.base.Engine
-        an Engine instance for creating database connections
+    sync_db: SyncDb
+        the sync store, or an Engine instance for creating database connections
+    partition_key: Optional[str]
+        an optional section id, limiting the sync comparison to the records
+        previously synced for the section, see _sync_keys
 
     Returns
     -------
     DataFrame
         a Submissions API DataFrame with the current and previously fetched data
     """
-    submissions_df: DataFrame = _sync_without_cleanup(to_df(submissions), sync_db)
-    cleanup_after_sync(SUBMISSIONS_RESOURCE_NAME, sync_db)
+    submissions_df: DataFrame = _sync_without_cleanup(
+        to_df(submissions), sync_db, partition_key
+    )
+    cleanup_after_sync(_sync_keys(partition_key)[0], sync_db)
 
     return submissions_df
 
 
+def submissions_synced_in_session(
+    submissions: List[Submission],
+    session: SyncSession,
+    partition_key: Optional[str] = None,
+) -> DataFrame:
+    """
+    Sync Submissions API data as part of a SyncSession, which commits and cleans up
+    once for every section synced in the session
+
+    Parameters
+    ----------
+    submissions: List[Submission]
+        a list of Canvas Submissions objects
+    session: SyncSession
+        an open SyncSession
+    partition_key: Optional[str]
+        an optional section id, limiting the sync comparison to the records
+        previously synced for the section, see _sync_keys
+
+    Returns
+    -------
+    DataFrame
+        a Submissions API DataFrame with the current and previously fetched data
+    """
+    (resource_name, identity_columns) = _sync_keys(partition_key)
+    return session.sync(
+        resource_df=_with_section_id(to_df(submissions), partition_key),
+        identity_columns=identity_columns,
+        resource_name=resource_name,
+        partition_key=partition_key,
+    )
+
+
+def _sync_keys(partition_key: Optional[str]) -> Tuple[str, List[str]]:
+    """
+    The resource name and identity columns submissions are synced with. Submissions
+    synced by section are stored once for each section they belong to, rather than
+    moving between the sections, so that each section's stored submissions are
+    complete.
+
+    Parameters
+    ----------
+    partition_key: Optional[str]
+        the section id the submissions were fetched for, if any
+
+    Returns
+    -------
+    Tuple[str, List[str]]
+        the resource name and identity columns
+    """
+    if partition_key is None:
+        return (SUBMISSIONS_RESOURCE_NAME, ["id"])
+    return (SECTION_SUBMISSIONS_RESOURCE_NAME, ["id", SECTION_ID_COLUMN])
+
+
+def _with_section_id(resource_df: DataFrame, partition_key: Optional[str]) -> DataFrame:
+    """
+    Add the SECTION_ID_COLUMN to submissions synced by section, see _sync_keys
+    """
+    if partition_key is not None:
+        resource_df[SECTION_ID_COLUMN] = partition_key
+    return resource_df
+
+
 def _sync_without_cleanup(
-    resource_df: DataFrame, sync_db: sqlalchemy.engine.base.Engine
+    resource_df: DataFrame,
+    sync_db: SyncDb,
+    partition_key: Optional[str] = None,
 ) -> DataFrame:
     """
     Take fetched API data and sync with database. Creates tables when necessary,
@@ -81,17 +214,22 @@ def _sync_without_cleanup(
     resource_df: DataFrame
         a Submissions API DataFrame with the current fetched data which
         will be mutated, adding Hash and CreateDate/LastModifiedDate
-    sync_db: sqlalchemy.engine.base.Engine
-        an Engine instance for creating database connections
+    sync_db: SyncDb
+        the sync store, or an Engine instance for creating database connections
+    partition_key: Optional[str]
+        an optional key limiting the sync comparison to records synced with the same key,
+        and keying the records by section as well, see _sync_keys
 
     Returns
     -------
     DataFrame
         a DataFrame with current fetched data and reconciled CreateDate/LastModifiedDate
     """
+    (resource_name, identity_columns) = _sync_keys(partition_key)
     return sync_to_db_without_cleanup(
-        resource_df=resource_df,
-        identity_columns=["id"],
-        resource_name=SUBMISSIONS_RESOURCE_NAME,
+        resource_df=_with_section_id(resource_df, partition_key),
+        identity_columns=identity_columns,
+        resource_name=resource_name,
         sync_db=sync_db,
+        partition_key=partition_key,
     )
@@ -3,19 +3,30 @@
 # The Ed-Fi Alliance licenses this file to you under the Apache License, Version 2.0.
 # See the LICENSE and NOTICES files in the project root for more information.
 
-from typing import Dict, List, Tuple
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from datetime import datetime, timezone
 import logging
+from urllib.parse import urlparse
 from canvasapi import Canvas
 from canvasapi.authentication_event import AuthenticationEvent
+from canvasapi.canvas_object import CanvasObject
 from canvasapi.enrollment import Enrollment
-import sqlalchemy
 from canvasapi.course import Course
 from canvasapi.section import Section
 from canvasapi.user import User
 from canvasapi.assignment import Assignment
 from canvasapi.submission import Submission
-from pandas import DataFrame
+from pandas import DataFrame, concat
 
+from edfi_lms_extractor_lib.api.sync_store import SyncDb
+from edfi_lms_extractor_lib.api.fetch_pool import (
+    fetch_concurrently,
+    get_fetch_workers,
+    get_host_limiter,
+)
+from edfi_lms_extractor_lib.api.sync_payload import PAYLOAD_MODES, get_payload_mode
+from edfi_lms_extractor_lib.api.sync_session import SyncSession
+from edfi_lms_extractor_lib.api.sync_watermarks import watermark_for_fetch_started_at
 from edfi_canvas_extractor.api import (
     courses as coursesApi,
     sections as sectionsApi,
@@ -24,6 +35,7 @@ from edfi_canvas_extractor.api import (
     submissions as submissionsApi,
     enrollments as enrollmentsApi,
     authentication_events as authEventsApi,
+    rosters as rostersApi,
 )
 from edfi_canvas_extractor.mapping import (
     sections as sectionsMap,
@@ -42,7 +54,7 @@ def extract_courses(
     canvas: Canvas,
     start_date: str,
     end_date: str,
-    sync_db: sqlalchemy.engine.base.Engine,
+    sync_db: SyncDb,
 ) -> Tuple[List[Course], DataFrame]:
     """
     Gets all Canvas courses for the given date range, in the Ed-Fi UDM format.
@@ -55,7 +67,7 @@ def extract_courses(
         Retrieve Courses starting on or after this date.
     end_date:
         Retrieve Courses ending on or before this date.
-    sync_db: sqlalchemy.engine.base.Engine
+    sync_db: SyncDb
         Sync database connection.
 
     Returns
@@ -70,7 +82,7 @@ def extract_courses(
 
 
 def extract_sections(
-    courses: List[Course], sync_db: sqlalchemy.engine.base.Engine
+    courses: List[Course], sync_db: SyncDb
 ) -> Tuple[List[Section], DataFrame, List[str]]:
     """
     Gets all Canvas sections, in the Ed-Fi UDM format.
@@ -79,7 +91,7 @@ def extract_sections(
     ----------
     courses: List[Course]
         A list of Canvas Course objects.
-    sync_db: sqlalchemy.engine.base.Engine
+    sync_db: SyncDb
         Sync database connection.
 
     Returns
@@ -95,8 +107,48 @@ def extract_sections(
     return (sections, udm_sections_df, section_ids)
 
 
+def _request_course_roster(course: Course) -> List[User]:
+    """
+    Fetch the roster of a course, within the per-host request limit. Called from
+    the fetch threads.
+    """
+    with get_host_limiter().limit(_api_host(course)):
+        return rostersApi.request_course_roster(course)
+
+
+def extract_rosters(
+    courses: List[Course],
+) -> Tuple[List[User], Dict[int, List[Enrollment]]]:
+    """
+    Gets the students and section enrollments of all Canvas courses with one
+    request per course, rather than one per course for the students and one per
+    section for the enrollments. Courses are fetched concurrently on the fetch
+    workers.
+
+    Parameters
+    ----------
+    courses: List[Course]
+        A list of Canvas Course objects.
+
+    Returns
+    -------
+    Tuple[List[User], Dict[int, List[Enrollment]]]
+        A tuple with the list of Canvas User objects of the students, for
+        extract_students, and the Canvas Enrollment objects by section id, for
+        extract_enrollments.
+    """
+    return rostersApi.split_rosters(
+        roster
+        for (_, roster) in fetch_concurrently(
+            courses, _request_course_roster, get_fetch_workers()
+        )
+    )
+
+
 def extract_students(
-    courses: List[Course], sync_db: sqlalchemy.engine.base.Engine
+    courses: List[Course],
+    sync_db: SyncDb,
+    students: Optional[List[User]] = None,
 ) -> Tuple[List[User], DataFrame]:
     """
     Gets all Canvas students, in the Ed-Fi UDM format.
@@ -105,15 +157,19 @@ def extract_students(
     ----------
     courses: List[Course]
         A list of Canvas Course objects.
-    sync_db: sqlalchemy.engine.base.Engine
+    sync_db: SyncDb
         Sync database connection.
+    students: Optional[List[User]]
+        The students already fetched with extract_rosters, if any, in place of
+        requesting the students of each course.
 
     Returns
     -------
     Tuple[List[User], DataFrame]
         A tuple with the list of Canvas User objects and the udm_users dataframe.
     """
-    students: List[User] = studentsApi.request_students(courses)
+    if students is None:
+        students = studentsApi.request_students(courses)
     students_df: DataFrame = studentsApi.students_synced_as_df(students, sync_db)
     udm_students_df: DataFrame = usersMap.map_to_udm_users(students_df)
 
@@ -123,7 +179,7 @@ def extract_students(
 def extract_assignments(
     courses: List[Course],
     sections_df: DataFrame,
-    sync_db: sqlalchemy.engine.base.Engine,
+    sync_db: SyncDb,
 ) -> Tuple[List[Assignment], Dict[str, DataFrame]]:
     """
     Gets all Canvas assignments, in the Ed-Fi UDM format.
@@ -134,7 +190,7 @@ def extract_assignments(
         A list of Canvas Course objects.
     sections_df: DataFrame
         A DataFrame of Canvas Section objects.
-    sync_db: sqlalchemy.engine.base.Engine
+    sync_db: SyncDb
         Sync database connection.
 
     Returns
@@ -156,101 +212,416 @@ def extract_assignments(
     return (assignments, udm_assignments_dfs)
 
 
+def _api_host(canvas_object: CanvasObject) -> str:
+    """
+    The host of the Canvas API an object, such as a section, was fetched from
+    """
+    return urlparse(canvas_object._requester.base_url).netloc
+
+
+def _request_section_submissions(section: Section) -> List[Submission]:
+    """
+    Fetch every page of the submissions of a section, within the per-host
+    request limit. Called from the fetch threads.
+    """
+    with get_host_limiter().limit(_api_host(section)):
+        return list(submissionsApi.request_submissions(section))
+
+
+def _request_section_enrollments(section: Section) -> List[Enrollment]:
+    """
+    Fetch every page of the enrollments of a section, within the per-host
+    request limit. Called from the fetch threads.
+    """
+    with get_host_limiter().limit(_api_host(section)):
+        return list(enrollmentsApi.request_enrollments_for_section(section))
+
+
+def _request_course_submissions(course: Course) -> List[Submission]:
+    """
+    Fetch every page of the submissions of a course, within the per-host
+    request limit. Called from the fetch threads.
+    """
+    with get_host_limiter().limit(_api_host(course)):
+        return list(submissionsApi.request_course_submissions(course))
+
+
+def _request_section_submissions_since(
+    section_and_since: Tuple[Section, Optional[str]]
+) -> List[Submission]:
+    """
+    Fetch every page of the submissions of a section submitted or graded since a
+    watermark, or every submission without one, within the per-host request
+    limit. Called from the fetch threads.
+    """
+    (section, since) = section_and_since
+    if since is None:
+        return _request_section_submissions(section)
+
+    with get_host_limiter().limit(_api_host(section)):
+        return submissionsApi.request_submissions_since(section, since)
+
+
+def _request_course_submissions_since(
+    course_and_since: Tuple[Course, Optional[str]]
+) -> List[Submission]:
+    """
+    Fetch every page of the submissions of a course submitted or graded since a
+    watermark, or every submission without one, within the per-host request
+    limit. Called from the fetch threads.
+    """
+    (course, since) = course_and_since
+    if since is None:
+        return _request_course_submissions(course)
+
+    with get_host_limiter().limit(_api_host(course)):
+        return submissionsApi.request_submissions_since(course, since)
+
+
+def _map_section_submissions(
+    section_id: str, submissions_for_section_df: DataFrame
+) -> Iterator[Tuple[Tuple[str, str], DataFrame]]:
+    """
+    Map the synced submissions of a section to UDM submissions by assignment
+    """
+    for assignment_id, submissions_df in submissions_for_section_df.groupby(
+        "assignment_id"
+    ):
+        yield (
+            (section_id, str(assignment_id)),
+            submissionsMap.map_to_udm_submissions(submissions_df, section_id),
+        )
+
+
+def _sync_section_submissions(
+    section_id: str, submissions: List[Submission], session: SyncSession
+) -> Iterator[Tuple[Tuple[str, str], DataFrame]]:
+    """
+    Sync the submissions of a section, then map them to UDM submissions by assignment
+    """
+    if len(submissions) < 1:
+        logger.info(
+            "Skipping submissions for section id %s - No data returned by API",
+            section_id,
+        )
+        return
+    submissions_for_section_df: DataFrame = submissionsApi.submissions_synced_in_session(
+        submissions, session, partition_key=section_id
+    )
+
+    yield from _map_section_submissions(section_id, submissions_for_section_df)
+
+
+def _sync_changed_section_submissions(
+    section_id: str,
+    changed_submissions: List[Submission],
+    section_users: Optional[Set[int]],
+    session: SyncSession,
+) -> Iterator[Tuple[Tuple[str, str], DataFrame]]:
+    """
+    Sync the submissions of a section changed since its watermark, then map every
+    stored submission of the section, changed or not, to UDM submissions by
+    assignment. The stored submissions of users no longer enrolled in the section
+    are left out, as they are no longer fetched.
+    """
+    if len(changed_submissions) > 0:
+        submissionsApi.submissions_synced_in_session(
+            changed_submissions, session, partition_key=section_id
+        )
+
+    submissions_for_section_df: DataFrame = session.read_stored_records(
+        submissionsApi.SECTION_SUBMISSIONS_RESOURCE_NAME, section_id
+    )
+    if section_users is not None and not submissions_for_section_df.empty:
+        submissions_for_section_df = submissions_for_section_df[
+            submissions_for_section_df["user_id"]
+            .astype(str)
+            .isin({str(user_id) for user_id in section_users})
+        ]
+    if submissions_for_section_df.empty:
+        logger.info(
+            "Skipping submissions for section id %s - No data returned by API",
+            section_id,
+        )
+        return
+
+    yield from _map_section_submissions(section_id, submissions_for_section_df)
+
+
+def _sync_submissions_since(
+    section_id: str,
+    submissions: List[Submission],
+    since: Optional[str],
+    section_users: Optional[Set[int]],
+    session: SyncSession,
+) -> Iterator[Tuple[Tuple[str, str], DataFrame]]:
+    """
+    Sync the submissions of a section fetched since a watermark, or all of them
+    without one, and map them to UDM submissions by assignment. The users enrolled
+    in the section, if known, limit the stored submissions merged with those fetched.
+    """
+    if since is None:
+        return _sync_section_submissions(section_id, submissions, session)
+    return _sync_changed_section_submissions(
+        section_id, submissions, section_users, session
+    )
+
+
+def _users_by_section(enrollments: List[Enrollment]) -> Dict[int, Set[int]]:
+    """
+    The ids of the users enrolled in each section, by section id
+    """
+    users_by_section: Dict[int, Set[int]] = {}
+    for enrollment in enrollments:
+        users_by_section.setdefault(enrollment.course_section_id, set()).add(
+            enrollment.user_id
+        )
+    return users_by_section
+
+
+def _incremental_submissions_available(
+    sync_db: SyncDb, incremental: bool
+) -> bool:
+    """
+    Whether submissions can be fetched incrementally, which reads the unchanged
+    submissions back from their stored Json
+    """
+    if incremental and get_payload_mode(sync_db) == PAYLOAD_MODES.HASH_ONLY:
+        logger.warning(
+            "Requesting every submission - Incremental submissions need the sync "
+            "database to store Json payloads"
+        )
+        return False
+    return incremental
+
+
+def _incremental_authentication_events_available(
+    sync_db: SyncDb, incremental: bool
+) -> bool:
+    """
+    Whether authentication events can be fetched incrementally, which reads the
+    events synced by earlier runs back from their stored Json
+    """
+    if incremental and get_payload_mode(sync_db) == PAYLOAD_MODES.HASH_ONLY:
+        logger.warning(
+            "Requesting every authentication event - Incremental authentication "
+            "events need the sync database to store Json payloads"
+        )
+        return False
+    return incremental
+
+
 def extract_submissions(
     sections: List[Section],
-    sync_db: sqlalchemy.engine.base.Engine,
-) -> Dict[Tuple[str, str], DataFrame]:
+    sync_db: SyncDb,
+    incremental: bool = False,
+    enrollments: Optional[List[Enrollment]] = None,
+) -> Iterator[Tuple[Tuple[str, str], DataFrame]]:
     """
-    Gets all Canvas submissions for sections, in the Ed-Fi UDM format.
+    Gets all Canvas submissions for sections, in the Ed-Fi UDM format, one
+    section at a time, so that each can be written as soon as it is fetched.
+    Sections are fetched concurrently on the fetch workers, while the sync of
+    each section stays serial. The sync is committed once every section has
+    been read, with a watermark for each section.
 
     Parameters
     ----------
     sections: List[Section]
         A List of Canvas Section objects.
-    sync_db: sqlalchemy.engine.base.Engine
+    sync_db: SyncDb
         Sync database connection.
+    incremental: bool
+        Whether to only request the submissions of a section submitted or graded
+        since its watermark, merged with the unchanged submissions already synced.
+    enrollments: Optional[List[Enrollment]]
+        The Canvas Enrollment objects of the sections, if known, so that only the
+        unchanged submissions of the users still enrolled in a section are merged.
 
     Returns
     -------
-    Dict[Tuple[str, str], DataFrame]
-        A dict with (section_id, assignment_id) as key and udm_submissions
-        as value.
+    Iterator[Tuple[Tuple[str, str], DataFrame]]
+        (section_id, assignment_id) and udm_submissions pairs.
     """
-    export: Dict[Tuple[str, str], DataFrame] = {}
-    for section in sections:
-        submissions: List[Submission] = submissionsApi.request_submissions(section)
-        if len(list(submissions)) < 1:
-            logger.info(
-                "Skipping submissions for section id %s - No data returned by API",
-                section.id,
+    watermark: str = watermark_for_fetch_started_at(datetime.now(timezone.utc))
+    incremental = _incremental_submissions_available(sync_db, incremental)
+    users_by_section: Optional[Dict[int, Set[int]]] = (
+        None if enrollments is None else _users_by_section(enrollments)
+    )
+
+    with SyncSession(sync_db) as session:
+        watermarks: Dict[str, str] = (
+            session.read_watermarks(submissionsApi.SECTION_SUBMISSIONS_RESOURCE_NAME)
+            if incremental
+            else {}
+        )
+        for (section, since), submissions in fetch_concurrently(
+            [(section, watermarks.get(str(section.id))) for section in sections],
+            _request_section_submissions_since,
+            get_fetch_workers(),
+        ):
+            section_id: str = str(section.id)
+            yield from _sync_submissions_since(
+                section_id,
+                submissions,
+                since,
+                None if users_by_section is None else users_by_section.get(section.id, set()),
+                session,
             )
-            continue
-        submissions_for_section_df: DataFrame = submissionsApi.submissions_synced_as_df(
-            submissions, sync_db
+            session.set_watermark(
+                submissionsApi.SECTION_SUBMISSIONS_RESOURCE_NAME, watermark, section_id
+            )
+
+
+def extract_submissions_by_course(
+    courses: List[Course],
+    sections: List[Section],
+    enrollments: List[Enrollment],
+    sync_db: SyncDb,
+    incremental: bool = False,
+) -> Iterator[Tuple[Tuple[str, str], DataFrame]]:
+    """
+    Gets all Canvas submissions for sections, in the Ed-Fi UDM format, like
+    extract_submissions, but requesting the submissions of each course once
+    rather than once per section. The submissions of a course are split into
+    its sections by the section enrollments of each user, so that the sync and
+    the files written are the same as fetching each section. The submissions of a
+    user enrolled in more than one section are synced for each of the sections. An incremental
+    course request starts from the earliest watermark of its sections.
+
+    Parameters
+    ----------
+    courses: List[Course]
+        A list of Canvas Course objects.
+    sections: List[Section]
+        A List of Canvas Section objects.
+    enrollments: List[Enrollment]
+        The Canvas Enrollment objects of the sections.
+    sync_db: SyncDb
+        Sync database connection.
+    incremental: bool
+        Whether to only request the submissions of a course submitted or graded
+        since the watermarks of its sections, merged with the unchanged
+        submissions already synced.
+
+    Returns
+    -------
+    Iterator[Tuple[Tuple[str, str], DataFrame]]
+        (section_id, assignment_id) and udm_submissions pairs.
+    """
+    watermark: str = watermark_for_fetch_started_at(datetime.now(timezone.utc))
+    incremental = _incremental_submissions_available(sync_db, incremental)
+
+    sections_by_course: Dict[int, List[Section]] = {}
+    for section in sections:
+        sections_by_course.setdefault(section.course_id, []).append(section)
+
+    users_by_section: Dict[int, Set[int]] = _users_by_section(enrollments)
+
+    with SyncSession(sync_db) as session:
+        watermarks: Dict[str, str] = (
+            session.read_watermarks(submissionsApi.SECTION_SUBMISSIONS_RESOURCE_NAME)
+            if incremental
+            else {}
         )
-        submissions_dfs_by_assignment_id = {
-            assignment_id: submissions_for_section_df.loc[submissions_df]
-            for assignment_id, submissions_df in submissions_for_section_df.groupby(
-                "assignment_id"
-            ).groups.items()
-        }
 
-        for assignment_id, submissions_df in submissions_dfs_by_assignment_id.items():
-            section_id = str(section.id)
-            submissions_df = submissionsMap.map_to_udm_submissions(submissions_df, section_id)
-            export[(section_id, str(assignment_id))] = submissions_df
-    return export
+        def _course_since(course: Course) -> Optional[str]:
+            section_watermarks: List[Optional[str]] = [
+                watermarks.get(str(section.id)) for section in sections_by_course[course.id]
+            ]
+            if None in section_watermarks:
+                return None
+            return min(section_watermarks)  # type: ignore
+
+        for (course, since), submissions in fetch_concurrently(
+            [
+                (course, _course_since(course))
+                for course in courses
+                if course.id in sections_by_course
+            ],
+            _request_course_submissions_since,
+            get_fetch_workers(),
+        ):
+            for section in sections_by_course[course.id]:
+                section_id: str = str(section.id)
+                section_users: Set[int] = users_by_section.get(section.id, set())
+                yield from _sync_submissions_since(
+                    section_id,
+                    [
+                        submission
+                        for submission in submissions
+                        if submission.user_id in section_users
+                    ],
+                    since,
+                    section_users,
+                    session,
+                )
+                session.set_watermark(
+                    submissionsApi.SECTION_SUBMISSIONS_RESOURCE_NAME, watermark, section_id
+                )
 
 
 def extract_enrollments(
-    sections: List[Section], sync_db: sqlalchemy.engine.base.Engine
-) -> Tuple[List[Enrollment], Dict[str, DataFrame]]:
+    sections: List[Section],
+    sync_db: SyncDb,
+    enrollments_by_section: Optional[Dict[int, List[Enrollment]]] = None,
+) -> Iterator[Tuple[str, List[Enrollment], DataFrame]]:
     """
-    Gets all Canvas enrollments, in the Ed-Fi UDM format.
+    Gets all Canvas enrollments, in the Ed-Fi UDM format, one section at a time,
+    so that each can be written as soon as it is fetched. Sections are fetched
+    concurrently on the fetch workers, while the sync of each section stays
+    serial. The sync is committed once every section has been read.
 
     Parameters
     ----------
     sections: List[Section]
         A list of Canvas Section objects.
-    sync_db: sqlalchemy.engine.base.Engine
+    sync_db: SyncDb
         Sync database connection.
+    enrollments_by_section: Optional[Dict[int, List[Enrollment]]]
+        The enrollments already fetched with extract_rosters, if any, in place of
+        requesting the enrollments of each section.
 
     Returns
     -------
-    Dict[str, DataFrame]
-        A dict with section_id as key and udm_enrollments as value.
+    Iterator[Tuple[str, List[Enrollment], DataFrame]]
+        The section_id, the Canvas Enrollment objects and udm_enrollments of
+        each section with enrollments.
     """
-    udm_enrollments: Dict[str, DataFrame] = dict()
-    enrollments: List[Enrollment] = []
-    for section in sections:
-        local_enrollments: List[Enrollment] = list(
-            enrollmentsApi.request_enrollments_for_section(section)
-        )
-        if len(list(local_enrollments)) < 1:
-            logger.info(
-                "Skipping enrollments for section id %s - No data returned by API",
-                section.id,
+    with SyncSession(sync_db) as session:
+        section_enrollments: Iterator[Tuple[Section, List[Enrollment]]] = (
+            fetch_concurrently(sections, _request_section_enrollments, get_fetch_workers())
+            if enrollments_by_section is None
+            else (
+                (section, enrollments_by_section.get(section.id, []))
+                for section in sections
             )
-            continue
-        enrollments_df: DataFrame = enrollmentsApi.enrollments_synced_as_df(
-            local_enrollments, sync_db
-        )
-        enrollments_df = section_associationsMap.map_to_udm_section_associations(
-            enrollments_df
         )
-        enrollments = enrollments + local_enrollments
-        udm_enrollments[str(section.id)] = enrollments_df
-
-    return (enrollments, udm_enrollments)
+        for section, local_enrollments in section_enrollments:
+            if len(local_enrollments) < 1:
+                logger.info(
+                    "Skipping enrollments for section id %s - No data returned by API",
+                    section.id,
+                )
+                continue
+            enrollments_df: DataFrame = enrollmentsApi.enrollments_synced_in_session(
+                local_enrollments, session, partition_key=str(section.id)
+            )
+            enrollments_df = section_associationsMap.map_to_udm_section_associations(
+                enrollments_df
+            )
+            yield (str(section.id), local_enrollments, enrollments_df)
 
 
 def extract_grades(
     enrollments: List[Enrollment],
     udm_enrollments: Dict[str, DataFrame],
     sections: List[Section],
-) -> Dict[str, DataFrame]:
+) -> Iterator[Tuple[str, DataFrame]]:
     """
-    Gets all Canvas grades, in the Ed-Fi UDM format.
+    Gets all Canvas grades, in the Ed-Fi UDM format, one section at a time.
+    The student enrollments are indexed by section once, and the grades of each
+    section are joined to the sync dates of their enrollments with a merge, so
+    the cost grows linearly with the number of enrollments.
 
     Parameters
     ----------
@@ -258,59 +629,88 @@ def extract_grades(
         A list of Canvas Enrollment objects.
     udm_enrollments: Dict[str, DataFrame]
         A dict of udm enrollments with section_id as the key and DataFrame as value.
+        Only the SourceSystemIdentifier, CreateDate and LastModifiedDate columns
+        are used.
     sections: List[Section]
         A list of Canvas Section objects.
 
     Returns
     -------
-    Dict[str, DataFrame]
-        A dict with section_id as key and UDM Grades DataFrame as value.
+    Iterator[Tuple[str, DataFrame]]
+        section_id and UDM Grades DataFrame pairs.
     """
-    output: Dict[str, DataFrame] = {}
+    student_enrollments: List[Enrollment] = [
+        enrollment for enrollment in enrollments if enrollment.type == "StudentEnrollment"
+    ]
+    enrollment_ids: List[str] = [str(enrollment.id) for enrollment in student_enrollments]
+
+    # the grades of every section are built, joined and mapped as one frame,
+    # then split by section
+    grades_df: DataFrame = DataFrame.from_records(
+        [enrollment.grades for enrollment in student_enrollments]
+    )
+    grades_df = grades_df.drop(
+        columns=["CreateDate", "LastModifiedDate"], errors="ignore"
+    )
+    grades_df["SourceSystemIdentifier"] = [
+        f"g#{enrollment_id}" for enrollment_id in enrollment_ids
+    ]
+    grades_df["LMSUserLMSSectionAssociationSourceSystemIdentifier"] = enrollment_ids
+    grades_df["LMSSectionIdentifier"] = [
+        str(enrollment.course_section_id) for enrollment in student_enrollments
+    ]
+
+    if len(udm_enrollments) > 0 and len(grades_df) > 0:
+        all_enrollments_df: DataFrame = concat(
+            list(udm_enrollments.values()), ignore_index=True
+        )
+        enrollment_dates_df = DataFrame(
+            {
+                "LMSUserLMSSectionAssociationSourceSystemIdentifier": all_enrollments_df[
+                    "SourceSystemIdentifier"
+                ].astype(str),
+                "CreateDate": all_enrollments_df["CreateDate"],
+                "LastModifiedDate": all_enrollments_df["LastModifiedDate"],
+            }
+        )
+        grades_df = grades_df.merge(
+            enrollment_dates_df,
+            how="left",
+            on="LMSUserLMSSectionAssociationSourceSystemIdentifier",
+            validate="many_to_one",
+        )
+        udm_grades_by_section: Dict[str, DataFrame] = dict(
+            tuple(
+                gradesMap.map_to_udm_grades(grades_df).groupby(
+                    grades_df["LMSSectionIdentifier"], sort=False
+                )
+            )
+        )
+    else:
+        udm_grades_by_section = {}
 
     for section in sections:
-        current_grades: List[dict] = []
         section_id: str = str(section.id)
         if section_id not in udm_enrollments:
             logger.info(
                 "Skipping enrollments for section id %s - None found", section_id
             )
             continue
-        udm_enrollments_list: List[dict] = udm_enrollments[section_id].to_dict(
-            "records"
-        )
 
-        for enrollment in [
-            enrollment
-            for enrollment in enrollments
-            if enrollment.type == "StudentEnrollment"
-            and enrollment.course_section_id == section.id
-        ]:
-            grade: dict = enrollment.grades
-            current_udm_enrollment = [
-                first_enrollment
-                for first_enrollment in udm_enrollments_list
-                if first_enrollment["SourceSystemIdentifier"] == str(enrollment.id)
-            ][0]
-            grade["SourceSystemIdentifier"] = f"g#{enrollment.id}"
-            grade["LMSUserLMSSectionAssociationSourceSystemIdentifier"] = str(
-                enrollment.id
-            )
-            grade["LMSSectionIdentifier"] = section_id
-            grade["CreateDate"] = current_udm_enrollment["CreateDate"]
-            grade["LastModifiedDate"] = current_udm_enrollment["LastModifiedDate"]
-            current_grades.append(grade)
-
-        output[section_id] = gradesMap.map_to_udm_grades(DataFrame(current_grades))
-
-    return output
+        yield (
+            section_id,
+            udm_grades_by_section.get(
+                section_id, gradesMap.map_to_udm_grades(DataFrame())
+            ),
+        )
 
 
 def extract_system_activities(
     users: List[User],
     start_date: str,
     end_date: str,
-    sync_db: sqlalchemy.engine.base.Engine,
+    sync_db: SyncDb,
+    incremental: bool = False,
 ) -> DataFrame:
     """
     Gets all Canvas students, in the Ed-Fi UDM format.
@@ -323,8 +723,12 @@ def extract_system_activities(
         Retrieve events occurring on or after this date.
     end_date: str
         Retrieve events occurring on or before this date.
-    sync_db: sqlalchemy.engine.base.Engine
+    sync_db: SyncDb
         Sync database connection.
+    incremental: bool
+        Only request the events of each user after the latest event already
+        synced for them. The events synced by earlier runs are read back from
+        the sync database, so the result still has every event in the date range.
 
     Returns
     -------
@@ -332,11 +736,16 @@ def extract_system_activities(
         A Dataframe with udm_system_activities.
     """
 
+    incremental = _incremental_authentication_events_available(sync_db, incremental)
+
     def _get_authentication_events():
+        start_dates_by_user: Dict[str, str] = (
+            authEventsApi.last_event_dates(sync_db) if incremental else {}
+        )
         auth_events: List[AuthenticationEvent] = authEventsApi.request_events(
-            users, start_date, end_date
+            users, start_date, end_date, start_dates_by_user
         )
-        if len(list(auth_events)) < 1:
+        if len(list(auth_events)) < 1 and not incremental:
             logger.info("Skipping authentication events - No data returned by API")
             return DataFrame()
 
@@ -348,9 +757,19 @@ def extract_system_activities(
 
             event.id = f"{event_type}#{user_id}#{event.created_at}"  # type: ignore
 
-        auth_events_df: DataFrame = authEventsApi.authentication_events_synced_as_df(
-            auth_events, sync_db
-        )
+        if incremental:
+            if len(auth_events) > 0:
+                authEventsApi.authentication_events_synced_as_df(auth_events, sync_db)
+            auth_events_df: DataFrame = authEventsApi.stored_events_as_df(
+                {str(user.id) for user in users}, start_date, end_date, sync_db
+            )
+            if auth_events_df.empty:
+                logger.info("Skipping authentication events - None found")
+                return DataFrame()
+        else:
+            auth_events_df = authEventsApi.authentication_events_synced_as_df(
+                auth_events, sync_db
+            )
 
         return authEventsMap.map_to_udm_system_activities(auth_events_df)
 
@@ -4,44 +4,50 @@
 # See the LICENSE and NOTICES files in the project root for more information.
 
 import logging
-import os
 import socket
 
 from canvasapi.exceptions import CanvasException
 from requests import RequestException
-from sqlalchemy import create_engine
-import sqlalchemy
 from canvasapi import Canvas
+from edfi_lms_extractor_lib.api import sync_store
+from edfi_lms_extractor_lib.api.sync_store import SYNC_STORES, SyncStore
+from edfi_lms_extractor_lib.api.fetch_pool import DEFAULT_REQUESTS_PER_HOST
+from edfi_canvas_extractor.api.request_scheduler import schedule_requests
 
 logger = logging.getLogger(__name__)
 
 
-def get_sync_db_engine(sync_database_directory: str) -> sqlalchemy.engine.base.Engine:
+def get_sync_store(
+    sync_database_directory: str, store: str = SYNC_STORES.SQLITE
+) -> SyncStore:
     """
-    Create a SQL Alchemy Engine for a SQLite file
+    Create the sync store, one of SYNC_STORES, in the sync database directory
 
     Returns
     -------
-    sqlalchemy.engine.base.Engine
-        a SQL Alchemy Engine
+    SyncStore
+        the sync store
     """
-    logger.debug(
-        "Ensuring database directory at %s", os.path.abspath(sync_database_directory)
-    )
-    os.makedirs(sync_database_directory, exist_ok=True)
-    return create_engine(f"sqlite:///{sync_database_directory}/sync.sqlite")
+    return sync_store.get_sync_store(sync_database_directory, store)
 
 
-def get_canvas_api(canvas_base_url: str, canvas_access_token: str) -> Canvas:
+def get_canvas_api(
+    canvas_base_url: str,
+    canvas_access_token: str,
+    max_requests_per_host: int = DEFAULT_REQUESTS_PER_HOST,
+) -> Canvas:
     """
-    Create new CanvasAPI object for API communication
+    Create new CanvasAPI object for API communication, with its requests
+    scheduled to stay within the Canvas rate limit
 
     Returns
     -------
     Canvas
         a new CanvasAPI object
     """
-    return Canvas(canvas_base_url, canvas_access_token)
+    canvas = Canvas(canvas_base_url, canvas_access_token)
+    schedule_requests(canvas, max_requests_per_host)
+    return canvas
 
 
 MAX_TOTAL_CALLS = 4
@@ -4,15 +4,21 @@
 # See the LICENSE and NOTICES files in the project root for more information.
 
 from datetime import datetime
-from typing import Dict, Tuple, cast
+from typing import Dict, Iterator, List, Optional, Tuple
 import sys
 import logging
 
 from pandas import DataFrame
-import sqlalchemy
 from canvasapi import Canvas
-
-from edfi_canvas_extractor.config import get_canvas_api, get_sync_db_engine
+from canvasapi.enrollment import Enrollment
+from canvasapi.user import User
+
+from edfi_lms_extractor_lib.api.sync_store import SyncDb
+from edfi_canvas_extractor.config import get_canvas_api, get_sync_store
+from edfi_lms_extractor_lib.csv_generation.manifest import (
+    finish_run_manifest,
+    start_run_manifest,
+)
 from edfi_lms_extractor_lib.csv_generation.write import (
     write_section_activities,
     write_users,
@@ -22,6 +28,18 @@ from edfi_lms_extractor_lib.csv_generation.write import (
     write_grades,
     write_assignment_submissions,
     write_system_activities,
+    set_csv_compression,
+    set_output_format,
+    set_output_layout,
+    set_skip_unchanged_files,
+)
+from edfi_lms_extractor_lib.api.fetch_pool import set_fetch_workers
+from edfi_lms_extractor_lib.api.resource_sync import set_hash_workers
+from edfi_lms_extractor_lib.api.sync_payload import set_payload_mode
+from edfi_lms_extractor_lib.api.sync_metrics import (
+    SyncRunSummary,
+    add_sync_metrics_listener,
+    remove_sync_metrics_listener,
 )
 from edfi_lms_extractor_lib.helpers.decorators import catch_exceptions
 
@@ -32,16 +50,22 @@ from edfi_canvas_extractor.client_facade import (
     extract_students,
     extract_assignments,
     extract_submissions,
+    extract_submissions_by_course,
     extract_enrollments,
+    extract_rosters,
     extract_system_activities,
 )
 from edfi_canvas_extractor.api.canvas_helper import to_df
 from edfi_canvas_extractor.helpers.arg_parser import MainArguments
+from edfi_canvas_extractor.helpers.constants import SubmissionFetchModes
 
 
 logger = logging.getLogger(__name__)
 results_store: Dict[str, Tuple] = {}
 
+# the UDM enrollment columns used to extract grades
+ENROLLMENT_DATE_COLUMNS = ["SourceSystemIdentifier", "CreateDate", "LastModifiedDate"]
+
 
 def _break_execution(failing_extraction: str) -> None:
     logger.critical(
@@ -53,7 +77,7 @@ def _break_execution(failing_extraction: str) -> None:
 
 @catch_exceptions
 def _get_courses(
-    arguments: MainArguments, canvas: Canvas, sync_db: sqlalchemy.engine.base.Engine
+    arguments: MainArguments, canvas: Canvas, sync_db: SyncDb
 ) -> None:
     logger.info("Extracting Courses from Canvas API")
     (courses, courses_df) = extract_courses(
@@ -64,7 +88,7 @@ def _get_courses(
 
 @catch_exceptions
 def _get_sections(
-    arguments: MainArguments, sync_db: sqlalchemy.engine.base.Engine
+    arguments: MainArguments, sync_db: SyncDb
 ) -> None:
     logger.info("Extracting Sections from Canvas API")
     (courses, _) = results_store["courses"]
@@ -88,7 +112,7 @@ def _get_section_activities(
 @catch_exceptions
 def _get_assignments(
     arguments: MainArguments,
-    sync_db: sqlalchemy.engine.base.Engine,
+    sync_db: SyncDb,
 ) -> None:
     logger.info("Extracting Assignments from Canvas API")
     (sections, _, all_section_ids) = results_store["sections"]
@@ -106,11 +130,15 @@ def _get_assignments(
 
 @catch_exceptions
 def _get_students(
-    arguments: MainArguments, sync_db: sqlalchemy.engine.base.Engine
+    arguments: MainArguments, sync_db: SyncDb
 ) -> None:
     logger.info("Extracting Students from Canvas API")
     (courses, _) = results_store["courses"]
-    (students, udm_students_df) = extract_students(courses, sync_db)
+    roster_students: Optional[List[User]] = None
+    if arguments.collapsed_fetch:
+        (roster_students, roster_enrollments) = extract_rosters(courses)
+        results_store["roster_enrollments"] = (roster_enrollments,)
+    (students, udm_students_df) = extract_students(courses, sync_db, roster_students)
     results_store["students"] = (students, udm_students_df)
     logger.info("Writing LMS UDM Users to CSV file")
     write_users(udm_students_df, datetime.now(), arguments.output_directory)
@@ -119,13 +147,24 @@ def _get_students(
 @catch_exceptions
 def _get_submissions(
     arguments: MainArguments,
-    sync_db: sqlalchemy.engine.base.Engine,
+    sync_db: SyncDb,
 ) -> None:
     logger.info("Extracting Submissions from Canvas API")
     (sections, _, _) = results_store["sections"]
+    (enrollments, _) = results_store["enrollments"]
+    submissions: Iterator[Tuple[Tuple[str, str], DataFrame]]
+    if arguments.fetch_submissions_by == SubmissionFetchModes.Course:
+        (courses, _) = results_store["courses"]
+        submissions = extract_submissions_by_course(
+            courses, sections, enrollments, sync_db, arguments.incremental_submissions
+        )
+    else:
+        submissions = extract_submissions(
+            sections, sync_db, arguments.incremental_submissions, enrollments
+        )
     logger.info("Writing LMS UDM AssignmentSubmissions to CSV files")
     write_assignment_submissions(
-        extract_submissions(sections, sync_db),
+        submissions,
         datetime.now(),
         arguments.output_directory,
     )
@@ -133,40 +172,61 @@ def _get_submissions(
 
 @catch_exceptions
 def _get_enrollments(
-    arguments: MainArguments, sync_db: sqlalchemy.engine.base.Engine
+    arguments: MainArguments, sync_db: SyncDb
 ) -> None:
     logger.info("Extracting Enrollments from Canvas API")
     (sections, _, all_section_ids) = results_store["sections"]
-    (enrollments, udm_enrollments) = extract_enrollments(sections, sync_db)
+    (roster_enrollments,) = results_store.get("roster_enrollments", (None,))
+
+    # grades only need the Enrollment objects and the sync dates of each enrollment,
+    # so the full enrollments are released once written
+    enrollments: List[Enrollment] = []
+    enrollment_dates: Dict[str, DataFrame] = {}
+
+    def _enrollments_by_section() -> Iterator[Tuple[str, DataFrame]]:
+        for (section_id, section_enrollments, udm_enrollments_df) in extract_enrollments(
+            sections, sync_db, roster_enrollments
+        ):
+            enrollments.extend(section_enrollments)
+            enrollment_dates[section_id] = udm_enrollments_df[ENROLLMENT_DATE_COLUMNS]
+            yield (section_id, udm_enrollments_df)
+
     logger.info("Writing LMS UDM UserSectionAssociations to CSV files")
     write_section_associations(
-        udm_enrollments, all_section_ids, datetime.now(), arguments.output_directory
+        _enrollments_by_section(),
+        all_section_ids,
+        datetime.now(),
+        arguments.output_directory,
     )
-    results_store["enrollments"] = (enrollments, udm_enrollments)
+    results_store["enrollments"] = (enrollments, enrollment_dates)
 
 
 @catch_exceptions
 def _get_grades(arguments: MainArguments) -> None:
     logger.info("Extracting Grades from Canvas API")
-    (enrollments, udm_enrollments) = results_store["enrollments"]
+    (enrollments, enrollment_dates) = results_store["enrollments"]
     (sections, _, all_section_ids) = results_store["sections"]
-    udm_grades: Dict[str, DataFrame] = extract_grades(
-        enrollments, cast(Dict[str, DataFrame], udm_enrollments), sections
-    )
     logger.info("Writing LMS UDM Grades to CSV files")
     write_grades(
-        udm_grades, all_section_ids, datetime.now(), arguments.output_directory
+        extract_grades(enrollments, enrollment_dates, sections),
+        all_section_ids,
+        datetime.now(),
+        arguments.output_directory,
     )
 
 
 @catch_exceptions
 def _get_system_activities(
-    arguments: MainArguments, sync_db: sqlalchemy.engine.base.Engine
+    arguments: MainArguments, sync_db: SyncDb
 ) -> None:
     logger.info("Extracting System Activities from Canvas API")
     (users, _) = results_store["students"]
     udm_system_activities = extract_system_activities(
-        users, arguments.start_date, arguments.end_date, sync_db
+        users,
+        arguments.start_date,
+        arguments.end_date,
+        sync_db,
+        arguments.incremental_authentication_events,
     )
     write_system_activities(
         udm_system_activities, datetime.now(), arguments.output_directory
@@ -175,13 +235,27 @@ def _get_system_activities(
 
 def run(arguments: MainArguments) -> None:
     logger.info("Starting Ed-Fi LMS Canvas Extractor")
-    sync_db: sqlalchemy.engine.base.Engine = get_sync_db_engine(
-        arguments.sync_database_directory
+    set_hash_workers(arguments.hash_workers)
+    set_output_format(arguments.output_format)
+    set_csv_compression(arguments.csv_compression)
+    set_skip_unchanged_files(arguments.skip_unchanged_files)
+    set_output_layout(arguments.output_layout, arguments.max_rows_per_file)
+    set_fetch_workers(arguments.fetch_workers, arguments.max_requests_per_host)
+    sync_summary = SyncRunSummary()
+    add_sync_metrics_listener(sync_summary)
+    start_run_manifest(arguments.output_directory)
+    sync_db: SyncDb = get_sync_store(
+        arguments.sync_database_directory, arguments.sync_store
     )
+    set_payload_mode(sync_db, arguments.sync_payload_mode)
     succeeded: bool = True
 
     succeeded = _get_courses(
-        arguments, get_canvas_api(arguments.base_url, arguments.access_token), sync_db
+        arguments,
+        get_canvas_api(
+            arguments.base_url, arguments.access_token, arguments.max_requests_per_host
+        ),
+        sync_db,
     )
     if not succeeded:
         _break_execution("Courses")
@@ -214,4 +288,8 @@ def run(arguments: MainArguments) -> None:
             arguments,
         )  # Grades don't need sync process because they are part of enrollments
 
+    finish_run_manifest()
+    remove_sync_metrics_listener(sync_summary)
+    sync_summary.log(logger)
+
     logger.info("Finishing Ed-Fi LMS Canvas Extractor")
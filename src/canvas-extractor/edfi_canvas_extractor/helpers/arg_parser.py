@@ -7,6 +7,14 @@ from dataclasses import dataclass
 from typing import List
 
 from configargparse import ArgParser
+from edfi_lms_extractor_lib.api.fetch_pool import DEFAULT_REQUESTS_PER_HOST
+from edfi_lms_extractor_lib.api.sync_payload import PAYLOAD_MODES
+from edfi_lms_extractor_lib.api.sync_store import SYNC_STORES
+from edfi_lms_extractor_lib.csv_generation.write import (
+    CSV_COMPRESSIONS,
+    OUTPUT_FORMATS,
+    OUTPUT_LAYOUTS,
+)
 
 from . import constants
 
@@ -24,6 +32,20 @@ class MainArguments:
     start_date: str
     end_date: str
     sync_database_directory: str
+    sync_store: str = SYNC_STORES.SQLITE
+    sync_payload_mode: str = PAYLOAD_MODES.FULL
+    hash_workers: int = 1
+    output_format: str = OUTPUT_FORMATS.CSV
+    csv_compression: str = CSV_COMPRESSIONS.NONE
+    skip_unchanged_files: bool = False
+    output_layout: str = OUTPUT_LAYOUTS.PARTITIONED
+    max_rows_per_file: int = 0
+    fetch_workers: int = 1
+    max_requests_per_host: int = DEFAULT_REQUESTS_PER_HOST
+    fetch_submissions_by: str = constants.SubmissionFetchModes.Section
+    incremental_authentication_events: bool = False
+    collapsed_fetch: bool = False
+    incremental_submissions: bool = False
     extract_activities: bool = False
     extract_assignments: bool = False
     extract_attendance: bool = False
@@ -118,6 +140,130 @@ def parse_main_arguments(args_in: List[str]) -> MainArguments:
         env_var="SYNC_DATABASE_DIRECTORY",
     )
 
+    parser.add(  # type: ignore
+        "--sync-store",
+        required=False,
+        help="The database the sync records are kept in. duckdb requires the duckdb package.",
+        type=str,
+        choices=SYNC_STORES.ALL,
+        default=SYNC_STORES.SQLITE,
+        env_var="SYNC_STORE",
+    )
+
+    parser.add(  # type: ignore
+        "--sync-payload-mode",
+        required=False,
+        help="How the sync database stores each record. compressed requires the sqlite sync store.",
+        type=str,
+        choices=PAYLOAD_MODES.ALL,
+        default=PAYLOAD_MODES.FULL,
+        env_var="SYNC_PAYLOAD_MODE",
+    )
+
+    parser.add(  # type: ignore
+        "--hash-workers",
+        required=False,
+        help="The number of processes for hashing large resources before syncing.",
+        type=int,
+        default=1,
+        env_var="HASH_WORKERS",
+    )
+
+    parser.add(  # type: ignore
+        "--output-format",
+        required=False,
+        help="The format of the generated files.",
+        type=str,
+        choices=OUTPUT_FORMATS.ALL,
+        default=OUTPUT_FORMATS.CSV,
+        env_var="OUTPUT_FORMAT",
+    )
+
+    parser.add(  # type: ignore
+        "--csv-compression",
+        required=False,
+        help="The compression of the generated csv files.",
+        type=str,
+        choices=CSV_COMPRESSIONS.ALL,
+        default=CSV_COMPRESSIONS.NONE,
+        env_var="CSV_COMPRESSION",
+    )
+
+    parser.add(  # type: ignore
+        "--skip-unchanged-files",
+        help="Do not write a file when its contents match the newest file in its directory.",
+        action="store_true",
+        env_var="SKIP_UNCHANGED_FILES",
+    )
+
+    parser.add(  # type: ignore
+        "--output-layout",
+        required=False,
+        help="The directory layout of the generated files.",
+        type=str,
+        choices=OUTPUT_LAYOUTS.ALL,
+        default=OUTPUT_LAYOUTS.PARTITIONED,
+        env_var="OUTPUT_LAYOUT",
+    )
+
+    parser.add(  # type: ignore
+        "--max-rows-per-file",
+        required=False,
+        help="In the consolidated layout, the number of rows above which a resource is split into shards.",
+        type=int,
+        default=0,
+        env_var="MAX_ROWS_PER_FILE",
+    )
+
+    parser.add(  # type: ignore
+        "--fetch-workers",
+        required=False,
+        help="The number of threads fetching sections, or users, concurrently.",
+        type=int,
+        default=1,
+        env_var="FETCH_WORKERS",
+    )
+
+    parser.add(  # type: ignore
+        "--max-requests-per-host",
+        required=False,
+        help="The most requests made to the Canvas API at a time, across every fetch thread.",
+        type=int,
+        default=DEFAULT_REQUESTS_PER_HOST,
+        env_var="MAX_REQUESTS_PER_HOST",
+    )
+
+    parser.add(  # type: ignore
+        "--fetch-submissions-by",
+        required=False,
+        help="Request the submissions of each section, or of each course once for all of its sections.",
+        type=str,
+        choices=constants.VALID_SUBMISSION_FETCH_MODES,
+        default=constants.SubmissionFetchModes.Section,
+        env_var="FETCH_SUBMISSIONS_BY",
+    )
+
+    parser.add(  # type: ignore
+        "--incremental-authentication-events",
+        help="Only request the authentication events of each user after the latest event already synced.",
+        action="store_true",
+        env_var="INCREMENTAL_AUTHENTICATION_EVENTS",
+    )
+
+    parser.add(  # type: ignore
+        "--collapsed-fetch",
+        help="Request the students and enrollments of each course together, with one request per course.",
+        action="store_true",
+        env_var="COLLAPSED_FETCH",
+    )
+
+    parser.add(  # type: ignore
+        "--incremental-submissions",
+        help="Only request the submissions submitted or graded since the previous run of each section.",
+        action="store_true",
+        env_var="INCREMENTAL_SUBMISSIONS",
+    )
+
     parser.add(  # type: ignore
         "-f",
         "--feature",
@@ -139,6 +285,20 @@ def parse_main_arguments(args_in: List[str]) -> MainArguments:
         start_date=args_parsed.start_date,
         end_date=args_parsed.end_date,
         sync_database_directory=args_parsed.sync_database_directory,
+        sync_store=args_parsed.sync_store,
+        sync_payload_mode=args_parsed.sync_payload_mode,
+        hash_workers=args_parsed.hash_workers,
+        output_format=args_parsed.output_format,
+        csv_compression=args_parsed.csv_compression,
+        skip_unchanged_files=args_parsed.skip_unchanged_files,
+        output_layout=args_parsed.output_layout,
+        max_rows_per_file=args_parsed.max_rows_per_file,
+        fetch_workers=args_parsed.fetch_workers,
+        max_requests_per_host=args_parsed.max_requests_per_host,
+        fetch_submissions_by=args_parsed.fetch_submissions_by,
+        incremental_authentication_events=args_parsed.incremental_authentication_events,
+        collapsed_fetch=args_parsed.collapsed_fetch,
+        incremental_submissions=args_parsed.incremental_submissions,
         extract_activities=constants.Features.Activities in args_parsed.feature,
         extract_assignments=constants.Features.Assignments in args_parsed.feature,
         extract_attendance=constants.Features.Attendance in args_parsed.feature,
@@ -18,3 +18,14 @@ VALID_FEATURES = [
     Features.Assignments,
     Features.Grades,
 ]
+
+
+class SubmissionFetchModes:
+    Section = "section"
+    Course = "course"
+
+
+VALID_SUBMISSION_FETCH_MODES = [
+    SubmissionFetchModes.Section,
+    SubmissionFetchModes.Course,
+]
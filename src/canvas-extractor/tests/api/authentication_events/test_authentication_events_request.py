@@ -0,0 +1,120 @@
+# SPDX-License-Identifier: Apache-2.0
+# Licensed to the Ed-Fi Alliance under one or more agreements.
+# The Ed-Fi Alliance licenses this file to you under the Apache License, Version 2.0.
+# See the LICENSE and NOTICES files in the project root for more information.
+
+from typing import Dict, List
+from unittest.mock import Mock
+
+from canvasapi.authentication_event import AuthenticationEvent
+from canvasapi.user import User
+from pandas import DataFrame
+import pytest
+
+from edfi_canvas_extractor.api import authentication_events
+from edfi_canvas_extractor.api.authentication_events import (
+    AuthenticationEventList,
+    authentication_events_synced_as_df,
+    last_event_dates,
+    request_events,
+    stored_events_as_df,
+)
+
+BASE_URL = "https://example.instructure.com/api/v1/"
+
+
+def _event(user_id: str, created_at: str) -> AuthenticationEvent:
+    event = AuthenticationEvent(
+        Mock(),
+        {
+            "created_at": created_at,
+            "event_type": "login",
+            "links": {"user": user_id},
+        },
+    )
+    event.id = f"in#{user_id}#{created_at}"  # type: ignore
+    return event
+
+
+def describe_when_reading_a_page_of_authentication_events():
+    def it_should_read_the_events_of_the_response():
+        response = Mock(links={})
+        response.json.return_value = {
+            "events": [{"event_type": "login"}, {"event_type": "logout"}],
+            "linked": {},
+        }
+        requester = Mock(base_url=BASE_URL)
+        requester.request.return_value = response
+
+        events = list(
+            AuthenticationEventList(
+                AuthenticationEvent, requester, "GET", "audit/authentication/users/1"
+            )
+        )
+
+        assert [event.event_type for event in events] == ["login", "logout"]
+
+
+def describe_when_requesting_events():
+    @pytest.fixture
+    def requested_windows(monkeypatch) -> Dict[int, List[str]]:
+        windows: Dict[int, List[str]] = {}
+
+        def request_user_events(user, start_date, end_date):
+            windows[user.id] = [start_date, end_date]
+            return [_event(str(user.id), start_date)]
+
+        monkeypatch.setattr(authentication_events, "request_user_events", request_user_events)
+        return windows
+
+    def it_should_start_each_user_after_their_latest_synced_event(requested_windows):
+        users = [
+            User(Mock(base_url=BASE_URL), {"id": user_id}) for user_id in [1, 2, 3]
+        ]
+
+        events = request_events(
+            users,
+            "2021-01-01",
+            "2021-06-01",
+            {"1": "2021-03-01T12:00:00Z", "3": "2020-12-01T12:00:00Z"},
+        )
+
+        assert requested_windows == {
+            1: ["2021-03-01T12:00:00Z", "2021-06-01"],
+            2: ["2021-01-01", "2021-06-01"],
+            3: ["2021-01-01", "2021-06-01"],
+        }
+        assert [event.links["user"] for event in events] == ["1", "2", "3"]
+
+
+def describe_when_reading_synced_events():
+    @pytest.fixture
+    def sync_db(test_db_fixture):
+        events = [
+            _event("1", "2020-12-01T08:00:00Z"),
+            _event("1", "2021-02-01T08:00:00Z"),
+            _event("1", "2021-03-01T08:00:00Z"),
+            _event("2", "2021-02-15T08:00:00Z"),
+        ]
+        authentication_events_synced_as_df(events, test_db_fixture)
+        return test_db_fixture
+
+    def it_should_find_the_latest_event_of_each_user(sync_db):
+        assert last_event_dates(sync_db) == {
+            "1": "2021-03-01T08:00:00Z",
+            "2": "2021-02-15T08:00:00Z",
+        }
+
+    def it_should_read_the_events_of_the_users_in_the_date_range(sync_db):
+        events_df: DataFrame = stored_events_as_df(
+            {"1"}, "2021-01-01", "2021-06-01", sync_db
+        )
+
+        assert events_df["created_at"].tolist() == [
+            "2021-02-01T08:00:00Z",
+            "2021-03-01T08:00:00Z",
+        ]
+        assert "CreateDate" in events_df.columns
+
+    def it_should_find_no_events_without_a_sync(test_db_fixture):
+        assert last_event_dates(test_db_fixture) == {}
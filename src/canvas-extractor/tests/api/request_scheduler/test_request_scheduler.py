@@ -0,0 +1,132 @@
+# SPDX-License-Identifier: Apache-2.0
+# Licensed to the Ed-Fi Alliance under one or more agreements.
+# The Ed-Fi Alliance licenses this file to you under the Apache License, Version 2.0.
+# See the LICENSE and NOTICES files in the project root for more information.
+
+from time import monotonic
+from typing import List
+from unittest.mock import Mock
+
+import pytest
+from requests import Response
+from requests.adapters import HTTPAdapter
+
+from edfi_canvas_extractor.api.request_scheduler import (
+    RequestScheduler,
+    SchedulingAdapter,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _response(status_code: int, headers: dict, content: bytes = b"[]") -> Response:
+    response = Response()
+    response.status_code = status_code
+    response.headers.update(headers)
+    response._content = content
+    return response
+
+
+def describe_when_recording_responses():
+    @pytest.fixture
+    def clock() -> FakeClock:
+        return FakeClock()
+
+    @pytest.fixture
+    def scheduler(clock: FakeClock) -> RequestScheduler:
+        return RequestScheduler(max_concurrency=4, clock=clock)
+
+    def it_should_start_at_the_max_concurrency(scheduler: RequestScheduler):
+        assert scheduler.concurrency == 4
+        assert scheduler.pause_remaining() == 0
+
+    def it_should_halve_the_concurrency_and_pause_when_the_rate_limit_is_low(
+        scheduler: RequestScheduler,
+    ):
+        scheduler.record_response(remaining=100, cost=1)
+
+        assert scheduler.concurrency == 2
+        assert scheduler.pause_remaining() == pytest.approx(20)
+
+    def it_should_raise_the_concurrency_again_when_the_rate_limit_is_high(
+        scheduler: RequestScheduler, clock: FakeClock
+    ):
+        scheduler.record_response(remaining=100, cost=1)
+        clock.now += 30
+        for _ in range(5):
+            scheduler.record_response(remaining=650, cost=1)
+
+        assert scheduler.concurrency == 4
+        assert scheduler.pause_remaining() == 0
+
+    def it_should_drop_to_one_request_at_a_time_when_throttled(
+        scheduler: RequestScheduler,
+    ):
+        scheduler.record_response(remaining=0, cost=1, throttled=True)
+
+        assert scheduler.concurrency == 1
+        assert scheduler.pause_remaining() == pytest.approx(30)
+
+    def it_should_count_the_cost_of_the_requests_in_flight(
+        scheduler: RequestScheduler,
+    ):
+        with scheduler.slot(), scheduler.slot(), scheduler.slot():
+            scheduler.record_response(remaining=350, cost=100)
+
+        assert scheduler.request_cost == pytest.approx(20.8)
+        assert scheduler.concurrency == 2
+
+    def it_should_ignore_responses_without_a_rate_limit(scheduler: RequestScheduler):
+        scheduler.record_response(remaining=None, cost=None)
+
+        assert scheduler.concurrency == 4
+        assert scheduler.pause_remaining() == 0
+
+
+def describe_when_a_request_is_paused():
+    def it_should_wait_for_the_rate_limit_to_refill():
+        scheduler = RequestScheduler(max_concurrency=2)
+        scheduler.record_response(remaining=299, cost=1)
+
+        started_at = monotonic()
+        with scheduler.slot():
+            pass
+
+        assert monotonic() - started_at >= 0.09
+
+
+def describe_when_sending_through_the_scheduling_adapter():
+    @pytest.fixture
+    def recorded(monkeypatch) -> List[tuple]:
+        responses = [
+            _response(200, {"X-Rate-Limit-Remaining": "650.5", "X-Request-Cost": "2.5"}),
+            _response(403, {"X-Rate-Limit-Remaining": "0"}, b"403 Forbidden (Rate Limit Exceeded)"),
+            _response(200, {}),
+        ]
+        monkeypatch.setattr(HTTPAdapter, "send", Mock(side_effect=responses))
+
+        calls: List[tuple] = []
+        scheduler = Mock(spec=RequestScheduler)
+        scheduler.slot.return_value.__enter__ = Mock()
+        scheduler.slot.return_value.__exit__ = Mock(return_value=False)
+        scheduler.record_response.side_effect = lambda *args, **kwargs: calls.append(
+            (*args, kwargs["throttled"])
+        )
+
+        adapter = SchedulingAdapter(scheduler)
+        for _ in responses:
+            adapter.send(Mock())
+        return calls
+
+    def it_should_record_the_rate_limit_of_each_response(recorded: List[tuple]):
+        assert recorded == [
+            (650.5, 2.5, False),
+            (0, None, True),
+            (None, None, False),
+        ]
@@ -0,0 +1,64 @@
+# SPDX-License-Identifier: Apache-2.0
+# Licensed to the Ed-Fi Alliance under one or more agreements.
+# The Ed-Fi Alliance licenses this file to you under the Apache License, Version 2.0.
+# See the LICENSE and NOTICES files in the project root for more information.
+
+from typing import Dict, List, Tuple
+from unittest.mock import Mock
+
+from canvasapi.enrollment import Enrollment
+from canvasapi.user import User
+import pytest
+
+from edfi_canvas_extractor.api.rosters import split_rosters
+
+
+def _user(user_id: int, enrollments: List[Tuple[int, int, str]]) -> User:
+    return User(
+        Mock(),
+        {
+            "id": user_id,
+            "name": f"User {user_id}",
+            "enrollments": [
+                {
+                    "id": enrollment_id,
+                    "user_id": user_id,
+                    "course_section_id": section_id,
+                    "type": enrollment_type,
+                }
+                for (enrollment_id, section_id, enrollment_type) in enrollments
+            ],
+        },
+    )
+
+
+def describe_when_splitting_course_rosters():
+    @pytest.fixture
+    def result() -> Tuple[List[User], Dict[int, List[Enrollment]]]:
+        first_course = [
+            _user(1, [(100, 10, "StudentEnrollment")]),
+            _user(2, [(101, 10, "TeacherEnrollment"), (102, 11, "TeacherEnrollment")]),
+            _user(3, [(103, 11, "StudentEnrollment")]),
+        ]
+        second_course = [_user(1, [(104, 20, "StudentEnrollment")])]
+        return split_rosters([first_course, second_course])
+
+    def it_should_keep_each_student_once(result):
+        (students, _) = result
+        assert [student.id for student in students] == [1, 3]
+
+    def it_should_remove_the_embedded_enrollments_from_the_students(result):
+        (students, _) = result
+        assert not any(hasattr(student, "enrollments") for student in students)
+
+    def it_should_group_every_enrollment_by_section(result):
+        (_, enrollments_by_section) = result
+        assert {
+            section_id: [enrollment.id for enrollment in enrollments]
+            for section_id, enrollments in enrollments_by_section.items()
+        } == {10: [100, 101], 11: [102, 103], 20: [104]}
+
+    def it_should_build_enrollment_objects(result):
+        (_, enrollments_by_section) = result
+        assert isinstance(enrollments_by_section[10][0], Enrollment)
+        assert enrollments_by_section[10][0].type == "StudentEnrollment"
@@ -0,0 +1,32 @@
+# SPDX-License-Identifier: Apache-2.0
+# Licensed to the Ed-Fi Alliance under one or more agreements.
+# The Ed-Fi Alliance licenses this file to you under the Apache License, Version 2.0.
+# See the LICENSE and NOTICES files in the project root for more information.
+
+from unittest.mock import Mock
+
+from canvasapi.submission import Submission
+
+from edfi_canvas_extractor.api.submissions import request_submissions_since
+
+TEST_SINCE = "2021-03-01T11:50:00Z"
+
+
+def _submission(submission_id: int) -> Submission:
+    return Submission(Mock(), {"id": submission_id})
+
+
+def describe_when_requesting_submissions_since_a_watermark():
+    def it_should_request_the_submitted_and_the_graded_submissions_once_each():
+        submitted = [_submission(1), _submission(2)]
+        graded = [_submission(2), _submission(3)]
+        section = Mock()
+        section.get_multiple_submissions.side_effect = [submitted, graded]
+
+        result = request_submissions_since(section, TEST_SINCE)
+
+        assert [submission.id for submission in result] == [1, 2, 3]
+        assert [call.kwargs for call in section.get_multiple_submissions.call_args_list] == [
+            {"student_ids": "all", "submitted_since": TEST_SINCE},
+            {"student_ids": "all", "graded_since": TEST_SINCE},
+        ]
@@ -22,6 +22,16 @@ TEST_END_DATE = "3"
 TEST_LOG_LEVEL = "DEBUG"
 TEST_OUTPUT_DIRECTORY = "5"
 TEST_SYNC_DATABASE_DIRECTORY = "test_sync_database_directory"
+TEST_SYNC_STORE = "duckdb"
+TEST_SYNC_PAYLOAD_MODE = "hash-only"
+TEST_HASH_WORKERS = 4
+TEST_OUTPUT_FORMAT = "both"
+TEST_CSV_COMPRESSION = "gzip"
+TEST_OUTPUT_LAYOUT = "consolidated"
+TEST_MAX_ROWS_PER_FILE = 100000
+TEST_FETCH_WORKERS = 8
+TEST_MAX_REQUESTS_PER_HOST = 2
+TEST_FETCH_SUBMISSIONS_BY = "course"
 TEST_FEATURES = "activities attendance assignments grades"
 
 
@@ -62,6 +72,46 @@ def describe_when_parsing_arguments():
         def it_should_load_the_end_date(result: MainArguments):
             assert result.end_date == TEST_END_DATE
 
+        def it_should_default_to_the_sqlite_sync_store(result: MainArguments):
+            assert result.sync_store == "sqlite"
+
+        def it_should_default_to_storing_full_payloads(result: MainArguments):
+            assert result.sync_payload_mode == "full"
+
+        def it_should_default_to_hashing_in_process(result: MainArguments):
+            assert result.hash_workers == 1
+
+        def it_should_default_to_csv_output(result: MainArguments):
+            assert result.output_format == "csv"
+
+        def it_should_default_to_uncompressed_csv(result: MainArguments):
+            assert result.csv_compression == "none"
+
+        def it_should_default_to_writing_every_file(result: MainArguments):
+            assert result.skip_unchanged_files is False
+
+        def it_should_default_to_the_partitioned_layout(result: MainArguments):
+            assert result.output_layout == "partitioned"
+            assert result.max_rows_per_file == 0
+
+        def it_should_default_to_fetching_one_section_at_a_time(result: MainArguments):
+            assert result.fetch_workers == 1
+            assert result.max_requests_per_host == 4
+
+        def it_should_default_to_fetching_submissions_by_section(result: MainArguments):
+            assert result.fetch_submissions_by == "section"
+
+        def it_should_default_to_requesting_every_authentication_event(result: MainArguments):
+            assert result.incremental_authentication_events is False
+
+        def it_should_default_to_requesting_students_and_enrollments_separately(
+            result: MainArguments,
+        ):
+            assert result.collapsed_fetch is False
+
+        def it_should_default_to_requesting_every_submission(result: MainArguments):
+            assert result.incremental_submissions is False
+
     def describe_given_optional_parameters():
         @pytest.fixture
         def result() -> MainArguments:
@@ -81,6 +131,30 @@ def describe_when_parsing_arguments():
                 TEST_OUTPUT_DIRECTORY,
                 "-d",
                 TEST_SYNC_DATABASE_DIRECTORY,
+                "--sync-store",
+                TEST_SYNC_STORE,
+                "--sync-payload-mode",
+                TEST_SYNC_PAYLOAD_MODE,
+                "--hash-workers",
+                str(TEST_HASH_WORKERS),
+                "--output-format",
+                TEST_OUTPUT_FORMAT,
+                "--csv-compression",
+                TEST_CSV_COMPRESSION,
+                "--skip-unchanged-files",
+                "--output-layout",
+                TEST_OUTPUT_LAYOUT,
+                "--max-rows-per-file",
+                str(TEST_MAX_ROWS_PER_FILE),
+                "--fetch-workers",
+                str(TEST_FETCH_WORKERS),
+                "--max-requests-per-host",
+                str(TEST_MAX_REQUESTS_PER_HOST),
+                "--fetch-submissions-by",
+                TEST_FETCH_SUBMISSIONS_BY,
+                "--incremental-authentication-events",
+                "--collapsed-fetch",
+                "--incremental-submissions",
                 "-f",
                 *TEST_FEATURES.split(),  # Split to convert it into a list and use * to unpack the list into separated values
             ]
@@ -109,6 +183,48 @@ def describe_when_parsing_arguments():
         def it_should_load_the_sync_database_directory(result: MainArguments):
             assert result.sync_database_directory == TEST_SYNC_DATABASE_DIRECTORY
 
+        def it_should_load_the_sync_store(result: MainArguments):
+            assert result.sync_store == TEST_SYNC_STORE
+
+        def it_should_load_the_sync_payload_mode(result: MainArguments):
+            assert result.sync_payload_mode == TEST_SYNC_PAYLOAD_MODE
+
+        def it_should_load_the_hash_workers(result: MainArguments):
+            assert result.hash_workers == TEST_HASH_WORKERS
+
+        def it_should_load_the_output_format(result: MainArguments):
+            assert result.output_format == TEST_OUTPUT_FORMAT
+
+        def it_should_load_the_csv_compression(result: MainArguments):
+            assert result.csv_compression == TEST_CSV_COMPRESSION
+
+        def it_should_load_skip_unchanged_files(result: MainArguments):
+            assert result.skip_unchanged_files is True
+
+        def it_should_load_the_output_layout(result: MainArguments):
+            assert result.output_layout == TEST_OUTPUT_LAYOUT
+
+        def it_should_load_the_max_rows_per_file(result: MainArguments):
+            assert result.max_rows_per_file == TEST_MAX_ROWS_PER_FILE
+
+        def it_should_load_the_fetch_workers(result: MainArguments):
+            assert result.fetch_workers == TEST_FETCH_WORKERS
+
+        def it_should_load_the_max_requests_per_host(result: MainArguments):
+            assert result.max_requests_per_host == TEST_MAX_REQUESTS_PER_HOST
+
+        def it_should_load_fetch_submissions_by(result: MainArguments):
+            assert result.fetch_submissions_by == TEST_FETCH_SUBMISSIONS_BY
+
+        def it_should_load_incremental_authentication_events(result: MainArguments):
+            assert result.incremental_authentication_events is True
+
+        def it_should_load_collapsed_fetch(result: MainArguments):
+            assert result.collapsed_fetch is True
+
+        def it_should_load_incremental_submissions(result: MainArguments):
+            assert result.incremental_submissions is True
+
         def it_should_load_the_features(result: MainArguments):
             assert result.extract_grades
             assert result.extract_activities
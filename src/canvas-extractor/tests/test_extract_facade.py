@@ -6,10 +6,13 @@
 from typing import Tuple
 from unittest.mock import Mock
 from canvasapi.canvas import Canvas
+from canvasapi.submission import Submission
 from pandas import DataFrame
 import pytest
 import sqlalchemy
 
+from edfi_lms_extractor_lib.api.sync_payload import PAYLOAD_MODES, set_payload_mode
+from edfi_lms_extractor_lib.api.sync_store import PARTITION_KEY_COLUMN
 from edfi_canvas_extractor import extract_facade
 from edfi_canvas_extractor.api import (
     courses as coursesApi,
@@ -17,12 +20,16 @@ from edfi_canvas_extractor.api import (
     students as studentsApi,
     assignments as assignmentsApi,
     authentication_events as authEventsApi,
+    submissions as submissionsApi,
+    enrollments as enrollmentsApi,
 )
 from edfi_canvas_extractor.mapping import (
     sections as sectionsMap,
     users as usersMap,
     assignments as assignmentsMap,
     authentication_events as authEventsMap,
+    submissions as submissionsMap,
+    section_associations as section_associationsMap,
 )
 
 TEST_START_DATE = "2021-01-01"
@@ -199,6 +206,284 @@ def describe_when_extract_submissions_is_called_and_no_submissions_exist():
         assert not system["map"].called
 
 
+def describe_when_extract_submissions_by_course_is_called():
+    @pytest.fixture
+    def system(monkeypatch):
+        requester = Mock(base_url="https://example.instructure.com/api/v1/")
+        course = Mock(id=1, _requester=requester)
+        sections = [Mock(id=10, course_id=1), Mock(id=11, course_id=1)]
+        enrollments = [
+            Mock(user_id=100, course_section_id=10),
+            Mock(user_id=101, course_section_id=11),
+            Mock(user_id=102, course_section_id=10),
+        ]
+        submissions = [
+            Mock(user_id=100),
+            Mock(user_id=101),
+            Mock(user_id=102),
+            Mock(user_id=103),
+        ]
+
+        request = Mock(return_value=submissions)
+        synced: dict = {}
+
+        def sync(section_submissions, session, partition_key):
+            synced[partition_key] = [submission.user_id for submission in section_submissions]
+            return DataFrame({"assignment_id": [5] * len(section_submissions)})
+
+        monkeypatch.setattr(submissionsApi, "request_course_submissions", request)
+        monkeypatch.setattr(submissionsApi, "submissions_synced_in_session", sync)
+        monkeypatch.setattr(submissionsMap, "map_to_udm_submissions", Mock())
+        results = list(
+            extract_facade.extract_submissions_by_course(
+                [course], sections, enrollments, sqlalchemy.create_engine("sqlite://")
+            )
+        )
+        return {"request": request, "synced": synced, "results": results}
+
+    def it_should_request_the_course_once(system: dict):
+        assert system["request"].call_count == 1
+
+    def it_should_split_the_submissions_by_section(system: dict):
+        assert system["synced"] == {"10": [100, 102], "11": [101]}
+
+    def it_should_yield_each_section_and_assignment(system: dict):
+        assert [key for (key, _) in system["results"]] == [("10", "5"), ("11", "5")]
+
+
+def describe_when_extracting_submissions_by_course_for_a_user_in_two_sections():
+    @pytest.fixture
+    def system(monkeypatch, tmp_path):
+        requester = Mock(base_url="https://example.instructure.com/api/v1/")
+        course = Mock(id=1, _requester=requester)
+        sections = [Mock(id=10, course_id=1), Mock(id=11, course_id=1)]
+        enrollments = [
+            Mock(user_id=100, course_section_id=10),
+            Mock(user_id=100, course_section_id=11),
+        ]
+        submission = Submission(
+            requester,
+            {
+                "id": 1,
+                "assignment_id": 5,
+                "user_id": 100,
+                "grade": "A",
+                "late": False,
+                "missing": False,
+                "submitted_at": None,
+                "graded_at": None,
+            },
+        )
+        monkeypatch.setattr(
+            submissionsApi, "request_course_submissions", Mock(return_value=[submission])
+        )
+        sync_db = sqlalchemy.create_engine(f"sqlite:///{tmp_path / 'sync.sqlite'}")
+
+        first_run = dict(
+            extract_facade.extract_submissions_by_course(
+                [course], sections, enrollments, sync_db
+            )
+        )
+        second_run = dict(
+            extract_facade.extract_submissions_by_course(
+                [course], sections, enrollments, sync_db
+            )
+        )
+        return {"first_run": first_run, "second_run": second_run, "sync_db": sync_db}
+
+    def it_should_yield_the_submission_for_both_sections(system: dict):
+        for run in [system["first_run"], system["second_run"]]:
+            assert run[("10", "5")]["SourceSystemIdentifier"].tolist() == ["1"]
+            assert run[("11", "5")]["SourceSystemIdentifier"].tolist() == ["1"]
+
+    def it_should_not_report_the_submission_changed_on_the_next_run(system: dict):
+        for key in [("10", "5"), ("11", "5")]:
+            assert (
+                system["second_run"][key]["LastModifiedDate"].tolist()
+                == system["first_run"][key]["LastModifiedDate"].tolist()
+            )
+
+    def it_should_store_the_submission_for_each_section(system: dict):
+        with system["sync_db"].connect() as con:
+            partitions = [
+                row[0]
+                for row in con.execute(
+                    f"SELECT {PARTITION_KEY_COLUMN} FROM "
+                    f"{submissionsApi.SECTION_SUBMISSIONS_RESOURCE_NAME} "
+                    f"ORDER BY {PARTITION_KEY_COLUMN}"
+                )
+            ]
+        assert partitions == ["10", "11"]
+
+
+def describe_when_extract_submissions_is_called_incrementally():
+    @pytest.fixture
+    def system(monkeypatch, tmp_path):
+        requester = Mock(base_url="https://example.instructure.com/api/v1/")
+        section = Mock(id=10, _requester=requester)
+        sync_db = sqlalchemy.create_engine(f"sqlite:///{tmp_path / 'sync.sqlite'}")
+
+        def submission(id: int, grade: str) -> Submission:
+            return Submission(
+                requester,
+                {
+                    "id": id,
+                    "assignment_id": 5,
+                    "user_id": 100 + id,
+                    "grade": grade,
+                    "late": False,
+                    "missing": False,
+                    "submitted_at": None,
+                    "graded_at": None,
+                },
+            )
+
+        request = Mock(return_value=[submission(1, "A"), submission(2, "B")])
+        request_since = Mock(return_value=[submission(2, "C")])
+        monkeypatch.setattr(submissionsApi, "request_submissions", request)
+        monkeypatch.setattr(submissionsApi, "request_submissions_since", request_since)
+
+        list(extract_facade.extract_submissions([section], sync_db, incremental=True))
+        results = list(
+            extract_facade.extract_submissions([section], sync_db, incremental=True)
+        )
+        return {"request": request, "request_since": request_since, "results": results}
+
+    def it_should_request_every_submission_of_a_section_without_a_watermark(system: dict):
+        assert system["request"].call_count == 1
+
+    def it_should_request_the_changed_submissions_since_the_watermark(system: dict):
+        assert system["request_since"].call_count == 1
+        (_, since) = system["request_since"].call_args[0]
+        assert since.endswith("Z")
+
+    def it_should_merge_the_changed_and_unchanged_submissions(system: dict):
+        [((section_id, assignment_id), submissions_df)] = system["results"]
+        assert (section_id, assignment_id) == ("10", "5")
+        assert dict(
+            zip(submissions_df["SourceSystemIdentifier"], submissions_df["Grade"])
+        ) == {"1": "A", "2": "C"}
+
+
+def describe_when_extracting_a_submission_shared_by_two_sections_incrementally():
+    @pytest.fixture
+    def system(monkeypatch, tmp_path):
+        requester = Mock(base_url="https://example.instructure.com/api/v1/")
+        sections = [Mock(id=10, _requester=requester), Mock(id=11, _requester=requester)]
+        sync_db = sqlalchemy.create_engine(f"sqlite:///{tmp_path / 'sync.sqlite'}")
+
+        def submission(id: int) -> Submission:
+            return Submission(
+                requester,
+                {
+                    "id": id,
+                    "assignment_id": 5,
+                    "user_id": 100 + id,
+                    "grade": "A",
+                    "late": False,
+                    "missing": False,
+                    "submitted_at": None,
+                    "graded_at": None,
+                },
+            )
+
+        submissions_by_section = {10: [submission(1), submission(2)], 11: [submission(1)]}
+        monkeypatch.setattr(
+            submissionsApi,
+            "request_submissions",
+            lambda section: submissions_by_section[section.id],
+        )
+        monkeypatch.setattr(
+            submissionsApi, "request_submissions_since", Mock(return_value=[])
+        )
+
+        list(extract_facade.extract_submissions(sections, sync_db, incremental=True))
+        # the user of submission 2 has since left section 10
+        enrollments = [
+            Mock(user_id=101, course_section_id=10),
+            Mock(user_id=101, course_section_id=11),
+        ]
+        return dict(
+            extract_facade.extract_submissions(
+                sections, sync_db, incremental=True, enrollments=enrollments
+            )
+        )
+
+    def it_should_keep_the_submission_in_both_sections(system: dict):
+        assert system[("10", "5")]["SourceSystemIdentifier"].tolist() == ["1"]
+        assert system[("11", "5")]["SourceSystemIdentifier"].tolist() == ["1"]
+
+
+def describe_when_extract_grades_is_called():
+    @pytest.fixture
+    def results() -> dict:
+        enrollments = [
+            Mock(id=1, type="StudentEnrollment", course_section_id=10, grades={"final_score": 90}),
+            Mock(id=2, type="TeacherEnrollment", course_section_id=10, grades={}),
+            Mock(id=3, type="StudentEnrollment", course_section_id=11, grades={"final_score": 75}),
+            Mock(id=4, type="StudentEnrollment", course_section_id=10, grades={"final_score": 60}),
+        ]
+        udm_enrollments = {
+            "10": DataFrame(
+                {
+                    "SourceSystemIdentifier": ["4", "2", "1"],
+                    "CreateDate": ["c4", "c2", "c1"],
+                    "LastModifiedDate": ["m4", "m2", "m1"],
+                }
+            ),
+            "11": DataFrame(
+                {
+                    "SourceSystemIdentifier": ["3"],
+                    "CreateDate": ["c3"],
+                    "LastModifiedDate": ["m3"],
+                }
+            ),
+        }
+        sections = [Mock(id=10), Mock(id=11), Mock(id=12)]
+        return dict(extract_facade.extract_grades(enrollments, udm_enrollments, sections))
+
+    def it_should_skip_sections_without_enrollments(results: dict):
+        assert list(results) == ["10", "11"]
+
+    def it_should_only_map_student_enrollments(results: dict):
+        assert results["10"]["SourceSystemIdentifier"].tolist() == ["g#1", "g#4"]
+
+    def it_should_join_the_dates_of_each_enrollment(results: dict):
+        grades_df: DataFrame = results["10"]
+        assert grades_df["Grade"].tolist() == [90, 60]
+        assert grades_df["CreateDate"].tolist() == ["c1", "c4"]
+        assert grades_df["LastModifiedDate"].tolist() == ["m1", "m4"]
+        assert results["11"]["CreateDate"].tolist() == ["c3"]
+
+
+def describe_when_extract_enrollments_is_called_with_roster_enrollments():
+    def it_should_not_request_the_enrollments(monkeypatch):
+        request = Mock()
+        monkeypatch.setattr(enrollmentsApi, "request_enrollments_for_section", request)
+        monkeypatch.setattr(
+            enrollmentsApi,
+            "enrollments_synced_in_session",
+            lambda enrollments, session, partition_key: DataFrame(),
+        )
+        monkeypatch.setattr(
+            section_associationsMap, "map_to_udm_section_associations", Mock()
+        )
+        enrollment = Mock(id=1, course_section_id=10)
+
+        results = list(
+            extract_facade.extract_enrollments(
+                [Mock(id=10), Mock(id=11)],
+                sqlalchemy.create_engine("sqlite://"),
+                {10: [enrollment]},
+            )
+        )
+
+        assert not request.called
+        assert [(section_id, enrollments) for (section_id, enrollments, _) in results] == [
+            ("10", [enrollment])
+        ]
+
+
 def describe_when_extract_system_activities_is_called():
     @pytest.fixture
     def system(sync_db_mock):
@@ -227,6 +512,41 @@ def describe_when_extract_system_activities_is_called():
         assert system["map"].called
 
 
+def describe_when_extract_system_activities_is_called_incrementally_in_hash_only_mode():
+    @pytest.fixture
+    def system(monkeypatch):
+        sync_db = sqlalchemy.create_engine("sqlite://")
+        set_payload_mode(sync_db, PAYLOAD_MODES.HASH_ONLY)
+
+        mockAuthEvent = Mock(links={"user": "1"}, event_type="login", created_at="now", id="1")
+        request = Mock(return_value=[mockAuthEvent])
+        last_event_dates = Mock(return_value={})
+        stored_events = Mock(return_value=DataFrame())
+        sync = Mock(return_value=DataFrame())
+        monkeypatch.setattr(authEventsApi, "request_events", request)
+        monkeypatch.setattr(authEventsApi, "last_event_dates", last_event_dates)
+        monkeypatch.setattr(authEventsApi, "stored_events_as_df", stored_events)
+        monkeypatch.setattr(authEventsApi, "authentication_events_synced_as_df", sync)
+        monkeypatch.setattr(authEventsMap, "map_to_udm_system_activities", Mock())
+
+        extract_facade.extract_system_activities([], "", "", sync_db, incremental=True)
+        return {
+            "request": request,
+            "last_event_dates": last_event_dates,
+            "stored_events": stored_events,
+            "sync": sync,
+        }
+
+    def it_should_request_every_event(system: dict):
+        assert not system["last_event_dates"].called
+        (_, _, _, start_dates_by_user) = system["request"].call_args[0]
+        assert start_dates_by_user == {}
+
+    def it_should_not_read_the_stored_events(system: dict):
+        assert not system["stored_events"].called
+        assert system["sync"].called
+
+
 def describe_when_extract_system_activities_is_called_and_no_activities_exist():
     @pytest.fixture
     def system(sync_db_mock):
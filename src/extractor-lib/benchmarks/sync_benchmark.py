@@ -0,0 +1,175 @@
+# SPDX-License-Identifier: Apache-2.0
+# Licensed to the Ed-Fi Alliance under one or more agreements.
+# The Ed-Fi Alliance licenses this file to you under the Apache License, Version 2.0.
+# See the LICENSE and NOTICES files in the project root for more information.
+
+"""
+Compares resource sync throughput across sync database stores and sync engines.
+
+For each row count, each combination runs against a new database: an initial
+sync where every record is new, then a resync of the same records with one
+percent of them changed, which is the typical nightly run.
+
+The sql and hash-diff engines sync the whole resource as one DataFrame. The
+chunked engine streams it in CHUNK_SIZE chunks, generated as they are synced,
+so it is the one to use for row counts which do not fit in memory more than once.
+
+Usage: python benchmarks/sync_benchmark.py --rows 10000 1000000 --engines sql hash-diff
+       python benchmarks/sync_benchmark.py --rows 10000000 --engines chunked
+"""
+
+import argparse
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Callable, Dict, Iterator, List
+
+from pandas import DataFrame, concat
+from sqlalchemy import create_engine
+
+from edfi_lms_extractor_lib.api.resource_sync import (
+    cleanup_after_sync,
+    set_hash_workers,
+    sync_chunks_to_db_without_cleanup,
+    sync_to_db_with_hash_diff,
+    sync_to_db_without_cleanup,
+)
+from edfi_lms_extractor_lib.api.sync_store import (
+    SYNC_DB_FILE_NAME,
+    SYNC_STORES,
+    SQLiteSyncStore,
+    SyncStore,
+    get_sync_store,
+)
+
+RESOURCE_NAME = "Benchmark"
+
+CHUNK_SIZE = 100_000
+
+STORES: Dict[str, Callable[[str], SyncStore]] = {
+    "sqlite-default": lambda directory: SQLiteSyncStore(
+        create_engine(f"sqlite:///{directory}/{SYNC_DB_FILE_NAME}")
+    ),
+    "sqlite-tuned": lambda directory: get_sync_store(directory, SYNC_STORES.SQLITE),
+    "duckdb": lambda directory: get_sync_store(directory, SYNC_STORES.DUCKDB),
+}
+
+
+def _generate_chunk(start: int, stop: int, changed: bool) -> DataFrame:
+    chunk_df = DataFrame(
+        {
+            "id": [str(i) for i in range(start, stop)],
+            "user_id": [f"u{i % 5000}" for i in range(start, stop)],
+            "workflow_state": "graded",
+            "score": [str(i % 100) for i in range(start, stop)],
+            "submitted_at": "2021-03-01T12:00:00Z",
+        }
+    )
+    if changed:
+        # one percent of the records
+        chunk_df.loc[range(-start % 100, stop - start, 100), "workflow_state"] = "submitted"
+    return chunk_df
+
+
+def _generate_chunks(rows: int, changed: bool) -> Iterator[DataFrame]:
+    for start in range(0, rows, CHUNK_SIZE):
+        yield _generate_chunk(start, min(start + CHUNK_SIZE, rows), changed)
+
+
+def _sql_sync(rows: int, changed: bool, sync_store: SyncStore) -> Callable[[], None]:
+    resource_df: DataFrame = concat(_generate_chunks(rows, changed), ignore_index=True)
+
+    def sync():
+        sync_to_db_without_cleanup(resource_df, ["id"], RESOURCE_NAME, sync_store)
+        cleanup_after_sync(RESOURCE_NAME, sync_store)
+
+    return sync
+
+
+def _hash_diff_sync(rows: int, changed: bool, sync_store: SyncStore) -> Callable[[], None]:
+    resource_df: DataFrame = concat(_generate_chunks(rows, changed), ignore_index=True)
+
+    def sync():
+        sync_to_db_with_hash_diff(resource_df, ["id"], RESOURCE_NAME, sync_store)
+
+    return sync
+
+
+def _chunked_sync(rows: int, changed: bool, sync_store: SyncStore) -> Callable[[], None]:
+    def sync():
+        for _ in sync_chunks_to_db_without_cleanup(
+            _generate_chunks(rows, changed), ["id"], RESOURCE_NAME, sync_store
+        ):
+            pass
+        cleanup_after_sync(RESOURCE_NAME, sync_store)
+
+    return sync
+
+
+# each prepares a sync of the given number of rows, outside of the timing
+ENGINES: Dict[str, Callable[[int, bool, SyncStore], Callable[[], None]]] = {
+    "sql": _sql_sync,
+    "hash-diff": _hash_diff_sync,
+    "chunked": _chunked_sync,
+}
+
+
+def _time(callback: Callable[[], None]) -> float:
+    start = perf_counter()
+    callback()
+    return perf_counter() - start
+
+
+def run(row_counts: List[int], store_names: List[str], engine_names: List[str], hash_workers: int):
+    set_hash_workers(hash_workers)
+    print(f"{'rows':>10} {'store':>15} {'engine':>10} {'initial (s)':>12} {'resync (s)':>11} {'rows/s':>10}")
+
+    for rows in row_counts:
+        for store_name in store_names:
+            for engine_name in engine_names:
+                with TemporaryDirectory() as directory:
+                    sync_store: SyncStore = STORES[store_name](directory)
+                    prepare_sync = ENGINES[engine_name]
+
+                    initial = _time(prepare_sync(rows, False, sync_store))
+                    resync = _time(prepare_sync(rows, True, sync_store))
+
+                    sync_store.dispose()
+
+                print(
+                    f"{rows:>10} {store_name:>15} {engine_name:>10} "
+                    f"{initial:>12.2f} {resync:>11.2f} {rows / resync:>10.0f}",
+                    flush=True,
+                )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--rows",
+        type=int,
+        nargs="+",
+        default=[10_000, 1_000_000, 10_000_000],
+        help="the row counts to benchmark",
+    )
+    parser.add_argument(
+        "--stores",
+        nargs="+",
+        choices=list(STORES),
+        default=list(STORES),
+        help="the sync stores to benchmark",
+    )
+    parser.add_argument(
+        "--engines",
+        nargs="+",
+        choices=list(ENGINES),
+        default=list(ENGINES),
+        help="the sync engines to benchmark",
+    )
+    parser.add_argument(
+        "--hash-workers",
+        type=int,
+        default=1,
+        help="the number of processes for hashing each resource frame",
+    )
+    arguments = parser.parse_args()
+    run(arguments.rows, arguments.stores, arguments.engines, arguments.hash_workers)
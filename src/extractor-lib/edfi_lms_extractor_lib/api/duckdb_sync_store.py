@@ -0,0 +1,495 @@
+# SPDX-License-Identifier: Apache-2.0
+# Licensed to the Ed-Fi Alliance under one or more agreements.
+# The Ed-Fi Alliance licenses this file to you under the Apache License, Version 2.0.
+# See the LICENSE and NOTICES files in the project root for more information.
+
+from importlib.util import find_spec
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from pandas import DataFrame, Series
+
+from edfi_lms_extractor_lib.api.sync_store import (
+    PARTITION_KEY_COLUMN,
+    SETTINGS_TABLE_NAME,
+    SYNC_COLUMNS,
+    WATERMARKS_TABLE_NAME,
+    SyncStore,
+    SyncStoreConnection,
+)
+
+DUCKDB_SYNC_DB_FILE_NAME = "sync.duckdb"
+
+# The dates are kept as text, as SQLite keeps them, so that they read back the
+# same whichever store a record came from. DuckDB compresses each column itself.
+# There is no primary key: the compares are hash joins over whole columns, and
+# the SourceId index a key would add only slows down the bulk writes.
+DUCKDB_SYNC_COLUMNS_SQL = f"""
+    SourceId VARCHAR,
+    Json VARCHAR,
+    Hash VARCHAR,
+    CreateDate VARCHAR,
+    LastModifiedDate VARCHAR,
+    SyncNeeded BIGINT,
+    {PARTITION_KEY_COLUMN} VARCHAR
+    """
+
+ALL_SYNC_COLUMNS = ", ".join([*SYNC_COLUMNS, PARTITION_KEY_COLUMN])
+
+# the number of rows in each vector returned by fetch_df_chunk
+DUCKDB_VECTOR_SIZE = 2048
+
+# the name DataFrames are registered under while they are written
+REGISTERED_DF_NAME = "FetchedRecords"
+
+
+class DuckDBSyncStoreConnection(SyncStoreConnection):
+    """
+    A connection to a DuckDB sync database. See DuckDBSyncStore.
+    """
+
+    def __init__(self, connection):
+        """
+        Parameters
+        ----------
+        connection: duckdb.DuckDBPyConnection
+            an open database connection
+        """
+        self._connection = connection
+
+    def close(self):
+        self._connection.close()
+
+    def begin(self):
+        self._connection.begin()
+
+    def commit(self):
+        self._connection.commit()
+
+    def rollback(self):
+        self._connection.rollback()
+
+    def _execute(self, sql: str, parameters: Optional[list] = None):
+        return self._connection.execute(sql, parameters)
+
+    def _read(self, sql: str, parameters: Optional[list] = None) -> DataFrame:
+        return self._connection.execute(sql, parameters).fetchdf()
+
+    def _execute_with_df(self, sql: str, df: DataFrame, parameters: Optional[list] = None):
+        """
+        Run a statement which reads a DataFrame by its registered name, so that
+        DuckDB scans its columns directly rather than binding a parameter per value.
+        """
+        self._connection.register(REGISTERED_DF_NAME, df)
+        try:
+            self._execute(sql, parameters)
+        finally:
+            self._connection.unregister(REGISTERED_DF_NAME)
+
+    def table_exists(self, table_name: str) -> bool:
+        return (
+            self._execute(
+                "SELECT table_name FROM information_schema.tables WHERE table_name = ?",
+                [table_name],
+            ).fetchone()
+            is not None
+        )
+
+    def resource_table_names(self) -> List[str]:
+        return [
+            row[0]
+            for row in self._execute(
+                """
+                SELECT table_name FROM information_schema.columns
+                WHERE column_name IN ('SourceId', 'Json', 'Hash')
+                AND NOT starts_with(table_name, 'Sync_')
+                AND NOT starts_with(table_name, 'Unmatched_')
+                GROUP BY table_name
+                HAVING COUNT(*) = 3
+                """
+            ).fetchall()
+        ]
+
+    def ensure_resource_table(self, resource_name: str):
+        self._execute(f"CREATE TABLE IF NOT EXISTS {resource_name} ({DUCKDB_SYNC_COLUMNS_SQL})")
+
+    def create_staging_table(self, resource_name: str):
+        self._execute(f"CREATE OR REPLACE TABLE Sync_{resource_name} ({DUCKDB_SYNC_COLUMNS_SQL})")
+
+    def clear_staging_table(self, resource_name: str):
+        self._execute(f"DELETE FROM Sync_{resource_name}")
+
+    def stage_records(self, resource_name: str, records_df: DataFrame):
+        self._execute_with_df(
+            f"""
+            INSERT INTO Sync_{resource_name}
+            SELECT
+                CAST(SourceId AS VARCHAR),
+                CAST(Json AS VARCHAR),
+                Hash,
+                CAST(CreateDate AS VARCHAR),
+                CAST(LastModifiedDate AS VARCHAR),
+                SyncNeeded,
+                CAST({PARTITION_KEY_COLUMN} AS VARCHAR)
+            FROM {REGISTERED_DF_NAME}
+            """,
+            records_df,
+        )
+
+    def compare_staged_records(
+        self,
+        resource_name: str,
+        partition_key: Optional[str] = None,
+        reuse_table: bool = False,
+    ) -> Tuple[int, int]:
+        # stored records always count as the SyncNeeded = 0 side, even if a flag
+        # was left behind by an interrupted sync
+        existing_records_sql = (
+            "SELECT SourceId, Json, Hash, CreateDate, LastModifiedDate, 0 AS SyncNeeded, "
+            f"{PARTITION_KEY_COLUMN} FROM {resource_name}"
+        )
+        parameters: list = []
+        if partition_key is not None:
+            existing_records_sql += f"""
+                WHERE {PARTITION_KEY_COLUMN} = ?
+                OR SourceId IN (SELECT SourceId FROM Sync_{resource_name})
+                """
+            parameters = [partition_key]
+
+        unmatched_records_sql = f"""
+            SELECT {ALL_SYNC_COLUMNS} FROM (
+                SELECT *, COUNT(*) OVER (PARTITION BY SourceId, Hash) AS Versions
+                FROM (
+                    {existing_records_sql}
+                    UNION ALL
+                    SELECT {ALL_SYNC_COLUMNS} FROM Sync_{resource_name}
+                )
+            )
+            WHERE Versions = 1
+            """
+        self._execute(
+            f"CREATE OR REPLACE TABLE Unmatched_{resource_name} AS {unmatched_records_sql}",
+            parameters,
+        )
+
+        # a fetched record is unmatched once if new, and twice (old and new hash) if changed
+        (new, changed) = self._execute(
+            f"""
+            SELECT
+                COUNT(*) FILTER (WHERE UnmatchedCount = 1),
+                COUNT(*) FILTER (WHERE UnmatchedCount > 1)
+            FROM (
+                SELECT COUNT(*) AS UnmatchedCount
+                FROM Unmatched_{resource_name}
+                GROUP BY SourceId
+                HAVING MAX(SyncNeeded) = 1
+            )
+            """
+        ).fetchone()
+        return int(new), int(changed)
+
+    def reconcile_create_dates(self, resource_name: str):
+        self._execute(
+            f"""
+            UPDATE Unmatched_{resource_name}
+            SET CreateDate = c.CreateDate
+            FROM {resource_name} c
+            WHERE c.SourceId = Unmatched_{resource_name}.SourceId
+            AND Unmatched_{resource_name}.SyncNeeded = 1
+            """
+        )
+
+    def apply_staged_changes(self, resource_name: str, partition_key: Optional[str] = None):
+        # every unmatched fetched record is either new or changed, so replace them all
+        self._execute(
+            f"""
+            DELETE FROM {resource_name}
+            WHERE SourceId IN (
+                SELECT SourceId FROM Unmatched_{resource_name} WHERE SyncNeeded = 1
+            )
+            """
+        )
+        self._execute(
+            f"""
+            INSERT INTO {resource_name}
+            SELECT {ALL_SYNC_COLUMNS} FROM Unmatched_{resource_name} WHERE SyncNeeded = 1
+            """
+        )
+        self.reset_sync_needed(resource_name)
+
+        # unchanged records fetched in a different partition than they were synced
+        # with, e.g. a student changing sections, move to the new partition
+        self._execute(
+            f"""
+            UPDATE {resource_name}
+            SET {PARTITION_KEY_COLUMN} = ?
+            WHERE SourceId IN (SELECT SourceId FROM Sync_{resource_name})
+            AND {PARTITION_KEY_COLUMN} IS DISTINCT FROM ?
+            """,
+            [partition_key, partition_key],
+        )
+
+        # copy the reconciled dates onto the staging table once, so that reading
+        # them back a chunk at a time does not join the whole main table per chunk
+        self._execute(
+            f"""
+            UPDATE Sync_{resource_name}
+            SET CreateDate = c.CreateDate, LastModifiedDate = c.LastModifiedDate
+            FROM {resource_name} c
+            WHERE c.SourceId = Sync_{resource_name}.SourceId
+            """
+        )
+
+    def read_staged_dates(
+        self, resource_name: str, after_row: int = 0, row_count: Optional[int] = None
+    ) -> DataFrame:
+        # DuckDB rowids start from 0, and SyncRowIds from 1 as in SQLite
+        limit_sql: str = "" if row_count is None else f"LIMIT {int(row_count)}"
+        return self._read(
+            f"""
+            SELECT rowid + 1 AS SyncRowId, SourceId, CreateDate, LastModifiedDate
+            FROM Sync_{resource_name}
+            WHERE rowid >= ?
+            ORDER BY rowid
+            {limit_sql}
+            """,
+            [after_row],
+        )
+
+    def read_staged_change_counts(self, resource_name: str) -> Series:
+        return self._read(
+            f"""
+            SELECT SourceId, COUNT(*) AS UnmatchedCount
+            FROM Unmatched_{resource_name}
+            WHERE SourceId IN (SELECT SourceId FROM Sync_{resource_name})
+            GROUP BY SourceId
+            """
+        ).set_index("SourceId")["UnmatchedCount"]
+
+    def read_missing_payloads(
+        self, resource_name: str, partition_key: Optional[str] = None
+    ) -> DataFrame:
+        missing_sql = f"""
+            SELECT Json, CreateDate, LastModifiedDate
+            FROM {resource_name}
+            WHERE SourceId NOT IN (SELECT SourceId FROM Sync_{resource_name})
+            """
+        parameters: list = []
+        if partition_key is not None:
+            missing_sql += f" AND {PARTITION_KEY_COLUMN} = ?"
+            parameters = [partition_key]
+
+        return self._read(missing_sql, parameters)
+
+    def drop_staging_tables(self, resource_name: str):
+        self._execute(f"DROP TABLE IF EXISTS Sync_{resource_name}")
+        self._execute(f"DROP TABLE IF EXISTS Unmatched_{resource_name}")
+
+    def read_stored_hashes(
+        self,
+        resource_name: str,
+        source_ids: Series,
+        partition_key: Optional[str] = None,
+    ) -> DataFrame:
+        select_sql = (
+            f"SELECT SourceId, Hash, CreateDate, LastModifiedDate, {PARTITION_KEY_COLUMN} "
+            f"FROM {resource_name}"
+        )
+        if partition_key is None:
+            return self._read(select_sql).set_index("SourceId")
+
+        # records can move between partitions, e.g. a student changing sections
+        self._connection.register(
+            REGISTERED_DF_NAME, DataFrame({"SourceId": source_ids.astype(str)})
+        )
+        try:
+            existing_df: DataFrame = self._read(
+                f"""
+                {select_sql}
+                WHERE {PARTITION_KEY_COLUMN} = ?
+                OR SourceId IN (SELECT SourceId FROM {REGISTERED_DF_NAME})
+                """,
+                [partition_key],
+            )
+        finally:
+            self._connection.unregister(REGISTERED_DF_NAME)
+        return existing_df.set_index("SourceId")
+
+    def upsert_records(self, resource_name: str, records_df: DataFrame):
+        self._execute_with_df(
+            f"""
+            DELETE FROM {resource_name}
+            WHERE SourceId IN (SELECT CAST(SourceId AS VARCHAR) FROM {REGISTERED_DF_NAME})
+            """,
+            records_df,
+        )
+        self._execute_with_df(
+            f"""
+            INSERT INTO {resource_name}
+            SELECT
+                CAST(SourceId AS VARCHAR),
+                CAST(Json AS VARCHAR),
+                Hash,
+                CAST(CreateDate AS VARCHAR),
+                CAST(LastModifiedDate AS VARCHAR),
+                SyncNeeded,
+                CAST({PARTITION_KEY_COLUMN} AS VARCHAR)
+            FROM {REGISTERED_DF_NAME}
+            """,
+            records_df,
+        )
+
+    def move_records_to_partition(
+        self, resource_name: str, source_ids: List[str], partition_key: Optional[str]
+    ):
+        if len(source_ids) == 0:
+            return
+
+        self._execute_with_df(
+            f"""
+            UPDATE {resource_name}
+            SET {PARTITION_KEY_COLUMN} = ?
+            WHERE SourceId IN (SELECT SourceId FROM {REGISTERED_DF_NAME})
+            """,
+            DataFrame({"SourceId": source_ids}),
+            [partition_key],
+        )
+
+    def reset_sync_needed(self, resource_name: str):
+        self._execute(f"UPDATE {resource_name} SET SyncNeeded = 0 WHERE SyncNeeded != 0")
+
+    def read_stored_payloads(
+        self, resource_name: str, partition_key: Optional[str] = None
+    ) -> DataFrame:
+        stored_sql = f"SELECT Json, CreateDate, LastModifiedDate FROM {resource_name}"
+        parameters: list = []
+        if partition_key is not None:
+            stored_sql += f" WHERE {PARTITION_KEY_COLUMN} = ?"
+            parameters = [partition_key]
+
+        return self._read(stored_sql, parameters)
+
+    def read_stored_payload_chunks(
+        self, resource_name: str, chunk_size: int
+    ) -> Iterator[DataFrame]:
+        self._execute(
+            f"SELECT SourceId, Json, CreateDate, LastModifiedDate FROM {resource_name}"
+        )
+        while True:
+            chunk_df: DataFrame = self._connection.fetch_df_chunk(
+                -(-chunk_size // DUCKDB_VECTOR_SIZE)
+            )
+            if chunk_df.empty:
+                return
+            yield chunk_df
+
+    def read_source_ids(self, resource_name: str) -> Series:
+        return self._read(f"SELECT SourceId FROM {resource_name}")["SourceId"]
+
+    def read_setting(self, name: str) -> Optional[str]:
+        if not self.table_exists(SETTINGS_TABLE_NAME):
+            return None
+
+        row = self._execute(
+            f"SELECT Value FROM {SETTINGS_TABLE_NAME} WHERE Name = ?", [name]
+        ).fetchone()
+        return None if row is None else row[0]
+
+    def write_setting(self, name: str, value: str):
+        self._execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {SETTINGS_TABLE_NAME} (
+                Name VARCHAR PRIMARY KEY,
+                Value VARCHAR
+            )
+            """
+        )
+        self._execute(f"INSERT OR REPLACE INTO {SETTINGS_TABLE_NAME} VALUES (?, ?)", [name, value])
+
+    def read_watermarks(self, resource_name: str) -> Dict[str, str]:
+        if not self.table_exists(WATERMARKS_TABLE_NAME):
+            return {}
+
+        return {
+            row[0]: row[1]
+            for row in self._execute(
+                f"SELECT PartitionKey, Watermark FROM {WATERMARKS_TABLE_NAME} WHERE ResourceName = ?",
+                [resource_name],
+            ).fetchall()
+        }
+
+    def write_watermark(self, resource_name: str, partition_key: str, watermark: str):
+        self._execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {WATERMARKS_TABLE_NAME} (
+                ResourceName VARCHAR,
+                PartitionKey VARCHAR,
+                Watermark VARCHAR,
+                PRIMARY KEY (ResourceName, PartitionKey)
+            )
+            """
+        )
+        self._execute(
+            f"INSERT OR REPLACE INTO {WATERMARKS_TABLE_NAME} VALUES (?, ?, ?)",
+            [resource_name, partition_key, watermark],
+        )
+
+    def clear_payloads(self, table_name: str):
+        self._execute(f"UPDATE {table_name} SET Json = NULL WHERE Json IS NOT NULL")
+
+    def read_payload_batch(
+        self, table_name: str, compressed: bool, batch_size: int
+    ) -> List[Tuple[Any, Any]]:
+        if compressed:
+            # Json is never stored compressed, see DuckDBSyncStore
+            return []
+
+        raise ValueError("DuckDB sync stores do not support compressed payloads")
+
+    def write_payloads(self, table_name: str, payloads: List[Tuple[Any, Any]]):
+        raise ValueError("DuckDB sync stores do not support compressed payloads")
+
+    def compact(self):
+        self._execute("CHECKPOINT")
+
+
+class DuckDBSyncStore(SyncStore):
+    """
+    A sync store in a DuckDB file. DuckDB stores each column compressed and runs
+    the sync compares as vectorized hash joins, so a sync of a large resource
+    does less work per record than in SQLite, and fetched DataFrames are written
+    by scanning their columns rather than a statement per row.
+
+    The Json payload is stored as text or not at all. The compressed payload mode
+    is not supported, as DuckDB already compresses the column.
+
+    A DuckDB file can be opened for writing by only one process at a time.
+    """
+
+    supports_compressed_payloads = False
+
+    def __init__(self, database_path: str):
+        """
+        Parameters
+        ----------
+        database_path: str
+            the path to the DuckDB file, which will be created if necessary
+
+        Raises
+        ------
+        ImportError
+            if the duckdb package is not installed
+        """
+        if find_spec("duckdb") is None:
+            raise ImportError("The DuckDB sync store requires the duckdb package to be installed")
+
+        import duckdb
+
+        self._database = duckdb.connect(database_path)
+
+    def connect(self) -> DuckDBSyncStoreConnection:
+        # each cursor is a separate connection to the same database, with its own
+        # transaction, and can be used by another thread
+        return DuckDBSyncStoreConnection(self._database.cursor())
+
+    def dispose(self):
+        self._database.close()
@@ -0,0 +1,169 @@
+# SPDX-License-Identifier: Apache-2.0
+# Licensed to the Ed-Fi Alliance under one or more agreements.
+# The Ed-Fi Alliance licenses this file to you under the Apache License, Version 2.0.
+# See the LICENSE and NOTICES files in the project root for more information.
+
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+import logging
+from threading import BoundedSemaphore, Lock
+from typing import Callable, Deque, Dict, Iterable, Iterator, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+# The number of requests made to one API host at a time, across every fetch
+# worker, see set_fetch_workers
+DEFAULT_REQUESTS_PER_HOST = 4
+
+# How many fetches each worker can run ahead of the consumer of the results,
+# which bounds the memory held by fetched records waiting to be synced
+FETCHES_AHEAD_PER_WORKER = 2
+
+Item = TypeVar("Item")
+Result = TypeVar("Result")
+
+
+class HostLimiter:
+    """
+    Limits the number of requests made to each API host at a time, so that
+    concurrent fetches stay within the host's throttling.
+
+    Usage
+    -----
+        with host_limiter.limit("example.instructure.com"):
+            records = list(section.get_enrollments())
+    """
+
+    def __init__(self, requests_per_host: int = DEFAULT_REQUESTS_PER_HOST):
+        """
+        Parameters
+        ----------
+        requests_per_host: int
+            the number of requests made to one host at a time
+        """
+        assert requests_per_host > 0, "The requests per host must be positive"
+
+        self._requests_per_host = requests_per_host
+        self._lock = Lock()
+        self._semaphores: Dict[str, BoundedSemaphore] = {}
+
+    @property
+    def requests_per_host(self) -> int:
+        return self._requests_per_host
+
+    @contextmanager
+    def limit(self, host: str) -> Iterator[None]:
+        """
+        Block until a request to the host is allowed, then hold it for the with block
+
+        Parameters
+        ----------
+        host: str
+            the host, e.g. the netloc of the API base url
+        """
+        with self._lock:
+            semaphore = self._semaphores.setdefault(
+                host, BoundedSemaphore(self._requests_per_host)
+            )
+        with semaphore:
+            yield
+
+
+_fetch_workers: int = 1
+_host_limiter: HostLimiter = HostLimiter()
+
+
+def set_fetch_workers(workers: int, requests_per_host: int = DEFAULT_REQUESTS_PER_HOST):
+    """
+    Set the number of threads used to fetch the records of each section
+    concurrently, and the number of requests made to one API host at a time.
+    1 worker, the default, fetches one section at a time.
+
+    Parameters
+    ----------
+    workers: int
+        the number of fetch threads
+    requests_per_host: int
+        the number of requests made to one host at a time, across every thread
+    """
+    assert workers > 0, "The fetch workers must be positive"
+
+    global _fetch_workers, _host_limiter
+    _fetch_workers = workers
+    _host_limiter = HostLimiter(requests_per_host)
+
+
+def get_fetch_workers() -> int:
+    """
+    Get the number of threads used to fetch the records of each section
+
+    Returns
+    -------
+    int
+        the number of fetch threads
+    """
+    return _fetch_workers
+
+
+def get_host_limiter() -> HostLimiter:
+    """
+    Get the limiter of the requests made to each API host
+
+    Returns
+    -------
+    HostLimiter
+        the limiter
+    """
+    return _host_limiter
+
+
+def fetch_concurrently(
+    items: Iterable[Item],
+    fetch: Callable[[Item], Result],
+    workers: int = 1,
+) -> Iterator[Tuple[Item, Result]]:
+    """
+    Fetch the results of a series of items, such as the records of each section,
+    on a pool of threads, yielding them in the order of the items. Only a few
+    fetches per worker run ahead of the consumer, so that the consumer can sync
+    and write each result, serially, while the next ones are fetched.
+
+    With 1 worker, each item is fetched in the calling thread as it is consumed.
+
+    Parameters
+    ----------
+    items: Iterable[Item]
+        the items to fetch
+    fetch: Callable[[Item], Result]
+        a function fetching the result of one item, which must be thread safe
+    workers: int
+        the number of fetch threads
+
+    Returns
+    -------
+    Iterator[Tuple[Item, Result]]
+        item/result pairs. An exception fetching an item is raised when its
+        result is reached.
+    """
+    if workers <= 1:
+        for item in items:
+            yield (item, fetch(item))
+        return
+
+    pending: Deque[Tuple[Item, Future]] = deque()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fetch") as executor:
+        try:
+            for item in items:
+                pending.append((item, executor.submit(fetch, item)))
+                if len(pending) >= workers * FETCHES_AHEAD_PER_WORKER:
+                    (next_item, future) = pending.popleft()
+                    yield (next_item, future.result())
+
+            while pending:
+                (next_item, future) = pending.popleft()
+                yield (next_item, future.result())
+        finally:
+            # when the consumer stops early, don't start the fetches still queued
+            for (_, future) in pending:
+                future.cancel()
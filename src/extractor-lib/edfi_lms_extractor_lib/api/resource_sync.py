@@ -3,55 +3,163 @@
 # The Ed-Fi Alliance licenses this file to you under the Apache License, Version 2.0.
 # See the LICENSE and NOTICES files in the project root for more information.
 
+from concurrent.futures import ProcessPoolExecutor
 import logging
 from datetime import datetime
-from typing import List
-from pandas import DataFrame, Series, read_sql_query, to_datetime
-import sqlalchemy
+from io import StringIO
+import os
+from tempfile import TemporaryDirectory
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+from pandas import DataFrame, Series, concat, read_json, read_pickle, to_datetime
 import xxhash
 
+from edfi_lms_extractor_lib.api.sync_metrics import (
+    SYNC_PHASES,
+    SyncMetrics,
+    report_sync_metrics,
+    timed_phase,
+)
+from edfi_lms_extractor_lib.api.sync_payload import (
+    PAYLOAD_MODES,
+    decode_payloads,
+    encode_payloads,
+    get_payload_mode,
+)
+from edfi_lms_extractor_lib.api.sync_store import (  # noqa: F401 SYNC_COLUMNS_SQL is used by extractor tests
+    PARTITION_KEY_COLUMN,
+    SYNC_COLUMNS,
+    SYNC_COLUMNS_SQL,
+    SyncDb,
+    SyncStoreConnection,
+    as_sync_store,
+)
+
 logger = logging.getLogger(__name__)
 
 DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
 
-SYNC_COLUMNS = [
-    "SourceId",
-    "Json",
-    "Hash",
-    "CreateDate",
-    "LastModifiedDate",
-    "SyncNeeded",
-]
+# the format SQLAlchemy uses when storing a datetime in a SQLite DATETIME column
+SQLITE_DATE_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+# Optional column classifying each synced record, see CHANGE_TYPES
+CHANGE_TYPE_COLUMN = "SyncChangeType"
+
+
+class CHANGE_TYPES:
+    NEW = "New"
+    CHANGED = "Changed"
+    UNCHANGED = "Unchanged"
+    DELETED = "Deleted"
+
+
+# Frames smaller than this are always hashed in-process, as the cost of sending
+# shards to worker processes outweighs the parallel speedup
+PARALLEL_HASH_MIN_ROWS = 100000
+
+# The number of processes used to serialize and hash large frames, see set_hash_workers
+_hash_workers: int = 1
+
+
+def set_hash_workers(workers: int):
+    """
+    Set the number of processes used to serialize and hash each large resource
+    frame before syncing. 1, the default, hashes in-process.
+
+    Parameters
+    ----------
+    workers: int
+        the number of worker processes
+    """
+    assert workers >= 1, "The number of hash workers must be at least 1"
 
-SYNC_COLUMNS_SQL = """
-    SourceId TEXT,
-    Json TEXT,
-    Hash TEXT,
-    CreateDate DATETIME,
-    LastModifiedDate DATETIME,
-    SyncNeeded BIGINT,
-    PRIMARY KEY (SourceId)
+    global _hash_workers
+    _hash_workers = workers
+
+
+def get_hash_workers() -> int:
     """
+    Get the number of processes used to serialize and hash large resource frames
+
+    Returns
+    -------
+    int
+        the number of worker processes
+    """
+    return _hash_workers
 
 
-def _json_hash_encode(row: Series) -> Series:
+def _to_json_strings(df: DataFrame) -> List[str]:
     """
-    Take a DataFrame row, add serialized JSON and hash
+    Serialize each DataFrame row to JSON in a single pass over the whole DataFrame.
+
+    The output is identical to calling `to_json()` on each row Series, which
+    is what previous versions did. A row Series has the common dtype of all
+    of the columns, so the columns are converted to that dtype before
+    serializing, e.g. an int column is written as a float when it shares the
+    DataFrame with a float column.
 
     Parameters
     ----------
-    row: Series
-        a DataFrame row
+    df: DataFrame
+        a non-empty DataFrame
 
     Returns
     -------
-    Series
-        the row with the json and hash columns added
+    List[str]
+        the serialized JSON for each row, in row order
     """
-    json = row.to_json()
-    row["Json"] = json
-    row["Hash"] = xxhash.xxh64_hexdigest(json.encode("utf-8"))
-    return row
+    row_dtype = df.iloc[0].dtype
+    json_lines: str = df.astype(row_dtype).to_json(orient="records", lines=True)
+
+    # JSON escapes newlines inside of strings, so each line is exactly one row
+    return json_lines.rstrip("\n").split("\n")
+
+
+def _hash_json_strings(json_strings: List[str]) -> List[str]:
+    return [xxhash.xxh64_hexdigest(json.encode("utf-8")) for json in json_strings]
+
+
+def _json_and_hashes_for_shard(shard: DataFrame) -> Tuple[List[str], List[str]]:
+    json_strings: List[str] = _to_json_strings(shard)
+    return json_strings, _hash_json_strings(json_strings)
+
+
+def _parallel_json_and_hashes(
+    df: DataFrame, workers: int
+) -> Tuple[List[str], List[str]]:
+    """
+    Serialize and hash DataFrame rows in shards across worker processes,
+    with the same output as doing so in-process.
+
+    Parameters
+    ----------
+    df: DataFrame
+        a non-empty DataFrame
+    workers: int
+        the number of worker processes
+
+    Returns
+    -------
+    Tuple[List[str], List[str]]
+        the serialized JSON and the hash for each row, in row order
+    """
+    # convert to the whole frame's row dtype first, so that each shard serializes
+    # its columns exactly as the whole frame would
+    typed_df: DataFrame = df.astype(df.iloc[0].dtype)
+    shard_size: int = -(-len(typed_df) // workers)
+    shards: List[DataFrame] = [
+        typed_df.iloc[start:start + shard_size]
+        for start in range(0, len(typed_df), shard_size)
+    ]
+
+    json_strings: List[str] = []
+    hashes: List[str] = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # map returns results in shard order
+        for shard_json, shard_hashes in executor.map(_json_and_hashes_for_shard, shards):
+            json_strings.extend(shard_json)
+            hashes.extend(shard_hashes)
+    return json_strings, hashes
 
 
 def add_hash_and_json_to(df: DataFrame) -> DataFrame:
@@ -69,7 +177,24 @@ def add_hash_and_json_to(df: DataFrame) -> DataFrame:
     DataFrame
         a new DataFrame with the json and hash columns added
     """
-    return df.apply(_json_hash_encode, axis=1)
+    result_df: DataFrame = df.copy()
+    if df.empty:
+        result_df["Json"] = Series(dtype="object")
+        result_df["Hash"] = Series(dtype="object")
+        return result_df
+
+    json_strings: List[str]
+    hashes: List[str]
+    if _hash_workers > 1 and len(df) >= PARALLEL_HASH_MIN_ROWS:
+        logger.debug("Hashing %d rows with %d processes", len(df), _hash_workers)
+        (json_strings, hashes) = _parallel_json_and_hashes(df, _hash_workers)
+    else:
+        json_strings = _to_json_strings(df)
+        hashes = _hash_json_strings(json_strings)
+
+    result_df["Json"] = json_strings
+    result_df["Hash"] = hashes
+    return result_df
 
 
 def add_sourceid_to(df: DataFrame, identity_columns: List[str]):
@@ -88,17 +213,26 @@ def add_sourceid_to(df: DataFrame, identity_columns: List[str]):
     ), "Identity columns missing from dataframe"
 
     df[identity_columns] = df[identity_columns].astype("string")
-    df["SourceId"] = df[sorted(identity_columns)].agg("-".join, axis=1)
+
+    (first_column, *other_columns) = sorted(identity_columns)
+    df["SourceId"] = df[first_column].str.cat(
+        [df[column] for column in other_columns], sep="-"
+    )
+    assert df["SourceId"].notna().all(), "Identity columns have missing values"
 
 
-def _create_sync_table_from_resource_df(
+def _append_to_sync_table(
     resource_df: DataFrame,
     identity_columns: List[str],
     resource_name: str,
-    sync_db: sqlalchemy.engine.base.Engine,
+    con: SyncStoreConnection,
+    now: datetime,
+    payload_mode: str,
+    partition_key: Optional[str] = None,
+    metrics: Optional[SyncMetrics] = None,
 ):
     """
-    Take fetched data and push to a new temporary sync table.  Includes
+    Push fetched data to the temporary sync table.  Includes
     hash and tentative extractor CreateDate/LastModifiedDates.
 
     Parameters
@@ -109,268 +243,563 @@ def _create_sync_table_from_resource_df(
         a List of the identity columns for the resource dataframe.
     resource_name: str
         the name of the API resource, e.g. "Courses", to be used in SQL
-    sync_db: sqlalchemy.engine.base.Engine
-        an Engine instance for creating database connections
-    """
-    with sync_db.connect() as con:
-        # ensure sync table exists, need column ordering to be identical to regular table
-        con.execute(f"DROP TABLE IF EXISTS Sync_{resource_name}")
-        con.execute(
-            f"""
-            CREATE TABLE IF NOT EXISTS Sync_{resource_name} (
-                {SYNC_COLUMNS_SQL}
-            )
-            """
-        )
+    con: SyncStoreConnection
+        an open sync store connection, which will not be closed by this function
+    now: datetime
+        the tentative CreateDate/LastModifiedDate
+    payload_mode: str
+        the payload mode of the sync database, one of PAYLOAD_MODES
+    partition_key: Optional[str]
+        the partition the fetched data belongs to, if any
+    metrics: Optional[SyncMetrics]
+        the metrics of the sync, to add the hash and stage timings to
+    """
+    if metrics is None:
+        metrics = SyncMetrics(resource_name)
 
-    sync_df: DataFrame = resource_df.copy()
-    sync_df = add_hash_and_json_to(sync_df)
+    with timed_phase(metrics, SYNC_PHASES.HASH):
+        sync_df: DataFrame = add_hash_and_json_to(resource_df)
 
     # add (possibly composite) primary key, sorting for consistent ordering
     add_sourceid_to(sync_df, identity_columns)
 
-    now: datetime = datetime.now()
     sync_df["CreateDate"] = now
     sync_df["LastModifiedDate"] = now
     sync_df["SyncNeeded"] = 1
+    sync_df[PARTITION_KEY_COLUMN] = partition_key
+
+    sync_df["Json"] = encode_payloads(sync_df["Json"], payload_mode)
+    metrics.bytes_written += _payload_size(sync_df["Json"])
 
-    sync_df = sync_df[SYNC_COLUMNS]
-    sync_df.set_index("SourceId", inplace=True)
     # push to temporary sync table
-    sync_df.to_sql(
-        f"Sync_{resource_name}", sync_db, if_exists="append", index=True, chunksize=1000
+    with timed_phase(metrics, SYNC_PHASES.STAGE):
+        con.stage_records(resource_name, sync_df[[*SYNC_COLUMNS, PARTITION_KEY_COLUMN]])
+
+
+def _payload_size(payloads: Series) -> int:
+    """
+    The size of encoded Json payloads. The JSON is ASCII-escaped, so the length of
+    each serialized record is its size in bytes.
+
+    Parameters
+    ----------
+    payloads: Series
+        values for the Json column, from encode_payloads
+
+    Returns
+    -------
+    int
+        the total size in bytes
+    """
+    return sum(len(payload) for payload in payloads if isinstance(payload, (str, bytes)))
+
+
+def _classify_changes(is_new: Series, is_changed: Series) -> Series:
+    """
+    Label each record with one of the CHANGE_TYPES.
+
+    Parameters
+    ----------
+    is_new: Series
+        a boolean Series, True for records not previously synced
+    is_changed: Series
+        a boolean Series, True for records with a different Hash than previously synced
+
+    Returns
+    -------
+    Series
+        a Series of CHANGE_TYPES values
+    """
+    return (
+        Series(CHANGE_TYPES.UNCHANGED, index=is_new.index)
+        .mask(is_changed, CHANGE_TYPES.CHANGED)
+        .mask(is_new, CHANGE_TYPES.NEW)
     )
 
 
-def _ensure_main_table_exists(
+def _update_dataframe_with_true_dates(
+    resource_df: DataFrame,
+    identity_columns: List[str],
     resource_name: str,
-    con: sqlalchemy.engine.base.Connection,
-):
+    con: SyncStoreConnection,
+    include_change_type: bool = False,
+) -> DataFrame:
     """
-    Ensure the main resource table exists, creating if necessary.
+    Update main resource DataFrame with reconciled CreateDate/LastModifiedDates
 
     Parameters
     ----------
+    resource_df: DataFrame
+        an API DataFrame with current fetched data which
+        will be mutated by updating CreateDate/LastModifiedDate
+    identity_columns: List[str]
+        a List of the identity columns for the resource dataframe.
     resource_name: str
         the name of the API resource, e.g. "Courses", to be used in SQL
-    table_columns_sql: str
-        the columns for the resource in the database, in SQL table creation form,
-            with dangling commas
-    con: sqlalchemy.engine.base.Connection
-        an open database connection, which will not be closed by this function
-    """
-    con.execute(f"DROP INDEX IF EXISTS SYNCNEEDED_{resource_name}")
-    con.execute(
-        f"""
-        CREATE TABLE IF NOT EXISTS {resource_name} (
-            {SYNC_COLUMNS_SQL}
+    con: SyncStoreConnection
+        an open sync store connection, which will not be closed by this function
+    include_change_type: bool
+        whether to add a CHANGE_TYPE_COLUMN, classified from the unmatched records table
+
+    Returns
+    -------
+    DataFrame
+        a DataFrame with reconciled CreateDate/LastModifiedDate
+    """
+    assert (
+        Series(identity_columns).isin(resource_df.columns).all()
+    ), "Identity columns missing from dataframe"
+
+    # fetch DataFrame with reconciled CreateDate/LastModifiedDate for sync records
+    create_date_df: DataFrame = con.read_staged_dates(resource_name)[
+        ["SourceId", "CreateDate", "LastModifiedDate"]
+    ]
+    create_date_df["SourceId"] = create_date_df["SourceId"].astype("string")
+
+    add_sourceid_to(resource_df, identity_columns)
+    resource_df["SourceId"] = resource_df["SourceId"].astype("string")
+
+    result_df = resource_df.join(create_date_df.set_index("SourceId"), on="SourceId")
+
+    if include_change_type:
+        # a fetched record is unmatched once if new, and twice (old and new hash) if changed
+        unmatched_counts: Series = con.read_staged_change_counts(resource_name)
+        unmatched_count: Series = result_df["SourceId"].astype(str).map(unmatched_counts)
+        result_df[CHANGE_TYPE_COLUMN] = _classify_changes(
+            is_new=unmatched_count == 1, is_changed=unmatched_count > 1
         )
-        """
-    )
-    con.execute(
-        f"CREATE INDEX IF NOT EXISTS SYNCNEEDED_{resource_name} ON {resource_name}(SyncNeeded)"
-    )
 
+    # reset index so no columns are hidden
+    result_df.drop(["SourceId"], axis=1, inplace=True)
+
+    # convert dates to string format
+    result_df["CreateDate"] = to_datetime(result_df["CreateDate"]).dt.strftime(DATE_FORMAT)
+    result_df["LastModifiedDate"] = to_datetime(result_df["LastModifiedDate"]).dt.strftime(DATE_FORMAT)
 
-def _create_unmatched_records_temp_table(
+    return result_df
+
+
+def sync_to_db_without_cleanup(
+    resource_df: DataFrame,
+    identity_columns: List[str],
     resource_name: str,
-    con: sqlalchemy.engine.base.Connection,
+    sync_db: SyncDb,
+    partition_key: Optional[str] = None,
+    include_change_type: bool = False,
 ):
     """
-    Select unmatched records into new temp table - differing by hash for same identity.
-    Single entry in result set if identity only exists in one table (meaning add or missing),
-        so SyncNeeded flag will indicate which table it's from.
-    Double entry in result set if identity exists in both (meaning update needed),
-        so SyncNeeded will show which row is from which table.
+    Take fetched data and sync with database. Creates tables when necessary,
+    but ok if temporary tables are there to start. Does not delete temporary tables when finished.
 
     Parameters
     ----------
+    resource_df: DataFrame
+        a DataFrame with current fetched data
+    identity_columns: List[str]
+        a List of the identity columns for the resource dataframe.
     resource_name: str
         the name of the API resource, e.g. "Courses", to be used in SQL
-    con: sqlalchemy.engine.base.Connection
-        an open database connection, which will not be closed by this function
-    """
-    con.execute(f"DROP INDEX IF EXISTS ID_{resource_name}")
-    con.execute(f"DROP TABLE IF EXISTS Unmatched_{resource_name}")
-    con.execute(
-        f"""
-        CREATE TABLE Unmatched_{resource_name} AS
-        SELECT * FROM (
-            SELECT * FROM {resource_name}
-            UNION ALL
-            SELECT * FROM Sync_{resource_name}
+    sync_db: Union[Engine, SyncStore]
+        a sync store, or an Engine instance for a SQLite sync database
+    partition_key: Optional[str]
+        when the fetched data is only one slice of the resource, e.g. a single
+        section, a key identifying that slice. Only the stored records in the
+        same partition are compared, so the cost follows the partition size
+        rather than the size of the whole resource table.
+    include_change_type: bool
+        when True, the result has a CHANGE_TYPE_COLUMN classifying each record as
+        CHANGE_TYPES.NEW, CHANGED or UNCHANGED. Records which were not fetched are
+        available from read_missing_records.
+
+    Returns
+    -------
+    DataFrame
+        a DataFrame with current fetched data and reconciled CreateDate/LastModifiedDate
+    """
+    assert (
+        Series(identity_columns).isin(resource_df.columns).all()
+    ), "Identity columns missing from dataframe"
+
+    with as_sync_store(sync_db).connect() as con:
+        return _sync_with_connection(
+            resource_df,
+            identity_columns,
+            resource_name,
+            con,
+            get_payload_mode(con),
+            partition_key,
+            include_change_type,
         )
-        GROUP BY SourceId, Hash
-        HAVING COUNT(*) = 1
-        """
-    )
-    con.execute(
-        f"CREATE INDEX IF NOT EXISTS ID_{resource_name} ON Unmatched_{resource_name}(SourceId)"
-    )
 
 
-def _get_true_create_dates_for_unmatched_records(
+def _sync_with_connection(
+    resource_df: DataFrame,
+    identity_columns: List[str],
     resource_name: str,
-    con: sqlalchemy.engine.base.Connection,
-):
+    con: SyncStoreConnection,
+    payload_mode: str,
+    partition_key: Optional[str] = None,
+    include_change_type: bool = False,
+    reuse_tables: bool = False,
+) -> DataFrame:
     """
-    All rows start with CreateDate and LastModifiedDate initialized to "now",
-        but updated rows need the original CreateDate pulled from existing table.
-
-    Note: UPDATE-FROM is not available in sqlite until v3.33.0, thus the
-        double select goofiness.
+    Sync fetched data using a single connection. See sync_to_db_without_cleanup.
 
     Parameters
     ----------
+    resource_df: DataFrame
+        a DataFrame with current fetched data
+    identity_columns: List[str]
+        a List of the identity columns for the resource dataframe.
     resource_name: str
         the name of the API resource, e.g. "Courses", to be used in SQL
-    con: sqlalchemy.engine.base.Connection
-        an open database connection, which will not be closed by this function
-    """
-    con.execute(
-        f"""
-        UPDATE Unmatched_{resource_name}
-            SET CreateDate = (
-                SELECT c.CreateDate
-                FROM {resource_name} c
-                WHERE c.SourceId = Unmatched_{resource_name}.SourceId
-            )
-            WHERE EXISTS (
-                SELECT *
-                FROM {resource_name} c
-                WHERE c.SourceId = Unmatched_{resource_name}.SourceId
-            ) AND SyncNeeded = 1
-        """
+    con: SyncStoreConnection
+        an open sync store connection, which will not be closed by this function
+    payload_mode: str
+        the payload mode of the sync database, one of PAYLOAD_MODES
+    partition_key: Optional[str]
+        the partition the fetched data belongs to, if any
+    include_change_type: bool
+        whether to add a CHANGE_TYPE_COLUMN
+    reuse_tables: bool
+        whether this connection already synced the resource, so the main table is
+        known to exist and the temporary tables can be emptied rather than recreated
+
+    Returns
+    -------
+    DataFrame
+        a DataFrame with current fetched data and reconciled CreateDate/LastModifiedDate
+    """
+    metrics = SyncMetrics(resource_name, rows_fetched=len(resource_df))
+
+    with timed_phase(metrics, SYNC_PHASES.STAGE):
+        if reuse_tables:
+            con.clear_staging_table(resource_name)
+        else:
+            con.create_staging_table(resource_name)
+            con.ensure_resource_table(resource_name)
+
+    _append_to_sync_table(
+        resource_df,
+        identity_columns,
+        resource_name,
+        con,
+        datetime.now(),
+        payload_mode,
+        partition_key,
+        metrics,
     )
+    _reconcile_sync_table(resource_name, con, metrics, partition_key, reuse_tables)
 
+    with timed_phase(metrics, SYNC_PHASES.READ_BACK):
+        result_df: DataFrame = _update_dataframe_with_true_dates(
+            resource_df, identity_columns, resource_name, con, include_change_type
+        )
+
+    report_sync_metrics(metrics)
+    return result_df
 
-def _update_resource_table_with_changes(
+
+def _reconcile_sync_table(
     resource_name: str,
-    con: sqlalchemy.engine.base.Connection,
+    con: SyncStoreConnection,
+    metrics: SyncMetrics,
+    partition_key: Optional[str] = None,
+    reuse_table: bool = False,
 ):
     """
-    Update main resource table with new and updated records
+    Compare the staged records with the main resource table, then write the new and
+    changed records to it, timing each phase and counting the changes.
 
     Parameters
     ----------
     resource_name: str
         the name of the API resource, e.g. "Courses", to be used in SQL
-    primary_keys: str
-        a comma separated list of the primary key columns for the resource,
-        e.g. "id,courseId"
-    con: sqlalchemy.engine.base.Connection
-        an open database connection, which will not be closed by this function
-    """
-    CHANGED_ROWS_CTE = f"""
-                        changedRows AS (
-                            SELECT * FROM Unmatched_{resource_name}
-                            WHERE (SourceId) IN (
-                                SELECT SourceId FROM Unmatched_{resource_name}
-                                GROUP BY SourceId
-                                HAVING COUNT(*) > 1
-                            ) AND SyncNeeded = 1
-                        )
-                        """
-
-    # delete obsolete data from regular table
-    con.execute(
-        # changed rows CTE (from SyncNeeded side only)
-        f"""
-        WITH
-        {CHANGED_ROWS_CTE}
-        DELETE FROM {resource_name}
-        WHERE (SourceId) IN (
-            SELECT SourceId from changedRows
+    con: SyncStoreConnection
+        an open sync store connection, which will not be closed by this function
+    metrics: SyncMetrics
+        the metrics of the sync, with rows_fetched set
+    partition_key: Optional[str]
+        the partition the fetched data belongs to, if any
+    reuse_table: bool
+        whether to empty and refill the unmatched records table rather than recreate it
+    """
+    with timed_phase(metrics, SYNC_PHASES.COMPARE):
+        (metrics.new, metrics.changed) = con.compare_staged_records(
+            resource_name, partition_key, reuse_table=reuse_table
         )
-        """
+    metrics.unchanged = metrics.rows_fetched - metrics.new - metrics.changed
+
+    with timed_phase(metrics, SYNC_PHASES.RECONCILE):
+        con.reconcile_create_dates(resource_name)
+    with timed_phase(metrics, SYNC_PHASES.UPDATE):
+        con.apply_staged_changes(resource_name, partition_key)
+
+
+def _read_json_records(json: Series) -> DataFrame:
+    """
+    Rebuild fetched data from the Json stored for each record, without any dtype or
+    date inference.
+
+    Parameters
+    ----------
+    json: Series
+        the stored Json column values, in any payload mode except hash-only
+
+    Returns
+    -------
+    DataFrame
+        a DataFrame with a row per Json string and a default index
+    """
+    return read_json(
+        StringIO("\n".join(decode_payloads(json))),
+        orient="records",
+        lines=True,
+        dtype=False,
+        convert_dates=False,
     )
 
-    # insert new and changed data into regular table
-    con.execute(
-        #    changed rows CTE (from SyncNeeded side only)
-        #    new rows CTE (also from SyncNeeded side)
-        f"""
-        WITH
-            {CHANGED_ROWS_CTE},
-            newRows AS (
-                SELECT * FROM Unmatched_{resource_name}
-                WHERE (SourceId) IN (
-                    SELECT SourceId FROM Unmatched_{resource_name}
-                    GROUP BY SourceId
-                    HAVING COUNT(*) = 1 AND SyncNeeded = 1
+
+def _join_reconciled_dates(
+    chunk_df: DataFrame, identity_columns: List[str], dates_df: DataFrame
+) -> DataFrame:
+    """
+    Add the reconciled CreateDate/LastModifiedDate to a chunk of fetched data by
+    SourceId, as sync_to_db_without_cleanup does for the whole of it.
+
+    Parameters
+    ----------
+    chunk_df: DataFrame
+        a chunk of fetched data, which will be mutated by adding a SourceId
+    identity_columns: List[str]
+        a List of the identity columns for the resource dataframe.
+    dates_df: DataFrame
+        the SourceId, CreateDate and LastModifiedDate of the chunk's records
+
+    Returns
+    -------
+    DataFrame
+        the chunk with CreateDate/LastModifiedDate in string format and a new RangeIndex
+    """
+    add_sourceid_to(chunk_df, identity_columns)
+    chunk_df["SourceId"] = chunk_df["SourceId"].astype("string")
+
+    dates_df = dates_df[["SourceId", "CreateDate", "LastModifiedDate"]].astype({"SourceId": "string"})
+    result_df: DataFrame = chunk_df.join(dates_df.set_index("SourceId"), on="SourceId")
+    result_df.drop(["SourceId"], axis=1, inplace=True)
+    result_df.reset_index(drop=True, inplace=True)
+
+    # convert dates to string format
+    result_df["CreateDate"] = to_datetime(result_df["CreateDate"]).dt.strftime(DATE_FORMAT)
+    result_df["LastModifiedDate"] = to_datetime(result_df["LastModifiedDate"]).dt.strftime(DATE_FORMAT)
+
+    return result_df
+
+
+def sync_chunks_to_db_without_cleanup(
+    resource_chunks: Iterable[DataFrame],
+    identity_columns: List[str],
+    resource_name: str,
+    sync_db: SyncDb,
+    partition_key: Optional[str] = None,
+) -> Iterator[DataFrame]:
+    """
+    Streaming variant of sync_to_db_without_cleanup for resources too large to hold
+    in memory more than once. Each chunk of fetched data, e.g. one API page, is hashed
+    and staged into the sync table as it arrives, and set aside in a temporary file.
+    Once the input is exhausted the records are reconciled in a single pass, then
+    each chunk is read back from its file, with its dtypes intact, and yielded with
+    the reconciled CreateDate/LastModifiedDate joined by SourceId, the same as
+    sync_to_db_without_cleanup. Memory use follows the chunk size rather than the
+    size of the resource.
+
+    This is a generator, so nothing is synced until it is iterated, and the sync is
+    not complete until it has been exhausted. Chunks are yielded with a new
+    RangeIndex. Does not delete temporary tables when finished.
+
+    Parameters
+    ----------
+    resource_chunks: Iterable[DataFrame]
+        DataFrames with current fetched data, all having the same columns
+    identity_columns: List[str]
+        a List of the identity columns for the resource dataframe.
+    resource_name: str
+        the name of the API resource, e.g. "Courses", to be used in SQL
+    sync_db: Union[Engine, SyncStore]
+        a sync store, or an Engine instance for a SQLite sync database
+    partition_key: Optional[str]
+        the partition the fetched data belongs to, if any. See sync_to_db_without_cleanup.
+
+    Returns
+    -------
+    Iterator[DataFrame]
+        DataFrames with current fetched data and reconciled CreateDate/LastModifiedDate
+    """
+    sync_store = as_sync_store(sync_db)
+    with sync_store.connect() as con:
+        con.create_staging_table(resource_name)
+        payload_mode: str = get_payload_mode(con)
+
+    now: datetime = datetime.now()
+    metrics = SyncMetrics(resource_name)
+    with TemporaryDirectory(prefix=f"sync-{resource_name}-") as chunk_directory:
+        chunk_files: List[Tuple[str, int]] = []
+        for chunk_df in resource_chunks:
+            assert (
+                Series(identity_columns).isin(chunk_df.columns).all()
+            ), "Identity columns missing from dataframe"
+            if chunk_df.empty:
+                continue
+
+            with sync_store.connect() as con:
+                _append_to_sync_table(
+                    chunk_df,
+                    identity_columns,
+                    resource_name,
+                    con,
+                    now,
+                    payload_mode,
+                    partition_key,
+                    metrics,
                 )
-            )
-        INSERT INTO {resource_name}
-            SELECT * FROM Unmatched_{resource_name}
-            WHERE (SourceId) IN (
-                SELECT SourceId FROM changedRows
-                UNION ALL
-                SELECT SourceId FROM newRows
-            ) AND SyncNeeded = 1
-        """
-    )
+            chunk_file: str = os.path.join(chunk_directory, f"{len(chunk_files)}.pkl")
+            chunk_df.to_pickle(chunk_file)
+            chunk_files.append((chunk_file, len(chunk_df)))
 
-    con.execute(
-        # reset SyncNeeded flag on main table
-        f"""
-        UPDATE {resource_name}
-        SET SyncNeeded = 0
-        WHERE SyncNeeded != 0
-        """
-    )
+        metrics.rows_fetched = sum(chunk_size for (_, chunk_size) in chunk_files)
+        with sync_store.connect() as con:
+            with timed_phase(metrics, SYNC_PHASES.STAGE):
+                con.ensure_resource_table(resource_name)
+            _reconcile_sync_table(resource_name, con, metrics, partition_key)
 
+        last_row: int = 0
+        for (chunk_file, chunk_size) in chunk_files:
+            # a connection per chunk, so no read lock is held while the consumer works
+            with sync_store.connect() as con, timed_phase(metrics, SYNC_PHASES.READ_BACK):
+                dates_df: DataFrame = con.read_staged_dates(
+                    resource_name, last_row, chunk_size
+                )
+                result_df: DataFrame = _join_reconciled_dates(
+                    read_pickle(chunk_file), identity_columns, dates_df
+                )
+            os.remove(chunk_file)
+            last_row = int(dates_df["SyncRowId"].iloc[-1])
+            yield result_df
 
-def _update_dataframe_with_true_dates(
+    report_sync_metrics(metrics)
+
+
+def sync_to_db_with_hash_diff(
     resource_df: DataFrame,
     identity_columns: List[str],
     resource_name: str,
-    con: sqlalchemy.engine.base.Connection,
+    sync_db: SyncDb,
+    partition_key: Optional[str] = None,
+    include_change_type: bool = False,
 ) -> DataFrame:
     """
-    Update main resource DataFrame with reconciled CreateDate/LastModifiedDates
+    Take fetched data and sync with database, as an alternative to
+    sync_to_db_without_cleanup. Rather than staging the full DataFrame in a
+    Sync table and reconciling in SQL, loads the existing hashes once, finds
+    the new and changed records in memory, and writes only those back.
+    Database work scales with the number of changes instead of the table size.
+    Creates the main table when necessary and leaves no temporary tables behind.
+
+    As there is no Sync table of the fetched records, read_missing_records cannot
+    find the deleted records after this sync, and raises a ValueError. Use
+    sync_to_db_without_cleanup when deletions are needed. Any Sync table left by an
+    earlier sync of the resource is dropped, so that its fetch is not mistaken for
+    this one.
 
     Parameters
     ----------
     resource_df: DataFrame
-        an API DataFrame with current fetched data which
-        will be mutated by updating CreateDate/LastModifiedDate
+        a DataFrame with current fetched data, which will not be mutated
     identity_columns: List[str]
         a List of the identity columns for the resource dataframe.
     resource_name: str
         the name of the API resource, e.g. "Courses", to be used in SQL
-    primary_keys: str
-        a comma separated list of the primary key columns for the resource,
-        e.g. "id,courseId"
-    con: sqlalchemy.engine.base.Connection
-        an open database connection, which will not be closed by this function
+    sync_db: Union[Engine, SyncStore]
+        a sync store, or an Engine instance for a SQLite sync database
+    partition_key: Optional[str]
+        when the fetched data is only one slice of the resource, e.g. a single
+        section, a key identifying that slice. See sync_to_db_without_cleanup.
+    include_change_type: bool
+        when True, the result has a CHANGE_TYPE_COLUMN. See sync_to_db_without_cleanup.
 
     Returns
     -------
     DataFrame
-        a DataFrame with reconciled CreateDate/LastModifiedDate
+        a DataFrame with current fetched data and reconciled CreateDate/LastModifiedDate
     """
     assert (
         Series(identity_columns).isin(resource_df.columns).all()
     ), "Identity columns missing from dataframe"
 
-    # fetch DataFrame with reconciled CreateDate/LastModifiedDate for sync records
-    update_dates_query = f"""
-                            SELECT SourceId, CreateDate, LastModifiedDate
-                            FROM {resource_name}
-                            WHERE (SourceId) IN (
-                                SELECT SourceId FROM Sync_{resource_name}
-                            )
-                            """
-    create_date_df = read_sql_query(update_dates_query, con)
-    create_date_df["SourceId"] = create_date_df["SourceId"].astype("string")
+    metrics = SyncMetrics(resource_name, rows_fetched=len(resource_df))
+    with timed_phase(metrics, SYNC_PHASES.HASH):
+        sync_df: DataFrame = add_hash_and_json_to(resource_df)
+    add_sourceid_to(sync_df, identity_columns)
 
-    add_sourceid_to(resource_df, identity_columns)
-    resource_df["SourceId"] = resource_df["SourceId"].astype("string")
+    now: str = datetime.now().strftime(SQLITE_DATE_FORMAT)
 
-    result_df = resource_df.join(create_date_df.set_index("SourceId"), on="SourceId")
+    with as_sync_store(sync_db).begin() as con:
+        with timed_phase(metrics, SYNC_PHASES.COMPARE):
+            con.ensure_resource_table(resource_name)
+            existing_df: DataFrame = con.read_stored_hashes(
+                resource_name, sync_df["SourceId"], partition_key
+            )
 
-    # reset index so no columns are hidden
-    result_df.drop(["SourceId"], axis=1, inplace=True)
+        existing_hash: Series = sync_df["SourceId"].map(existing_df["Hash"])
+        is_new: Series = existing_hash.isna()
+        is_changed: Series = ~is_new & (existing_hash != sync_df["Hash"])
+        is_unchanged: Series = ~(is_new | is_changed)
+        existing_partition: Series = sync_df["SourceId"].map(
+            existing_df[PARTITION_KEY_COLUMN]
+        )
+        # unchanged records fetched in a different partition than they were synced
+        # with, e.g. a student changing sections, move to the new partition
+        is_moved: Series = is_unchanged & (
+            existing_partition.notna()
+            if partition_key is None
+            else existing_partition.ne(partition_key) | existing_partition.isna()
+        )
+
+        existing_create_date: Series = sync_df["SourceId"].map(
+            existing_df["CreateDate"]
+        )
+        sync_df["CreateDate"] = existing_create_date.where(~is_new, now)
+        sync_df["LastModifiedDate"] = sync_df["SourceId"].map(
+            existing_df["LastModifiedDate"]
+        ).where(is_unchanged, now)
+        sync_df["SyncNeeded"] = 0
+        sync_df[PARTITION_KEY_COLUMN] = partition_key
+
+        changed_df: DataFrame = sync_df[is_new | is_changed].copy()
+        changed_df["Json"] = encode_payloads(changed_df["Json"], get_payload_mode(con))
+        metrics.bytes_written = _payload_size(changed_df["Json"])
+        with timed_phase(metrics, SYNC_PHASES.UPDATE):
+            if not changed_df.empty:
+                con.upsert_records(
+                    resource_name, changed_df[[*SYNC_COLUMNS, PARTITION_KEY_COLUMN]]
+                )
+            con.move_records_to_partition(
+                resource_name, sync_df.loc[is_moved, "SourceId"].tolist(), partition_key
+            )
+            con.reset_sync_needed(resource_name)
+            con.drop_staging_tables(resource_name)
+
+    metrics.new = int(is_new.sum())
+    metrics.changed = int(is_changed.sum())
+    metrics.unchanged = int(is_unchanged.sum())
+    report_sync_metrics(metrics)
+
+    result_df: DataFrame = sync_df.drop(
+        ["Json", "Hash", "SourceId", "SyncNeeded", PARTITION_KEY_COLUMN], axis=1
+    )
+
+    if include_change_type:
+        result_df[CHANGE_TYPE_COLUMN] = _classify_changes(is_new, is_changed)
 
     # convert dates to string format
     result_df["CreateDate"] = to_datetime(result_df["CreateDate"]).dt.strftime(DATE_FORMAT)
@@ -379,53 +808,225 @@ def _update_dataframe_with_true_dates(
     return result_df
 
 
-def sync_to_db_without_cleanup(
-    resource_df: DataFrame,
-    identity_columns: List[str],
+def read_missing_records(
     resource_name: str,
-    sync_db: sqlalchemy.engine.base.Engine,
-):
+    sync_db: SyncDb,
+    partition_key: Optional[str] = None,
+) -> DataFrame:
     """
-    Take fetched data and sync with database. Creates tables when necessary,
-    but ok if temporary tables are there to start. Does not delete temporary tables when finished.
+    Read the previously synced records which were not in the latest fetch, e.g. to
+    find the records deleted from the source system. Must be called after
+    sync_to_db_without_cleanup and before cleanup_after_sync, with the same partition key.
+    Not available after sync_to_db_with_hash_diff, which keeps no Sync table of the
+    fetched records to compare with.
 
     Parameters
     ----------
-    resource_df: DataFrame
-        a DataFrame with current fetched data
-    identity_columns: List[str]
-        a List of the identity columns for the resource dataframe.
     resource_name: str
         the name of the API resource, e.g. "Courses", to be used in SQL
-    sync_db: sqlalchemy.engine.base.Engine
-        an Engine instance for creating database connections
+    sync_db: Union[Engine, SyncStore]
+        a sync store, or an Engine instance for a SQLite sync database
+    partition_key: Optional[str]
+        the partition the fetched data belonged to, if any
 
     Returns
     -------
     DataFrame
-        a DataFrame with current fetched data and reconciled CreateDate/LastModifiedDate
+        a DataFrame with the stored data, CreateDate/LastModifiedDate, and a
+        CHANGE_TYPE_COLUMN of CHANGE_TYPES.DELETED
+
+    Raises
+    ------
+    ValueError
+        if there is no Sync table of the resource, e.g. after sync_to_db_with_hash_diff
+        or cleanup_after_sync
     """
-    assert (
-        Series(identity_columns).isin(resource_df.columns).all()
-    ), "Identity columns missing from dataframe"
+    with as_sync_store(sync_db).connect() as con:
+        return _read_missing_records(resource_name, con, partition_key)
 
-    _create_sync_table_from_resource_df(
-        resource_df, identity_columns, resource_name, sync_db
-    )
 
-    with sync_db.connect() as con:
-        _ensure_main_table_exists(resource_name, con)
-        _create_unmatched_records_temp_table(resource_name, con)
-        _get_true_create_dates_for_unmatched_records(resource_name, con)
-        _update_resource_table_with_changes(resource_name, con)
-        result_df: DataFrame = _update_dataframe_with_true_dates(
-            resource_df, identity_columns, resource_name, con
+def _read_missing_records(
+    resource_name: str,
+    con: SyncStoreConnection,
+    partition_key: Optional[str] = None,
+) -> DataFrame:
+    """
+    See read_missing_records
+
+    Parameters
+    ----------
+    resource_name: str
+        the name of the API resource, e.g. "Courses", to be used in SQL
+    con: SyncStoreConnection
+        an open sync store connection, which will not be closed by this function
+    partition_key: Optional[str]
+        the partition the fetched data belonged to, if any
+
+    Returns
+    -------
+    DataFrame
+        a DataFrame with the stored data, CreateDate/LastModifiedDate, and a
+        CHANGE_TYPE_COLUMN of CHANGE_TYPES.DELETED
+    """
+    if not con.table_exists(f"Sync_{resource_name}"):
+        raise ValueError(
+            f"Missing {resource_name} records are found from the Sync_{resource_name} "
+            "table, which only sync_to_db_without_cleanup keeps until cleanup_after_sync"
         )
 
+    missing_df: DataFrame = con.read_missing_payloads(resource_name, partition_key)
+
+    if missing_df.empty:
+        return DataFrame()
+
+    result_df: DataFrame = _read_stored_json_and_dates(missing_df)
+    result_df[CHANGE_TYPE_COLUMN] = CHANGE_TYPES.DELETED
+
     return result_df
 
 
-def cleanup_after_sync(resource_name: str, sync_db: sqlalchemy.engine.base.Engine):
+def _read_stored_json_and_dates(stored_df: DataFrame) -> DataFrame:
+    """
+    Rebuild records from stored Json and CreateDate/LastModifiedDate columns, with
+    the dates in the format of synced data.
+
+    Parameters
+    ----------
+    stored_df: DataFrame
+        a DataFrame with Json, CreateDate and LastModifiedDate columns
+
+    Returns
+    -------
+    DataFrame
+        a DataFrame with the stored data and CreateDate/LastModifiedDate
+    """
+    result_df: DataFrame = _read_json_records(stored_df["Json"])
+    result_df["CreateDate"] = to_datetime(stored_df["CreateDate"]).dt.strftime(DATE_FORMAT)
+    result_df["LastModifiedDate"] = to_datetime(stored_df["LastModifiedDate"]).dt.strftime(DATE_FORMAT)
+
+    return result_df
+
+
+def _read_stored_records(
+    resource_name: str,
+    con: SyncStoreConnection,
+    partition_key: Optional[str] = None,
+) -> DataFrame:
+    """
+    Read every stored record of a resource, or of one partition of it, back from
+    its Json, e.g. to write the records of an incremental fetch together with the
+    unchanged records fetched by earlier runs. Records synced earlier on the same
+    connection are included. Not available in the hash-only payload mode.
+
+    Parameters
+    ----------
+    resource_name: str
+        the name of the API resource, e.g. "Courses", to be used in SQL
+    con: SyncStoreConnection
+        an open sync store connection, which will not be closed by this function
+    partition_key: Optional[str]
+        the partition to read, if any
+
+    Returns
+    -------
+    DataFrame
+        a DataFrame with the stored data and CreateDate/LastModifiedDate, empty if
+        there are no stored records
+    """
+    if not con.table_exists(resource_name):
+        return DataFrame()
+
+    stored_df: DataFrame = con.read_stored_payloads(resource_name, partition_key)
+
+    if stored_df.empty:
+        return DataFrame()
+
+    return _read_stored_json_and_dates(stored_df)
+
+
+# number of stored records read at a time by read_synced_records
+SYNCED_RECORDS_READ_CHUNK_SIZE = 50000
+
+
+def read_synced_source_ids(resource_name: str, sync_db: SyncDb) -> Series:
+    """
+    Read the SourceId of every record previously synced for a resource, e.g. to
+    find where an incremental fetch should resume.
+
+    Parameters
+    ----------
+    resource_name: str
+        the name of the API resource, e.g. "Courses", to be used in SQL
+    sync_db: Union[Engine, SyncStore]
+        a sync store, or an Engine instance for a SQLite sync database
+
+    Returns
+    -------
+    Series
+        the SourceId values, empty if the resource was never synced
+    """
+    with as_sync_store(sync_db).connect() as con:
+        if not con.table_exists(resource_name):
+            return Series(dtype="string")
+        return con.read_source_ids(resource_name).astype("string")
+
+
+def read_synced_records(
+    resource_name: str,
+    sync_db: SyncDb,
+    source_id_filter: Optional[Callable[[Series], Series]] = None,
+) -> DataFrame:
+    """
+    Read previously synced records back from their stored Json, e.g. to write the
+    records of an incremental fetch together with those fetched by earlier runs.
+    Records are read a chunk at a time, and filtered by SourceId before their Json
+    is decoded. Not available in the hash-only payload mode.
+
+    Parameters
+    ----------
+    resource_name: str
+        the name of the API resource, e.g. "Courses", to be used in SQL
+    sync_db: Union[Engine, SyncStore]
+        a sync store, or an Engine instance for a SQLite sync database
+    source_id_filter: Optional[Callable[[Series], Series]]
+        given a Series of SourceId values, returns a boolean Series selecting the
+        records to read. By default every record is read.
+
+    Returns
+    -------
+    DataFrame
+        a DataFrame with the stored data and CreateDate/LastModifiedDate, empty if
+        no records were selected
+    """
+    result_chunks: List[DataFrame] = []
+    with as_sync_store(sync_db).connect() as con:
+        if get_payload_mode(con) == PAYLOAD_MODES.HASH_ONLY:
+            raise ValueError(
+                "Synced records are read back from their stored Json, "
+                "which is not available in hash-only payload mode"
+            )
+
+        if not con.table_exists(resource_name):
+            return DataFrame()
+
+        for stored_df in con.read_stored_payload_chunks(
+            resource_name, SYNCED_RECORDS_READ_CHUNK_SIZE
+        ):
+            if source_id_filter is not None:
+                stored_df = stored_df[
+                    source_id_filter(stored_df["SourceId"].astype("string")).fillna(False).to_numpy(bool)
+                ].reset_index(drop=True)
+            if stored_df.empty:
+                continue
+
+            result_chunks.append(_read_stored_json_and_dates(stored_df))
+
+    if len(result_chunks) == 0:
+        return DataFrame()
+    return concat(result_chunks, ignore_index=True)
+
+
+def cleanup_after_sync(resource_name: str, sync_db: SyncDb):
     """
     Delete sync temporary tables if they exist
 
@@ -433,9 +1034,8 @@ def cleanup_after_sync(resource_name: str, sync_db: sqlalchemy.engine.base.Engin
     ----------
     resource_name: str
         the name of the API resource, e.g. "Courses", to be used in SQL
-    sync_db: sqlalchemy.engine.base.Engine
-        an Engine instance for creating database connections
+    sync_db: Union[Engine, SyncStore]
+        a sync store, or an Engine instance for a SQLite sync database
     """
-    with sync_db.connect() as con:
-        con.execute(f"DROP TABLE IF EXISTS Sync_{resource_name}")
-        con.execute(f"DROP TABLE IF EXISTS Unmatched_{resource_name}")
+    with as_sync_store(sync_db).connect() as con:
+        con.drop_staging_tables(resource_name)
@@ -0,0 +1,221 @@
+# SPDX-License-Identifier: Apache-2.0
+# Licensed to the Ed-Fi Alliance under one or more agreements.
+# The Ed-Fi Alliance licenses this file to you under the Apache License, Version 2.0.
+# See the LICENSE and NOTICES files in the project root for more information.
+
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+import logging
+from time import perf_counter
+from typing import Callable, Dict, Iterator, List
+
+from pandas import DataFrame
+
+logger = logging.getLogger(__name__)
+
+
+class SYNC_PHASES:
+    """
+    The timed phases of a resource sync. Not every sync engine runs every phase.
+    """
+
+    # serializing and hashing the fetched records
+    HASH = "Hash"
+    # writing the fetched records to the temporary sync table
+    STAGE = "Stage"
+    # finding the new, changed and missing records
+    COMPARE = "Compare"
+    # looking up the original CreateDate/LastModifiedDate of each record
+    RECONCILE = "Reconcile"
+    # writing new and changed records to the resource table
+    UPDATE = "Update"
+    # reading synced records back from the sync database
+    READ_BACK = "ReadBack"
+
+    # the phases spent in SQLite, rather than in pandas
+    SQLITE = [STAGE, COMPARE, RECONCILE, UPDATE, READ_BACK]
+
+
+@dataclass
+class SyncMetrics:
+    """
+    Row counts and timings for one sync of a resource, or of one partition of a
+    resource.
+    """
+
+    resource_name: str
+    rows_fetched: int = 0
+    new: int = 0
+    changed: int = 0
+    unchanged: int = 0
+    # the size of the Json payloads written to the sync database
+    bytes_written: int = 0
+    phase_seconds: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def sqlite_seconds(self) -> float:
+        return sum(
+            seconds
+            for phase, seconds in self.phase_seconds.items()
+            if phase in SYNC_PHASES.SQLITE
+        )
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(self.phase_seconds.values())
+
+
+SyncMetricsListener = Callable[[SyncMetrics], None]
+
+_listeners: List[SyncMetricsListener] = []
+
+
+def add_sync_metrics_listener(listener: SyncMetricsListener):
+    """
+    Register a function to be called with the SyncMetrics of every completed sync
+
+    Parameters
+    ----------
+    listener: Callable[[SyncMetrics], None]
+        the function to call
+    """
+    _listeners.append(listener)
+
+
+def remove_sync_metrics_listener(listener: SyncMetricsListener):
+    """
+    Stop calling a function registered with add_sync_metrics_listener
+
+    Parameters
+    ----------
+    listener: Callable[[SyncMetrics], None]
+        the function to stop calling
+    """
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+
+@contextmanager
+def timed_phase(metrics: SyncMetrics, phase: str) -> Iterator[None]:
+    """
+    Add the time spent in a with block to a phase of a sync
+
+    Parameters
+    ----------
+    metrics: SyncMetrics
+        the metrics of the sync
+    phase: str
+        one of SYNC_PHASES
+    """
+    start: float = perf_counter()
+    try:
+        yield
+    finally:
+        metrics.phase_seconds[phase] = (
+            metrics.phase_seconds.get(phase, 0.0) + perf_counter() - start
+        )
+
+
+def report_sync_metrics(metrics: SyncMetrics):
+    """
+    Log the metrics of a completed sync and pass them to each registered listener.
+    The log record carries the metrics as a dict in its sync_metrics attribute,
+    for structured log handlers.
+
+    Parameters
+    ----------
+    metrics: SyncMetrics
+        the metrics of the sync
+    """
+    logger.debug(
+        "Synced %s: %d fetched, %d new, %d changed, %d unchanged in %.3fs (%.3fs in SQLite)",
+        metrics.resource_name,
+        metrics.rows_fetched,
+        metrics.new,
+        metrics.changed,
+        metrics.unchanged,
+        metrics.total_seconds,
+        metrics.sqlite_seconds,
+        extra={"sync_metrics": asdict(metrics)},
+    )
+    for listener in list(_listeners):
+        listener(metrics)
+
+
+class SyncRunSummary:
+    """
+    A SyncMetrics listener which collects the syncs of an extractor run and
+    summarizes them by resource.
+
+    Usage
+    -----
+        summary = SyncRunSummary()
+        add_sync_metrics_listener(summary)
+        ... run the extract ...
+        remove_sync_metrics_listener(summary)
+        summary.log()
+    """
+
+    def __init__(self):
+        self.metrics: List[SyncMetrics] = []
+
+    def __call__(self, metrics: SyncMetrics):
+        self.metrics.append(metrics)
+
+    def to_df(self) -> DataFrame:
+        """
+        Total the collected metrics by resource
+
+        Returns
+        -------
+        DataFrame
+            a DataFrame with a row per resource, in first sync order, with the number
+            of syncs, row counts, bytes written and seconds, including per phase
+        """
+        rows: List[dict] = [
+            {
+                "Resource": metrics.resource_name,
+                "Syncs": 1,
+                "Fetched": metrics.rows_fetched,
+                "New": metrics.new,
+                "Changed": metrics.changed,
+                "Unchanged": metrics.unchanged,
+                "Bytes": metrics.bytes_written,
+                "SQLite (s)": metrics.sqlite_seconds,
+                "Total (s)": metrics.total_seconds,
+                **{
+                    f"{phase} (s)": seconds
+                    for phase, seconds in metrics.phase_seconds.items()
+                },
+            }
+            for metrics in self.metrics
+        ]
+        if len(rows) == 0:
+            return DataFrame()
+
+        return (
+            DataFrame(rows)
+            .fillna(0.0)
+            .groupby("Resource", sort=False)
+            .sum()
+            .reset_index()
+        )
+
+    def log(self, summary_logger: logging.Logger = logger):
+        """
+        Log a table of the collected metrics by resource at INFO level
+
+        Parameters
+        ----------
+        summary_logger: logging.Logger
+            the logger to write to
+        """
+        summary_df: DataFrame = self.to_df()
+        if summary_df.empty:
+            summary_logger.info("No resources were synced")
+            return
+
+        summary_logger.info(
+            "Sync summary:\n%s",
+            summary_df.to_string(index=False, float_format=lambda seconds: f"{seconds:.2f}"),
+        )
@@ -0,0 +1,180 @@
+# SPDX-License-Identifier: Apache-2.0
+# Licensed to the Ed-Fi Alliance under one or more agreements.
+# The Ed-Fi Alliance licenses this file to you under the Apache License, Version 2.0.
+# See the LICENSE and NOTICES files in the project root for more information.
+
+import logging
+import zlib
+
+from pandas import Series
+
+from edfi_lms_extractor_lib.api.sync_store import (
+    SyncConnectable,
+    SyncDb,
+    SyncStoreConnection,
+    as_sync_store,
+    connect_to,
+)
+
+logger = logging.getLogger(__name__)
+
+PAYLOAD_MODE_SETTING = "PayloadMode"
+
+# zlib level 1 compresses serialized records by around 4x at a fraction of the
+# cost of the default level
+COMPRESSION_LEVEL = 1
+
+MIGRATION_BATCH_SIZE = 10000
+
+
+class PAYLOAD_MODES:
+    """
+    How the Json payload of each synced record is stored in the sync database.
+    The Hash column, which is all a sync compares, is stored the same way in every mode.
+    """
+
+    # the serialized record as text, readable with any SQLite tool
+    FULL = "full"
+    # the serialized record, zlib compressed, as a BLOB
+    COMPRESSED = "compressed"
+    # no payload, so stored records cannot be read back, e.g. with read_missing_records
+    HASH_ONLY = "hash-only"
+
+    ALL = [FULL, COMPRESSED, HASH_ONLY]
+
+
+def get_payload_mode(sync_db: SyncConnectable) -> str:
+    """
+    Get the payload mode of a sync database
+
+    Parameters
+    ----------
+    sync_db: Union[Engine, Connection, SyncStore, SyncStoreConnection]
+        a sync store or an Engine instance, or an open connection to either
+
+    Returns
+    -------
+    str
+        one of PAYLOAD_MODES, FULL if never set
+    """
+    with connect_to(sync_db) as con:
+        payload_mode = con.read_setting(PAYLOAD_MODE_SETTING)
+    return PAYLOAD_MODES.FULL if payload_mode is None else payload_mode
+
+
+def encode_payloads(json: Series, payload_mode: str) -> Series:
+    """
+    Convert serialized records to the form stored for a payload mode
+
+    Parameters
+    ----------
+    json: Series
+        the serialized records
+    payload_mode: str
+        one of PAYLOAD_MODES
+
+    Returns
+    -------
+    Series
+        the values to store in the Json column
+    """
+    if payload_mode == PAYLOAD_MODES.COMPRESSED:
+        return Series(
+            [zlib.compress(value.encode("utf-8"), COMPRESSION_LEVEL) for value in json],
+            index=json.index,
+            dtype="object",
+        )
+    if payload_mode == PAYLOAD_MODES.HASH_ONLY:
+        return Series(None, index=json.index, dtype="object")
+    return json
+
+
+def decode_payloads(stored: Series) -> Series:
+    """
+    Convert stored Json column values back to serialized records, whichever
+    payload mode each was stored with
+
+    Parameters
+    ----------
+    stored: Series
+        values from a Json column
+
+    Returns
+    -------
+    Series
+        the serialized records
+    """
+    if stored.isna().any():
+        raise ValueError(
+            "Some records were synced in hash-only payload mode and cannot be read back"
+        )
+
+    return Series(
+        [
+            zlib.decompress(value).decode("utf-8") if isinstance(value, bytes) else value
+            for value in stored
+        ],
+        index=stored.index,
+        dtype="object",
+    )
+
+
+def _migrate_table(table: str, payload_mode: str, con: SyncStoreConnection):
+    if payload_mode == PAYLOAD_MODES.HASH_ONLY:
+        con.clear_payloads(table)
+        return
+
+    # converted rows no longer match, so each batch picks up where the last left off
+    while True:
+        rows = con.read_payload_batch(
+            table, payload_mode != PAYLOAD_MODES.COMPRESSED, MIGRATION_BATCH_SIZE
+        )
+        if len(rows) == 0:
+            return
+
+        row_keys = [row[0] for row in rows]
+        payloads: Series = encode_payloads(
+            decode_payloads(Series([row[1] for row in rows], dtype="object")),
+            payload_mode,
+        )
+        con.write_payloads(table, list(zip(payloads, row_keys)))
+
+
+def set_payload_mode(sync_db: SyncDb, payload_mode: str):
+    """
+    Set the payload mode for future syncs, migrating the records already stored in
+    every resource table, then reclaim the freed space. Does nothing when the sync
+    database is already in the payload mode, so it can be called on every run.
+
+    Migrating from HASH_ONLY leaves the existing records without a payload until
+    they next change.
+
+    Parameters
+    ----------
+    sync_db: Union[Engine, SyncStore]
+        a sync store, or an Engine instance for a SQLite sync database
+    payload_mode: str
+        one of PAYLOAD_MODES
+
+    Raises
+    ------
+    ValueError
+        if the sync store cannot keep payloads in the mode
+    """
+    assert payload_mode in PAYLOAD_MODES.ALL, f"Unknown payload mode {payload_mode}"
+
+    sync_store = as_sync_store(sync_db)
+    if payload_mode == PAYLOAD_MODES.COMPRESSED and not sync_store.supports_compressed_payloads:
+        raise ValueError(f"{type(sync_store).__name__} does not support compressed payloads")
+
+    if get_payload_mode(sync_store) == payload_mode:
+        return
+
+    with sync_store.begin() as con:
+        con.write_setting(PAYLOAD_MODE_SETTING, payload_mode)
+        for table in con.resource_table_names():
+            logger.debug("Migrating %s to payload mode %s", table, payload_mode)
+            _migrate_table(table, payload_mode, con)
+
+    with sync_store.connect() as con:
+        con.compact()
@@ -0,0 +1,228 @@
+# SPDX-License-Identifier: Apache-2.0
+# Licensed to the Ed-Fi Alliance under one or more agreements.
+# The Ed-Fi Alliance licenses this file to you under the Apache License, Version 2.0.
+# See the LICENSE and NOTICES files in the project root for more information.
+
+import logging
+from typing import Dict, List, Optional, Set
+
+from pandas import DataFrame, Series
+
+from edfi_lms_extractor_lib.api.resource_sync import (
+    _read_missing_records,
+    _read_stored_records,
+    _sync_with_connection,
+)
+from edfi_lms_extractor_lib.api.sync_payload import PAYLOAD_MODES, get_payload_mode
+from edfi_lms_extractor_lib.api.sync_store import SyncDb, SyncStoreConnection, as_sync_store
+from edfi_lms_extractor_lib.api.sync_watermarks import read_watermarks, write_watermark
+
+logger = logging.getLogger(__name__)
+
+
+class SyncSession:
+    """
+    Syncs any number of resources, or partitions of a resource, over one
+    connection with a single commit. The table and index DDL for each resource
+    runs once per session instead of once per sync, and the temporary sync
+    tables are dropped when the session ends.
+
+    Nothing is committed if the session ends with an exception.
+
+    Usage
+    -----
+        with SyncSession(sync_db) as session:
+            for section in sections:
+                synced_df = session.sync(
+                    enrollments_df, ["id"], "Enrollments", partition_key=section_id
+                )
+    """
+
+    def __init__(self, sync_db: SyncDb):
+        """
+        Parameters
+        ----------
+        sync_db: Union[Engine, SyncStore]
+            a sync store, or an Engine instance for a SQLite sync database
+        """
+        self._sync_store = as_sync_store(sync_db)
+        self._connection: Optional[SyncStoreConnection] = None
+        self._payload_mode: str = ""
+        self._synced_resources: Set[str] = set()
+
+    def __enter__(self) -> "SyncSession":
+        self._connection = self._sync_store.connect()
+        self._connection.begin()
+        self._payload_mode = get_payload_mode(self._connection)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        assert self._connection is not None
+
+        try:
+            if exc_type is None:
+                for resource_name in self._synced_resources:
+                    self._connection.drop_staging_tables(resource_name)
+                self._connection.commit()
+            else:
+                logger.debug("Rolling back sync session after an error")
+                self._connection.rollback()
+        finally:
+            self._connection.close()
+            self._connection = None
+            self._synced_resources = set()
+
+    def _get_connection(self) -> SyncStoreConnection:
+        assert self._connection is not None, "SyncSession must be used in a with statement"
+        return self._connection
+
+    def sync(
+        self,
+        resource_df: DataFrame,
+        identity_columns: List[str],
+        resource_name: str,
+        partition_key: Optional[str] = None,
+        include_change_type: bool = False,
+    ) -> DataFrame:
+        """
+        Take fetched data and sync with the database, as sync_to_db_without_cleanup
+        does, as part of the session.
+
+        Parameters
+        ----------
+        resource_df: DataFrame
+            a DataFrame with current fetched data
+        identity_columns: List[str]
+            a List of the identity columns for the resource dataframe.
+        resource_name: str
+            the name of the API resource, e.g. "Courses", to be used in SQL
+        partition_key: Optional[str]
+            when the fetched data is only one slice of the resource, e.g. a single
+            section, a key identifying that slice
+        include_change_type: bool
+            whether to add a CHANGE_TYPE_COLUMN classifying each record
+
+        Returns
+        -------
+        DataFrame
+            a DataFrame with current fetched data and reconciled CreateDate/LastModifiedDate
+        """
+        assert (
+            Series(identity_columns).isin(resource_df.columns).all()
+        ), "Identity columns missing from dataframe"
+
+        result_df: DataFrame = _sync_with_connection(
+            resource_df,
+            identity_columns,
+            resource_name,
+            self._get_connection(),
+            self._payload_mode,
+            partition_key,
+            include_change_type,
+            reuse_tables=resource_name in self._synced_resources,
+        )
+        self._synced_resources.add(resource_name)
+
+        return result_df
+
+    def read_missing_records(
+        self, resource_name: str, partition_key: Optional[str] = None
+    ) -> DataFrame:
+        """
+        Read the previously synced records which were not in the latest sync of a
+        resource in this session. See resource_sync.read_missing_records.
+        Only a resource synced in this session has a Sync table of its latest fetch
+        to compare with.
+
+        Parameters
+        ----------
+        resource_name: str
+            the name of the API resource, e.g. "Courses", to be used in SQL
+        partition_key: Optional[str]
+            the partition the fetched data belonged to, if any
+
+        Returns
+        -------
+        DataFrame
+            a DataFrame with the stored data, CreateDate/LastModifiedDate, and a
+            CHANGE_TYPE_COLUMN of CHANGE_TYPES.DELETED
+
+        Raises
+        ------
+        ValueError
+            if the resource has not been synced in this session
+        """
+        if resource_name not in self._synced_resources:
+            raise ValueError(
+                f"Missing {resource_name} records can only be read after syncing "
+                f"{resource_name} in the same session"
+            )
+
+        return _read_missing_records(
+            resource_name, self._get_connection(), partition_key
+        )
+
+    def read_stored_records(
+        self, resource_name: str, partition_key: Optional[str] = None
+    ) -> DataFrame:
+        """
+        Read every stored record of a resource, or of one partition of it, including
+        those synced earlier in this session. Not available in the hash-only
+        payload mode.
+
+        Parameters
+        ----------
+        resource_name: str
+            the name of the API resource, e.g. "Courses", to be used in SQL
+        partition_key: Optional[str]
+            the partition to read, if any
+
+        Returns
+        -------
+        DataFrame
+            a DataFrame with the stored data and CreateDate/LastModifiedDate, empty
+            if there are no stored records
+        """
+        if self._payload_mode == PAYLOAD_MODES.HASH_ONLY:
+            raise ValueError(
+                "Stored records are read back from their Json, "
+                "which is not available in hash-only payload mode"
+            )
+
+        return _read_stored_records(
+            resource_name, self._get_connection(), partition_key
+        )
+
+    def read_watermarks(self, resource_name: str) -> Dict[str, str]:
+        """
+        Read the high-water marks of a resource. See sync_watermarks.read_watermarks.
+
+        Parameters
+        ----------
+        resource_name: str
+            the name of the API resource, e.g. "Submissions"
+
+        Returns
+        -------
+        Dict[str, str]
+            the watermarks by partition key
+        """
+        return read_watermarks(self._get_connection(), resource_name)
+
+    def set_watermark(
+        self, resource_name: str, watermark: str, partition_key: Optional[str] = None
+    ):
+        """
+        Record the high-water mark of a resource, or of one partition of it, to be
+        committed with the records synced in this session.
+
+        Parameters
+        ----------
+        resource_name: str
+            the name of the API resource, e.g. "Submissions"
+        watermark: str
+            the watermark, see sync_watermarks.watermark_for_fetch_started_at
+        partition_key: Optional[str]
+            the partition the watermark is for, if any
+        """
+        write_watermark(self._get_connection(), resource_name, watermark, partition_key)
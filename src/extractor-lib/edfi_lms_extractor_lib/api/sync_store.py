@@ -0,0 +1,1274 @@
+# SPDX-License-Identifier: Apache-2.0
+# Licensed to the Ed-Fi Alliance under one or more agreements.
+# The Ed-Fi Alliance licenses this file to you under the Apache License, Version 2.0.
+# See the LICENSE and NOTICES files in the project root for more information.
+
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+import logging
+import os
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from pandas import DataFrame, Series, concat, read_sql_query
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import QueuePool
+import sqlalchemy
+
+logger = logging.getLogger(__name__)
+
+SYNC_DB_FILE_NAME = "sync.sqlite"
+
+
+class SYNC_STORES:
+    """
+    The databases a sync can be stored in, see get_sync_store
+    """
+
+    # a SQLite file, readable with any SQLite tool. The default.
+    SQLITE = "sqlite"
+    # a DuckDB file, with columnar storage and vectorized compares.
+    # Requires the duckdb package, e.g. the duckdb extra of this library.
+    DUCKDB = "duckdb"
+
+    ALL = [SQLITE, DUCKDB]
+
+
+SYNC_COLUMNS = [
+    "SourceId",
+    "Json",
+    "Hash",
+    "CreateDate",
+    "LastModifiedDate",
+    "SyncNeeded",
+]
+
+# Json is stored in the form set for the database, see sync_payload.PAYLOAD_MODES
+SYNC_COLUMNS_SQL = """
+    SourceId TEXT,
+    Json TEXT,
+    Hash TEXT,
+    CreateDate DATETIME,
+    LastModifiedDate DATETIME,
+    SyncNeeded BIGINT,
+    PRIMARY KEY (SourceId)
+    """
+
+# Optional column identifying the partition (e.g. a section) a record was last synced with.
+# Kept out of SYNC_COLUMNS and added to existing tables on demand.
+PARTITION_KEY_COLUMN = "PartitionKey"
+
+SETTINGS_TABLE_NAME = "SyncSettings"
+
+WATERMARKS_TABLE_NAME = "SyncWatermarks"
+
+# SQLite limits the number of parameters in a single statement
+MAX_SQL_PARAMETERS = 500
+
+# Settings applied to every new sync database connection. WAL lets readers and the
+# writer work concurrently and, with synchronous=NORMAL, avoids an fsync per commit.
+# The sync tables are rebuilt from the source LMS each run, so this durability
+# trade-off is safe. The page cache and memory map keep the resource tables and
+# their indexes in memory, and temp_store keeps SQLite's sort and GROUP BY
+# scratch space off disk.
+SQLITE_PRAGMAS: Dict[str, Any] = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    # a negative cache_size is in KiB, i.e. 64 MiB
+    "cache_size": -64000,
+    # 256 MiB
+    "mmap_size": 268435456,
+    "temp_store": "MEMORY",
+}
+
+# The number of sync database connections kept open between uses. Each fetch
+# thread syncs over its own connection, so this follows the fetch concurrency.
+SYNC_DB_POOL_SIZE = 5
+
+
+class SyncStoreConnection(ABC):
+    """
+    An open connection to a sync database. Every statement a sync runs goes
+    through one of these methods, so the sync logic in resource_sync is the same
+    whichever database stores the records.
+
+    Besides the main table of each resource, a sync may keep two work tables:
+    a staging table of the fetched records, and a table of the records which
+    differ between the fetched and stored versions. See resource_sync for how
+    they are used.
+
+    Usage
+    -----
+        with sync_store.connect() as con:
+            con.ensure_resource_table("Courses")
+    """
+
+    def __enter__(self) -> "SyncStoreConnection":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @abstractmethod
+    def close(self):
+        """
+        Close the connection, rolling back any transaction left open
+        """
+
+    @abstractmethod
+    def begin(self):
+        """
+        Start a transaction, to be ended with commit or rollback
+        """
+
+    @abstractmethod
+    def commit(self):
+        """
+        Commit the transaction started with begin
+        """
+
+    @abstractmethod
+    def rollback(self):
+        """
+        Roll back the transaction started with begin
+        """
+
+    @abstractmethod
+    def table_exists(self, table_name: str) -> bool:
+        """
+        Parameters
+        ----------
+        table_name: str
+            the name of a table, e.g. a resource name
+
+        Returns
+        -------
+        bool
+            whether the table exists
+        """
+
+    @abstractmethod
+    def resource_table_names(self) -> List[str]:
+        """
+        Returns
+        -------
+        List[str]
+            the name of every main resource table, without the work tables
+        """
+
+    @abstractmethod
+    def ensure_resource_table(self, resource_name: str):
+        """
+        Ensure the main resource table exists, creating if necessary.
+
+        Parameters
+        ----------
+        resource_name: str
+            the name of the API resource, e.g. "Courses", to be used in SQL
+        """
+
+    @abstractmethod
+    def create_staging_table(self, resource_name: str):
+        """
+        Replace any existing staging table of a resource with an empty one.
+
+        Parameters
+        ----------
+        resource_name: str
+            the name of the API resource, e.g. "Courses", to be used in SQL
+        """
+
+    @abstractmethod
+    def clear_staging_table(self, resource_name: str):
+        """
+        Empty the staging table of a resource created earlier on this connection.
+
+        Parameters
+        ----------
+        resource_name: str
+            the name of the API resource, e.g. "Courses", to be used in SQL
+        """
+
+    @abstractmethod
+    def stage_records(self, resource_name: str, records_df: DataFrame):
+        """
+        Append fetched records to the staging table of a resource.
+
+        Parameters
+        ----------
+        resource_name: str
+            the name of the API resource, e.g. "Courses", to be used in SQL
+        records_df: DataFrame
+            a DataFrame with the SYNC_COLUMNS and partition key column
+        """
+
+    @abstractmethod
+    def compare_staged_records(
+        self,
+        resource_name: str,
+        partition_key: Optional[str] = None,
+        reuse_table: bool = False,
+    ) -> Tuple[int, int]:
+        """
+        Find the records which differ by hash between the staging and main tables,
+        i.e. new, changed, and stored but not fetched. When a partition key is
+        given, only the stored records in that partition are compared, along with
+        any record matching a staged SourceId, which may have been synced with a
+        different partition.
+
+        Parameters
+        ----------
+        resource_name: str
+            the name of the API resource, e.g. "Courses", to be used in SQL
+        partition_key: Optional[str]
+            the partition the fetched data belongs to, if any
+        reuse_table: bool
+            whether to refill the table of differing records created earlier on
+            this connection, rather than recreate it
+
+        Returns
+        -------
+        Tuple[int, int]
+            the number of new records and the number of changed records
+        """
+
+    @abstractmethod
+    def reconcile_create_dates(self, resource_name: str):
+        """
+        Carry the stored CreateDate over to the changed records, which were
+        staged with a CreateDate of now.
+
+        Parameters
+        ----------
+        resource_name: str
+            the name of the API resource, e.g. "Courses", to be used in SQL
+        """
+
+    @abstractmethod
+    def apply_staged_changes(self, resource_name: str, partition_key: Optional[str] = None):
+        """
+        Write the new and changed records to the main table, and move the unchanged
+        staged records to the partition they were fetched in.
+
+        Parameters
+        ----------
+        resource_name: str
+            the name of the API resource, e.g. "Courses", to be used in SQL
+        partition_key: Optional[str]
+            the partition the fetched data belongs to, if any
+        """
+
+    @abstractmethod
+    def read_staged_dates(
+        self, resource_name: str, after_row: int = 0, row_count: Optional[int] = None
+    ) -> DataFrame:
+        """
+        Read the reconciled CreateDate/LastModifiedDate of the staged records, in
+        staging order.
+
+        Parameters
+        ----------
+        resource_name: str
+            the name of the API resource, e.g. "Courses", to be used in SQL
+        after_row: int
+            the SyncRowId of the last record already read, 0 to start from the first
+        row_count: Optional[int]
+            the number of records to read, all of them by default
+
+        Returns
+        -------
+        DataFrame
+            a DataFrame with SyncRowId, SourceId, CreateDate and LastModifiedDate columns
+        """
+
+    @abstractmethod
+    def read_staged_change_counts(self, resource_name: str) -> Series:
+        """
+        Count the stored and fetched versions of each staged record found by
+        compare_staged_records: one if new, two (old and new hash) if changed.
+
+        Parameters
+        ----------
+        resource_name: str
+            the name of the API resource, e.g. "Courses", to be used in SQL
+
+        Returns
+        -------
+        Series
+            the counts indexed by SourceId, without the unchanged records
+        """
+
+    @abstractmethod
+    def read_missing_payloads(
+        self, resource_name: str, partition_key: Optional[str] = None
+    ) -> DataFrame:
+        """
+        Read the stored records which are not in the staging table.
+
+        Parameters
+        ----------
+        resource_name: str
+            the name of the API resource, e.g. "Courses", to be used in SQL
+        partition_key: Optional[str]
+            the partition to read, if any
+
+        Returns
+        -------
+        DataFrame
+            a DataFrame with Json, CreateDate and LastModifiedDate columns
+        """
+
+    @abstractmethod
+    def drop_staging_tables(self, resource_name: str):
+        """
+        Delete the work tables of a resource if they exist.
+
+        Parameters
+        ----------
+        resource_name: str
+            the name of the API resource, e.g. "Courses", to be used in SQL
+        """
+
+    @abstractmethod
+    def read_stored_hashes(
+        self,
+        resource_name: str,
+        source_ids: Series,
+        partition_key: Optional[str] = None,
+    ) -> DataFrame:
+        """
+        Load the SourceId, Hash and dates of the records already in the main table.
+        Without a partition key this is every record in the table. With a partition
+        key, it is the records in that partition plus any fetched SourceIds found
+        elsewhere.
+
+        Parameters
+        ----------
+        resource_name: str
+            the name of the API resource, e.g. "Courses", to be used in SQL
+        source_ids: Series
+            the SourceIds of the fetched records
+        partition_key: Optional[str]
+            the partition the fetched data belongs to, if any
+
+        Returns
+        -------
+        DataFrame
+            a DataFrame indexed by SourceId with Hash, CreateDate, LastModifiedDate
+            and partition key columns
+        """
+
+    @abstractmethod
+    def upsert_records(self, resource_name: str, records_df: DataFrame):
+        """
+        Insert new records and replace changed records in the main table.
+
+        Parameters
+        ----------
+        resource_name: str
+            the name of the API resource, e.g. "Courses", to be used in SQL
+        records_df: DataFrame
+            a non-empty DataFrame with the SYNC_COLUMNS and partition key column
+        """
+
+    @abstractmethod
+    def move_records_to_partition(
+        self, resource_name: str, source_ids: List[str], partition_key: Optional[str]
+    ):
+        """
+        Set the partition key of stored records.
+
+        Parameters
+        ----------
+        resource_name: str
+            the name of the API resource, e.g. "Courses", to be used in SQL
+        source_ids: List[str]
+            the SourceIds of the records
+        partition_key: Optional[str]
+            the partition the records were fetched in
+        """
+
+    @abstractmethod
+    def reset_sync_needed(self, resource_name: str):
+        """
+        Reset any SyncNeeded flags in the main table, e.g. left behind by an
+        interrupted sync.
+
+        Parameters
+        ----------
+        resource_name: str
+            the name of the API resource, e.g. "Courses", to be used in SQL
+        """
+
+    @abstractmethod
+    def read_stored_payloads(
+        self, resource_name: str, partition_key: Optional[str] = None
+    ) -> DataFrame:
+        """
+        Read every stored record of a resource, or of one partition of it.
+
+        Parameters
+        ----------
+        resource_name: str
+            the name of the API resource, e.g. "Courses", to be used in SQL
+        partition_key: Optional[str]
+            the partition to read, if any
+
+        Returns
+        -------
+        DataFrame
+            a DataFrame with Json, CreateDate and LastModifiedDate columns
+        """
+
+    @abstractmethod
+    def read_stored_payload_chunks(
+        self, resource_name: str, chunk_size: int
+    ) -> Iterator[DataFrame]:
+        """
+        Read every stored record of a resource a chunk at a time.
+
+        Parameters
+        ----------
+        resource_name: str
+            the name of the API resource, e.g. "Courses", to be used in SQL
+        chunk_size: int
+            the number of records in each chunk
+
+        Returns
+        -------
+        Iterator[DataFrame]
+            DataFrames with SourceId, Json, CreateDate and LastModifiedDate columns
+        """
+
+    @abstractmethod
+    def read_source_ids(self, resource_name: str) -> Series:
+        """
+        Parameters
+        ----------
+        resource_name: str
+            the name of the API resource, e.g. "Courses", to be used in SQL
+
+        Returns
+        -------
+        Series
+            the SourceId of every stored record
+        """
+
+    @abstractmethod
+    def read_setting(self, name: str) -> Optional[str]:
+        """
+        Parameters
+        ----------
+        name: str
+            the name of a sync database setting, e.g. sync_payload.PAYLOAD_MODE_SETTING
+
+        Returns
+        -------
+        Optional[str]
+            the value of the setting, None if never set
+        """
+
+    @abstractmethod
+    def write_setting(self, name: str, value: str):
+        """
+        Parameters
+        ----------
+        name: str
+            the name of a sync database setting
+        value: str
+            the value to set
+        """
+
+    @abstractmethod
+    def read_watermarks(self, resource_name: str) -> Dict[str, str]:
+        """
+        Parameters
+        ----------
+        resource_name: str
+            the name of the API resource, e.g. "Submissions"
+
+        Returns
+        -------
+        Dict[str, str]
+            the watermarks of the resource by partition key
+        """
+
+    @abstractmethod
+    def write_watermark(self, resource_name: str, partition_key: str, watermark: str):
+        """
+        Parameters
+        ----------
+        resource_name: str
+            the name of the API resource, e.g. "Submissions"
+        partition_key: str
+            the partition the watermark is for
+        watermark: str
+            the watermark
+        """
+
+    @abstractmethod
+    def clear_payloads(self, table_name: str):
+        """
+        Remove the stored Json of every record in a resource table.
+
+        Parameters
+        ----------
+        table_name: str
+            the name of a main resource table
+        """
+
+    @abstractmethod
+    def read_payload_batch(
+        self, table_name: str, compressed: bool, batch_size: int
+    ) -> List[Tuple[Any, Any]]:
+        """
+        Read a batch of stored Json in one form, to be converted to the other.
+
+        Parameters
+        ----------
+        table_name: str
+            the name of a main resource table
+        compressed: bool
+            whether to read compressed Json rather than text
+        batch_size: int
+            the maximum number of records to read
+
+        Returns
+        -------
+        List[Tuple[Any, Any]]
+            the row key and stored Json of each record, for write_payloads
+        """
+
+    @abstractmethod
+    def write_payloads(self, table_name: str, payloads: List[Tuple[Any, Any]]):
+        """
+        Parameters
+        ----------
+        table_name: str
+            the name of a main resource table
+        payloads: List[Tuple[Any, Any]]
+            the new stored Json and the row key, from read_payload_batch, of each record
+        """
+
+    @abstractmethod
+    def compact(self):
+        """
+        Reclaim the space freed by deleted and rewritten records. Must not be
+        called in a transaction.
+        """
+
+
+class SyncStore(ABC):
+    """
+    A database the synced records of each resource are stored in, and compared
+    against on the next sync. See get_sync_store.
+    """
+
+    # whether the store can keep Json in the sync_payload.PAYLOAD_MODES.COMPRESSED form
+    supports_compressed_payloads: bool = True
+
+    @abstractmethod
+    def connect(self) -> SyncStoreConnection:
+        """
+        Open a connection, to be closed by the caller or a with statement
+
+        Returns
+        -------
+        SyncStoreConnection
+            an open connection
+        """
+
+    @abstractmethod
+    def dispose(self):
+        """
+        Close every connection held open by the store
+        """
+
+    @contextmanager
+    def begin(self) -> Iterator[SyncStoreConnection]:
+        """
+        Open a connection with a transaction, which is committed when the with
+        statement ends, or rolled back if it ends with an exception
+
+        Returns
+        -------
+        Iterator[SyncStoreConnection]
+            the open connection
+        """
+        with self.connect() as con:
+            con.begin()
+            try:
+                yield con
+            except BaseException:
+                con.rollback()
+                raise
+            con.commit()
+
+
+SyncDb = Union[sqlalchemy.engine.base.Engine, SyncStore]
+
+SyncConnectable = Union[
+    sqlalchemy.engine.base.Engine,
+    sqlalchemy.engine.base.Connection,
+    SyncStore,
+    SyncStoreConnection,
+]
+
+
+class SQLiteSyncStoreConnection(SyncStoreConnection):
+    """
+    A connection to a SQLite sync database. See SQLiteSyncStore.
+    """
+
+    def __init__(self, connection: sqlalchemy.engine.base.Connection, close: bool = True):
+        """
+        Parameters
+        ----------
+        connection: sqlalchemy.engine.base.Connection
+            an open database connection
+        close: bool
+            whether closing this connection closes the database connection, False
+            when it belongs to the caller
+        """
+        self._connection = connection
+        self._close = close
+        self._transaction: Optional[sqlalchemy.engine.base.Transaction] = None
+
+    def close(self):
+        if self._close:
+            self._connection.close()
+
+    def begin(self):
+        self._transaction = self._connection.begin()
+
+    def commit(self):
+        assert self._transaction is not None, "No transaction was started"
+        self._transaction.commit()
+        self._transaction = None
+
+    def rollback(self):
+        assert self._transaction is not None, "No transaction was started"
+        self._transaction.rollback()
+        self._transaction = None
+
+    def table_exists(self, table_name: str) -> bool:
+        return (
+            self._connection.execute(
+                "SELECT name FROM sqlite_master WHERE type='table' AND name=?",
+                (table_name,),
+            ).first()
+            is not None
+        )
+
+    def _column_names(self, table_name: str) -> List[str]:
+        return [column[1] for column in self._connection.execute(f"PRAGMA table_info({table_name})")]
+
+    def resource_table_names(self) -> List[str]:
+        tables: List[str] = [
+            row[0]
+            for row in self._connection.execute("SELECT name FROM sqlite_master WHERE type='table'")
+            if not row[0].startswith(("Sync_", "Unmatched_"))
+        ]
+        return [
+            table
+            for table in tables
+            if {"SourceId", "Json", "Hash"}.issubset(self._column_names(table))
+        ]
+
+    def _ensure_partition_column_exists(self, table_name: str):
+        # tables created by an earlier version of this library have no partition column
+        if PARTITION_KEY_COLUMN not in self._column_names(table_name):
+            self._connection.execute(
+                f"ALTER TABLE {table_name} ADD COLUMN {PARTITION_KEY_COLUMN} TEXT"
+            )
+
+    def ensure_resource_table(self, resource_name: str):
+        self._connection.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {resource_name} (
+                {SYNC_COLUMNS_SQL}
+            )
+            """
+        )
+        self._connection.execute(
+            f"CREATE INDEX IF NOT EXISTS SYNCNEEDED_{resource_name} ON {resource_name}(SyncNeeded)"
+        )
+        self._ensure_partition_column_exists(resource_name)
+        self._connection.execute(
+            f"CREATE INDEX IF NOT EXISTS PARTITION_{resource_name} "
+            f"ON {resource_name}({PARTITION_KEY_COLUMN})"
+        )
+
+    def create_staging_table(self, resource_name: str):
+        # need column ordering to be identical to regular table
+        self._connection.execute(f"DROP TABLE IF EXISTS Sync_{resource_name}")
+        self._connection.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS Sync_{resource_name} (
+                {SYNC_COLUMNS_SQL}
+            )
+            """
+        )
+        self._ensure_partition_column_exists(f"Sync_{resource_name}")
+
+    def clear_staging_table(self, resource_name: str):
+        self._connection.execute(f"DELETE FROM Sync_{resource_name}")
+
+    def stage_records(self, resource_name: str, records_df: DataFrame):
+        records_df.set_index("SourceId").to_sql(
+            f"Sync_{resource_name}",
+            self._connection,
+            if_exists="append",
+            index=True,
+            chunksize=1000,
+        )
+
+    def compare_staged_records(
+        self,
+        resource_name: str,
+        partition_key: Optional[str] = None,
+        reuse_table: bool = False,
+    ) -> Tuple[int, int]:
+        # Single entry in result set if identity only exists in one table (meaning add
+        # or missing), so SyncNeeded flag will indicate which table it's from.
+        # Double entry in result set if identity exists in both (meaning update needed),
+        # so SyncNeeded will show which row is from which table.
+        existing_records_sql = f"SELECT * FROM {resource_name}"
+        parameters: tuple = ()
+        if partition_key is not None:
+            existing_records_sql += f"""
+                WHERE {PARTITION_KEY_COLUMN} = ?
+                OR SourceId IN (SELECT SourceId FROM Sync_{resource_name})
+                """
+            parameters = (partition_key,)
+
+        unmatched_records_sql = f"""
+            SELECT * FROM (
+                {existing_records_sql}
+                UNION ALL
+                SELECT * FROM Sync_{resource_name}
+            )
+            GROUP BY SourceId, Hash
+            HAVING COUNT(*) = 1
+            """
+
+        if reuse_table:
+            self._connection.execute(f"DELETE FROM Unmatched_{resource_name}")
+            self._connection.execute(
+                f"INSERT INTO Unmatched_{resource_name} {unmatched_records_sql}", parameters
+            )
+        else:
+            self._connection.execute(f"DROP INDEX IF EXISTS ID_{resource_name}")
+            self._connection.execute(f"DROP TABLE IF EXISTS Unmatched_{resource_name}")
+            self._connection.execute(
+                f"CREATE TABLE Unmatched_{resource_name} AS {unmatched_records_sql}",
+                parameters,
+            )
+            self._connection.execute(
+                f"CREATE INDEX IF NOT EXISTS ID_{resource_name} ON Unmatched_{resource_name}(SourceId)"
+            )
+
+        # a fetched record is unmatched once if new, and twice (old and new hash) if changed
+        (new, changed) = self._connection.execute(
+            f"""
+            SELECT COALESCE(SUM(UnmatchedCount = 1), 0), COALESCE(SUM(UnmatchedCount > 1), 0)
+            FROM (
+                SELECT COUNT(*) AS UnmatchedCount
+                FROM Unmatched_{resource_name}
+                GROUP BY SourceId
+                HAVING MAX(SyncNeeded) = 1
+            )
+            """
+        ).first()
+        return int(new), int(changed)
+
+    def reconcile_create_dates(self, resource_name: str):
+        # UPDATE-FROM is not available in sqlite until v3.33.0, thus the double select
+        self._connection.execute(
+            f"""
+            UPDATE Unmatched_{resource_name}
+                SET CreateDate = (
+                    SELECT c.CreateDate
+                    FROM {resource_name} c
+                    WHERE c.SourceId = Unmatched_{resource_name}.SourceId
+                )
+                WHERE EXISTS (
+                    SELECT *
+                    FROM {resource_name} c
+                    WHERE c.SourceId = Unmatched_{resource_name}.SourceId
+                ) AND SyncNeeded = 1
+            """
+        )
+
+    def apply_staged_changes(self, resource_name: str, partition_key: Optional[str] = None):
+        CHANGED_ROWS_CTE = f"""
+                            changedRows AS (
+                                SELECT * FROM Unmatched_{resource_name}
+                                WHERE (SourceId) IN (
+                                    SELECT SourceId FROM Unmatched_{resource_name}
+                                    GROUP BY SourceId
+                                    HAVING COUNT(*) > 1
+                                ) AND SyncNeeded = 1
+                            )
+                            """
+
+        # delete obsolete data from regular table
+        self._connection.execute(
+            # changed rows CTE (from SyncNeeded side only)
+            f"""
+            WITH
+            {CHANGED_ROWS_CTE}
+            DELETE FROM {resource_name}
+            WHERE (SourceId) IN (
+                SELECT SourceId from changedRows
+            )
+            """
+        )
+
+        # insert new and changed data into regular table
+        self._connection.execute(
+            #    changed rows CTE (from SyncNeeded side only)
+            #    new rows CTE (also from SyncNeeded side)
+            f"""
+            WITH
+                {CHANGED_ROWS_CTE},
+                newRows AS (
+                    SELECT * FROM Unmatched_{resource_name}
+                    WHERE (SourceId) IN (
+                        SELECT SourceId FROM Unmatched_{resource_name}
+                        GROUP BY SourceId
+                        HAVING COUNT(*) = 1 AND SyncNeeded = 1
+                    )
+                )
+            INSERT INTO {resource_name}
+                SELECT * FROM Unmatched_{resource_name}
+                WHERE (SourceId) IN (
+                    SELECT SourceId FROM changedRows
+                    UNION ALL
+                    SELECT SourceId FROM newRows
+                ) AND SyncNeeded = 1
+            """
+        )
+
+        self.reset_sync_needed(resource_name)
+
+        # unchanged records fetched in a different partition than they were synced
+        # with, e.g. a student changing sections, move to the new partition
+        self._connection.execute(
+            f"""
+            UPDATE {resource_name}
+            SET {PARTITION_KEY_COLUMN} = ?
+            WHERE SourceId IN (SELECT SourceId FROM Sync_{resource_name})
+            AND {PARTITION_KEY_COLUMN} IS NOT ?
+            """,
+            (partition_key, partition_key),
+        )
+
+    def read_staged_dates(
+        self, resource_name: str, after_row: int = 0, row_count: Optional[int] = None
+    ) -> DataFrame:
+        return read_sql_query(
+            f"""
+            SELECT s.rowid AS SyncRowId, s.SourceId, c.CreateDate, c.LastModifiedDate
+            FROM Sync_{resource_name} s
+            INNER JOIN {resource_name} c ON c.SourceId = s.SourceId
+            WHERE s.rowid > ?
+            ORDER BY s.rowid
+            LIMIT ?
+            """,
+            self._connection,
+            # a negative LIMIT is no limit
+            params=(after_row, -1 if row_count is None else row_count),
+        )
+
+    def read_staged_change_counts(self, resource_name: str) -> Series:
+        return read_sql_query(
+            f"""
+            SELECT SourceId, COUNT(*) AS UnmatchedCount
+            FROM Unmatched_{resource_name}
+            WHERE SourceId IN (SELECT SourceId FROM Sync_{resource_name})
+            GROUP BY SourceId
+            """,
+            self._connection,
+        ).set_index("SourceId")["UnmatchedCount"]
+
+    def read_missing_payloads(
+        self, resource_name: str, partition_key: Optional[str] = None
+    ) -> DataFrame:
+        missing_sql = f"""
+            SELECT Json, CreateDate, LastModifiedDate
+            FROM {resource_name}
+            WHERE SourceId NOT IN (SELECT SourceId FROM Sync_{resource_name})
+            """
+        parameters: tuple = ()
+        if partition_key is not None:
+            missing_sql += f" AND {PARTITION_KEY_COLUMN} = ?"
+            parameters = (partition_key,)
+
+        return read_sql_query(missing_sql, self._connection, params=parameters)
+
+    def drop_staging_tables(self, resource_name: str):
+        self._connection.execute(f"DROP TABLE IF EXISTS Sync_{resource_name}")
+        self._connection.execute(f"DROP TABLE IF EXISTS Unmatched_{resource_name}")
+
+    def read_stored_hashes(
+        self,
+        resource_name: str,
+        source_ids: Series,
+        partition_key: Optional[str] = None,
+    ) -> DataFrame:
+        select_sql = (
+            f"SELECT SourceId, Hash, CreateDate, LastModifiedDate, {PARTITION_KEY_COLUMN} "
+            f"FROM {resource_name}"
+        )
+        if partition_key is None:
+            return read_sql_query(select_sql, self._connection).set_index("SourceId")
+
+        existing_df: DataFrame = read_sql_query(
+            f"{select_sql} WHERE {PARTITION_KEY_COLUMN} = ?",
+            self._connection,
+            params=(partition_key,),
+        )
+
+        # records can move between partitions, e.g. a student changing sections
+        other_source_ids: List[str] = source_ids[
+            ~source_ids.isin(existing_df["SourceId"])
+        ].tolist()
+        other_dfs: List[DataFrame] = [
+            read_sql_query(
+                f"{select_sql} WHERE SourceId IN ({', '.join('?' * len(chunk))})",
+                self._connection,
+                params=chunk,
+            )
+            for chunk in [
+                other_source_ids[i : i + MAX_SQL_PARAMETERS]
+                for i in range(0, len(other_source_ids), MAX_SQL_PARAMETERS)
+            ]
+        ]
+
+        return concat([existing_df, *other_dfs]).set_index("SourceId")
+
+    def upsert_records(self, resource_name: str, records_df: DataFrame):
+        # uses the SourceId primary key index to find existing rows
+        all_columns = [*SYNC_COLUMNS, PARTITION_KEY_COLUMN]
+        columns = ", ".join(all_columns)
+        placeholders = ", ".join("?" * len(all_columns))
+        self._connection.execute(
+            f"INSERT OR REPLACE INTO {resource_name} ({columns}) VALUES ({placeholders})",
+            list(records_df[all_columns].itertuples(index=False, name=None)),
+        )
+
+    def move_records_to_partition(
+        self, resource_name: str, source_ids: List[str], partition_key: Optional[str]
+    ):
+        for i in range(0, len(source_ids), MAX_SQL_PARAMETERS):
+            chunk: List[str] = source_ids[i : i + MAX_SQL_PARAMETERS]
+            self._connection.execute(
+                f"""
+                UPDATE {resource_name}
+                SET {PARTITION_KEY_COLUMN} = ?
+                WHERE SourceId IN ({', '.join('?' * len(chunk))})
+                """,
+                (partition_key, *chunk),
+            )
+
+    def reset_sync_needed(self, resource_name: str):
+        self._connection.execute(
+            f"""
+            UPDATE {resource_name}
+            SET SyncNeeded = 0
+            WHERE SyncNeeded != 0
+            """
+        )
+
+    def read_stored_payloads(
+        self, resource_name: str, partition_key: Optional[str] = None
+    ) -> DataFrame:
+        stored_sql = f"SELECT Json, CreateDate, LastModifiedDate FROM {resource_name}"
+        parameters: tuple = ()
+        if partition_key is not None:
+            stored_sql += f" WHERE {PARTITION_KEY_COLUMN} = ?"
+            parameters = (partition_key,)
+
+        return read_sql_query(stored_sql, self._connection, params=parameters)
+
+    def read_stored_payload_chunks(
+        self, resource_name: str, chunk_size: int
+    ) -> Iterator[DataFrame]:
+        return read_sql_query(
+            f"SELECT SourceId, Json, CreateDate, LastModifiedDate FROM {resource_name}",
+            self._connection,
+            chunksize=chunk_size,
+        )
+
+    def read_source_ids(self, resource_name: str) -> Series:
+        return read_sql_query(f"SELECT SourceId FROM {resource_name}", self._connection)[
+            "SourceId"
+        ]
+
+    def read_setting(self, name: str) -> Optional[str]:
+        if not self.table_exists(SETTINGS_TABLE_NAME):
+            return None
+
+        row = self._connection.execute(
+            f"SELECT Value FROM {SETTINGS_TABLE_NAME} WHERE Name=?", (name,)
+        ).first()
+        return None if row is None else row[0]
+
+    def write_setting(self, name: str, value: str):
+        self._connection.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {SETTINGS_TABLE_NAME} (
+                Name TEXT PRIMARY KEY,
+                Value TEXT
+            )
+            """
+        )
+        self._connection.execute(
+            f"INSERT OR REPLACE INTO {SETTINGS_TABLE_NAME} VALUES (?, ?)", (name, value)
+        )
+
+    def read_watermarks(self, resource_name: str) -> Dict[str, str]:
+        if not self.table_exists(WATERMARKS_TABLE_NAME):
+            return {}
+
+        return {
+            row[0]: row[1]
+            for row in self._connection.execute(
+                f"SELECT PartitionKey, Watermark FROM {WATERMARKS_TABLE_NAME} WHERE ResourceName=?",
+                (resource_name,),
+            )
+        }
+
+    def write_watermark(self, resource_name: str, partition_key: str, watermark: str):
+        self._connection.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {WATERMARKS_TABLE_NAME} (
+                ResourceName TEXT,
+                PartitionKey TEXT,
+                Watermark TEXT,
+                PRIMARY KEY (ResourceName, PartitionKey)
+            )
+            """
+        )
+        self._connection.execute(
+            f"INSERT OR REPLACE INTO {WATERMARKS_TABLE_NAME} VALUES (?, ?, ?)",
+            (resource_name, partition_key, watermark),
+        )
+
+    def clear_payloads(self, table_name: str):
+        self._connection.execute(f"UPDATE {table_name} SET Json = NULL WHERE Json IS NOT NULL")
+
+    def read_payload_batch(
+        self, table_name: str, compressed: bool, batch_size: int
+    ) -> List[Tuple[Any, Any]]:
+        # SQLite keeps the storage class of each value, so compressed Json is a BLOB
+        return [
+            (row[0], row[1])
+            for row in self._connection.execute(
+                f"SELECT rowid, Json FROM {table_name} WHERE typeof(Json) = ? LIMIT ?",
+                ("blob" if compressed else "text", batch_size),
+            )
+        ]
+
+    def write_payloads(self, table_name: str, payloads: List[Tuple[Any, Any]]):
+        self._connection.execute(f"UPDATE {table_name} SET Json = ? WHERE rowid = ?", payloads)
+
+    def compact(self):
+        self._connection.execute("VACUUM")
+
+
+class SQLiteSyncStore(SyncStore):
+    """
+    A sync store in a SQLite file, the default. See create_sync_db_engine for the
+    tuning applied to a sync database created by this library.
+    """
+
+    def __init__(self, engine: sqlalchemy.engine.base.Engine):
+        """
+        Parameters
+        ----------
+        engine: sqlalchemy.engine.base.Engine
+            an Engine instance for a SQLite database
+        """
+        self.engine = engine
+
+    def connect(self) -> SQLiteSyncStoreConnection:
+        return SQLiteSyncStoreConnection(self.engine.connect())
+
+    def dispose(self):
+        self.engine.dispose()
+
+
+def as_sync_store(sync_db: SyncDb) -> SyncStore:
+    """
+    Get the sync store for an argument which may also be a SQL Alchemy Engine, as
+    passed by earlier versions of this library
+
+    Parameters
+    ----------
+    sync_db: Union[Engine, SyncStore]
+        a sync store, or an Engine instance for a SQLite sync database
+
+    Returns
+    -------
+    SyncStore
+        the sync store
+    """
+    if isinstance(sync_db, SyncStore):
+        return sync_db
+    return SQLiteSyncStore(sync_db)
+
+
+@contextmanager
+def connect_to(sync_db: SyncConnectable) -> Iterator[SyncStoreConnection]:
+    """
+    Get a sync store connection for an argument which may already be a connection,
+    closing it afterwards only if opened here
+
+    Parameters
+    ----------
+    sync_db: Union[Engine, Connection, SyncStore, SyncStoreConnection]
+        a sync store, an Engine instance for a SQLite sync database, or an open
+        connection to either
+
+    Returns
+    -------
+    Iterator[SyncStoreConnection]
+        the sync store connection
+    """
+    if isinstance(sync_db, SyncStoreConnection):
+        yield sync_db
+    elif isinstance(sync_db, sqlalchemy.engine.base.Connection):
+        yield SQLiteSyncStoreConnection(sync_db, close=False)
+    else:
+        with as_sync_store(sync_db).connect() as con:
+            yield con
+
+
+def _apply_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+
+def create_sync_db_engine(database_path: str) -> sqlalchemy.engine.base.Engine:
+    """
+    Create a SQL Alchemy Engine for a SQLite sync database file, tuned for the
+    bulk load and compare work done by the resource sync.
+
+    The Engine keeps a pool of open connections instead of reopening the file, and
+    its page cache, for every operation. Each connection is used by one thread at
+    a time, and can be checked out by any thread.
+
+    Parameters
+    ----------
+    database_path: str
+        the path to the SQLite file, which will be created if necessary
+
+    Returns
+    -------
+    sqlalchemy.engine.base.Engine
+        a SQL Alchemy Engine
+    """
+    engine: sqlalchemy.engine.base.Engine = create_engine(
+        f"sqlite:///{database_path}",
+        poolclass=QueuePool,
+        pool_size=SYNC_DB_POOL_SIZE,
+        # pooled connections move between threads, but are never shared by two at once
+        connect_args={"check_same_thread": False},
+    )
+    event.listen(engine, "connect", _apply_pragmas)
+    return engine
+
+
+def get_sync_db_engine(sync_database_directory: str) -> sqlalchemy.engine.base.Engine:
+    """
+    Create a SQL Alchemy Engine for the sync database in a directory, creating the
+    directory if necessary.
+
+    Parameters
+    ----------
+    sync_database_directory: str
+        the directory for the sync database file
+
+    Returns
+    -------
+    sqlalchemy.engine.base.Engine
+        a SQL Alchemy Engine
+    """
+    logger.debug(
+        "Ensuring database directory at %s", os.path.abspath(sync_database_directory)
+    )
+    os.makedirs(sync_database_directory, exist_ok=True)
+
+    return create_sync_db_engine(
+        os.path.join(sync_database_directory, SYNC_DB_FILE_NAME)
+    )
+
+
+def get_sync_store(sync_database_directory: str, store: str = SYNC_STORES.SQLITE) -> SyncStore:
+    """
+    Create a sync store in a directory, creating the directory if necessary. Each
+    store keeps its own file, so switching stores starts a new sync history.
+
+    Parameters
+    ----------
+    sync_database_directory: str
+        the directory for the sync database file
+    store: str
+        one of SYNC_STORES
+
+    Returns
+    -------
+    SyncStore
+        the sync store
+
+    Raises
+    ------
+    ImportError
+        if the store requires a package which is not installed
+    """
+    assert store in SYNC_STORES.ALL, f"Unknown sync store {store}"
+
+    if store == SYNC_STORES.DUCKDB:
+        # imported here as the duckdb package is optional
+        from edfi_lms_extractor_lib.api.duckdb_sync_store import (
+            DUCKDB_SYNC_DB_FILE_NAME,
+            DuckDBSyncStore,
+        )
+
+        os.makedirs(sync_database_directory, exist_ok=True)
+        return DuckDBSyncStore(
+            os.path.join(sync_database_directory, DUCKDB_SYNC_DB_FILE_NAME)
+        )
+
+    return SQLiteSyncStore(get_sync_db_engine(sync_database_directory))
+
+
+def get_extractor_db_engine(
+    sync_db: SyncDb, sync_database_directory: str
+) -> sqlalchemy.engine.base.Engine:
+    """
+    Get a SQL Alchemy Engine for the tables an extractor keeps beside its synced
+    resources, e.g. a record of the usage files already processed. A SQLite sync
+    store shares its Engine, while other stores keep these tables in the SQLite
+    sync database of the same directory.
+
+    Parameters
+    ----------
+    sync_db: Union[Engine, SyncStore]
+        the sync store of the extractor, or an Engine instance for a SQLite sync database
+    sync_database_directory: str
+        the directory of the sync store
+
+    Returns
+    -------
+    sqlalchemy.engine.base.Engine
+        a SQL Alchemy Engine
+    """
+    if isinstance(sync_db, sqlalchemy.engine.base.Engine):
+        return sync_db
+    if isinstance(sync_db, SQLiteSyncStore):
+        return sync_db.engine
+    return get_sync_db_engine(sync_database_directory)
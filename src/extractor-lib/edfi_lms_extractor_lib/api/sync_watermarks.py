@@ -0,0 +1,85 @@
+# SPDX-License-Identifier: Apache-2.0
+# Licensed to the Ed-Fi Alliance under one or more agreements.
+# The Ed-Fi Alliance licenses this file to you under the Apache License, Version 2.0.
+# See the LICENSE and NOTICES files in the project root for more information.
+
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from edfi_lms_extractor_lib.api.sync_store import SyncConnectable, connect_to
+
+# the watermark of a resource with no partition key
+NO_PARTITION = ""
+
+# a watermark is set this far before the fetch started, so that records changed
+# while the fetch ran, or stamped by a server clock running behind, are fetched
+# again by the next incremental run rather than missed
+WATERMARK_OVERLAP = timedelta(minutes=10)
+
+
+def watermark_for_fetch_started_at(fetch_started_at: datetime) -> str:
+    """
+    Get the watermark to set for a fetch, as an ISO 8601 UTC date time
+
+    Parameters
+    ----------
+    fetch_started_at: datetime
+        when the fetch started, timezone aware
+
+    Returns
+    -------
+    str
+        the watermark, e.g. 2021-03-01T11:50:00Z
+    """
+    return (fetch_started_at - WATERMARK_OVERLAP).astimezone(timezone.utc).strftime(
+        "%Y-%m-%dT%H:%M:%SZ"
+    )
+
+
+def read_watermarks(con: SyncConnectable, resource_name: str) -> Dict[str, str]:
+    """
+    Read the high-water marks of a resource, such as the date of its last fetch,
+    from which an incremental fetch can resume
+
+    Parameters
+    ----------
+    con: Union[Engine, Connection, SyncStore, SyncStoreConnection]
+        a sync store or an Engine instance, or an open connection to either
+    resource_name: str
+        the name of the API resource, e.g. "Submissions"
+
+    Returns
+    -------
+    Dict[str, str]
+        the watermarks by partition key, NO_PARTITION for the whole resource
+    """
+    with connect_to(con) as store_con:
+        return store_con.read_watermarks(resource_name)
+
+
+def write_watermark(
+    con: SyncConnectable,
+    resource_name: str,
+    watermark: str,
+    partition_key: Optional[str] = None,
+):
+    """
+    Record the high-water mark of a resource, or of one partition of it. Write it
+    with the sync of the records it covers, e.g. in the same SyncSession, so that
+    it is only committed with them.
+
+    Parameters
+    ----------
+    con: Union[Engine, Connection, SyncStore, SyncStoreConnection]
+        a sync store or an Engine instance, or an open connection to either
+    resource_name: str
+        the name of the API resource, e.g. "Submissions"
+    watermark: str
+        the watermark, see watermark_for_fetch_started_at
+    partition_key: Optional[str]
+        the partition the watermark is for, if any
+    """
+    with connect_to(con) as store_con:
+        store_con.write_watermark(
+            resource_name, NO_PARTITION if partition_key is None else partition_key, watermark
+        )
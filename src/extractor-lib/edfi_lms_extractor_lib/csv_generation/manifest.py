@@ -0,0 +1,313 @@
+# SPDX-License-Identifier: Apache-2.0
+# Licensed to the Ed-Fi Alliance under one or more agreements.
+# The Ed-Fi Alliance licenses this file to you under the Apache License, Version 2.0.
+# See the LICENSE and NOTICES files in the project root for more information.
+
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from hashlib import sha256
+import json
+import logging
+import os
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+from uuid import uuid4
+
+logger = logging.getLogger(__name__)
+
+# each run writes its manifest to this subdirectory of the output directory, named
+# by the run date and a random suffix, as e.g. manifests/2021-01-02-03-04-05-1a2b3c4d.json
+MANIFEST_DIRECTORY = "manifests"
+MANIFEST_VERSION = 1
+
+# the partition directory of a section, e.g. section=123
+SECTION_PARTITION = "section"
+
+_HASH_CHUNK_BYTES = 1024 * 1024
+
+
+@dataclass
+class ManifestEntry:
+    """
+    A file written by a run.
+    """
+
+    # relative to the output directory, with / separators
+    path: str
+    # the resource directory name, e.g. grades
+    resource: str
+    # the ids of the partition directories, e.g. {"section": "123"}
+    partitions: Dict[str, str] = field(default_factory=dict)
+    rows: int = 0
+    size: int = 0
+    sha256: str = ""
+
+
+@dataclass
+class EmptyPartition:
+    """
+    A section which had no records for a resource in a run, recorded in place of
+    writing an empty file for it.
+    """
+
+    # the path the empty file would have had, relative to the output directory,
+    # without an extension, e.g. section=123/grades/2021-01-02-03-04-05
+    path: str
+    resource: str
+    partitions: Dict[str, str] = field(default_factory=dict)
+
+
+def _parse_path(relative_path: str) -> Tuple[str, Dict[str, str]]:
+    """
+    Get the resource and partition ids from a path relative to the output directory
+    """
+    partitions: Dict[str, str] = {}
+    resources: List[str] = []
+    for directory in relative_path.split(os.sep)[:-1]:
+        (name, equals, value) = directory.partition("=")
+        if equals:
+            partitions[name] = value
+        else:
+            resources.append(name)
+
+    return (resources[0] if resources else "", partitions)
+
+
+def _file_sha256(path: str) -> str:
+    digest = sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(_HASH_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class RunManifest:
+    """
+    Records each file written by an extractor run, and each section with no
+    records for a resource, then writes them as the run manifest. Since the
+    manifest is only written once the run has finished writing, and is written to
+    a temporary file which is then renamed, a reader of the manifest never sees a
+    partly written manifest or data file.
+    """
+
+    def __init__(self, output_directory: str, run_date: Optional[datetime] = None):
+        """
+        Parameters
+        ----------
+        output_directory: str
+            the root output directory of the extractor
+        run_date: Optional[datetime]
+            the start of the run, for the manifest file name, by default now
+        """
+        self._output_directory = os.path.normpath(output_directory)
+        self._run_date = run_date or datetime.now()
+        self._lock = Lock()
+        self._entries: List[ManifestEntry] = []
+        self._empty_partitions: List[EmptyPartition] = []
+
+    @property
+    def entries(self) -> List[ManifestEntry]:
+        """
+        The files recorded so far, in the order they were written
+        """
+        return self._entries
+
+    @property
+    def empty_partitions(self) -> List[EmptyPartition]:
+        """
+        The sections recorded as having no records so far
+        """
+        return self._empty_partitions
+
+    def _relative_path(self, path: str) -> Optional[str]:
+        relative_path: str = os.path.relpath(path, self._output_directory)
+        if relative_path.startswith(os.pardir):
+            logger.debug("Not recording %s outside of the output directory", path)
+            return None
+        return relative_path
+
+    def record(self, path: str, rows: int):
+        """
+        Record a newly written file. Safe to call from writer threads.
+
+        Parameters
+        ----------
+        path: str
+            the path of the file, under the output directory
+        rows: int
+            the number of records in the file
+        """
+        relative_path: Optional[str] = self._relative_path(path)
+        if relative_path is None:
+            return
+
+        (resource, partitions) = _parse_path(relative_path)
+        entry = ManifestEntry(
+            path="/".join(relative_path.split(os.sep)),
+            resource=resource,
+            partitions=partitions,
+            rows=rows,
+            size=os.path.getsize(path),
+            sha256=_file_sha256(path),
+        )
+        with self._lock:
+            self._entries.append(entry)
+
+    def record_empty_partition(self, path: str) -> bool:
+        """
+        Record that a section has no records for a resource, in place of writing
+        an empty file for it. Only files of a single section can be recorded.
+        Safe to call from writer threads.
+
+        Parameters
+        ----------
+        path: str
+            the path the empty file would have, under the output directory
+
+        Returns
+        -------
+        bool
+            True if recorded, False if an empty file must be written instead
+        """
+        relative_path: Optional[str] = self._relative_path(path)
+        if relative_path is None:
+            return False
+
+        (resource, partitions) = _parse_path(relative_path)
+        if list(partitions) != [SECTION_PARTITION]:
+            return False
+
+        (directory, file_name) = os.path.split(relative_path)
+        empty_partition = EmptyPartition(
+            path="/".join([*directory.split(os.sep), file_name.split(".", 1)[0]]),
+            resource=resource,
+            partitions=partitions,
+        )
+        with self._lock:
+            self._empty_partitions.append(empty_partition)
+        return True
+
+    def write(self) -> str:
+        """
+        Write the manifest atomically, as a temporary file which is then renamed.
+        The name has a random suffix after the run date, so that runs started in
+        the same second, e.g. runs of separate resources into one output
+        directory, do not overwrite each other's manifest.
+
+        Returns
+        -------
+        str
+            the path of the manifest
+        """
+        directory: str = os.path.join(self._output_directory, MANIFEST_DIRECTORY)
+        os.makedirs(directory, exist_ok=True)
+        path: str = os.path.join(
+            directory,
+            f"{self._run_date.strftime('%Y-%m-%d-%H-%M-%S')}-{uuid4().hex[:8]}.json",
+        )
+
+        with self._lock:
+            manifest = {
+                "version": MANIFEST_VERSION,
+                "run": self._run_date.isoformat(),
+                "files": [asdict(entry) for entry in self._entries],
+                "empty_partitions": [
+                    asdict(empty_partition) for empty_partition in self._empty_partitions
+                ],
+            }
+        with open(f"{path}.tmp", "w") as manifest_file:
+            json.dump(manifest, manifest_file, indent=2)
+        os.replace(f"{path}.tmp", path)
+
+        logger.info(f"Generated run manifest => {path}")
+        return path
+
+
+_run_manifest: Optional[RunManifest] = None
+
+
+def start_run_manifest(output_directory: str) -> RunManifest:
+    """
+    Start recording every file written by the write functions, for the run
+    manifest
+
+    Parameters
+    ----------
+    output_directory: str
+        the root output directory of the extractor
+
+    Returns
+    -------
+    RunManifest
+        the manifest of the run
+    """
+    global _run_manifest
+    _run_manifest = RunManifest(output_directory)
+    return _run_manifest
+
+
+def get_run_manifest() -> Optional[RunManifest]:
+    """
+    Get the manifest of the current run
+
+    Returns
+    -------
+    Optional[RunManifest]
+        the manifest, or None when files are not being recorded
+    """
+    return _run_manifest
+
+
+def record_written_file(path: str, rows: int):
+    """
+    Record a newly written file in the manifest of the current run, if any
+
+    Parameters
+    ----------
+    path: str
+        the path of the file
+    rows: int
+        the number of records in the file
+    """
+    manifest: Optional[RunManifest] = _run_manifest
+    if manifest is not None:
+        manifest.record(path, rows)
+
+
+def record_empty_partition(path: str) -> bool:
+    """
+    Record that a section has no records for a resource in the manifest of the
+    current run, in place of writing an empty file for it
+
+    Parameters
+    ----------
+    path: str
+        the path the empty file would have
+
+    Returns
+    -------
+    bool
+        True if recorded, False if an empty file must be written instead, because
+        no run was started or the file is not for a single section
+    """
+    manifest: Optional[RunManifest] = _run_manifest
+    if manifest is None:
+        return False
+    return manifest.record_empty_partition(path)
+
+
+def finish_run_manifest() -> Optional[str]:
+    """
+    Write the manifest of the current run, and stop recording files
+
+    Returns
+    -------
+    Optional[str]
+        the path of the manifest, or None when no run was started
+    """
+    global _run_manifest
+    manifest: Optional[RunManifest] = _run_manifest
+    _run_manifest = None
+    if manifest is None:
+        return None
+    return manifest.write()
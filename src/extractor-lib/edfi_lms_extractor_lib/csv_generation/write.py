@@ -3,11 +3,39 @@
 # The Ed-Fi Alliance licenses this file to you under the Apache License, Version 2.0.
 # See the LICENSE and NOTICES files in the project root for more information.
 
+from hashlib import sha256
+import json
 import logging
-from typing import Dict, List, Tuple
+from functools import partial
+from itertools import chain
+from importlib.util import find_spec
+from threading import Lock
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+    Union,
+)
 import os
+import re
 from datetime import datetime
-from pandas import DataFrame
+import pandas
+from pandas import DataFrame, concat, to_datetime
+from edfi_lms_extractor_lib.csv_generation.manifest import (
+    record_empty_partition,
+    record_written_file,
+)
+from edfi_lms_extractor_lib.csv_generation.writer_pool import (
+    CsvWriterPool,
+    current_writer_pool,
+)
 
 
 USERS_ROOT_DIRECTORY = ["users"]
@@ -19,8 +47,363 @@ GRADES_ROOT_DIRECTORY = ["section={id}", "grades"]
 SECTION_ACTIVITY_DIRECTORY = ["section={id}", "section-activities"]
 SYSTEM_ACTIVITY_ROOT_DIRECTORY = ["system-activities"]
 
+# the LMS UDM date columns, written as timestamps in Parquet output
+DATE_COLUMNS = [
+    "SourceCreateDate",
+    "SourceLastModifiedDate",
+    "CreateDate",
+    "LastModifiedDate",
+]
+
+# each output directory records the fingerprint of its newest file of each type
+# here, when skipping unchanged files
+FINGERPRINT_FILE = ".fingerprints.json"
+
+# the pandas Parquet engines, one of which must be installed for Parquet output
+PARQUET_ENGINES = ["pyarrow", "fastparquet"]
+
+
+class OUTPUT_FORMATS:
+    """
+    The file formats written by the extractors. Each file is written with the
+    same directory layout and timestamped name in each format.
+    """
+
+    CSV = "csv"
+    PARQUET = "parquet"
+    BOTH = "both"
+
+    ALL = [CSV, PARQUET, BOTH]
+
+
+class OUTPUT_LAYOUTS:
+    """
+    The directory layouts written by the extractors. The partitioned layout writes
+    a file per section, or per section and assignment, in a section={id} directory.
+    The consolidated layout writes each resource as one file, or as shards of a
+    maximum number of rows, carrying the partition ids in partition columns named
+    after the partition directories, e.g. section.
+    """
+
+    PARTITIONED = "partitioned"
+    CONSOLIDATED = "consolidated"
+
+    ALL = [PARTITIONED, CONSOLIDATED]
+
+
+class CSV_COMPRESSIONS:
+    """
+    The compression applied to CSV output, which adds an extension to each file
+    name, e.g. 2021-01-02-03-04-05.csv.gz
+    """
+
+    NONE = "none"
+    GZIP = "gzip"
+    # requires pandas 1.4 or later and the zstandard package
+    ZSTD = "zstd"
+
+    ALL = [NONE, GZIP, ZSTD]
+
+    EXTENSIONS = {NONE: "csv", GZIP: "csv.gz", ZSTD: "csv.zst"}
+
+
+_output_format: str = OUTPUT_FORMATS.CSV
+_csv_compression: str = CSV_COMPRESSIONS.NONE
+_skip_unchanged_files: bool = False
+_output_layout: str = OUTPUT_LAYOUTS.PARTITIONED
+_max_rows_per_file: int = 0
+
+# a partition directory in a directory template, e.g. section={id}
+PARTITION_DIRECTORY = re.compile(r"^(\w+)=\{(\w+)\}$")
+
+# serializes updates to the fingerprint files, which writer threads share
+_fingerprint_lock = Lock()
+
 logger = logging.getLogger(__name__)
 
+Key = TypeVar("Key")
+
+# The DataFrames of a multi-file resource, by section id or by (section id,
+# assignment id), as a Dict or as an Iterable of pairs. An Iterable, such as a
+# generator, lets each DataFrame be written and released as soon as it is produced.
+DataFramesByKey = Union[Mapping[Key, DataFrame], Iterable[Tuple[Key, DataFrame]]]
+
+# The ids of a partition, one per placeholder of a directory template, e.g.
+# (section id,) or (section id, assignment id)
+IdTuple = TypeVar("IdTuple", bound=Tuple[str, ...])
+
+
+def _pairs(dfs_to_write: DataFramesByKey[Key]) -> Iterable[Tuple[Key, DataFrame]]:
+    if isinstance(dfs_to_write, Mapping):
+        return dfs_to_write.items()
+    return dfs_to_write
+
+
+def set_output_format(output_format: str):
+    """
+    Set the file format written by all of the write functions. CSV is the default.
+
+    Parameters
+    ----------
+    output_format: str
+        one of OUTPUT_FORMATS
+
+    Raises
+    ------
+    ImportError
+        if a Parquet format is requested and no Parquet engine is installed
+    """
+    assert output_format in OUTPUT_FORMATS.ALL, f"Unknown output format {output_format}"
+
+    if output_format != OUTPUT_FORMATS.CSV and not any(
+        find_spec(engine) is not None for engine in PARQUET_ENGINES
+    ):
+        raise ImportError(
+            f"Parquet output requires one of these packages to be installed: {', '.join(PARQUET_ENGINES)}"
+        )
+
+    global _output_format
+    _output_format = output_format
+
+
+def get_output_format() -> str:
+    """
+    Get the file format written by the write functions
+
+    Returns
+    -------
+    str
+        one of OUTPUT_FORMATS
+    """
+    return _output_format
+
+
+def set_csv_compression(compression: str):
+    """
+    Set the compression of the CSV files written by all of the write functions.
+    No compression is the default.
+
+    Parameters
+    ----------
+    compression: str
+        one of CSV_COMPRESSIONS
+
+    Raises
+    ------
+    ImportError
+        if zstd compression is requested and the zstandard package is not installed
+    """
+    assert compression in CSV_COMPRESSIONS.ALL, f"Unknown CSV compression {compression}"
+
+    if compression == CSV_COMPRESSIONS.ZSTD and find_spec("zstandard") is None:
+        raise ImportError("zstd CSV compression requires the zstandard package to be installed")
+
+    global _csv_compression
+    _csv_compression = compression
+
+
+def get_csv_compression() -> str:
+    """
+    Get the compression of the CSV files written by the write functions
+
+    Returns
+    -------
+    str
+        one of CSV_COMPRESSIONS
+    """
+    return _csv_compression
+
+
+def csv_file_extension() -> str:
+    """
+    Get the extension of the CSV files written by the write functions, which
+    depends on the compression
+
+    Returns
+    -------
+    str
+        the extension, without a leading dot, e.g. "csv.gz"
+    """
+    return CSV_COMPRESSIONS.EXTENSIONS[_csv_compression]
+
+
+def set_output_layout(output_layout: str, max_rows_per_file: int = 0):
+    """
+    Set the directory layout written by the write functions. The partitioned
+    layout is the default.
+
+    Parameters
+    ----------
+    output_layout: str
+        one of OUTPUT_LAYOUTS
+    max_rows_per_file: int
+        for the consolidated layout, the number of rows above which a resource is
+        split into shards, without splitting a partition; 0 for a single file
+    """
+    assert output_layout in OUTPUT_LAYOUTS.ALL, f"Unknown output layout {output_layout}"
+    assert max_rows_per_file >= 0, "The maximum rows per file cannot be negative"
+
+    global _output_layout, _max_rows_per_file
+    _output_layout = output_layout
+    _max_rows_per_file = max_rows_per_file
+
+
+def get_output_layout() -> str:
+    """
+    Get the directory layout written by the write functions
+
+    Returns
+    -------
+    str
+        one of OUTPUT_LAYOUTS
+    """
+    return _output_layout
+
+
+def set_skip_unchanged_files(skip_unchanged_files: bool):
+    """
+    Set whether the write functions skip a file when its contents match the
+    newest file of the same type already in its directory. Writing every file is
+    the default.
+
+    Parameters
+    ----------
+    skip_unchanged_files: bool
+        whether to skip writing unchanged files
+    """
+    global _skip_unchanged_files
+    _skip_unchanged_files = skip_unchanged_files
+
+
+def get_skip_unchanged_files() -> bool:
+    """
+    Get whether the write functions skip writing unchanged files
+
+    Returns
+    -------
+    bool
+        whether to skip writing unchanged files
+    """
+    return _skip_unchanged_files
+
+
+def dataframe_fingerprint(df: DataFrame) -> str:
+    """
+    Compute a fingerprint of the contents of a DataFrame which is stable across
+    runs. The order of the rows does not affect the fingerprint, since APIs do not
+    always return records in the same order, but the columns and their types do.
+
+    Parameters
+    ----------
+    df: DataFrame
+        is a LMS UDM DataFrame
+
+    Returns
+    -------
+    str
+        a hex digest of the column names and row values
+    """
+    try:
+        row_hashes = pandas.util.hash_pandas_object(df, index=False)
+    except TypeError:
+        # unhashable values, e.g. lists, are fingerprinted by their string form
+        row_hashes = pandas.util.hash_pandas_object(df.astype(str), index=False)
+
+    digest = sha256()
+    digest.update(json.dumps([str(column) for column in df.columns]).encode("utf-8"))
+    digest.update(row_hashes.sort_values().to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _file_type(file_name: str) -> str:
+    # the timestamped file names have no other dots, e.g. 2021-01-02-03-04-05.csv.gz
+    return file_name.split(".", 1)[1] if "." in file_name else ""
+
+
+def _read_fingerprints(directory: str) -> Dict[str, Dict[str, str]]:
+    try:
+        with open(os.path.join(directory, FINGERPRINT_FILE), "r") as fingerprint_file:
+            return json.load(fingerprint_file)
+    except (OSError, ValueError):
+        return {}
+
+
+def is_unchanged_file(fingerprint: str, path: str) -> bool:
+    """
+    Determine whether a file to be written would be a copy of the newest file of
+    the same type already in its directory
+
+    Parameters
+    ----------
+    fingerprint: str
+        is the dataframe_fingerprint of the DataFrame to be written
+    path: str
+        is the path the file would be written to
+
+    Returns
+    -------
+    bool
+        True if the newest existing file was recorded with the same fingerprint
+    """
+    (directory, file_name) = os.path.split(path)
+    if not os.path.isdir(directory):
+        return False
+
+    file_type: str = _file_type(file_name)
+    recorded: Optional[Dict[str, str]] = _read_fingerprints(directory).get(file_type)
+    if recorded is None or recorded.get("fingerprint") != fingerprint:
+        return False
+
+    newest_file: Optional[str] = max(
+        (name for name in os.listdir(directory) if _file_type(name) == file_type),
+        default=None,
+    )
+    return recorded.get("file") == newest_file
+
+
+def record_fingerprint(fingerprint: str, path: str):
+    """
+    Record the fingerprint of a newly written file in the fingerprint file of its
+    directory
+
+    Parameters
+    ----------
+    fingerprint: str
+        is the dataframe_fingerprint of the DataFrame written
+    path: str
+        is the path of the file written
+    """
+    (directory, file_name) = os.path.split(path)
+    fingerprint_path: str = os.path.join(directory, FINGERPRINT_FILE)
+
+    with _fingerprint_lock:
+        fingerprints = _read_fingerprints(directory)
+        fingerprints[_file_type(file_name)] = {
+            "file": file_name,
+            "fingerprint": fingerprint,
+        }
+        with open(f"{fingerprint_path}.tmp", "w") as fingerprint_file:
+            json.dump(fingerprints, fingerprint_file)
+        os.replace(f"{fingerprint_path}.tmp", fingerprint_path)
+
+
+def clear_fingerprints(directory: str):
+    """
+    Remove the recorded fingerprints of a directory, so that the next file written
+    to it is written even if it matches the newest file, e.g. after a section was
+    recorded as empty in the run manifest rather than written as an empty file
+
+    Parameters
+    ----------
+    directory: str
+        is the output directory
+    """
+    with _fingerprint_lock:
+        try:
+            os.remove(os.path.join(directory, FINGERPRINT_FILE))
+        except FileNotFoundError:
+            pass
+
 
 def _normalized_directory_template(
     output_directory: str, additional_path: List[str]
@@ -30,7 +413,18 @@ def _normalized_directory_template(
 
 def _write_csv(df_to_write: DataFrame, output_date: datetime, directory: str):
     """
-    Write a LMS UDM DataFrame to a CSV file
+    Write a LMS UDM DataFrame to a CSV file, a Parquet file, or both, depending
+    on the output format. CSV files are compressed with the CSV compression.
+
+    When skipping unchanged files, a file is not written if its contents match the
+    newest file of the same type in the directory.
+
+    Each file written is recorded in the run manifest, when a run manifest has
+    been started. A section without records is then recorded as an empty partition
+    of the manifest rather than written as an empty file, and the fingerprints of
+    its directory are cleared, since the loader treats the section as emptied.
+
+    Inside a CsvWriterPool with block, the file is queued to be written by the pool.
 
     Parameters
     ----------
@@ -41,28 +435,137 @@ def _write_csv(df_to_write: DataFrame, output_date: datetime, directory: str):
     directory: str
         is the directory the file will go in
     """
-    filename: str = output_date.strftime("%Y-%m-%d-%H-%M-%S")
-    path = os.path.join(directory, f"{filename}.csv")
+    file_stem: str = output_date.strftime("%Y-%m-%d-%H-%M-%S")
+    if df_to_write.empty and record_empty_partition(os.path.join(directory, file_stem)):
+        logger.debug(f"Recorded empty partition => {directory}")
+        clear_fingerprints(directory)
+        return
+
+    fingerprint: Optional[str] = (
+        dataframe_fingerprint(df_to_write) if _skip_unchanged_files else None
+    )
+    _write_files(df_to_write, directory, file_stem, fingerprint)
 
-    try:
-        os.makedirs(directory, exist_ok=True)
+
+def _write_files(
+    df_to_write: DataFrame, directory: str, file_stem: str, fingerprint: Optional[str]
+):
+    for (extension, write_file) in _file_writers():
+        path = os.path.join(directory, f"{file_stem}.{extension}")
+
+        if fingerprint is not None and is_unchanged_file(fingerprint, path):
+            logger.info(f"Skipped unchanged file => {path}")
+            continue
+
+        writer_pool: Optional[CsvWriterPool] = current_writer_pool()
+        if writer_pool is not None:
+            writer_pool.submit(
+                path,
+                partial(_write_file, write_file, df_to_write, directory, path, fingerprint),
+            )
+            continue
+
+        try:
+            _write_file(write_file, df_to_write, directory, path, fingerprint)
+        except Exception:
+            logger.exception("An exception occurred while writing file %s", path)
+
+
+def _write_file(
+    write_file: Callable[[DataFrame, str, str], None],
+    df_to_write: DataFrame,
+    directory: str,
+    path: str,
+    fingerprint: Optional[str],
+):
+    write_file(df_to_write, directory, path)
+    if fingerprint is not None:
+        record_fingerprint(fingerprint, path)
+    record_written_file(path, len(df_to_write))
+
+
+def _write_csv_file(df_to_write: DataFrame, directory: str, path: str):
+    os.makedirs(directory, exist_ok=True)
+    write_csv_file(df_to_write, path)
+
+    logger.info(f"Generated file => {path}")
+
+
+def write_csv_file(df_to_write: DataFrame, path: str):
+    """
+    Write a LMS UDM DataFrame to a CSV file, compressed with the CSV compression.
+    When compressed, a DataFrame without columns is written as an empty file, since
+    even a compressed line break is large enough for file readers to treat it as
+    having records.
+
+    Parameters
+    ----------
+    df_to_write: DataFrame
+        is a LMS UDM DataFrame
+    path: str
+        is the path of the file, in an existing directory
+    """
+    if _csv_compression == CSV_COMPRESSIONS.NONE:
         df_to_write.to_csv(path, index=False)
+        return
+
+    if len(df_to_write.columns) == 0:
+        open(path, "wb").close()
+        return
+
+    df_to_write.to_csv(path, index=False, compression=_csv_compression)
 
-        logger.info(f"Generated file => {path}")
-    except Exception:
-        logger.exception("An exception occurred while writing file %s", path)
+
+def _write_parquet_file(df_to_write: DataFrame, directory: str, path: str):
+    os.makedirs(directory, exist_ok=True)
+    write_parquet_file(df_to_write, path)
+
+    logger.info(f"Generated file => {path}")
+
+
+def write_parquet_file(df_to_write: DataFrame, path: str):
+    """
+    Write a LMS UDM DataFrame to a Parquet file, with the date columns as timestamps.
+    A DataFrame without columns is written as an empty file, which file readers
+    treat as having no records, as they do the CSV for an empty DataFrame.
+
+    Parameters
+    ----------
+    df_to_write: DataFrame
+        is a LMS UDM DataFrame
+    path: str
+        is the path of the file, in an existing directory
+    """
+    if len(df_to_write.columns) == 0:
+        open(path, "wb").close()
+        return
+
+    typed_df: DataFrame = df_to_write.copy()
+    for column in DATE_COLUMNS:
+        if column in typed_df.columns:
+            typed_df[column] = to_datetime(typed_df[column], errors="ignore")
+    typed_df.to_parquet(path, index=False)
+
+
+def _file_writers() -> List[Tuple[str, Callable[[DataFrame, str, str], None]]]:
+    writers: List[Tuple[str, Callable[[DataFrame, str, str], None]]] = []
+    if _output_format in [OUTPUT_FORMATS.CSV, OUTPUT_FORMATS.BOTH]:
+        writers.append((csv_file_extension(), _write_csv_file))
+    if _output_format in [OUTPUT_FORMATS.PARQUET, OUTPUT_FORMATS.BOTH]:
+        writers.append(("parquet", _write_parquet_file))
+    return writers
 
 
 def _write_multi_csv(
-    dfs_to_write: Dict[str, DataFrame], output_date: datetime, directory_template: str
+    dfs_to_write: DataFramesByKey[str], output_date: datetime, directory_template: str
 ):
     """
-    Write a series of LMS UDM DataFrames to CSV files
+    Write a series of LMS UDM DataFrames to CSV files, concurrently
 
     Parameters
     ----------
-    dfs_to_write: Dict[str, DataFrame]
-        is a Dict of id/LMS UDM DataFrame pairs
+    dfs_to_write: DataFramesByKey[str]
+        is a Dict, or an Iterable, of id/LMS UDM DataFrame pairs
     output_date: datetime
         is the timestamp for the filename
     directory_template: str
@@ -70,23 +573,32 @@ def _write_multi_csv(
     """
     assert "{id}" in directory_template
 
-    for id_placeholder, df_to_write in dfs_to_write.items():
-        directory: str = directory_template.format(id=id_placeholder)
-        _write_csv(df_to_write, output_date, directory)
+    if _output_layout == OUTPUT_LAYOUTS.CONSOLIDATED:
+        _write_consolidated_csv(
+            (((id_placeholder,), df) for id_placeholder, df in _pairs(dfs_to_write)),
+            output_date,
+            directory_template,
+        )
+        return
+
+    with CsvWriterPool():
+        for id_placeholder, df_to_write in _pairs(dfs_to_write):
+            directory: str = directory_template.format(id=id_placeholder)
+            _write_csv(df_to_write, output_date, directory)
 
 
 def _write_multi_tuple_csv(
-    dfs_to_write: Dict[Tuple[str, str], DataFrame],
+    dfs_to_write: DataFramesByKey[Tuple[str, str]],
     output_date: datetime,
     directory_template: str,
 ):
     """
-    Write a series of LMS UDM DataFrames to CSV files
+    Write a series of LMS UDM DataFrames to CSV files, concurrently
 
     Parameters
     ----------
-    dfs_to_write: Dict[Tuple[str, str], DataFrame]
-        is a Dict of 2 id tuples/LMS UDM DataFrame pairs
+    dfs_to_write: DataFramesByKey[Tuple[str, str]]
+        is a Dict, or an Iterable, of 2 id tuples/LMS UDM DataFrame pairs
     output_date: datetime
         is the timestamp for the filename
     directory_template: str
@@ -95,37 +607,210 @@ def _write_multi_tuple_csv(
     assert "{id1}" in directory_template
     assert "{id2}" in directory_template
 
-    for id_tuple, df_to_write in dfs_to_write.items():
-        (id1, id2) = id_tuple
-        directory: str = directory_template.format(id1=id1, id2=id2)
-        _write_csv(df_to_write, output_date, directory)
+    if _output_layout == OUTPUT_LAYOUTS.CONSOLIDATED:
+        _write_consolidated_csv(dfs_to_write, output_date, directory_template)
+        return
+
+    with CsvWriterPool():
+        for id_tuple, df_to_write in _pairs(dfs_to_write):
+            (id1, id2) = id_tuple
+            directory: str = directory_template.format(id1=id1, id2=id2)
+            _write_csv(df_to_write, output_date, directory)
+
+
+def _consolidated_directory(directory_template: str) -> Tuple[str, List[str]]:
+    """
+    Split a partitioned directory template into the directory of the consolidated
+    layout and the partition columns, in placeholder order, e.g.
+    out/section={id1}/assignment={id2}/submissions is out/submissions with the
+    partition columns section and assignment
+    """
+    directories: List[str] = []
+    partition_columns: List[str] = []
+    for directory in directory_template.split(os.sep):
+        partition = PARTITION_DIRECTORY.match(directory)
+        if partition is None:
+            directories.append(directory)
+        else:
+            partition_columns.append(partition.group(1))
+
+    return os.sep.join(directories), partition_columns
+
+
+def _write_consolidated_csv(
+    dfs_to_write: DataFramesByKey[IdTuple],
+    output_date: datetime,
+    directory_template: str,
+):
+    """
+    Write a series of LMS UDM DataFrames to one file, or to shards when there are
+    more than the maximum rows per file, with a partition column for each
+    placeholder of the partitioned directory template.
+
+    With a maximum rows per file, each shard is written as soon as its rows are
+    produced. Delta output, which is written as one file, and skipping unchanged
+    files, which fingerprints every row before writing any shard, collect all of
+    the DataFrames first.
+
+    Parameters
+    ----------
+    dfs_to_write: DataFramesByKey[IdTuple]
+        is a Dict, or an Iterable, of id tuples/LMS UDM DataFrame pairs, with an id
+        per placeholder
+    output_date: datetime
+        is the timestamp for the filename
+    directory_template: str
+        is the directory of the partitioned layout, with placeholders
+    """
+    (directory, partition_columns) = _consolidated_directory(directory_template)
+
+    partition_dfs: Iterator[DataFrame] = (
+        df_to_write.assign(**dict(zip(partition_columns, [str(id) for id in ids])))
+        for ids, df_to_write in _pairs(dfs_to_write)
+        if not df_to_write.empty
+    )
+    first_df: Optional[DataFrame] = next(partition_dfs, None)
+    if first_df is None:
+        _write_csv(DataFrame(), output_date, directory)
+        return
+
+    if _max_rows_per_file > 0 and not _skip_unchanged_files:
+        _stream_shards(chain([first_df], partition_dfs), output_date, directory)
+        return
+
+    consolidated_df: DataFrame = concat([first_df, *partition_dfs], ignore_index=True)
+    shards: List[DataFrame] = _shard(consolidated_df, partition_columns)
+    if len(shards) == 1:
+        _write_csv(consolidated_df, output_date, directory)
+        return
+
+    _write_shards(consolidated_df, shards, output_date, directory)
+
+
+def _stream_shards(
+    partition_dfs: Iterable[DataFrame], output_date: datetime, directory: str
+):
+    """
+    Write consolidated rows as shards of at most the maximum rows per file, as in
+    _shard, while the partitions are produced. A shard is queued for writing once
+    the next partition would take it over the maximum, so only the shard being
+    filled is held in memory. When every row fits in one shard, it is written as
+    one file without a part number.
+    """
+    file_stem: str = output_date.strftime("%Y-%m-%d-%H-%M-%S")
+
+    shard_dfs: List[DataFrame] = []
+    (rows, number) = (0, 0)
+    with CsvWriterPool():
+        for partition_df in partition_dfs:
+            if rows > 0 and rows + len(partition_df) > _max_rows_per_file:
+                number += 1
+                _write_files(
+                    concat(shard_dfs, ignore_index=True),
+                    directory,
+                    f"{file_stem}.part-{number:04}",
+                    None,
+                )
+                (shard_dfs, rows) = ([], 0)
+            shard_dfs.append(partition_df)
+            rows += len(partition_df)
+
+        if number == 0:
+            _write_csv(concat(shard_dfs, ignore_index=True), output_date, directory)
+            return
+
+        _write_files(
+            concat(shard_dfs, ignore_index=True),
+            directory,
+            f"{file_stem}.part-{number + 1:04}",
+            None,
+        )
+
+
+def _shard(df_to_shard: DataFrame, partition_columns: List[str]) -> List[DataFrame]:
+    """
+    Split consolidated rows, which are contiguous by partition, into shards of at
+    most the maximum rows per file, except where a single partition is larger
+    """
+    if _max_rows_per_file == 0 or len(df_to_shard) <= _max_rows_per_file:
+        return [df_to_shard]
+
+    shards: List[DataFrame] = []
+    (start, rows) = (0, 0)
+    for partition_rows in df_to_shard.groupby(partition_columns, sort=False).size():
+        if rows > 0 and rows + partition_rows > _max_rows_per_file:
+            shards.append(df_to_shard.iloc[start : start + rows])
+            (start, rows) = (start + rows, 0)
+        rows += partition_rows
+    shards.append(df_to_shard.iloc[start : start + rows])
+
+    return shards
+
+
+def _write_shards(
+    consolidated_df: DataFrame,
+    shards: List[DataFrame],
+    output_date: datetime,
+    directory: str,
+):
+    """
+    Write the shards of a consolidated resource as 2021-01-02-03-04-05.part-0001.csv
+    and so on. Unchanged shards are only skipped together, when the fingerprint of
+    all of the rows matches the one recorded for the first shard, so that the
+    newest files are always one complete set.
+    """
+    file_stem: str = output_date.strftime("%Y-%m-%d-%H-%M-%S")
+
+    fingerprint: Optional[str] = None
+    if _skip_unchanged_files:
+        fingerprint = dataframe_fingerprint(consolidated_df)
+        if all(
+            is_unchanged_file(
+                fingerprint, os.path.join(directory, f"{file_stem}.part-0001.{extension}")
+            )
+            for (extension, _) in _file_writers()
+        ):
+            logger.info(f"Skipped unchanged files => {directory}")
+            return
+
+    with CsvWriterPool():
+        for (number, shard_df) in enumerate(shards, start=1):
+            _write_files(
+                shard_df,
+                directory,
+                f"{file_stem}.part-{number:04}",
+                fingerprint if number == 1 else None,
+            )
 
 
 def _fill_in_missing_section_ids(
-    dfs_to_write: Dict[str, DataFrame], all_section_ids: List[str]
-) -> Dict[str, DataFrame]:
+    dfs_to_write: DataFramesByKey[str], all_section_ids: List[str]
+) -> Iterator[Tuple[str, DataFrame]]:
     """
-    Fill in any missing DataFrames for a Section with an empty DataFrame
+    Fill in any missing DataFrames for a Section with an empty DataFrame, after
+    the given DataFrames, without holding them in memory
 
     Parameters
     ----------
-    dfs_to_write: Dict[str, DataFrame]
-        is a Dict of section id/DataFrame pairs
+    dfs_to_write: DataFramesByKey[str]
+        is a Dict, or an Iterable, of section id/DataFrame pairs
     all_section_ids: List[str]
         is a list of all known section ids
 
 
     Returns
     -------
-    Dict[str, DataFrame]
-        a new Dict of section id/DataFrame pairs, with missing DataFrames
-        for a Section filled in
+    Iterator[Tuple[str, DataFrame]]
+        section id/DataFrame pairs, with missing DataFrames for a Section filled in
     """
-    full_dfs_to_write = dfs_to_write.copy()
+    section_ids_written: Set[str] = set()
+    for section_id, df_to_write in _pairs(dfs_to_write):
+        section_ids_written.add(section_id)
+        yield (section_id, df_to_write)
+
     for section_id in all_section_ids:
-        if section_id not in full_dfs_to_write:
-            full_dfs_to_write[section_id] = DataFrame()
-    return full_dfs_to_write
+        if section_id not in section_ids_written:
+            yield (section_id, DataFrame())
 
 
 def write_users(df_to_write: DataFrame, output_date: datetime, output_directory: str):
@@ -171,7 +856,7 @@ def write_sections(
 
 
 def write_section_associations(
-    dfs_to_write: Dict[str, DataFrame],
+    dfs_to_write: DataFramesByKey[str],
     all_section_ids: List[str],
     output_date: datetime,
     output_directory: str,
@@ -181,8 +866,8 @@ def write_section_associations(
 
     Parameters
     ----------
-    dfs_to_write: Dict[str, DataFrame]
-        is a Dict of id/LMS UDM UserSectionAssociation DataFrame pairs
+    dfs_to_write: DataFramesByKey[str]
+        is a Dict, or an Iterable, of id/LMS UDM UserSectionAssociation DataFrame pairs
     all_section_ids: List[str]
         is a list of all known section ids
     output_date: datetime
@@ -200,7 +885,7 @@ def write_section_associations(
 
 
 def write_assignments(
-    dfs_to_write: Dict[str, DataFrame],
+    dfs_to_write: DataFramesByKey[str],
     all_section_ids: List[str],
     output_date: datetime,
     output_directory: str,
@@ -210,8 +895,8 @@ def write_assignments(
 
     Parameters
     ----------
-    dfs_to_write: Dict[str, DataFrame]
-        is a Dict of section id/LMS UDM Assignments DataFrame pairs
+    dfs_to_write: DataFramesByKey[str]
+        is a Dict, or an Iterable, of section id/LMS UDM Assignments DataFrame pairs
     all_section_ids: List[str]
         is a list of all known section ids
     output_date: datetime
@@ -228,7 +913,7 @@ def write_assignments(
 
 
 def write_assignment_submissions(
-    dfs_to_write: Dict[Tuple[str, str], DataFrame],
+    dfs_to_write: DataFramesByKey[Tuple[str, str]],
     output_date: datetime,
     output_directory: str,
 ):
@@ -237,8 +922,9 @@ def write_assignment_submissions(
 
     Parameters
     ----------
-    dfs_to_write: Dict[Tuple[str, str], DataFrame]
-        is a Dict of 2 id tuples/LMS UDM AssignmentSubmissions DataFrame pairs
+    dfs_to_write: DataFramesByKey[Tuple[str, str]]
+        is a Dict, or an Iterable, of 2 id tuples/LMS UDM AssignmentSubmissions
+        DataFrame pairs
     output_date: datetime
         is the timestamp for the filename
     output_directory: str
@@ -252,7 +938,7 @@ def write_assignment_submissions(
 
 
 def write_grades(
-    dfs_to_write: Dict[str, DataFrame],
+    dfs_to_write: DataFramesByKey[str],
     all_section_ids: List[str],
     output_date: datetime,
     output_directory: str,
@@ -262,8 +948,8 @@ def write_grades(
 
     Parameters
     ----------
-    dfs_to_write: Dict[str, DataFrame]
-        is a Dict of section id/LMS UDM Grades DataFrame pairs
+    dfs_to_write: DataFramesByKey[str]
+        is a Dict, or an Iterable, of section id/LMS UDM Grades DataFrame pairs
     all_section_ids: List[str]
         is a list of all known section ids
     output_date: datetime
@@ -279,7 +965,7 @@ def write_grades(
 
 
 def write_section_activities(
-    dfs_to_write: Dict[str, DataFrame],
+    dfs_to_write: DataFramesByKey[str],
     all_section_ids: List[str],
     output_date: datetime,
     output_directory: str,
@@ -289,8 +975,8 @@ def write_section_activities(
 
     Parameters
     ----------
-    dfs_to_write: Dict[str, DataFrame]
-        is a Dict of section id/LMS UDM SectionActivity DataFrame pairs
+    dfs_to_write: DataFramesByKey[str]
+        is a Dict, or an Iterable, of section id/LMS UDM SectionActivity DataFrame pairs
     all_section_ids: List[str]
         is a list of all known section ids
     output_date: datetime
@@ -0,0 +1,145 @@
+# SPDX-License-Identifier: Apache-2.0
+# Licensed to the Ed-Fi Alliance under one or more agreements.
+# The Ed-Fi Alliance licenses this file to you under the Apache License, Version 2.0.
+# See the LICENSE and NOTICES files in the project root for more information.
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextvars import ContextVar, Token
+import logging
+from threading import BoundedSemaphore, Lock
+from typing import Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Output files are small and writing them is dominated by directory and file
+# system calls, which release the GIL, so threads overlap them well
+CSV_WRITER_THREADS = 8
+
+# How many writes can be queued per thread before submitting blocks, which bounds
+# the memory held by DataFrames waiting to be written
+PENDING_WRITES_PER_THREAD = 4
+
+_current_pool: ContextVar[Optional["CsvWriterPool"]] = ContextVar(
+    "current_csv_writer_pool", default=None
+)
+
+
+def current_writer_pool() -> Optional["CsvWriterPool"]:
+    """
+    Get the CsvWriterPool of the enclosing with block, if any
+
+    Returns
+    -------
+    Optional[CsvWriterPool]
+        the pool, or None when writes should be made synchronously
+    """
+    return _current_pool.get()
+
+
+class CsvWriterPool:
+    """
+    Runs file writes on a bounded thread pool. Within its with block, the
+    csv_generation.write functions submit their writes to the pool rather than
+    writing one file at a time. Leaving the block waits for every write to finish,
+    then logs any failures together.
+
+    Usage
+    -----
+        with CsvWriterPool():
+            for section_id, df in dfs_to_write.items():
+                _write_csv(df, output_date, directory_template.format(id=section_id))
+    """
+
+    def __init__(
+        self,
+        max_workers: int = CSV_WRITER_THREADS,
+        max_pending: Optional[int] = None,
+    ):
+        """
+        Parameters
+        ----------
+        max_workers: int
+            the number of writer threads
+        max_pending: Optional[int]
+            the number of writes which can be submitted but not finished before
+            submitting blocks, by default PENDING_WRITES_PER_THREAD per thread
+        """
+        self._max_workers = max_workers
+        self._pending = BoundedSemaphore(
+            max_pending or max_workers * PENDING_WRITES_PER_THREAD
+        )
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._token: Optional[Token] = None
+        self._lock = Lock()
+        self._written: int = 0
+        self._failures: List[Tuple[str, BaseException]] = []
+
+    def __enter__(self) -> "CsvWriterPool":
+        self._executor = ThreadPoolExecutor(
+            max_workers=self._max_workers, thread_name_prefix="csv-writer"
+        )
+        self._token = _current_pool.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        assert self._executor is not None
+        assert self._token is not None
+
+        _current_pool.reset(self._token)
+        self._executor.shutdown(wait=True)
+        self._executor = None
+        self._report_failures()
+
+    @property
+    def failures(self) -> List[Tuple[str, BaseException]]:
+        """
+        The path and exception of each failed write
+        """
+        return self._failures
+
+    def submit(self, path: str, write: Callable[[], None]):
+        """
+        Queue a file write, blocking while the pool has too many writes pending
+
+        Parameters
+        ----------
+        path: str
+            the path of the file, for reporting
+        write: Callable[[], None]
+            a function which writes the file
+        """
+        assert self._executor is not None, "CsvWriterPool must be used in a with statement"
+
+        self._pending.acquire()
+        try:
+            future: Future = self._executor.submit(write)
+        except BaseException:
+            self._pending.release()
+            raise
+        future.add_done_callback(lambda done: self._on_done(path, done))
+
+    def _on_done(self, path: str, future: Future):
+        self._pending.release()
+        exception: Optional[BaseException] = future.exception()
+        with self._lock:
+            if exception is None:
+                self._written += 1
+            else:
+                self._failures.append((path, exception))
+
+    def _report_failures(self):
+        if len(self._failures) == 0:
+            return
+
+        for (path, exception) in self._failures:
+            logger.error(
+                "An exception occurred while writing file %s",
+                path,
+                exc_info=(type(exception), exception, exception.__traceback__),
+            )
+        logger.error(
+            "%d of %d files could not be written: %s",
+            len(self._failures),
+            len(self._failures) + self._written,
+            ", ".join(path for (path, _) in self._failures),
+        )
@@ -0,0 +1,215 @@
+# SPDX-License-Identifier: Apache-2.0
+# Licensed to the Ed-Fi Alliance under one or more agreements.
+# The Ed-Fi Alliance licenses this file to you under the Apache License, Version 2.0.
+# See the LICENSE and NOTICES files in the project root for more information.
+
+import pytest
+from pandas import DataFrame, concat
+from pandas.testing import assert_frame_equal
+from edfi_lms_extractor_lib.api.resource_sync import (
+    CHANGE_TYPE_COLUMN,
+    CHANGE_TYPES,
+    cleanup_after_sync,
+    read_missing_records,
+    read_synced_records,
+    read_synced_source_ids,
+    sync_chunks_to_db_without_cleanup,
+    sync_to_db_with_hash_diff,
+    sync_to_db_without_cleanup,
+)
+from edfi_lms_extractor_lib.api.sync_payload import (
+    PAYLOAD_MODES,
+    get_payload_mode,
+    set_payload_mode,
+)
+from edfi_lms_extractor_lib.api.sync_session import SyncSession
+from edfi_lms_extractor_lib.api.sync_store import (
+    SYNC_DB_FILE_NAME,
+    SYNC_STORES,
+    get_extractor_db_engine,
+    get_sync_store,
+)
+from edfi_lms_extractor_lib.api.sync_watermarks import read_watermarks, write_watermark
+
+pytest.importorskip("duckdb")
+
+INITIAL_DF = DataFrame(
+    {"id": ["1", "2", "3"], "section": ["s1", "s1", "s1"], "name": ["a", "b", "c"]}
+)
+# 1 changed, 2 unchanged, 3 missing, 4 new
+RESYNC_DF = DataFrame(
+    {"id": ["1", "2", "4"], "section": ["s1", "s1", "s1"], "name": ["changed", "b", "d"]}
+)
+
+
+@pytest.fixture
+def duckdb_store(tmp_path):
+    sync_store = get_sync_store(str(tmp_path / "duckdb"), SYNC_STORES.DUCKDB)
+    yield sync_store
+    sync_store.dispose()
+
+
+@pytest.fixture
+def sqlite_store(tmp_path):
+    sync_store = get_sync_store(str(tmp_path / "sqlite"))
+    yield sync_store
+    sync_store.dispose()
+
+
+def _without_dates(df: DataFrame) -> DataFrame:
+    return df.drop(["CreateDate", "LastModifiedDate"], axis=1)
+
+
+def describe_when_syncing_with_a_duckdb_store():
+    @pytest.fixture(params=[sync_to_db_without_cleanup, sync_to_db_with_hash_diff])
+    def results(request, duckdb_store, sqlite_store):
+        sync = request.param
+        results = {}
+        for (name, sync_store) in [("duckdb", duckdb_store), ("sqlite", sqlite_store)]:
+            initial_df = sync(
+                INITIAL_DF.copy(), ["id"], "Courses", sync_store, include_change_type=True
+            )
+            resync_df = sync(
+                RESYNC_DF.copy(), ["id"], "Courses", sync_store, include_change_type=True
+            )
+            results[name] = (initial_df, resync_df)
+        return results
+
+    def it_should_classify_the_changes_as_sqlite_does(results):
+        assert_frame_equal(
+            _without_dates(results["duckdb"][1]), _without_dates(results["sqlite"][1])
+        )
+        assert results["duckdb"][1][CHANGE_TYPE_COLUMN].tolist() == [
+            CHANGE_TYPES.CHANGED,
+            CHANGE_TYPES.UNCHANGED,
+            CHANGE_TYPES.NEW,
+        ]
+
+    def it_should_keep_the_create_dates_of_stored_records(results):
+        (initial_df, resync_df) = results["duckdb"]
+
+        assert resync_df["CreateDate"].tolist()[:2] == initial_df["CreateDate"].tolist()[:2]
+        assert resync_df["LastModifiedDate"][1] == initial_df["LastModifiedDate"][1]
+
+    def it_should_store_every_record(duckdb_store, results):
+        assert sorted(read_synced_source_ids("Courses", duckdb_store)) == ["1", "2", "3", "4"]
+
+
+def describe_when_reading_records_from_a_duckdb_store():
+    @pytest.fixture
+    def synced_store(duckdb_store):
+        sync_to_db_without_cleanup(INITIAL_DF.copy(), ["id"], "Courses", duckdb_store)
+        sync_to_db_without_cleanup(RESYNC_DF.copy(), ["id"], "Courses", duckdb_store)
+        return duckdb_store
+
+    def it_should_read_the_missing_records(synced_store):
+        missing_df = read_missing_records("Courses", synced_store)
+
+        assert missing_df["id"].tolist() == ["3"]
+        assert missing_df[CHANGE_TYPE_COLUMN].tolist() == [CHANGE_TYPES.DELETED]
+
+    def it_should_read_the_synced_records(synced_store):
+        records_df = read_synced_records("Courses", synced_store)
+
+        assert sorted(records_df["name"]) == ["b", "c", "changed", "d"]
+
+    def it_should_drop_the_temporary_tables(synced_store):
+        cleanup_after_sync("Courses", synced_store)
+
+        with synced_store.connect() as con:
+            assert not con.table_exists("Sync_Courses")
+            assert not con.table_exists("Unmatched_Courses")
+            assert con.table_exists("Courses")
+
+
+def describe_when_syncing_partitions_with_a_duckdb_store():
+    def it_should_only_compare_the_same_partition(duckdb_store):
+        sync_to_db_without_cleanup(INITIAL_DF.copy(), ["id"], "Courses", duckdb_store, "s1")
+        sync_to_db_without_cleanup(
+            DataFrame({"id": ["9"], "section": ["s2"], "name": ["z"]}),
+            ["id"],
+            "Courses",
+            duckdb_store,
+            "s2",
+        )
+
+        assert read_missing_records("Courses", duckdb_store, "s2").empty
+
+    def it_should_move_unchanged_records_to_their_new_partition(duckdb_store):
+        sync_to_db_with_hash_diff(INITIAL_DF.copy(), ["id"], "Courses", duckdb_store, "s1")
+        sync_to_db_with_hash_diff(INITIAL_DF.iloc[:1].copy(), ["id"], "Courses", duckdb_store, "s2")
+
+        with duckdb_store.connect() as con:
+            assert con.read_stored_payloads("Courses", "s2").shape[0] == 1
+
+
+def describe_when_syncing_chunks_with_a_duckdb_store():
+    def it_should_match_the_unchunked_sync(duckdb_store, sqlite_store):
+        for sync_store in [duckdb_store, sqlite_store]:
+            sync_to_db_without_cleanup(INITIAL_DF.copy(), ["id"], "Courses", sync_store)
+        chunks = [RESYNC_DF.iloc[:2], RESYNC_DF.iloc[2:]]
+
+        duckdb_df = concat(
+            sync_chunks_to_db_without_cleanup(
+                [chunk.copy() for chunk in chunks], ["id"], "Courses", duckdb_store
+            ),
+            ignore_index=True,
+        )
+        sqlite_df = sync_to_db_without_cleanup(RESYNC_DF.copy(), ["id"], "Courses", sqlite_store)
+
+        assert_frame_equal(_without_dates(duckdb_df), _without_dates(sqlite_df))
+        assert duckdb_df["CreateDate"].notna().all()
+
+
+def describe_when_syncing_in_a_session_with_a_duckdb_store():
+    def it_should_commit_every_partition(duckdb_store):
+        with SyncSession(duckdb_store) as session:
+            session.sync(INITIAL_DF.iloc[:2].copy(), ["id"], "Courses", partition_key="s1")
+            session.sync(INITIAL_DF.iloc[2:].copy(), ["id"], "Courses", partition_key="s2")
+            session.set_watermark("Courses", "2021-03-01T00:00:00Z")
+
+        assert sorted(read_synced_source_ids("Courses", duckdb_store)) == ["1", "2", "3"]
+        assert read_watermarks(duckdb_store, "Courses") == {"": "2021-03-01T00:00:00Z"}
+
+    def it_should_roll_back_after_an_error(duckdb_store):
+        with pytest.raises(RuntimeError):
+            with SyncSession(duckdb_store) as session:
+                session.sync(INITIAL_DF.copy(), ["id"], "Courses")
+                raise RuntimeError()
+
+        with duckdb_store.connect() as con:
+            assert not con.table_exists("Courses")
+
+
+def describe_when_setting_the_payload_mode_of_a_duckdb_store():
+    def it_should_stop_storing_json_in_hash_only_mode(duckdb_store):
+        sync_to_db_without_cleanup(INITIAL_DF.copy(), ["id"], "Courses", duckdb_store)
+
+        set_payload_mode(duckdb_store, PAYLOAD_MODES.HASH_ONLY)
+
+        assert get_payload_mode(duckdb_store) == PAYLOAD_MODES.HASH_ONLY
+        with pytest.raises(ValueError):
+            read_synced_records("Courses", duckdb_store)
+
+    def it_should_reject_compressed_payloads(duckdb_store):
+        with pytest.raises(ValueError):
+            set_payload_mode(duckdb_store, PAYLOAD_MODES.COMPRESSED)
+
+        assert get_payload_mode(duckdb_store) == PAYLOAD_MODES.FULL
+
+
+def describe_when_writing_watermarks_to_a_duckdb_store():
+    def it_should_replace_an_earlier_watermark(duckdb_store):
+        write_watermark(duckdb_store, "Submissions", "2021-03-01T00:00:00Z", "s1")
+        write_watermark(duckdb_store, "Submissions", "2021-03-05T00:00:00Z", "s1")
+
+        assert read_watermarks(duckdb_store, "Submissions") == {"s1": "2021-03-05T00:00:00Z"}
+
+
+def describe_when_getting_the_extractor_tables_of_a_duckdb_store():
+    def it_should_keep_them_in_the_sqlite_file_of_the_directory(tmp_path, duckdb_store):
+        engine = get_extractor_db_engine(duckdb_store, str(tmp_path / "duckdb"))
+        with engine.connect() as con:
+            con.execute("CREATE TABLE ProcessedFiles (FileName TEXT)")
+
+        assert (tmp_path / "duckdb" / SYNC_DB_FILE_NAME).exists()
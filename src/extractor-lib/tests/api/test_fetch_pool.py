@@ -0,0 +1,105 @@
+# SPDX-License-Identifier: Apache-2.0
+# Licensed to the Ed-Fi Alliance under one or more agreements.
+# The Ed-Fi Alliance licenses this file to you under the Apache License, Version 2.0.
+# See the LICENSE and NOTICES files in the project root for more information.
+
+from threading import Lock, get_ident
+from time import sleep
+from typing import List, Set
+
+import pytest
+from edfi_lms_extractor_lib.api.fetch_pool import (
+    HostLimiter,
+    fetch_concurrently,
+    get_fetch_workers,
+    get_host_limiter,
+    set_fetch_workers,
+)
+
+
+def describe_when_fetching_concurrently():
+    def it_should_yield_the_results_in_item_order():
+        def fetch(item: int) -> int:
+            # later items finish first
+            sleep((10 - item) / 1000)
+            return item * 2
+
+        results = list(fetch_concurrently(range(10), fetch, workers=4))
+
+        assert results == [(item, item * 2) for item in range(10)]
+
+    def it_should_fetch_on_more_than_one_thread():
+        threads: Set[int] = set()
+        lock = Lock()
+
+        def fetch(item: int) -> int:
+            with lock:
+                threads.add(get_ident())
+            sleep(0.01)
+            return item
+
+        list(fetch_concurrently(range(8), fetch, workers=4))
+
+        assert len(threads) > 1
+
+    def it_should_fetch_in_the_calling_thread_with_one_worker():
+        threads: List[int] = []
+
+        list(fetch_concurrently(range(3), lambda item: threads.append(get_ident()), workers=1))
+
+        assert threads == [get_ident()] * 3
+
+    def it_should_raise_a_fetch_exception_when_its_result_is_reached():
+        def fetch(item: int) -> int:
+            if item == 2:
+                raise ValueError("API error")
+            return item
+
+        results = fetch_concurrently(range(5), fetch, workers=2)
+
+        assert next(results) == (0, 0)
+        assert next(results) == (1, 1)
+        with pytest.raises(ValueError):
+            next(results)
+
+
+def describe_when_limiting_requests_per_host():
+    def it_should_limit_concurrent_requests_to_one_host():
+        limiter = HostLimiter(requests_per_host=2)
+        lock = Lock()
+        active: List[int] = [0]
+        most_active: List[int] = [0]
+
+        def fetch(item: int) -> int:
+            with limiter.limit("example.com"):
+                with lock:
+                    active[0] += 1
+                    most_active[0] = max(most_active[0], active[0])
+                sleep(0.01)
+                with lock:
+                    active[0] -= 1
+            return item
+
+        list(fetch_concurrently(range(12), fetch, workers=6))
+
+        assert most_active[0] == 2
+
+    def it_should_limit_each_host_separately():
+        limiter = HostLimiter(requests_per_host=1)
+
+        with limiter.limit("one.example.com"):
+            with limiter.limit("two.example.com"):
+                pass
+
+
+def describe_when_setting_fetch_workers():
+    @pytest.fixture(autouse=True)
+    def restore_defaults():
+        yield
+        set_fetch_workers(1)
+
+    def it_should_set_the_workers_and_the_host_limit():
+        set_fetch_workers(8, requests_per_host=3)
+
+        assert get_fetch_workers() == 8
+        assert get_host_limiter().requests_per_host == 3
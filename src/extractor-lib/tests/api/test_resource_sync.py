@@ -7,15 +7,26 @@ from datetime import datetime
 from typing import List
 from pathlib import Path
 import pytest
-from pandas import read_sql_query, DataFrame
+import xxhash
+from pandas import concat, read_sql_query, DataFrame, Series, Timestamp
+from pandas.testing import assert_frame_equal
 from sqlalchemy import create_engine
 from edfi_lms_extractor_lib.api.resource_sync import (
+    CHANGE_TYPE_COLUMN,
+    CHANGE_TYPES,
+    PARTITION_KEY_COLUMN,
     SYNC_COLUMNS_SQL,
     SYNC_COLUMNS,
     add_hash_and_json_to,
     add_sourceid_to,
+    read_missing_records,
+    read_synced_records,
+    read_synced_source_ids,
+    sync_chunks_to_db_without_cleanup,
+    sync_to_db_with_hash_diff,
     sync_to_db_without_cleanup,
 )
+from edfi_lms_extractor_lib.api import resource_sync
 
 DB_FILE = "tests/api/test.db"
 
@@ -185,3 +196,755 @@ def describe_when_testing_sync_with_new_and_missing_and_updated_rows():
             )
 
             assert expected_unmatched_df.to_csv() == unmatched_from_db_df.to_csv()
+
+
+def describe_when_testing_hash_diff_sync_with_new_and_missing_and_updated_rows():
+    INITIAL_DATE = datetime(2020, 9, 14, 12, 0, 0)
+
+    @pytest.fixture
+    def sync_result(test_db_fixture):
+        # arrange
+        INITIAL_COURSE_DATA = [
+            CHANGED_COURSE_BEFORE,
+            UNCHANGED_COURSE,
+            OMITTED_FROM_SYNC_COURSE,
+        ]
+
+        courses_initial_df = DataFrame(INITIAL_COURSE_DATA, columns=COLUMNS)
+        courses_initial_df = add_hash_and_json_to(courses_initial_df)
+        add_sourceid_to(courses_initial_df, IDENTITY_COLUMNS)
+
+        courses_initial_df["SyncNeeded"] = 0
+        courses_initial_df["CreateDate"] = INITIAL_DATE
+        courses_initial_df["LastModifiedDate"] = INITIAL_DATE
+        courses_initial_df = courses_initial_df[SYNC_COLUMNS]
+
+        with test_db_fixture.connect() as con:
+            con.execute("DROP TABLE IF EXISTS Courses")
+            con.execute(
+                f"""
+                CREATE TABLE IF NOT EXISTS Courses (
+                    {SYNC_COLUMNS_SQL}
+                )
+                """
+            )
+
+        courses_initial_df.to_sql(
+            "Courses", test_db_fixture, if_exists="append", index=False, chunksize=1000
+        )
+
+        # act
+        result_df = sync_to_db_with_hash_diff(
+            DataFrame(SYNC_DATA, columns=COLUMNS),
+            IDENTITY_COLUMNS,
+            "Courses",
+            test_db_fixture,
+        )
+
+        return (test_db_fixture, result_df.set_index("id"))
+
+    def it_should_have_courses_table_with_updated_row_and_added_new_row(sync_result):
+        (test_db, _) = sync_result
+        EXPECTED_COURSE_DATA_AFTER_SYNC = [
+            CHANGED_COURSE_AFTER,
+            UNCHANGED_COURSE,
+            OMITTED_FROM_SYNC_COURSE,
+            NEW_COURSE,
+        ]
+        with test_db.connect() as con:
+            expected_courses_df = prep_expected_sync_df(
+                DataFrame(EXPECTED_COURSE_DATA_AFTER_SYNC, columns=COLUMNS).astype(
+                    "string"
+                ),
+                IDENTITY_COLUMNS,
+            )
+
+            courses_from_db_df = prep_from_sync_db_df(
+                read_sql_query("SELECT * from Courses ORDER BY SourceId", con).astype(
+                    "string"
+                ),
+                IDENTITY_COLUMNS,
+            )
+
+            assert expected_courses_df.to_csv() == courses_from_db_df.to_csv()
+
+    def it_should_reset_sync_needed(sync_result):
+        (test_db, _) = sync_result
+        with test_db.connect() as con:
+            courses_from_db_df = read_sql_query("SELECT SyncNeeded from Courses", con)
+
+        assert (courses_from_db_df["SyncNeeded"] == 0).all()
+
+    def it_should_not_create_temporary_tables(sync_result):
+        (test_db, _) = sync_result
+        assert not test_db.has_table("Sync_Courses")
+        assert not test_db.has_table("Unmatched_Courses")
+
+    def it_should_return_only_the_fetched_rows(sync_result):
+        (_, result_df) = sync_result
+        assert sorted(result_df.index) == ["1", "2", "4"]
+        assert list(result_df.columns) == [
+            "name",
+            "descriptionHeading",
+            "CreateDate",
+            "LastModifiedDate",
+        ]
+
+    def it_should_keep_both_dates_for_the_unchanged_row(sync_result):
+        (_, result_df) = sync_result
+        assert result_df.loc["2", "CreateDate"] == "2020-09-14 12:00:00"
+        assert result_df.loc["2", "LastModifiedDate"] == "2020-09-14 12:00:00"
+
+    def it_should_keep_the_create_date_for_the_changed_row(sync_result):
+        (_, result_df) = sync_result
+        assert result_df.loc["1", "CreateDate"] == "2020-09-14 12:00:00"
+        assert result_df.loc["1", "LastModifiedDate"] > "2020-09-14 12:00:00"
+
+    def it_should_use_new_dates_for_the_new_row(sync_result):
+        (_, result_df) = sync_result
+        assert result_df.loc["4", "CreateDate"] > "2020-09-14 12:00:00"
+        assert result_df.loc["4", "CreateDate"] == result_df.loc["4", "LastModifiedDate"]
+
+    def it_should_match_the_dates_stored_in_the_database(sync_result):
+        (test_db, result_df) = sync_result
+        with test_db.connect() as con:
+            courses_from_db_df = read_sql_query(
+                "SELECT SourceId, CreateDate, LastModifiedDate from Courses", con
+            ).set_index("SourceId")
+
+        for source_id in ["1", "2", "4"]:
+            assert courses_from_db_df.loc[source_id, "CreateDate"].startswith(
+                result_df.loc[source_id, "CreateDate"]
+            )
+            assert courses_from_db_df.loc[source_id, "LastModifiedDate"].startswith(
+                result_df.loc[source_id, "LastModifiedDate"]
+            )
+
+
+def describe_when_testing_hash_diff_sync_without_an_existing_table():
+    def it_should_create_the_table_and_insert_all_rows(test_db_fixture):
+        result_df = sync_to_db_with_hash_diff(
+            DataFrame(SYNC_DATA, columns=COLUMNS),
+            IDENTITY_COLUMNS,
+            "Courses",
+            test_db_fixture,
+        )
+
+        with test_db_fixture.connect() as con:
+            courses_from_db_df = read_sql_query("SELECT * from Courses", con)
+
+        assert len(courses_from_db_df) == 3
+        assert len(result_df) == 3
+        assert result_df["CreateDate"].notna().all()
+
+
+def describe_when_reading_missing_records_after_a_hash_diff_sync():
+    def it_should_raise_an_error(test_db_fixture):
+        sync_to_db_without_cleanup(
+            DataFrame(SYNC_DATA, columns=COLUMNS),
+            IDENTITY_COLUMNS,
+            "Courses",
+            test_db_fixture,
+        )
+        sync_to_db_with_hash_diff(
+            DataFrame(SYNC_DATA[:1], columns=COLUMNS),
+            IDENTITY_COLUMNS,
+            "Courses",
+            test_db_fixture,
+        )
+
+        with pytest.raises(ValueError):
+            read_missing_records("Courses", test_db_fixture)
+
+
+def _create_partitioned_courses(test_db, initial_data_by_partition) -> None:
+    with test_db.connect() as con:
+        con.execute("DROP TABLE IF EXISTS Courses")
+        con.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS Courses (
+                {SYNC_COLUMNS_SQL}
+            )
+            """
+        )
+        con.execute(f"ALTER TABLE Courses ADD COLUMN {PARTITION_KEY_COLUMN} TEXT")
+
+    for partition_key, initial_data in initial_data_by_partition.items():
+        initial_df = DataFrame(initial_data, columns=COLUMNS)
+        initial_df = add_hash_and_json_to(initial_df)
+        add_sourceid_to(initial_df, IDENTITY_COLUMNS)
+
+        initial_df["SyncNeeded"] = 0
+        initial_df["CreateDate"] = datetime(2020, 9, 14, 12, 0, 0)
+        initial_df["LastModifiedDate"] = datetime(2020, 9, 14, 12, 0, 0)
+        initial_df[PARTITION_KEY_COLUMN] = partition_key
+        initial_df = initial_df[[*SYNC_COLUMNS, PARTITION_KEY_COLUMN]]
+
+        initial_df.to_sql(
+            "Courses", test_db, if_exists="append", index=False, chunksize=1000
+        )
+
+
+def describe_when_testing_sync_with_a_partition_key():
+    @pytest.fixture
+    def test_db_after_sync(test_db_fixture):
+        # arrange
+        _create_partitioned_courses(
+            test_db_fixture,
+            {
+                "A": [CHANGED_COURSE_BEFORE, UNCHANGED_COURSE],
+                "B": [OMITTED_FROM_SYNC_COURSE],
+            },
+        )
+
+        # act
+        sync_to_db_without_cleanup(
+            DataFrame(SYNC_DATA, columns=COLUMNS),
+            IDENTITY_COLUMNS,
+            "Courses",
+            test_db_fixture,
+            partition_key="A",
+        )
+
+        return test_db_fixture
+
+    def it_should_only_compare_records_in_the_partition(test_db_after_sync):
+        EXPECTED_UNMATCHED_DATA_AFTER_SYNC = [
+            CHANGED_COURSE_BEFORE,
+            CHANGED_COURSE_AFTER,
+            NEW_COURSE,
+        ]
+        with test_db_after_sync.connect() as con:
+            expected_unmatched_df = prep_expected_sync_df(
+                DataFrame(EXPECTED_UNMATCHED_DATA_AFTER_SYNC, columns=COLUMNS).astype(
+                    "string"
+                ),
+                IDENTITY_COLUMNS,
+            )
+
+            unmatched_from_db_df = prep_from_sync_db_df(
+                read_sql_query("SELECT * from Unmatched_Courses", con).astype("string"),
+                IDENTITY_COLUMNS,
+            )
+
+            assert expected_unmatched_df.to_csv() == unmatched_from_db_df.to_csv()
+
+    def it_should_record_the_partition_of_synced_records(test_db_after_sync):
+        with test_db_after_sync.connect() as con:
+            courses_from_db_df = read_sql_query(
+                f"SELECT SourceId, {PARTITION_KEY_COLUMN} from Courses", con
+            ).set_index("SourceId")
+
+        assert courses_from_db_df[PARTITION_KEY_COLUMN].to_dict() == {
+            "1": "A",
+            "2": "A",
+            "3": "B",
+            "4": "A",
+        }
+
+    def it_should_index_the_partition_key(test_db_after_sync):
+        with test_db_after_sync.connect() as con:
+            indexes = [row[1] for row in con.execute("PRAGMA index_list(Courses)")]
+
+        assert "PARTITION_Courses" in indexes
+
+
+def describe_when_testing_sync_with_a_record_stored_in_another_partition():
+    @pytest.fixture
+    def result_df(test_db_fixture):
+        # arrange
+        _create_partitioned_courses(
+            test_db_fixture,
+            {"A": [UNCHANGED_COURSE]},
+        )
+
+        # act
+        return sync_to_db_without_cleanup(
+            DataFrame([UNCHANGED_COURSE], columns=COLUMNS),
+            IDENTITY_COLUMNS,
+            "Courses",
+            test_db_fixture,
+            partition_key="B",
+        )
+
+    def it_should_treat_the_record_as_unchanged(result_df):
+        assert result_df["CreateDate"].tolist() == ["2020-09-14 12:00:00"]
+        assert result_df["LastModifiedDate"].tolist() == ["2020-09-14 12:00:00"]
+
+
+def describe_when_an_unchanged_record_moves_to_another_partition():
+    @pytest.fixture(params=[sync_to_db_without_cleanup, sync_to_db_with_hash_diff])
+    def test_db_after_moving(request, test_db_fixture):
+        # arrange
+        _create_partitioned_courses(
+            test_db_fixture,
+            {"A": [UNCHANGED_COURSE, OMITTED_FROM_SYNC_COURSE]},
+        )
+
+        # act
+        request.param(
+            DataFrame([UNCHANGED_COURSE], columns=COLUMNS),
+            IDENTITY_COLUMNS,
+            "Courses",
+            test_db_fixture,
+            partition_key="B",
+        )
+        sync_to_db_without_cleanup(
+            DataFrame([OMITTED_FROM_SYNC_COURSE], columns=COLUMNS),
+            IDENTITY_COLUMNS,
+            "Courses",
+            test_db_fixture,
+            partition_key="A",
+        )
+
+        return test_db_fixture
+
+    def it_should_record_the_new_partition(test_db_after_moving):
+        with test_db_after_moving.connect() as con:
+            courses_from_db_df = read_sql_query(
+                f"SELECT SourceId, {PARTITION_KEY_COLUMN} from Courses", con
+            ).set_index("SourceId")
+
+        assert courses_from_db_df[PARTITION_KEY_COLUMN].to_dict() == {
+            "2": "B",
+            "3": "A",
+        }
+
+    def it_should_not_report_the_record_missing_from_the_old_partition(
+        test_db_after_moving,
+    ):
+        assert read_missing_records("Courses", test_db_after_moving, "A").empty
+
+
+def describe_when_testing_sync_with_a_partition_key_on_an_older_table():
+    def it_should_add_the_partition_key_column(test_db_fixture):
+        with test_db_fixture.connect() as con:
+            con.execute(
+                f"""
+                CREATE TABLE IF NOT EXISTS Courses (
+                    {SYNC_COLUMNS_SQL}
+                )
+                """
+            )
+
+        sync_to_db_without_cleanup(
+            DataFrame(SYNC_DATA, columns=COLUMNS),
+            IDENTITY_COLUMNS,
+            "Courses",
+            test_db_fixture,
+            partition_key="A",
+        )
+
+        with test_db_fixture.connect() as con:
+            partitions = read_sql_query(
+                f"SELECT {PARTITION_KEY_COLUMN} from Courses", con
+            )[PARTITION_KEY_COLUMN]
+
+        assert partitions.tolist() == ["A", "A", "A"]
+
+
+def describe_when_testing_hash_diff_sync_with_a_partition_key():
+    @pytest.fixture
+    def sync_result(test_db_fixture):
+        # arrange
+        _create_partitioned_courses(
+            test_db_fixture,
+            {
+                "A": [CHANGED_COURSE_BEFORE],
+                "B": [UNCHANGED_COURSE, OMITTED_FROM_SYNC_COURSE],
+            },
+        )
+
+        # act
+        result_df = sync_to_db_with_hash_diff(
+            DataFrame(SYNC_DATA, columns=COLUMNS),
+            IDENTITY_COLUMNS,
+            "Courses",
+            test_db_fixture,
+            partition_key="A",
+        )
+
+        return (test_db_fixture, result_df.set_index("id"))
+
+    def it_should_find_unchanged_records_stored_in_another_partition(sync_result):
+        (_, result_df) = sync_result
+        assert result_df.loc["2", "LastModifiedDate"] == "2020-09-14 12:00:00"
+
+    def it_should_keep_the_create_date_for_the_changed_row(sync_result):
+        (_, result_df) = sync_result
+        assert result_df.loc["1", "CreateDate"] == "2020-09-14 12:00:00"
+        assert result_df.loc["1", "LastModifiedDate"] > "2020-09-14 12:00:00"
+
+    def it_should_record_the_partition_of_written_records(sync_result):
+        (test_db, _) = sync_result
+        with test_db.connect() as con:
+            courses_from_db_df = read_sql_query(
+                f"SELECT SourceId, {PARTITION_KEY_COLUMN} from Courses", con
+            ).set_index("SourceId")
+
+        assert courses_from_db_df[PARTITION_KEY_COLUMN].to_dict() == {
+            "1": "A",
+            "2": "A",
+            "3": "B",
+            "4": "A",
+        }
+
+
+def describe_when_testing_sync_with_chunked_input():
+    @pytest.fixture
+    def sync_result(test_db_fixture):
+        # arrange
+        _create_partitioned_courses(
+            test_db_fixture,
+            {None: [CHANGED_COURSE_BEFORE, UNCHANGED_COURSE, OMITTED_FROM_SYNC_COURSE]},
+        )
+        chunks = (
+            DataFrame(chunk, columns=COLUMNS).astype("string")
+            for chunk in [[CHANGED_COURSE_AFTER, UNCHANGED_COURSE], [NEW_COURSE]]
+        )
+
+        # act
+        result_chunks = list(
+            sync_chunks_to_db_without_cleanup(
+                chunks, IDENTITY_COLUMNS, "Courses", test_db_fixture
+            )
+        )
+
+        return (test_db_fixture, result_chunks)
+
+    def it_should_yield_chunks_matching_the_input_chunks(sync_result):
+        (_, result_chunks) = sync_result
+        assert [chunk["id"].tolist() for chunk in result_chunks] == [["1", "2"], ["4"]]
+
+    def it_should_restore_the_fetched_data(sync_result):
+        (_, result_chunks) = sync_result
+        assert result_chunks[0]["descriptionHeading"].tolist() == [
+            "*CHANGED*",
+            "descriptionHeading2",
+        ]
+        assert result_chunks[0]["name"].dtype == "string"
+
+    def it_should_reconcile_the_dates(sync_result):
+        (_, result_chunks) = sync_result
+        (first_chunk, second_chunk) = result_chunks
+
+        assert first_chunk["CreateDate"].tolist() == ["2020-09-14 12:00:00"] * 2
+        assert first_chunk["LastModifiedDate"].iloc[0] > "2020-09-14 12:00:00"
+        assert first_chunk["LastModifiedDate"].iloc[1] == "2020-09-14 12:00:00"
+        assert second_chunk["CreateDate"].iloc[0] > "2020-09-14 12:00:00"
+
+    def it_should_have_courses_table_with_updated_row_and_added_new_row(sync_result):
+        (test_db, _) = sync_result
+        with test_db.connect() as con:
+            courses_from_db_df = read_sql_query(
+                "SELECT SourceId, Json, SyncNeeded from Courses", con
+            ).set_index("SourceId")
+
+        assert sorted(courses_from_db_df.index) == ["1", "2", "3", "4"]
+        assert "*CHANGED*" in courses_from_db_df.loc["1", "Json"]
+        assert courses_from_db_df["SyncNeeded"].eq(0).all()
+
+
+def describe_when_testing_sync_with_chunked_numeric_input():
+    @pytest.fixture
+    def chunks() -> List[DataFrame]:
+        return [
+            DataFrame(
+                {
+                    "id": [1, 2],
+                    "points": [10.5, 11.0],
+                    "due": [Timestamp("2021-03-01 12:00", tz="US/Central")] * 2,
+                }
+            ),
+            DataFrame(
+                {
+                    "id": [3],
+                    "points": [12.0],
+                    "due": [Timestamp("2021-03-02 12:00", tz="US/Central")],
+                }
+            ),
+        ]
+
+    def it_should_keep_the_original_dtypes(test_db_fixture, chunks):
+        result_chunks = list(
+            sync_chunks_to_db_without_cleanup(
+                chunks, IDENTITY_COLUMNS, "Scores", test_db_fixture
+            )
+        )
+
+        assert result_chunks[0]["points"].dtype == "float64"
+        assert result_chunks[0]["due"].dtype == chunks[0]["due"].dtype
+        assert result_chunks[1]["points"].tolist() == [12.0]
+
+    def it_should_match_the_unchunked_sync(test_db_fixture, chunks):
+        unchunked_df = sync_to_db_without_cleanup(
+            concat(chunks, ignore_index=True),
+            IDENTITY_COLUMNS,
+            "Scores",
+            test_db_fixture,
+        )
+        result_df = concat(
+            sync_chunks_to_db_without_cleanup(
+                chunks, IDENTITY_COLUMNS, "Scores", test_db_fixture
+            ),
+            ignore_index=True,
+        )
+
+        assert_frame_equal(result_df, unchunked_df)
+
+
+def describe_when_testing_sync_with_no_chunks():
+    def it_should_yield_nothing(test_db_fixture):
+        result_chunks = list(
+            sync_chunks_to_db_without_cleanup(
+                iter([]), IDENTITY_COLUMNS, "Courses", test_db_fixture
+            )
+        )
+
+        assert result_chunks == []
+        assert test_db_fixture.has_table("Courses")
+
+
+def describe_when_testing_sync_with_change_types():
+    @pytest.fixture
+    def sync_result(test_db_fixture):
+        # arrange
+        _create_partitioned_courses(
+            test_db_fixture,
+            {
+                "A": [CHANGED_COURSE_BEFORE, UNCHANGED_COURSE],
+                "B": [OMITTED_FROM_SYNC_COURSE],
+            },
+        )
+
+        # act
+        result_df = sync_to_db_without_cleanup(
+            DataFrame(SYNC_DATA, columns=COLUMNS),
+            IDENTITY_COLUMNS,
+            "Courses",
+            test_db_fixture,
+            include_change_type=True,
+        )
+
+        return (test_db_fixture, result_df)
+
+    def it_should_classify_each_fetched_record(sync_result):
+        (_, result_df) = sync_result
+        assert result_df.set_index("id")[CHANGE_TYPE_COLUMN].to_dict() == {
+            "1": CHANGE_TYPES.CHANGED,
+            "2": CHANGE_TYPES.UNCHANGED,
+            "4": CHANGE_TYPES.NEW,
+        }
+
+    def it_should_read_the_missing_records_as_deleted(sync_result):
+        (test_db, _) = sync_result
+        missing_df = read_missing_records("Courses", test_db)
+
+        assert missing_df["id"].tolist() == ["3"]
+        assert missing_df["name"].tolist() == ["Omitted From Sync Course"]
+        assert missing_df["CreateDate"].tolist() == ["2020-09-14 12:00:00"]
+        assert missing_df[CHANGE_TYPE_COLUMN].tolist() == [CHANGE_TYPES.DELETED]
+
+    def it_should_only_read_missing_records_from_the_given_partition(sync_result):
+        (test_db, _) = sync_result
+        assert read_missing_records("Courses", test_db, partition_key="A").empty
+
+
+def describe_when_reading_synced_records():
+    @pytest.fixture
+    def test_db(test_db_fixture):
+        _create_partitioned_courses(
+            test_db_fixture,
+            {None: [CHANGED_COURSE_BEFORE, UNCHANGED_COURSE, OMITTED_FROM_SYNC_COURSE]},
+        )
+        return test_db_fixture
+
+    def it_should_read_every_source_id(test_db):
+        assert sorted(read_synced_source_ids("Courses", test_db)) == ["1", "2", "3"]
+
+    def it_should_read_the_records_selected_by_source_id(test_db):
+        records_df = read_synced_records(
+            "Courses", test_db, lambda source_ids: source_ids != "2"
+        )
+
+        assert records_df["id"].tolist() == ["1", "3"]
+        assert records_df["name"].tolist() == ["Changed Course", "Omitted From Sync Course"]
+        assert records_df["CreateDate"].tolist() == ["2020-09-14 12:00:00"] * 2
+
+    def it_should_read_every_record_by_default(test_db):
+        assert len(read_synced_records("Courses", test_db)) == 3
+
+    def it_should_read_nothing_for_a_resource_never_synced(test_db):
+        assert read_synced_source_ids("Sections", test_db).empty
+        assert read_synced_records("Sections", test_db).empty
+
+
+def describe_when_testing_hash_diff_sync_with_change_types():
+    def it_should_classify_each_fetched_record(test_db_fixture):
+        _create_partitioned_courses(
+            test_db_fixture,
+            {None: [CHANGED_COURSE_BEFORE, UNCHANGED_COURSE]},
+        )
+
+        result_df = sync_to_db_with_hash_diff(
+            DataFrame(SYNC_DATA, columns=COLUMNS),
+            IDENTITY_COLUMNS,
+            "Courses",
+            test_db_fixture,
+            include_change_type=True,
+        )
+
+        assert result_df.set_index("id")[CHANGE_TYPE_COLUMN].to_dict() == {
+            "1": CHANGE_TYPES.CHANGED,
+            "2": CHANGE_TYPES.UNCHANGED,
+            "4": CHANGE_TYPES.NEW,
+        }
+
+
+def _row_by_row_hash_and_json(df: DataFrame) -> DataFrame:
+    """
+    The original row-at-a-time implementation of add_hash_and_json_to,
+    kept here as the reference for compatibility with existing sync databases
+    """
+
+    def _json_hash_encode(row: Series) -> Series:
+        json = row.to_json()
+        row["Json"] = json
+        row["Hash"] = xxhash.xxh64_hexdigest(json.encode("utf-8"))
+        return row
+
+    return df.apply(_json_hash_encode, axis=1)
+
+
+def describe_when_adding_hash_and_json():
+    def describe_given_string_columns():
+        @pytest.fixture
+        def df() -> DataFrame:
+            return DataFrame(
+                {
+                    "id": ["1", "2"],
+                    "name": ['Course "One"', None],
+                    "description": ["line1\nline2", "\u00e9"],
+                }
+            ).astype("string")
+
+        def it_should_produce_the_same_json_as_previous_versions(df):
+            assert add_hash_and_json_to(df)["Json"].tolist() == [
+                '{"id":"1","name":"Course \\"One\\"","description":"line1\\nline2"}',
+                '{"id":"2","name":null,"description":"\\u00e9"}',
+            ]
+
+        def it_should_produce_the_same_hashes_as_previous_versions(df):
+            assert add_hash_and_json_to(df)["Hash"].tolist() == [
+                "c7e5350dc2864bc2",
+                "db92decb0260c67a",
+            ]
+
+        def it_should_match_row_by_row_serialization(df):
+            expected = _row_by_row_hash_and_json(df)
+            result = add_hash_and_json_to(df)
+            assert result["Json"].tolist() == expected["Json"].tolist()
+            assert result["Hash"].tolist() == expected["Hash"].tolist()
+
+        def it_should_not_modify_the_original_dataframe(df):
+            add_hash_and_json_to(df)
+            assert list(df.columns) == ["id", "name", "description"]
+
+    def describe_given_mixed_column_types():
+        @pytest.fixture
+        def df() -> DataFrame:
+            return DataFrame(
+                {
+                    "id": [1, 2],
+                    "score": [9.5, None],
+                    "submitted": [True, False],
+                    "state": ["graded", "unsubmitted"],
+                    "submitted_at": [Timestamp("2021-03-01 12:30:00"), None],
+                }
+            )
+
+        def it_should_produce_the_same_hashes_as_previous_versions(df):
+            result = add_hash_and_json_to(df)
+            assert result["Json"].tolist() == [
+                '{"id":1,"score":9.5,"submitted":true,"state":"graded","submitted_at":1614601800000}',
+                '{"id":2,"score":null,"submitted":false,"state":"unsubmitted","submitted_at":null}',
+            ]
+            assert result["Hash"].tolist() == ["6fd4775ff66309fe", "43cf9c9e495d4ca4"]
+
+    def describe_given_only_numeric_columns():
+        @pytest.fixture
+        def df() -> DataFrame:
+            return DataFrame({"id": [1, 2], "points": [10.0, 0.25]})
+
+        def it_should_serialize_ints_as_floats_like_previous_versions(df):
+            result = add_hash_and_json_to(df)
+            assert result["Json"].tolist() == [
+                '{"id":1.0,"points":10.0}',
+                '{"id":2.0,"points":0.25}',
+            ]
+            assert result["Hash"].tolist() == ["ab713d361219a7fe", "cdde8cd2d8051343"]
+
+    def describe_given_nested_values():
+        @pytest.fixture
+        def df() -> DataFrame:
+            return DataFrame(
+                {
+                    "id": ["1", "2"],
+                    "teacherFolder": [{"id": "f1", "title": "Folder"}, None],
+                    "materials": [[{"link": "a"}], []],
+                }
+            )
+
+        def it_should_produce_the_same_hashes_as_previous_versions(df):
+            result = add_hash_and_json_to(df)
+            assert result["Json"].tolist() == [
+                '{"id":"1","teacherFolder":{"id":"f1","title":"Folder"},"materials":[{"link":"a"}]}',
+                '{"id":"2","teacherFolder":null,"materials":[]}',
+            ]
+            assert result["Hash"].tolist() == ["0bd70f97de3ab207", "351f0ddac7cc0f1e"]
+
+    def describe_given_a_non_default_index():
+        def it_should_keep_the_index_aligned():
+            df = DataFrame({"id": ["10", "20", "30"]}, index=[7, 3, 5])
+            result = add_hash_and_json_to(df)
+            assert result.loc[3, "Json"] == '{"id":"20"}'
+
+    def describe_given_an_empty_dataframe():
+        def it_should_add_empty_json_and_hash_columns():
+            result = add_hash_and_json_to(DataFrame(columns=["id"]))
+            assert result.empty
+            assert list(result.columns) == ["id", "Json", "Hash"]
+
+
+def describe_when_adding_hash_and_json_with_hash_workers():
+    @pytest.fixture
+    def df() -> DataFrame:
+        return DataFrame(
+            {
+                "id": [str(i) for i in range(11)],
+                "points": [i / 4 for i in range(11)],
+                "state": ["graded", None] * 5 + ["unsubmitted"],
+            },
+            index=range(100, 111),
+        )
+
+    @pytest.fixture
+    def parallel(monkeypatch):
+        monkeypatch.setattr(resource_sync, "PARALLEL_HASH_MIN_ROWS", 2)
+        resource_sync.set_hash_workers(3)
+        yield
+        resource_sync.set_hash_workers(1)
+
+    def it_should_match_in_process_hashing(df, parallel):
+        result = add_hash_and_json_to(df)
+        expected = _row_by_row_hash_and_json(df)
+        assert result["Json"].tolist() == expected["Json"].tolist()
+        assert result["Hash"].tolist() == expected["Hash"].tolist()
+
+    def it_should_keep_the_index_aligned(df, parallel):
+        result = add_hash_and_json_to(df)
+        assert result.loc[105, "Json"] == '{"id":"5","points":1.25,"state":null}'
+
+    def it_should_reject_fewer_than_one_worker():
+        with pytest.raises(AssertionError):
+            resource_sync.set_hash_workers(0)
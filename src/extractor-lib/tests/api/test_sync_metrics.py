@@ -0,0 +1,164 @@
+# SPDX-License-Identifier: Apache-2.0
+# Licensed to the Ed-Fi Alliance under one or more agreements.
+# The Ed-Fi Alliance licenses this file to you under the Apache License, Version 2.0.
+# See the LICENSE and NOTICES files in the project root for more information.
+
+import logging
+from typing import List
+
+import pytest
+from pandas import DataFrame
+from edfi_lms_extractor_lib.api.resource_sync import (
+    cleanup_after_sync,
+    sync_chunks_to_db_without_cleanup,
+    sync_to_db_with_hash_diff,
+    sync_to_db_without_cleanup,
+)
+from edfi_lms_extractor_lib.api.sync_metrics import (
+    SYNC_PHASES,
+    SyncMetrics,
+    SyncRunSummary,
+    add_sync_metrics_listener,
+    remove_sync_metrics_listener,
+)
+from edfi_lms_extractor_lib.api.sync_store import get_sync_db_engine
+
+
+@pytest.fixture
+def sync_db(tmp_path):
+    yield get_sync_db_engine(str(tmp_path / "sync"))
+
+
+@pytest.fixture
+def reported() -> List[SyncMetrics]:
+    metrics: List[SyncMetrics] = []
+    add_sync_metrics_listener(metrics.append)
+    yield metrics
+    remove_sync_metrics_listener(metrics.append)
+
+
+INITIAL_DF = DataFrame({"id": ["1", "2", "3"], "name": ["first", "second", "third"]})
+
+# 1 changed, 2 unchanged, 3 missing and 4 new
+RESYNC_DF = DataFrame({"id": ["1", "2", "4"], "name": ["changed", "second", "fourth"]})
+
+
+def describe_when_syncing_with_a_metrics_listener():
+    def describe_given_the_sql_sync():
+        @pytest.fixture
+        def resync_metrics(sync_db, reported) -> SyncMetrics:
+            sync_to_db_without_cleanup(INITIAL_DF.copy(), ["id"], "Courses", sync_db)
+            sync_to_db_without_cleanup(RESYNC_DF.copy(), ["id"], "Courses", sync_db)
+            cleanup_after_sync("Courses", sync_db)
+            assert len(reported) == 2
+            return reported[1]
+
+        def it_should_count_the_changes(resync_metrics):
+            assert resync_metrics.resource_name == "Courses"
+            assert resync_metrics.rows_fetched == 3
+            assert resync_metrics.new == 1
+            assert resync_metrics.changed == 1
+            assert resync_metrics.unchanged == 1
+
+        def it_should_count_the_bytes_staged(resync_metrics):
+            assert resync_metrics.bytes_written == len(
+                '{"id":"1","name":"changed"}{"id":"2","name":"second"}{"id":"4","name":"fourth"}'
+            )
+
+        def it_should_time_each_phase(resync_metrics):
+            assert set(resync_metrics.phase_seconds) == {
+                SYNC_PHASES.HASH,
+                SYNC_PHASES.STAGE,
+                SYNC_PHASES.COMPARE,
+                SYNC_PHASES.RECONCILE,
+                SYNC_PHASES.UPDATE,
+                SYNC_PHASES.READ_BACK,
+            }
+            assert 0 < resync_metrics.sqlite_seconds < resync_metrics.total_seconds
+
+    def describe_given_the_hash_diff_sync():
+        def it_should_count_the_changes_and_bytes_written(sync_db, reported):
+            sync_to_db_with_hash_diff(INITIAL_DF.copy(), ["id"], "Courses", sync_db)
+            sync_to_db_with_hash_diff(RESYNC_DF.copy(), ["id"], "Courses", sync_db)
+
+            assert (reported[1].new, reported[1].changed, reported[1].unchanged) == (1, 1, 1)
+            # only new and changed records are written
+            assert reported[1].bytes_written == len(
+                '{"id":"1","name":"changed"}{"id":"4","name":"fourth"}'
+            )
+
+    def describe_given_chunked_input():
+        def it_should_report_once_the_chunks_are_consumed(sync_db, reported):
+            chunks = sync_chunks_to_db_without_cleanup(
+                [INITIAL_DF.iloc[:2], INITIAL_DF.iloc[2:]], ["id"], "Courses", sync_db
+            )
+            next(chunks)
+            assert len(reported) == 0
+
+            list(chunks)
+            assert len(reported) == 1
+            assert reported[0].rows_fetched == 3
+            assert reported[0].new == 3
+
+    def describe_given_the_listener_was_removed():
+        def it_should_not_be_called(sync_db):
+            reported: List[SyncMetrics] = []
+            add_sync_metrics_listener(reported.append)
+            remove_sync_metrics_listener(reported.append)
+
+            sync_to_db_with_hash_diff(INITIAL_DF.copy(), ["id"], "Courses", sync_db)
+
+            assert len(reported) == 0
+
+
+def describe_when_summarizing_a_run():
+    @pytest.fixture
+    def summary() -> SyncRunSummary:
+        summary = SyncRunSummary()
+        summary(SyncMetrics("Sections", 2, new=2, phase_seconds={SYNC_PHASES.HASH: 0.5}))
+        summary(
+            SyncMetrics(
+                "Enrollments",
+                3,
+                new=1,
+                unchanged=2,
+                bytes_written=10,
+                phase_seconds={SYNC_PHASES.STAGE: 1.0},
+            )
+        )
+        summary(
+            SyncMetrics(
+                "Enrollments",
+                4,
+                changed=4,
+                bytes_written=20,
+                phase_seconds={SYNC_PHASES.STAGE: 2.0, SYNC_PHASES.UPDATE: 1.0},
+            )
+        )
+        return summary
+
+    def it_should_total_by_resource_in_sync_order(summary):
+        summary_df = summary.to_df().set_index("Resource")
+
+        assert summary_df.index.tolist() == ["Sections", "Enrollments"]
+        assert summary_df.loc["Enrollments", "Syncs"] == 2
+        assert summary_df.loc["Enrollments", "Fetched"] == 7
+        assert summary_df.loc["Enrollments", "Changed"] == 4
+        assert summary_df.loc["Enrollments", "Bytes"] == 30
+        assert summary_df.loc["Enrollments", "SQLite (s)"] == 4.0
+        assert summary_df.loc["Enrollments", "Stage (s)"] == 3.0
+        assert summary_df.loc["Sections", "Stage (s)"] == 0.0
+
+    def it_should_log_a_table(summary, caplog):
+        with caplog.at_level(logging.INFO):
+            summary.log()
+
+        assert "Sync summary" in caplog.text
+        assert "Enrollments" in caplog.text
+
+    def describe_given_nothing_was_synced():
+        def it_should_log_that(caplog):
+            with caplog.at_level(logging.INFO):
+                SyncRunSummary().log()
+
+            assert "No resources were synced" in caplog.text
@@ -0,0 +1,115 @@
+# SPDX-License-Identifier: Apache-2.0
+# Licensed to the Ed-Fi Alliance under one or more agreements.
+# The Ed-Fi Alliance licenses this file to you under the Apache License, Version 2.0.
+# See the LICENSE and NOTICES files in the project root for more information.
+
+import pytest
+from pandas import DataFrame, read_sql_query
+from sqlalchemy import create_engine
+from edfi_lms_extractor_lib.api.resource_sync import (
+    read_missing_records,
+    sync_chunks_to_db_without_cleanup,
+    sync_to_db_without_cleanup,
+)
+from edfi_lms_extractor_lib.api.sync_payload import (
+    PAYLOAD_MODES,
+    get_payload_mode,
+    set_payload_mode,
+)
+
+INITIAL_DF = DataFrame({"id": ["1", "2"], "name": ["first", "second"]})
+RESYNC_DF = DataFrame({"id": ["2"], "name": ["second"]})
+
+
+@pytest.fixture
+def sync_db(tmp_path):
+    yield create_engine(f"sqlite:///{tmp_path / 'sync.sqlite'}")
+
+
+def _stored_json(sync_db) -> list:
+    with sync_db.connect() as con:
+        return read_sql_query("SELECT Json FROM Courses ORDER BY SourceId", con)[
+            "Json"
+        ].tolist()
+
+
+def describe_when_getting_the_payload_mode():
+    def it_should_default_to_full(sync_db):
+        assert get_payload_mode(sync_db) == PAYLOAD_MODES.FULL
+
+
+def describe_when_syncing_in_compressed_payload_mode():
+    @pytest.fixture
+    def synced_db(sync_db):
+        set_payload_mode(sync_db, PAYLOAD_MODES.COMPRESSED)
+        sync_to_db_without_cleanup(INITIAL_DF.copy(), ["id"], "Courses", sync_db)
+        return sync_db
+
+    def it_should_store_the_json_as_a_blob(synced_db):
+        assert all(isinstance(json, bytes) for json in _stored_json(synced_db))
+
+    def it_should_still_find_unchanged_records(synced_db):
+        result_df = sync_to_db_without_cleanup(
+            INITIAL_DF.copy(), ["id"], "Courses", synced_db
+        )
+        with synced_db.connect() as con:
+            unmatched_count = con.execute(
+                "SELECT COUNT(*) FROM Unmatched_Courses"
+            ).scalar()
+
+        assert unmatched_count == 0
+        assert result_df.shape[0] == 2
+
+    def it_should_read_back_missing_records(synced_db):
+        sync_to_db_without_cleanup(RESYNC_DF.copy(), ["id"], "Courses", synced_db)
+
+        missing_df = read_missing_records("Courses", synced_db)
+
+        assert missing_df["name"].tolist() == ["first"]
+
+
+def describe_when_migrating_between_payload_modes():
+    def it_should_restore_the_original_json(sync_db):
+        sync_to_db_without_cleanup(INITIAL_DF.copy(), ["id"], "Courses", sync_db)
+        original_json = _stored_json(sync_db)
+
+        set_payload_mode(sync_db, PAYLOAD_MODES.COMPRESSED)
+        set_payload_mode(sync_db, PAYLOAD_MODES.FULL)
+
+        assert _stored_json(sync_db) == original_json
+        assert get_payload_mode(sync_db) == PAYLOAD_MODES.FULL
+
+    def it_should_not_migrate_again_when_already_in_the_payload_mode(sync_db):
+        set_payload_mode(sync_db, PAYLOAD_MODES.COMPRESSED)
+        sync_to_db_without_cleanup(INITIAL_DF.copy(), ["id"], "Courses", sync_db)
+        with sync_db.connect() as con:
+            con.execute("UPDATE Courses SET Json = 'not migrated' WHERE SourceId = '1'")
+
+        set_payload_mode(sync_db, PAYLOAD_MODES.COMPRESSED)
+
+        assert _stored_json(sync_db)[0] == "not migrated"
+
+
+def describe_when_syncing_in_hash_only_payload_mode():
+    @pytest.fixture
+    def synced_db(sync_db):
+        sync_to_db_without_cleanup(INITIAL_DF.copy(), ["id"], "Courses", sync_db)
+        set_payload_mode(sync_db, PAYLOAD_MODES.HASH_ONLY)
+        sync_to_db_without_cleanup(RESYNC_DF.copy(), ["id"], "Courses", sync_db)
+        return sync_db
+
+    def it_should_not_store_any_json(synced_db):
+        assert _stored_json(synced_db) == [None, None]
+
+    def it_should_not_read_back_missing_records(synced_db):
+        with pytest.raises(ValueError):
+            read_missing_records("Courses", synced_db)
+
+    def it_should_sync_chunks_without_reading_json(synced_db):
+        result_chunks = list(
+            sync_chunks_to_db_without_cleanup(
+                [INITIAL_DF.copy()], ["id"], "Courses", synced_db
+            )
+        )
+
+        assert result_chunks[0]["name"].tolist() == INITIAL_DF["name"].tolist()
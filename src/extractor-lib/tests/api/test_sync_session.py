@@ -0,0 +1,145 @@
+# SPDX-License-Identifier: Apache-2.0
+# Licensed to the Ed-Fi Alliance under one or more agreements.
+# The Ed-Fi Alliance licenses this file to you under the Apache License, Version 2.0.
+# See the LICENSE and NOTICES files in the project root for more information.
+
+import pytest
+from pandas import DataFrame, read_sql_query
+from sqlalchemy import create_engine
+from edfi_lms_extractor_lib.api.resource_sync import (
+    CHANGE_TYPE_COLUMN,
+    CHANGE_TYPES,
+    sync_to_db_with_hash_diff,
+    sync_to_db_without_cleanup,
+    cleanup_after_sync,
+)
+from edfi_lms_extractor_lib.api.sync_session import SyncSession
+
+SECTION_1_DF = DataFrame({"id": ["1", "2"], "section": ["s1", "s1"]})
+SECTION_2_DF = DataFrame({"id": ["3"], "section": ["s2"]})
+
+
+@pytest.fixture
+def sync_db(tmp_path):
+    yield create_engine(f"sqlite:///{tmp_path / 'sync.sqlite'}")
+
+
+def _stored_ids(sync_db) -> list:
+    with sync_db.connect() as con:
+        return read_sql_query(
+            "SELECT SourceId FROM Enrollments ORDER BY SourceId", con
+        )["SourceId"].tolist()
+
+
+def _table_names(sync_db) -> list:
+    with sync_db.connect() as con:
+        return [
+            row[0]
+            for row in con.execute("SELECT name FROM sqlite_master WHERE type='table'")
+        ]
+
+
+def describe_when_syncing_partitions_in_a_session():
+    @pytest.fixture
+    def results(sync_db):
+        with SyncSession(sync_db) as session:
+            first_df = session.sync(
+                SECTION_1_DF.copy(), ["id"], "Enrollments", partition_key="s1"
+            )
+            second_df = session.sync(
+                SECTION_2_DF.copy(), ["id"], "Enrollments", partition_key="s2"
+            )
+        return (first_df, second_df)
+
+    def it_should_return_the_synced_records(results):
+        (first_df, second_df) = results
+        assert first_df["id"].tolist() == ["1", "2"]
+        assert second_df["id"].tolist() == ["3"]
+        assert second_df["CreateDate"].notna().all()
+
+    def it_should_commit_every_partition(sync_db, results):
+        assert _stored_ids(sync_db) == ["1", "2", "3"]
+
+    def it_should_drop_the_temporary_tables(sync_db, results):
+        assert _table_names(sync_db) == ["Enrollments"]
+
+
+def describe_when_resyncing_in_a_session():
+    def it_should_match_a_sync_outside_a_session(sync_db):
+        sync_to_db_without_cleanup(SECTION_1_DF.copy(), ["id"], "Enrollments", sync_db)
+        cleanup_after_sync("Enrollments", sync_db)
+        changed_df = DataFrame({"id": ["1", "4"], "section": ["changed", "s1"]})
+
+        with SyncSession(sync_db) as session:
+            result_df = session.sync(
+                changed_df, ["id"], "Enrollments", include_change_type=True
+            )
+            missing_df = session.read_missing_records("Enrollments")
+
+        assert result_df[CHANGE_TYPE_COLUMN].tolist() == [
+            CHANGE_TYPES.CHANGED,
+            CHANGE_TYPES.NEW,
+        ]
+        assert missing_df["id"].tolist() == ["2"]
+        assert _stored_ids(sync_db) == ["1", "2", "4"]
+
+
+def describe_when_reading_missing_records_of_a_resource_not_synced_in_the_session():
+    def it_should_raise_an_error(sync_db):
+        sync_to_db_with_hash_diff(SECTION_1_DF.copy(), ["id"], "Enrollments", sync_db)
+
+        with SyncSession(sync_db) as session:
+            with pytest.raises(ValueError):
+                session.read_missing_records("Enrollments")
+
+
+def describe_when_a_session_fails():
+    def it_should_not_commit_any_records(sync_db):
+        with pytest.raises(RuntimeError):
+            with SyncSession(sync_db) as session:
+                session.sync(SECTION_1_DF.copy(), ["id"], "Enrollments")
+                raise RuntimeError("failed")
+
+        assert _stored_ids(sync_db) == []
+
+
+def describe_when_reading_stored_records_in_a_session():
+    def it_should_merge_a_partial_sync_with_the_unchanged_records(sync_db):
+        with SyncSession(sync_db) as session:
+            session.sync(SECTION_1_DF.copy(), ["id"], "Enrollments", partition_key="s1")
+            session.sync(SECTION_2_DF.copy(), ["id"], "Enrollments", partition_key="s2")
+
+        with SyncSession(sync_db) as session:
+            session.sync(
+                DataFrame({"id": ["2"], "section": ["changed"]}),
+                ["id"],
+                "Enrollments",
+                partition_key="s1",
+            )
+            stored_df = session.read_stored_records("Enrollments", partition_key="s1")
+
+        assert stored_df.sort_values("id")["section"].tolist() == ["s1", "changed"]
+        assert stored_df["LastModifiedDate"].notna().all()
+
+    def it_should_be_empty_before_the_first_sync(sync_db):
+        with SyncSession(sync_db) as session:
+            assert session.read_stored_records("Enrollments").empty
+
+
+def describe_when_setting_watermarks_in_a_session():
+    def it_should_commit_them_with_the_sync(sync_db):
+        with SyncSession(sync_db) as session:
+            session.sync(SECTION_1_DF.copy(), ["id"], "Enrollments", partition_key="s1")
+            session.set_watermark("Enrollments", "2021-03-01T11:50:00Z", "s1")
+
+        with SyncSession(sync_db) as session:
+            assert session.read_watermarks("Enrollments") == {"s1": "2021-03-01T11:50:00Z"}
+
+    def it_should_not_commit_them_when_the_session_fails(sync_db):
+        with pytest.raises(RuntimeError):
+            with SyncSession(sync_db) as session:
+                session.set_watermark("Enrollments", "2021-03-01T11:50:00Z", "s1")
+                raise RuntimeError("failed")
+
+        with SyncSession(sync_db) as session:
+            assert session.read_watermarks("Enrollments") == {}
@@ -0,0 +1,107 @@
+# SPDX-License-Identifier: Apache-2.0
+# Licensed to the Ed-Fi Alliance under one or more agreements.
+# The Ed-Fi Alliance licenses this file to you under the Apache License, Version 2.0.
+# See the LICENSE and NOTICES files in the project root for more information.
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from pandas import DataFrame, read_sql_query
+from sqlalchemy import create_engine
+from edfi_lms_extractor_lib.api.resource_sync import (
+    cleanup_after_sync,
+    sync_to_db_without_cleanup,
+)
+from edfi_lms_extractor_lib.api.sync_store import (
+    SYNC_DB_FILE_NAME,
+    SQLiteSyncStore,
+    as_sync_store,
+    get_extractor_db_engine,
+    get_sync_db_engine,
+    get_sync_store,
+)
+
+
+@pytest.fixture
+def sync_db(tmp_path):
+    yield get_sync_db_engine(str(tmp_path / "sync"))
+
+
+def describe_when_getting_a_sync_db_engine():
+    def it_should_create_the_database_in_the_directory(sync_db, tmp_path):
+        with sync_db.connect() as con:
+            con.execute("SELECT 1")
+
+        assert (tmp_path / "sync" / SYNC_DB_FILE_NAME).exists()
+
+    def it_should_use_write_ahead_logging(sync_db):
+        with sync_db.connect() as con:
+            assert con.execute("PRAGMA journal_mode").scalar() == "wal"
+
+    def it_should_keep_temporary_storage_in_memory(sync_db):
+        with sync_db.connect() as con:
+            # 2 is MEMORY
+            assert con.execute("PRAGMA temp_store").scalar() == 2
+
+    def it_should_reuse_pooled_connections(sync_db):
+        with sync_db.connect() as con:
+            first_connection = con.connection.connection
+        with sync_db.connect() as con:
+            assert con.connection.connection is first_connection
+
+    def it_should_not_share_a_connection_between_open_connections(sync_db):
+        with sync_db.connect() as first, sync_db.connect() as second:
+            assert first.connection.connection is not second.connection.connection
+
+    def it_should_use_pooled_connections_from_other_threads(sync_db):
+        with sync_db.connect() as con:
+            con.execute("CREATE TABLE Numbers (Number INT)")
+
+        def insert(number: int):
+            with sync_db.connect() as con:
+                con.execute("INSERT INTO Numbers VALUES (?)", (number,))
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(insert, range(20)))
+
+        with sync_db.connect() as con:
+            assert con.execute("SELECT COUNT(*) FROM Numbers").scalar() == 20
+
+
+def describe_when_getting_a_sync_store():
+    def it_should_default_to_sqlite_in_the_directory(tmp_path):
+        sync_store = get_sync_store(str(tmp_path / "sync"))
+        with sync_store.connect() as con:
+            con.ensure_resource_table("Courses")
+
+        assert isinstance(sync_store, SQLiteSyncStore)
+        assert (tmp_path / "sync" / SYNC_DB_FILE_NAME).exists()
+
+    def it_should_reject_an_unknown_store(tmp_path):
+        with pytest.raises(AssertionError):
+            get_sync_store(str(tmp_path / "sync"), "unknown")
+
+    def it_should_wrap_an_engine_as_a_sqlite_store(tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'sync.sqlite'}")
+
+        assert as_sync_store(engine).engine is engine
+
+    def it_should_share_the_engine_of_a_sqlite_store_with_the_extractor(tmp_path):
+        sync_store = get_sync_store(str(tmp_path / "sync"))
+
+        assert get_extractor_db_engine(sync_store, str(tmp_path / "sync")) is sync_store.engine
+
+
+def describe_when_syncing_with_a_sync_db_engine():
+    def it_should_sync_a_resource(sync_db):
+        resource_df = DataFrame({"id": ["1", "2"], "name": ["first", "second"]})
+
+        sync_to_db_without_cleanup(resource_df, ["id"], "Courses", sync_db)
+        result_df = sync_to_db_without_cleanup(
+            resource_df.copy(), ["id"], "Courses", sync_db
+        )
+        cleanup_after_sync("Courses", sync_db)
+
+        assert result_df["id"].tolist() == ["1", "2"]
+        with sync_db.connect() as con:
+            assert read_sql_query("SELECT * FROM Courses", con).shape[0] == 2
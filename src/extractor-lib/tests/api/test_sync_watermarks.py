@@ -0,0 +1,51 @@
+# SPDX-License-Identifier: Apache-2.0
+# Licensed to the Ed-Fi Alliance under one or more agreements.
+# The Ed-Fi Alliance licenses this file to you under the Apache License, Version 2.0.
+# See the LICENSE and NOTICES files in the project root for more information.
+
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import create_engine
+from edfi_lms_extractor_lib.api.sync_watermarks import (
+    NO_PARTITION,
+    read_watermarks,
+    watermark_for_fetch_started_at,
+    write_watermark,
+)
+
+
+@pytest.fixture
+def sync_db(tmp_path):
+    yield create_engine(f"sqlite:///{tmp_path / 'sync.sqlite'}")
+
+
+def describe_when_reading_watermarks():
+    def it_should_be_empty_before_any_are_written(sync_db):
+        assert read_watermarks(sync_db, "Submissions") == {}
+
+    def it_should_read_the_watermarks_of_the_resource(sync_db):
+        write_watermark(sync_db, "Submissions", "2021-03-01T00:00:00Z", "s1")
+        write_watermark(sync_db, "Submissions", "2021-03-02T00:00:00Z", "s2")
+        write_watermark(sync_db, "Enrollments", "2021-03-03T00:00:00Z")
+
+        assert read_watermarks(sync_db, "Submissions") == {
+            "s1": "2021-03-01T00:00:00Z",
+            "s2": "2021-03-02T00:00:00Z",
+        }
+        assert read_watermarks(sync_db, "Enrollments") == {
+            NO_PARTITION: "2021-03-03T00:00:00Z"
+        }
+
+    def it_should_replace_an_earlier_watermark(sync_db):
+        write_watermark(sync_db, "Submissions", "2021-03-01T00:00:00Z", "s1")
+        write_watermark(sync_db, "Submissions", "2021-03-05T00:00:00Z", "s1")
+
+        assert read_watermarks(sync_db, "Submissions") == {"s1": "2021-03-05T00:00:00Z"}
+
+
+def describe_when_getting_the_watermark_for_a_fetch():
+    def it_should_overlap_the_fetch_in_utc():
+        fetch_started_at = datetime(2021, 3, 1, 12, 0, 0, tzinfo=timezone.utc)
+
+        assert watermark_for_fetch_started_at(fetch_started_at) == "2021-03-01T11:50:00Z"
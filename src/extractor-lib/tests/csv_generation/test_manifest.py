@@ -0,0 +1,142 @@
+# SPDX-License-Identifier: Apache-2.0
+# Licensed to the Ed-Fi Alliance under one or more agreements.
+# The Ed-Fi Alliance licenses this file to you under the Apache License, Version 2.0.
+# See the LICENSE and NOTICES files in the project root for more information.
+
+from datetime import datetime
+from hashlib import sha256
+import json
+import os
+from typing import Dict
+
+import pytest
+from pandas import DataFrame
+from edfi_lms_extractor_lib.csv_generation.manifest import (
+    MANIFEST_DIRECTORY,
+    RunManifest,
+    finish_run_manifest,
+    get_run_manifest,
+    start_run_manifest,
+)
+from edfi_lms_extractor_lib.csv_generation.write import (
+    write_assignment_submissions,
+    write_grades,
+    write_users,
+)
+
+OUTPUT_DATE: datetime = datetime(2021, 3, 1, 12, 30, 5)
+
+
+def describe_when_recording_a_run_manifest():
+    @pytest.fixture
+    def manifest(tmp_path):
+        start_run_manifest(str(tmp_path))
+        yield get_run_manifest()
+        finish_run_manifest()
+
+    def it_should_record_each_file_with_its_partitions(tmp_path, manifest):
+        write_users(DataFrame({"id": ["1", "2"]}), OUTPUT_DATE, str(tmp_path))
+        write_assignment_submissions(
+            {("10", "20"): DataFrame({"id": ["3"]})}, OUTPUT_DATE, str(tmp_path)
+        )
+
+        entries = {entry.path: entry for entry in manifest.entries}
+        users = entries["users/2021-03-01-12-30-05.csv"]
+        assert (users.resource, users.partitions, users.rows) == ("users", {}, 2)
+
+        submissions = entries["section=10/assignment=20/submissions/2021-03-01-12-30-05.csv"]
+        assert submissions.resource == "submissions"
+        assert submissions.partitions == {"section": "10", "assignment": "20"}
+        assert submissions.rows == 1
+
+    def it_should_record_the_size_and_hash_of_the_file(tmp_path, manifest):
+        write_users(DataFrame({"id": ["1"]}), OUTPUT_DATE, str(tmp_path))
+
+        contents = (tmp_path / "users" / "2021-03-01-12-30-05.csv").read_bytes()
+        [entry] = manifest.entries
+        assert entry.size == len(contents)
+        assert entry.sha256 == sha256(contents).hexdigest()
+
+    def it_should_record_missing_sections_instead_of_writing_empty_files(tmp_path, manifest):
+        write_grades({"1": DataFrame({"id": ["1"]})}, ["1", "2"], OUTPUT_DATE, str(tmp_path))
+
+        assert [entry.path for entry in manifest.entries] == [
+            "section=1/grades/2021-03-01-12-30-05.csv"
+        ]
+        [empty_partition] = manifest.empty_partitions
+        assert empty_partition.path == "section=2/grades/2021-03-01-12-30-05"
+        assert empty_partition.resource == "grades"
+        assert empty_partition.partitions == {"section": "2"}
+        assert not (tmp_path / "section=2").exists()
+
+    def it_should_still_write_empty_files_which_are_not_for_one_section(tmp_path, manifest):
+        write_users(DataFrame(), OUTPUT_DATE, str(tmp_path))
+        write_assignment_submissions({("1", "2"): DataFrame()}, OUTPUT_DATE, str(tmp_path))
+
+        assert len(manifest.entries) == 2
+        assert manifest.empty_partitions == []
+
+
+def describe_when_writing_a_run_manifest():
+    def it_should_write_every_entry_under_the_run_date(tmp_path):
+        manifest = RunManifest(str(tmp_path), OUTPUT_DATE)
+        write_path = tmp_path / "sections" / "2021-03-01-12-30-05.csv"
+        write_path.parent.mkdir()
+        write_path.write_text("id\n1\n")
+        manifest.record(str(write_path), 1)
+
+        path = manifest.write()
+
+        assert os.path.dirname(path) == os.path.join(str(tmp_path), MANIFEST_DIRECTORY)
+        assert os.path.basename(path).startswith("2021-03-01-12-30-05-")
+        with open(path) as manifest_file:
+            written: Dict = json.load(manifest_file)
+        assert written["run"] == OUTPUT_DATE.isoformat()
+        assert [entry["path"] for entry in written["files"]] == [
+            "sections/2021-03-01-12-30-05.csv"
+        ]
+        assert os.listdir(os.path.dirname(path)) == [os.path.basename(path)]
+
+    def it_should_not_overwrite_a_run_started_in_the_same_second(tmp_path):
+        first_path = RunManifest(str(tmp_path), OUTPUT_DATE).write()
+        second_path = RunManifest(str(tmp_path), OUTPUT_DATE).write()
+
+        assert first_path != second_path
+        assert sorted(os.listdir(os.path.dirname(first_path))) == sorted(
+            [os.path.basename(first_path), os.path.basename(second_path)]
+        )
+
+    def it_should_not_record_files_outside_of_the_output_directory(tmp_path):
+        manifest = RunManifest(str(tmp_path / "output"))
+        other = tmp_path / "other.csv"
+        other.write_text("id\n")
+
+        manifest.record(str(other), 0)
+
+        assert manifest.entries == []
+
+    def it_should_write_the_empty_partitions(tmp_path):
+        manifest = RunManifest(str(tmp_path), OUTPUT_DATE)
+        manifest.record_empty_partition(
+            os.path.join(str(tmp_path), "section=1", "grades", "2021-03-01-12-30-05.csv")
+        )
+
+        with open(manifest.write()) as manifest_file:
+            written: Dict = json.load(manifest_file)
+        assert written["empty_partitions"] == [
+            {
+                "path": "section=1/grades/2021-03-01-12-30-05",
+                "resource": "grades",
+                "partitions": {"section": "1"},
+            }
+        ]
+
+    def it_should_do_nothing_when_no_run_was_started():
+        assert finish_run_manifest() is None
+
+
+def describe_when_writing_without_a_run_manifest():
+    def it_should_write_empty_files_for_missing_sections(tmp_path):
+        write_grades({}, ["1"], OUTPUT_DATE, str(tmp_path))
+
+        assert (tmp_path / "section=1" / "grades" / "2021-03-01-12-30-05.csv").exists()
@@ -4,13 +4,31 @@
 # See the LICENSE and NOTICES files in the project root for more information.
 
 from datetime import datetime
-from typing import Dict, Tuple
+from pathlib import Path
+from typing import Dict, List, Tuple
 from unittest.mock import call, patch
-from pandas import DataFrame
+import pytest
+from pandas import DataFrame, Timestamp, read_csv, read_parquet
+from edfi_lms_extractor_lib.csv_generation import write
+from edfi_lms_extractor_lib.csv_generation.manifest import (
+    finish_run_manifest,
+    start_run_manifest,
+)
 from edfi_lms_extractor_lib.csv_generation.write import (
+    CSV_COMPRESSIONS,
+    OUTPUT_FORMATS,
+    OUTPUT_LAYOUTS,
     _write_multi_csv,
     _write_multi_tuple_csv,
-    _write_csv
+    _write_csv,
+    dataframe_fingerprint,
+    get_output_format,
+    set_csv_compression,
+    set_output_format,
+    set_output_layout,
+    set_skip_unchanged_files,
+    write_assignment_submissions,
+    write_grades,
 )
 
 
@@ -105,3 +123,342 @@ def describe_when_writing_csv_to_file():
 
         # if we make it this far without an exception, then the exception caused
         # by the bad directory must have been handled correctly.
+
+
+def describe_when_setting_the_output_format():
+    @pytest.fixture(autouse=True)
+    def reset_output_format():
+        yield
+        set_output_format(OUTPUT_FORMATS.CSV)
+
+    def it_should_default_to_csv():
+        assert get_output_format() == OUTPUT_FORMATS.CSV
+
+    def describe_given_no_parquet_engine_is_installed():
+        def it_should_refuse_parquet_output(monkeypatch):
+            monkeypatch.setattr(write, "find_spec", lambda _: None)
+
+            with pytest.raises(ImportError):
+                set_output_format(OUTPUT_FORMATS.PARQUET)
+            assert get_output_format() == OUTPUT_FORMATS.CSV
+
+    def describe_given_an_empty_dataframe_in_both_formats():
+        def it_should_write_empty_files(monkeypatch, tmp_path):
+            monkeypatch.setattr(write, "find_spec", lambda _: object())
+            set_output_format(OUTPUT_FORMATS.BOTH)
+
+            _write_csv(DataFrame(), datetime(2021, 1, 2, 3, 4, 5), str(tmp_path))
+
+            # the loader treats files of 4 bytes or less as having no records
+            assert (tmp_path / "2021-01-02-03-04-05.csv").stat().st_size <= 4
+            assert (tmp_path / "2021-01-02-03-04-05.parquet").stat().st_size == 0
+
+    def describe_given_parquet_output():
+        @pytest.fixture
+        def written_df(tmp_path) -> DataFrame:
+            pytest.importorskip("pyarrow")
+            set_output_format(OUTPUT_FORMATS.PARQUET)
+
+            _write_csv(
+                DataFrame(
+                    {
+                        "SourceSystemIdentifier": ["1"],
+                        "Points": [2.5],
+                        "CreateDate": ["2021-01-02 03:04:05"],
+                    }
+                ),
+                datetime(2021, 1, 2, 3, 4, 5),
+                str(tmp_path),
+            )
+
+            assert not (tmp_path / "2021-01-02-03-04-05.csv").exists()
+            return read_parquet(tmp_path / "2021-01-02-03-04-05.parquet")
+
+        def it_should_keep_the_column_types(written_df):
+            assert written_df["Points"].tolist() == [2.5]
+
+        def it_should_write_dates_as_timestamps(written_df):
+            assert written_df["CreateDate"].tolist() == [Timestamp("2021-01-02 03:04:05")]
+
+
+def describe_when_writing_compressed_csv():
+    @pytest.fixture(autouse=True)
+    def reset_compression():
+        yield
+        set_csv_compression(CSV_COMPRESSIONS.NONE)
+
+    def describe_given_gzip_compression():
+        def it_should_write_a_csv_gz_file(tmp_path):
+            set_csv_compression(CSV_COMPRESSIONS.GZIP)
+
+            _write_csv(DF1_TO_WRITE, datetime(2021, 1, 2, 3, 4, 5), str(tmp_path))
+
+            path = tmp_path / "2021-01-02-03-04-05.csv.gz"
+            assert path.read_bytes()[:2] == b"\x1f\x8b"
+            assert read_csv(path, dtype="string")["dummy"].tolist() == ["1"]
+
+        def it_should_write_an_empty_file_for_an_empty_dataframe(tmp_path):
+            set_csv_compression(CSV_COMPRESSIONS.GZIP)
+
+            _write_csv(DataFrame(), datetime(2021, 1, 2, 3, 4, 5), str(tmp_path))
+
+            assert (tmp_path / "2021-01-02-03-04-05.csv.gz").stat().st_size == 0
+
+    def describe_given_zstd_compression_without_zstandard():
+        def it_should_refuse_the_compression(monkeypatch):
+            monkeypatch.setattr(write, "find_spec", lambda _: None)
+
+            with pytest.raises(ImportError):
+                set_csv_compression(CSV_COMPRESSIONS.ZSTD)
+
+
+def describe_when_skipping_unchanged_files():
+    @pytest.fixture(autouse=True)
+    def skip_unchanged_files():
+        set_skip_unchanged_files(True)
+        yield
+        set_skip_unchanged_files(False)
+
+    FIRST_RUN = datetime(2021, 1, 2, 3, 4, 5)
+    SECOND_RUN = datetime(2021, 1, 3, 3, 4, 5)
+
+    def describe_given_the_contents_are_unchanged():
+        def it_should_not_write_a_new_file(tmp_path):
+            _write_csv(DataFrame({"id": ["1", "2"]}), FIRST_RUN, str(tmp_path))
+            _write_csv(DataFrame({"id": ["2", "1"]}), SECOND_RUN, str(tmp_path))
+
+            assert sorted(path.name for path in tmp_path.glob("*.csv")) == [
+                "2021-01-02-03-04-05.csv"
+            ]
+
+    def describe_given_the_contents_changed():
+        def it_should_write_a_new_file(tmp_path):
+            _write_csv(DataFrame({"id": ["1"]}), FIRST_RUN, str(tmp_path))
+            _write_csv(DataFrame({"id": ["2"]}), SECOND_RUN, str(tmp_path))
+
+            assert (tmp_path / "2021-01-03-03-04-05.csv").exists()
+
+    def describe_given_a_newer_file_was_written_without_a_fingerprint():
+        def it_should_write_a_new_file(tmp_path):
+            _write_csv(DataFrame({"id": ["1"]}), FIRST_RUN, str(tmp_path))
+            (tmp_path / "2021-01-02-12-00-00.csv").write_text("id\n2\n")
+            _write_csv(DataFrame({"id": ["1"]}), SECOND_RUN, str(tmp_path))
+
+            assert (tmp_path / "2021-01-03-03-04-05.csv").exists()
+
+    def describe_given_the_section_was_recorded_empty_in_between():
+        def it_should_write_the_same_contents_again(tmp_path):
+            THIRD_RUN = datetime(2021, 1, 4, 3, 4, 5)
+            grades_directory = tmp_path / "section=1" / "grades"
+
+            for (run_date, df) in [
+                (FIRST_RUN, DataFrame({"id": ["1"]})),
+                (SECOND_RUN, DataFrame()),
+                (THIRD_RUN, DataFrame({"id": ["1"]})),
+            ]:
+                start_run_manifest(str(tmp_path))
+                _write_csv(df, run_date, str(grades_directory))
+                finish_run_manifest()
+
+            assert sorted(path.name for path in grades_directory.glob("*.csv")) == [
+                "2021-01-02-03-04-05.csv",
+                "2021-01-04-03-04-05.csv",
+            ]
+
+    def describe_given_a_different_compression():
+        def it_should_write_a_new_file(tmp_path):
+            _write_csv(DataFrame({"id": ["1"]}), FIRST_RUN, str(tmp_path))
+            set_csv_compression(CSV_COMPRESSIONS.GZIP)
+            try:
+                _write_csv(DataFrame({"id": ["1"]}), SECOND_RUN, str(tmp_path))
+            finally:
+                set_csv_compression(CSV_COMPRESSIONS.NONE)
+
+            assert (tmp_path / "2021-01-03-03-04-05.csv.gz").exists()
+
+
+def describe_when_fingerprinting_a_dataframe():
+    def it_should_ignore_the_row_order():
+        assert dataframe_fingerprint(
+            DataFrame({"id": ["1", "2"], "name": ["a", "b"]})
+        ) == dataframe_fingerprint(DataFrame({"id": ["2", "1"], "name": ["b", "a"]}))
+
+    def it_should_depend_on_the_columns():
+        assert dataframe_fingerprint(DataFrame({"id": ["1"]})) != dataframe_fingerprint(
+            DataFrame({"name": ["1"]})
+        )
+
+    def it_should_handle_unhashable_values():
+        assert dataframe_fingerprint(DataFrame({"ids": [["1", "2"]]})) != dataframe_fingerprint(
+            DataFrame({"ids": [["1"]]})
+        )
+
+
+def describe_when_writing_the_consolidated_layout():
+    @pytest.fixture(autouse=True)
+    def consolidated_layout():
+        set_output_layout(OUTPUT_LAYOUTS.CONSOLIDATED)
+        yield
+        set_output_layout(OUTPUT_LAYOUTS.PARTITIONED)
+
+    OUTPUT_DATE = datetime(2021, 1, 2, 3, 4, 5)
+
+    def describe_given_dataframes_by_section():
+        @pytest.fixture
+        def written_df(tmp_path) -> DataFrame:
+            write_grades(
+                {"1": DataFrame({"Grade": ["A", "B"]}), "2": DataFrame({"Grade": ["C"]})},
+                ["1", "2", "3"],
+                OUTPUT_DATE,
+                str(tmp_path),
+            )
+            return read_csv(tmp_path / "grades" / "2021-01-02-03-04-05.csv", dtype="string")
+
+        def it_should_write_one_file_with_a_section_column(written_df):
+            assert written_df["Grade"].tolist() == ["A", "B", "C"]
+            assert written_df["section"].tolist() == ["1", "1", "2"]
+
+        def it_should_not_write_section_directories(tmp_path, written_df):
+            assert [path.name for path in tmp_path.iterdir()] == ["grades"]
+
+    def describe_given_dataframes_by_section_and_assignment():
+        def it_should_write_a_column_for_each_partition(tmp_path):
+            write_assignment_submissions(
+                {("1", "10"): DataFrame({"Grade": ["A"]})}, OUTPUT_DATE, str(tmp_path)
+            )
+
+            written_df = read_csv(
+                tmp_path / "submissions" / "2021-01-02-03-04-05.csv", dtype="string"
+            )
+            assert written_df.to_dict("records") == [
+                {"Grade": "A", "section": "1", "assignment": "10"}
+            ]
+
+    def describe_given_no_records():
+        def it_should_write_an_empty_file(tmp_path):
+            write_grades({}, ["1"], OUTPUT_DATE, str(tmp_path))
+
+            assert (tmp_path / "grades" / "2021-01-02-03-04-05.csv").stat().st_size <= 4
+
+    def describe_given_a_maximum_rows_per_file():
+        @pytest.fixture
+        def grades_directory(tmp_path) -> Path:
+            set_output_layout(OUTPUT_LAYOUTS.CONSOLIDATED, max_rows_per_file=2)
+            write_grades(
+                {
+                    "1": DataFrame({"Grade": ["A"]}),
+                    "2": DataFrame({"Grade": ["B", "C"]}),
+                    "3": DataFrame({"Grade": ["D"]}),
+                },
+                ["1", "2", "3"],
+                OUTPUT_DATE,
+                str(tmp_path),
+            )
+            return tmp_path / "grades"
+
+        def it_should_shard_without_splitting_a_section(grades_directory):
+            assert sorted(path.name for path in grades_directory.glob("*.csv")) == [
+                "2021-01-02-03-04-05.part-0001.csv",
+                "2021-01-02-03-04-05.part-0002.csv",
+                "2021-01-02-03-04-05.part-0003.csv",
+            ]
+            assert read_csv(
+                grades_directory / "2021-01-02-03-04-05.part-0002.csv", dtype="string"
+            )["Grade"].tolist() == ["B", "C"]
+
+        def it_should_skip_all_shards_when_unchanged(grades_directory):
+            set_skip_unchanged_files(True)
+            try:
+                write_grades(
+                    {
+                        "1": DataFrame({"Grade": ["A"]}),
+                        "2": DataFrame({"Grade": ["B", "C"]}),
+                        "3": DataFrame({"Grade": ["D"]}),
+                    },
+                    ["1", "2", "3"],
+                    datetime(2021, 1, 3, 3, 4, 5),
+                    str(grades_directory.parent),
+                )
+                write_grades(
+                    {
+                        "1": DataFrame({"Grade": ["A"]}),
+                        "2": DataFrame({"Grade": ["B", "C"]}),
+                        "3": DataFrame({"Grade": ["D"]}),
+                    },
+                    ["1", "2", "3"],
+                    datetime(2021, 1, 4, 3, 4, 5),
+                    str(grades_directory.parent),
+                )
+            finally:
+                set_skip_unchanged_files(False)
+
+            assert len(list(grades_directory.glob("2021-01-03-*.csv"))) == 3
+            assert len(list(grades_directory.glob("2021-01-04-*.csv"))) == 0
+
+        def it_should_write_each_shard_as_soon_as_it_is_full(tmp_path, monkeypatch):
+            produced: List[str] = []
+            produced_at_write: List[List[str]] = []
+            write_files = write._write_files
+
+            def record_write(*args):
+                produced_at_write.append(list(produced))
+                write_files(*args)
+
+            def generate_grades():
+                for (section_id, grades) in [("1", ["A"]), ("2", ["B", "C"]), ("3", ["D"])]:
+                    produced.append(section_id)
+                    yield (section_id, DataFrame({"Grade": grades}))
+
+            monkeypatch.setattr(write, "_write_files", record_write)
+            set_output_layout(OUTPUT_LAYOUTS.CONSOLIDATED, max_rows_per_file=2)
+            write_grades(generate_grades(), ["1", "2", "3"], OUTPUT_DATE, str(tmp_path))
+
+            assert produced_at_write == [["1", "2"], ["1", "2", "3"], ["1", "2", "3"]]
+            assert read_csv(
+                tmp_path / "grades" / "2021-01-02-03-04-05.part-0003.csv", dtype="string"
+            )["Grade"].tolist() == ["D"]
+
+        def it_should_write_one_file_when_every_row_fits(tmp_path):
+            set_output_layout(OUTPUT_LAYOUTS.CONSOLIDATED, max_rows_per_file=10)
+            write_grades(
+                iter([("1", DataFrame({"Grade": ["A"]})), ("2", DataFrame({"Grade": ["B"]}))]),
+                ["1", "2"],
+                OUTPUT_DATE,
+                str(tmp_path),
+            )
+
+            assert [path.name for path in (tmp_path / "grades").glob("*.csv")] == [
+                "2021-01-02-03-04-05.csv"
+            ]
+
+
+def describe_when_writing_dataframes_from_a_generator():
+    @pytest.fixture
+    def produced() -> List[str]:
+        return []
+
+    @pytest.fixture
+    def grades_directory(tmp_path, produced) -> Path:
+        def generate_grades():
+            for section_id in ["1", "2"]:
+                produced.append(section_id)
+                yield (section_id, DataFrame({"Grade": [section_id]}))
+
+        write_grades(generate_grades(), ["1", "2", "3"], datetime(2021, 1, 2, 3, 4, 5), str(tmp_path))
+        return tmp_path
+
+    def it_should_write_each_dataframe(grades_directory):
+        for section_id in ["1", "2"]:
+            written_df = read_csv(
+                grades_directory / f"section={section_id}" / "grades" / "2021-01-02-03-04-05.csv",
+                dtype="string",
+            )
+            assert written_df["Grade"].tolist() == [section_id]
+
+    def it_should_fill_in_missing_sections(grades_directory):
+        assert (
+            grades_directory / "section=3" / "grades" / "2021-01-02-03-04-05.csv"
+        ).stat().st_size <= 4
+
+    def it_should_consume_the_generator_once(grades_directory, produced):
+        assert produced == ["1", "2"]
@@ -0,0 +1,92 @@
+# SPDX-License-Identifier: Apache-2.0
+# Licensed to the Ed-Fi Alliance under one or more agreements.
+# The Ed-Fi Alliance licenses this file to you under the Apache License, Version 2.0.
+# See the LICENSE and NOTICES files in the project root for more information.
+
+from datetime import datetime
+import logging
+from threading import Event, Lock
+from typing import Dict, List
+
+from pandas import DataFrame, read_csv
+from edfi_lms_extractor_lib.csv_generation.write import _write_multi_csv
+from edfi_lms_extractor_lib.csv_generation.writer_pool import (
+    CsvWriterPool,
+    current_writer_pool,
+)
+
+OUTPUT_DATE: datetime = datetime(2021, 3, 1, 12, 30, 5)
+
+
+def describe_when_writing_multiple_csv_files():
+    def it_should_write_each_file_in_the_usual_layout(tmp_path):
+        dfs_to_write: Dict[str, DataFrame] = {
+            str(i): DataFrame({"id": [str(i)]}) for i in range(50)
+        }
+
+        _write_multi_csv(dfs_to_write, OUTPUT_DATE, str(tmp_path / "section={id}" / "grades"))
+
+        for i in range(50):
+            path = tmp_path / f"section={i}" / "grades" / "2021-03-01-12-30-05.csv"
+            assert read_csv(path, dtype=str)["id"].tolist() == [str(i)]
+
+    def it_should_report_failures_together_at_the_end(tmp_path, caplog):
+        (tmp_path / "blocked").write_text("a file where a directory should be")
+        dfs_to_write: Dict[str, DataFrame] = {
+            "ok": DataFrame({"id": ["1"]}),
+            "blocked": DataFrame({"id": ["2"]}),
+        }
+
+        _write_multi_csv(dfs_to_write, OUTPUT_DATE, str(tmp_path / "{id}" / "grades"))
+
+        assert (tmp_path / "ok" / "grades" / "2021-03-01-12-30-05.csv").exists()
+        assert "1 of 2 files could not be written" in caplog.text
+
+
+def describe_when_using_a_writer_pool():
+    def it_should_only_be_current_inside_the_with_block():
+        with CsvWriterPool() as pool:
+            assert current_writer_pool() is pool
+        assert current_writer_pool() is None
+
+    def it_should_wait_for_every_write_on_exit():
+        written: List[str] = []
+        with CsvWriterPool(max_workers=4) as pool:
+            for i in range(20):
+                pool.submit(str(i), lambda i=i: written.append(str(i)))
+
+        assert sorted(written, key=int) == [str(i) for i in range(20)]
+
+    def it_should_collect_failures():
+        def fail():
+            raise OSError("disk full")
+
+        with CsvWriterPool() as pool:
+            pool.submit("good.csv", lambda: None)
+            pool.submit("bad.csv", fail)
+
+        assert [path for (path, _) in pool.failures] == ["bad.csv"]
+        assert isinstance(pool.failures[0][1], OSError)
+
+    def it_should_limit_the_writes_pending(caplog):
+        release = Event()
+        lock = Lock()
+        started: List[int] = []
+
+        def blocked_write():
+            with lock:
+                started.append(1)
+            release.wait(5)
+
+        with caplog.at_level(logging.ERROR):
+            with CsvWriterPool(max_workers=2, max_pending=2) as pool:
+                pool.submit("1", blocked_write)
+                pool.submit("2", blocked_write)
+
+                # a third write would block until one of the first two finishes
+                assert not pool._pending.acquire(blocking=False)
+
+                release.set()
+
+        assert len(started) == 2
+        assert pool.failures == []
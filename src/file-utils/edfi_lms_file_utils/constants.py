@@ -18,6 +18,15 @@ class Resources:
     USERS = "users"
 
 
+# Partition columns, which the consolidated file layout adds to the rows of a
+# resource in place of the section={id} and assignment={id} directories
+class Partitions:
+    SECTION = Resources.SECTION
+    ASSIGNMENT = Resources.ASSIGNMENT
+
+    COLUMNS = [SECTION, ASSIGNMENT]
+
+
 # Keys
 class Keys:
     LMS_SECTION_SOURCE_SYSTEM_IDENTIFIER = "LMSSectionSourceSystemIdentifier"
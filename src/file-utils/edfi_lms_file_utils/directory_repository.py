@@ -9,6 +9,9 @@ from typing import Union
 
 from edfi_lms_file_utils.constants import Resources
 
+# the extractors write a manifest of the files written by each run here
+MANIFESTS_DIRECTORY = "manifests"
+
 
 def _get_directory_for_section(
     base_directory: str, section_id: Union[str, int], file_type: str
@@ -213,3 +216,40 @@ def get_attendance_events_directory(base_directory: str, section_id: int) -> str
     return _get_directory_for_section(
         base_directory, section_id, Resources.ATTENDANCE_EVENTS
     )
+
+
+def get_consolidated_directory(base_directory: str, resource: str) -> str:
+    """
+    Gets the directory of a resource in the consolidated layout, where all of the
+    sections are in one file, or in shards of one file.
+
+    Parameters
+    ----------
+    base_directory: str
+        The base / parent directory for LMS extractor files.
+    resource: str
+        The resource directory name, e.g. Resources.GRADES.
+
+    Returns
+    -------
+    str
+        Full directory path for the resource.
+    """
+    return os.path.join(base_directory, resource)
+
+
+def get_manifests_directory(base_directory: str) -> str:
+    """
+    Gets the canonical directory for the run manifests written by the extractors.
+
+    Parameters
+    ----------
+    base_directory: str
+        The base / parent directory for LMS extractor files.
+
+    Returns
+    -------
+    str
+        Full directory path for the run manifests.
+    """
+    return os.path.join(base_directory, MANIFESTS_DIRECTORY)
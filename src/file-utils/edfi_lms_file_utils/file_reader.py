@@ -9,7 +9,7 @@ from typing import Callable, Dict, List, Optional
 import pandas as pd  # type: ignore
 
 import edfi_lms_file_utils.file_repository as fr
-from edfi_lms_file_utils.constants import DataTypes, Keys
+from edfi_lms_file_utils.constants import DataTypes, Keys, Partitions, Resources
 
 logger = logging.getLogger(__name__)
 
@@ -23,9 +23,13 @@ def _read_csv(
     nrows: Optional[int] = None,
     data_types: Dict[str, str] = dict(),
     extra_date_columns: List[str] = list(),
+    partition: Dict[str, List[str]] = dict(),
 ) -> pd.DataFrame:
     """
-    Loads a CSV file into a DataFrame.
+    Loads a CSV file, which may be gzip (.csv.gz) or zstd (.csv.zst) compressed, or
+    a Parquet file written by the extractors' Parquet output format, into a DataFrame.
+    The format is selected by the file extension. The partition columns of a file
+    in the consolidated layout are removed.
 
     Parameters
     ----------
@@ -40,6 +44,10 @@ def _read_csv(
     extra_date_columns: list (optional)
         A list of columns that should be treated as having DateTime
         data type.
+    partition: dictionary (optional)
+        For a file in the consolidated layout, the partition column values of
+        the rows to keep, e.g. {"section": ["123", "456"]}. All rows are kept
+        by default.
 
     Returns
     -------
@@ -61,21 +69,121 @@ def _read_csv(
         dtype = {
             "SourceSystemIdentifier": "string",
             "SourceSystem": "string",
+            **{column: "string" for column in Partitions.COLUMNS},
             **data_types,
         }
 
-        return pd.read_csv(
+        if file.endswith(".parquet"):
+            return _select_partition(_read_parquet(file, nrows, dtype, dates), partition)
+
+        df: pd.DataFrame = pd.read_csv(
             file,
             engine="c",
             parse_dates=dates,
             infer_datetime_format=True,
             nrows=nrows,
             dtype=dtype,
+            compression=_csv_compression(file),
         )
+        return _select_partition(df, partition)
 
     return _default()
 
 
+def _select_partition(df: pd.DataFrame, partition: Dict[str, List[str]]) -> pd.DataFrame:
+    """
+    Keeps the rows of a consolidated file in the given partitions, then removes
+    the partition columns, which are not part of the LMS UDM.
+    """
+    for column, values in partition.items():
+        if column in df.columns:
+            df = df[df[column].isin(values)]
+
+    partition_columns = [column for column in Partitions.COLUMNS if column in df.columns]
+    if len(partition_columns) == 0:
+        return df
+
+    return df.drop(columns=partition_columns)
+
+
+def _read_consolidated(
+    base_directory: str,
+    resource: str,
+    read_file: Callable[..., pd.DataFrame],
+    partition: Dict[str, List[str]],
+    nrows: Optional[int] = None,
+) -> Optional[pd.DataFrame]:
+    """
+    Reads the newest files of a resource in the consolidated layout, keeping the
+    rows in the given partitions.
+
+    Returns
+    -------
+    Optional[pd.DataFrame]
+        The rows, or None when the resource is not in the consolidated layout.
+    """
+    files = fr.get_consolidated_files(base_directory, resource)
+    if len(files) == 0:
+        return None
+
+    # the rows of a partition can be anywhere in the files, so nrows is only
+    # applied once the other partitions are filtered out
+    dfs: List[pd.DataFrame] = []
+    rows = 0
+    for file in files:
+        df = read_file(file, partition=partition)
+        dfs.append(df)
+        rows += df.shape[0]
+        if nrows is not None and rows >= nrows:
+            break
+
+    df = pd.concat(dfs, ignore_index=True)
+    return df if nrows is None else df.head(nrows)
+
+
+def _csv_compression(file: str) -> str:
+    """
+    The compression of a CSV file, from its extension. gzip is inferred by every
+    supported pandas version, while zstd needs pandas 1.4 and the zstandard package.
+    """
+    return "zstd" if file.endswith(".zst") else "infer"
+
+
+def _read_parquet(
+    file: str, nrows: Optional[int], dtype: Dict[str, str], dates: List[str]
+) -> pd.DataFrame:
+    """
+    Loads a Parquet file into a DataFrame with the same dtypes as the equivalent
+    CSV file. Parquet files keep their column types, so this is only a conversion
+    where a type differs, e.g. an extra date column written as text.
+
+    Parameters
+    ----------
+    file: str
+        Full path to the file to read.
+    nrows: int (optional)
+        Number of rows to read. If not specified, reads all rows.
+    dtype: dictionary
+        A dictionary of column names and data types.
+    dates: list
+        A list of columns that should have DateTime data type.
+
+    Returns
+    -------
+    pd.DataFrame
+        The exact columns depend on the file being read.
+    """
+    df: pd.DataFrame = pd.read_parquet(file)
+    if nrows is not None:
+        df = df.head(nrows)
+
+    for column in dates:
+        if column in df.columns and not pd.api.types.is_datetime64_any_dtype(df[column]):
+            df[column] = pd.to_datetime(df[column])
+
+    return df.astype({column: t for column, t in dtype.items() if column in df.columns})
+
+
 def get_all_users(base_directory: str, nrows: Optional[int] = None) -> pd.DataFrame:
     """
     Reads the most recent users file into a Pandas DataFrame.
@@ -254,6 +362,16 @@ def get_section_associations(
     -------
     Pandas DataFrame with columns matching the model definition / CSV file.
     """
+    consolidated = _read_consolidated(
+        base_directory,
+        Resources.SECTION_ASSOCIATIONS,
+        read_section_associations_file,
+        {Partitions.SECTION: [str(section_id)]},
+        nrows,
+    )
+    if consolidated is not None:
+        return consolidated
+
     file = fr.get_section_associations_file(base_directory, section_id)
 
     if file is None:
@@ -263,7 +381,9 @@ def get_section_associations(
 
 
 def read_section_associations_file(
-    full_path: str, nrows: Optional[int] = None
+    full_path: str,
+    nrows: Optional[int] = None,
+    partition: Dict[str, List[str]] = dict(),
 ) -> pd.DataFrame:
     """
     Reads the CSV file for the given path into a Pandas DataFrame.
@@ -275,6 +395,9 @@ def read_section_associations_file(
     nrows: int or None
         (Optional) number of rows to read from the file - useful for testing
         without reading the entirety of a large file.
+    partition: dictionary (optional)
+        For a file in the consolidated layout, the partition column values of
+        the rows to read, e.g. {"section": ["123"]}.
 
     Returns
     -------
@@ -286,12 +409,14 @@ def read_section_associations_file(
         "LMSUserSourceSystemIdentifier": "string",
     }
 
-    return _read_csv(full_path, nrows, data_types=data_types)
+    return _read_csv(full_path, nrows, data_types=data_types, partition=partition)
 
 
 def _get_data_for_section(
     base_directory: str,
     sections: pd.DataFrame,
+    resource: str,
+    read_file: Callable[..., pd.DataFrame],
     callback: Callable[[str, int, Optional[int]], pd.DataFrame],
     nrows: Optional[int] = None,
 ) -> pd.DataFrame:
@@ -303,6 +428,17 @@ def _get_data_for_section(
         )
         return _default()
 
+    # in the consolidated layout, every section is read from the same files at once
+    consolidated = _read_consolidated(
+        base_directory,
+        resource,
+        read_file,
+        {Partitions.SECTION: sections[Keys.SOURCE_SYSTEM_IDENTIFIER].astype(str).tolist()},
+        nrows,
+    )
+    if consolidated is not None:
+        return consolidated
+
     for _, section_id in sections[[Keys.SOURCE_SYSTEM_IDENTIFIER]].itertuples():
         sa = callback(base_directory, section_id, nrows)
 
@@ -334,7 +470,12 @@ def get_all_section_associations(
     Pandas DataFrame with columns matching the model definition / CSV file.
     """
     return _get_data_for_section(
-        base_directory, sections, get_section_associations, nrows
+        base_directory,
+        sections,
+        Resources.SECTION_ASSOCIATIONS,
+        read_section_associations_file,
+        get_section_associations,
+        nrows,
     )
 
 
@@ -359,6 +500,16 @@ def get_section_activities(
     -------
     Pandas DataFrame with columns matching the model definition / CSV file.
     """
+    consolidated = _read_consolidated(
+        base_directory,
+        Resources.SECTION_ACTIVITIES,
+        read_section_activities_file,
+        {Partitions.SECTION: [str(section_id)]},
+        nrows,
+    )
+    if consolidated is not None:
+        return consolidated
+
     file = fr.get_section_activities_file(base_directory, section_id)
 
     if file is None:
@@ -368,7 +519,9 @@ def get_section_activities(
 
 
 def read_section_activities_file(
-    full_path: str, nrows: Optional[int] = None
+    full_path: str,
+    nrows: Optional[int] = None,
+    partition: Dict[str, List[str]] = dict(),
 ) -> pd.DataFrame:
     """
     Reads the CSV file for the given path into a Pandas DataFrame.
@@ -380,6 +533,9 @@ def read_section_activities_file(
     nrows: int or None
         (Optional) number of rows to read from the file - useful for testing
         without reading the entirety of a large file.
+    partition: dictionary (optional)
+        For a file in the consolidated layout, the partition column values of
+        the rows to read, e.g. {"section": ["123"]}.
 
     Returns
     -------
@@ -401,6 +557,7 @@ def read_section_activities_file(
         nrows,
         data_types=data_types,
         extra_date_columns=extra_date_columns,
+        partition=partition,
     )
 
 
@@ -426,7 +583,12 @@ def get_all_section_activities(
     Pandas DataFrame with columns matching the model definition / CSV file.
     """
     return _get_data_for_section(
-        base_directory, sections, get_section_activities, nrows
+        base_directory,
+        sections,
+        Resources.SECTION_ACTIVITIES,
+        read_section_activities_file,
+        get_section_activities,
+        nrows,
     )
 
 
@@ -451,6 +613,16 @@ def get_assignments(
     -------
     Pandas DataFrame with columns matching the model definition / CSV file.
     """
+    consolidated = _read_consolidated(
+        base_directory,
+        Resources.ASSIGNMENTS,
+        read_assignments_file,
+        {Partitions.SECTION: [str(section_id)]},
+        nrows,
+    )
+    if consolidated is not None:
+        return consolidated
+
     file = fr.get_assignments_file(base_directory, section_id)
 
     if file is None:
@@ -459,7 +631,11 @@ def get_assignments(
     return read_assignments_file(file, nrows)
 
 
-def read_assignments_file(full_path: str, nrows: Optional[int] = None) -> pd.DataFrame:
+def read_assignments_file(
+    full_path: str,
+    nrows: Optional[int] = None,
+    partition: Dict[str, List[str]] = dict(),
+) -> pd.DataFrame:
     """
     Reads the CSV file for the given path into a Pandas DataFrame.
 
@@ -470,12 +646,15 @@ def read_assignments_file(full_path: str, nrows: Optional[int] = None) -> pd.Dat
     nrows: int or None
         (Optional) number of rows to read from the file - useful for testing
         without reading the entirety of a large file.
+    partition: dictionary (optional)
+        For a file in the consolidated layout, the partition column values of
+        the rows to read, e.g. {"section": ["123"]}.
 
     Returns
     -------
     Pandas DataFrame with columns matching the model definition / CSV file.
     """
-    return _read_csv(full_path, nrows)
+    return _read_csv(full_path, nrows, partition=partition)
 
 
 def get_all_assignments(
@@ -499,7 +678,14 @@ def get_all_assignments(
     -------
     Pandas DataFrame with columns matching the model definition / CSV file.
     """
-    return _get_data_for_section(base_directory, sections, get_assignments, nrows)
+    return _get_data_for_section(
+        base_directory,
+        sections,
+        Resources.ASSIGNMENTS,
+        read_assignments_file,
+        get_assignments,
+        nrows,
+    )
 
 
 def get_submissions(
@@ -528,6 +714,16 @@ def get_submissions(
     -------
     Pandas DataFrame with columns matching the model definition / CSV file.
     """
+    consolidated = _read_consolidated(
+        base_directory,
+        Resources.SUBMISSIONS,
+        read_submissions_file,
+        {Partitions.SECTION: [str(section_id)], Partitions.ASSIGNMENT: [str(assignment_id)]},
+        nrows,
+    )
+    if consolidated is not None:
+        return consolidated
+
     file = fr.get_submissions_file(base_directory, section_id, assignment_id)
 
     if file is None:
@@ -536,7 +732,11 @@ def get_submissions(
     return read_submissions_file(file, nrows)
 
 
-def read_submissions_file(full_path: str, nrows: Optional[int] = None) -> pd.DataFrame:
+def read_submissions_file(
+    full_path: str,
+    nrows: Optional[int] = None,
+    partition: Dict[str, List[str]] = dict(),
+) -> pd.DataFrame:
     """
     Reads the CSV file for the given path into a Pandas DataFrame.
 
@@ -547,6 +747,9 @@ def read_submissions_file(full_path: str, nrows: Optional[int] = None) -> pd.Dat
     nrows: int or None
         (Optional) number of rows to read from the file - useful for testing
         without reading the entirety of a large file.
+    partition: dictionary (optional)
+        For a file in the consolidated layout, the partition column values of
+        the rows to read, e.g. {"section": ["123"]}.
 
     Returns
     -------
@@ -567,6 +770,7 @@ def read_submissions_file(full_path: str, nrows: Optional[int] = None) -> pd.Dat
         nrows,
         data_types=data_types,
         extra_date_columns=extra_date_columns,
+        partition=partition,
     )
 
 
@@ -598,6 +802,20 @@ def get_all_submissions(
         )
         return _default()
 
+    consolidated = _read_consolidated(
+        base_directory,
+        Resources.SUBMISSIONS,
+        read_submissions_file,
+        {
+            Partitions.ASSIGNMENT: assignments[Keys.SOURCE_SYSTEM_IDENTIFIER]
+            .astype(str)
+            .tolist()
+        },
+        nrows,
+    )
+    if consolidated is not None:
+        return consolidated
+
     df = pd.DataFrame()
     columns = [Keys.SOURCE_SYSTEM_IDENTIFIER, Keys.LMS_SECTION_SOURCE_SYSTEM_IDENTIFIER]
     for _, assignment_id, section_id in assignments[columns].itertuples():
@@ -630,6 +848,16 @@ def get_grades(
     -------
     Pandas DataFrame with columns matching the model definition / CSV file.
     """
+    consolidated = _read_consolidated(
+        base_directory,
+        Resources.GRADES,
+        read_grades_file,
+        {Partitions.SECTION: [str(section_id)]},
+        nrows,
+    )
+    if consolidated is not None:
+        return consolidated
+
     file = fr.get_grades_file(base_directory, section_id)
 
     if file is None:
@@ -638,7 +866,11 @@ def get_grades(
     return read_grades_file(file, nrows)
 
 
-def read_grades_file(full_path: str, nrows: Optional[int] = None) -> pd.DataFrame:
+def read_grades_file(
+    full_path: str,
+    nrows: Optional[int] = None,
+    partition: Dict[str, List[str]] = dict(),
+) -> pd.DataFrame:
     """
     Reads the CSV file for the given path into a Pandas DataFrame.
 
@@ -649,12 +881,15 @@ def read_grades_file(full_path: str, nrows: Optional[int] = None) -> pd.DataFram
     nrows: int or None
         (Optional) number of rows to read from the file - useful for testing
         without reading the entirety of a large file.
+    partition: dictionary (optional)
+        For a file in the consolidated layout, the partition column values of
+        the rows to read, e.g. {"section": ["123"]}.
 
     Returns
     -------
     Pandas DataFrame with columns matching the model definition / CSV file.
     """
-    return _read_csv(full_path, nrows)
+    return _read_csv(full_path, nrows, partition=partition)
 
 
 def get_all_grades(
@@ -678,7 +913,14 @@ def get_all_grades(
     -------
     Pandas DataFrame with columns matching the model definition / CSV file.
     """
-    return _get_data_for_section(base_directory, sections, get_grades, nrows)
+    return _get_data_for_section(
+        base_directory,
+        sections,
+        Resources.GRADES,
+        read_grades_file,
+        get_grades,
+        nrows,
+    )
 
 
 def get_attendance_events(
@@ -702,6 +944,16 @@ def get_attendance_events(
     -------
     Pandas DataFrame with columns matching the model definition / CSV file.
     """
+    consolidated = _read_consolidated(
+        base_directory,
+        Resources.ATTENDANCE_EVENTS,
+        read_attendance_events_file,
+        {Partitions.SECTION: [str(section_id)]},
+        nrows,
+    )
+    if consolidated is not None:
+        return consolidated
+
     file = fr.get_attendance_events_file(base_directory, section_id)
 
     if file is None:
@@ -711,7 +963,9 @@ def get_attendance_events(
 
 
 def read_attendance_events_file(
-    full_path: str, nrows: Optional[int] = None
+    full_path: str,
+    nrows: Optional[int] = None,
+    partition: Dict[str, List[str]] = dict(),
 ) -> pd.DataFrame:
     """
     Reads the CSV file for the given path into a Pandas DataFrame.
@@ -723,6 +977,9 @@ def read_attendance_events_file(
     nrows: int or None
         (Optional) number of rows to read from the file - useful for testing
         without reading the entirety of a large file.
+    partition: dictionary (optional)
+        For a file in the consolidated layout, the partition column values of
+        the rows to read, e.g. {"section": ["123"]}.
 
     Returns
     -------
@@ -737,7 +994,7 @@ def read_attendance_events_file(
 
     extra_date_columns = ["EventDate"]
 
-    return _read_csv(full_path, nrows, data_types, extra_date_columns)
+    return _read_csv(full_path, nrows, data_types, extra_date_columns, partition=partition)
 
 
 def get_all_attendance_events(
@@ -761,4 +1018,11 @@ def get_all_attendance_events(
     -------
     Pandas DataFrame with columns matching the model definition / CSV file.
     """
-    return _get_data_for_section(base_directory, sections, get_attendance_events, nrows)
+    return _get_data_for_section(
+        base_directory,
+        sections,
+        Resources.ATTENDANCE_EVENTS,
+        read_attendance_events_file,
+        get_attendance_events,
+        nrows,
+    )
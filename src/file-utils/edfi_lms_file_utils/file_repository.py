@@ -3,12 +3,14 @@
 # The Ed-Fi Alliance licenses this file to you under the Apache License, Version 2.0.
 # See the LICENSE and NOTICES files in the project root for more information.
 
+import json
 import os
-from typing import Callable, List, Optional
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
 from dataclasses import dataclass
 
 
 import edfi_lms_file_utils.directory_repository as dr
+from edfi_lms_file_utils.constants import Partitions
 
 
 @dataclass
@@ -20,7 +22,8 @@ class FileInfo:
     def has_contents(self) -> bool:
         """
         Determines if a file has contents beyond a couple of line breaks; this situation occurs when
-        `pandas.DataFrame.to_csv` writes a file with value "\n\n" for an empty DataFrame.
+        `pandas.DataFrame.to_csv` writes a file with value "\n\n" for an empty DataFrame. Compressed
+        CSV and Parquet files for an empty DataFrame are written with no contents at all.
 
             Returns
             ---------
@@ -29,16 +32,37 @@ class FileInfo:
         return self.size > 4
 
 
+# The extensions of the files written by the extractors, most preferred first.
+# When an extract was written in more than one format, only the preferred file is used.
+FILE_EXTENSIONS = [".parquet", ".csv.zst", ".csv.gz", ".csv"]
+
+# The extension given to the path of a section which a run manifest recorded as
+# having no records for a resource, in place of an empty file
+EMPTY_PARTITION_EXTENSION = ".empty"
+
+
+def _split_extension(name: str) -> Tuple[str, Optional[str]]:
+    for extension in FILE_EXTENSIONS:
+        if name.endswith(extension):
+            return name[: -len(extension)], extension
+    return name, None
+
+
 def _scan_files(directory: str) -> List[FileInfo]:
     if not os.path.exists(directory):
         return []
 
-    files = [
-        FileInfo(f.path, str(f.name), int(str(f.stat().st_size)))
-        for f in os.scandir(directory)
-        if f.name.endswith(".csv")
-    ]
-    return sorted(files, key=lambda x: x.name, reverse=False)
+    preferred: Dict[str, Tuple[int, FileInfo]] = {}
+    for f in os.scandir(directory):
+        (stem, extension) = _split_extension(str(f.name))
+        if extension is None:
+            continue
+
+        rank = FILE_EXTENSIONS.index(extension)
+        if stem not in preferred or rank < preferred[stem][0]:
+            preferred[stem] = (rank, FileInfo(f.path, str(f.name), int(str(f.stat().st_size))))
+
+    return [preferred[stem][1] for stem in sorted(preferred)]
 
 
 def _get_newest_file(directory: str) -> Optional[str]:
@@ -57,6 +81,262 @@ def _get_file_paths(directory: str) -> List[str]:
     return [f.path for f in files if f.has_contents()]
 
 
+def _get_newest_files(directory: str) -> List[str]:
+    # shards of one write share the timestamp before the first dot, e.g.
+    # 2021-01-02-03-04-05.part-0001.csv
+    files = [f for f in _scan_files(directory) if f.has_contents()]
+    if len(files) == 0:
+        return []
+
+    newest = files[-1].name.split(".")[0]
+    return [f.path for f in files if f.name.split(".")[0] == newest]
+
+
+def get_consolidated_files(base_directory: str, resource: str) -> List[str]:
+    """
+    Gets the files of the newest write of a resource in the consolidated layout,
+    which is one file unless it was sharded.
+
+    Parameters
+    ----------
+    base_directory: str
+        The base / parent directory for LMS extractor files.
+    resource: str
+        The resource directory name, e.g. Resources.GRADES.
+
+    Returns
+    -------
+    List[str]
+        The file paths, or an empty list when the resource has no consolidated files.
+    """
+    return _get_newest_files(dr.get_consolidated_directory(base_directory, resource))
+
+
+def get_consolidated_file_paths(base_directory: str, resource: str) -> List[str]:
+    """
+    Gets the paths of all of the files of a resource in the consolidated layout.
+
+    Parameters
+    ----------
+    base_directory: str
+        The base / parent directory for LMS extractor files.
+    resource: str
+        The resource directory name, e.g. Resources.GRADES.
+
+    Returns
+    -------
+    List[str]
+        The file paths, or an empty list when the resource has no consolidated files.
+    """
+    return _get_file_paths(dr.get_consolidated_directory(base_directory, resource))
+
+
+@dataclass
+class ManifestFile:
+    path: str
+    resource: str
+    partitions: Dict[str, str]
+    rows: int
+    size: int
+    sha256: str
+
+
+def _get_manifest_names(directory: str) -> List[str]:
+    if not os.path.exists(directory):
+        return []
+
+    # named by the run date and a random suffix, so sort oldest run first
+    return sorted(name for name in os.listdir(directory) if name.endswith(".json"))
+
+
+def get_manifest_files(
+    base_directory: str, include_empty_partitions: bool = False
+) -> Optional[List[ManifestFile]]:
+    """
+    Gets the files listed by the run manifests of the extractors, oldest run first.
+    A manifest is only written once its run has finished writing, so every file
+    listed is complete. Deleted record files are not included, and when a file was
+    written in more than one format, only the preferred file is included.
+
+    Parameters
+    ----------
+    base_directory: str
+        The base / parent directory for LMS extractor files.
+    include_empty_partitions: bool
+        Whether to include the sections which a run recorded as having no records
+        for a resource, in place of writing an empty file. Each is included as a
+        file without records, at the path the empty file would have had but with
+        the EMPTY_PARTITION_EXTENSION. No such file exists.
+
+    Returns
+    -------
+    Optional[List[ManifestFile]]
+        The files, with full paths, or None when there are no run manifests.
+    """
+    directory = dr.get_manifests_directory(base_directory)
+    manifest_names = _get_manifest_names(directory)
+    if len(manifest_names) == 0:
+        return None
+
+    def _full_path(path: str) -> str:
+        return os.path.join(base_directory, *path.split("/"))
+
+    preferred: Dict[str, Tuple[int, ManifestFile]] = {}
+    for manifest_name in manifest_names:
+        with open(os.path.join(directory, manifest_name)) as manifest_file:
+            manifest = json.load(manifest_file)
+
+        for entry in manifest["files"]:
+            (stem, extension) = _split_extension(entry["path"])
+            if extension is None:
+                continue
+
+            rank = FILE_EXTENSIONS.index(extension)
+            if stem not in preferred or rank < preferred[stem][0]:
+                preferred[stem] = (
+                    rank,
+                    ManifestFile(
+                        _full_path(entry["path"]),
+                        entry["resource"],
+                        entry["partitions"],
+                        entry["rows"],
+                        entry["size"],
+                        entry["sha256"],
+                    ),
+                )
+
+        if not include_empty_partitions:
+            continue
+
+        for empty_partition in manifest.get("empty_partitions", []):
+            preferred[empty_partition["path"]] = (
+                len(FILE_EXTENSIONS),
+                ManifestFile(
+                    _full_path(empty_partition["path"] + EMPTY_PARTITION_EXTENSION),
+                    empty_partition["resource"],
+                    empty_partition["partitions"],
+                    0,
+                    0,
+                    "",
+                ),
+            )
+
+    return [file for (_, file) in preferred.values()]
+
+
+def get_empty_partition_section(path: str) -> Optional[str]:
+    """
+    Gets the section id of a path from get_manifest_file_paths which is a section
+    that had no records, rather than a file.
+
+    Parameters
+    ----------
+    path: str
+        The path.
+
+    Returns
+    -------
+    Optional[str]
+        The section id, or None when the path is a file.
+    """
+    if not path.endswith(EMPTY_PARTITION_EXTENSION):
+        return None
+
+    for directory in reversed(os.path.normpath(path).split(os.sep)):
+        (name, equals, value) = directory.partition("=")
+        if equals and name == Partitions.SECTION:
+            return value
+    return None
+
+
+def get_manifest_file_paths(
+    base_directory: str,
+    resource: str,
+    partitions: Optional[Iterable[Tuple[Any, ...]]] = None,
+    include_empty_partitions: bool = False,
+) -> Optional[List[str]]:
+    """
+    Gets the paths of the files of a resource with records, from the run manifests,
+    without scanning the resource directories.
+
+    Parameters
+    ----------
+    base_directory: str
+        The base / parent directory for LMS extractor files.
+    resource: str
+        The resource directory name, e.g. Resources.GRADES.
+    partitions: Optional[Iterable[Tuple[Any, ...]]]
+        The partitions to include, as (section id,) or (section id, assignment id)
+        tuples, or None for all. Files of the consolidated layout hold every
+        partition and are always included.
+    include_empty_partitions: bool
+        Whether to include the paths of sections which had no records, which sort
+        among the files of the section by date. See get_empty_partition_section.
+
+    Returns
+    -------
+    Optional[List[str]]
+        The file paths, or None when there are no run manifests.
+    """
+    files = get_manifest_files(base_directory, include_empty_partitions)
+    if files is None:
+        return None
+
+    included: Optional[Set[Tuple[str, ...]]] = None
+    if partitions is not None:
+        included = {tuple(str(id) for id in partition) for partition in partitions}
+
+    def _is_included(file: ManifestFile) -> bool:
+        partition = tuple(
+            file.partitions[column]
+            for column in Partitions.COLUMNS
+            if column in file.partitions
+        )
+        return included is None or len(partition) == 0 or partition in included
+
+    return [
+        file.path
+        for file in files
+        if file.resource == resource
+        and (file.rows > 0 or get_empty_partition_section(file.path) is not None)
+        and _is_included(file)
+    ]
+
+
+def get_paths_written_before_manifests(
+    base_directory: str, file_paths: List[str]
+) -> List[str]:
+    """
+    Filters scanned file paths down to the files written before the first run
+    manifest, which no manifest lists. These are files written by extractors from
+    before the run manifests, which may not have been loaded yet. The files are
+    compared by the run date they are named by, which is earlier than the run date
+    of the first manifest.
+
+    Parameters
+    ----------
+    base_directory: str
+        The base / parent directory for LMS extractor files.
+    file_paths: List[str]
+        The scanned file paths, e.g. from get_users_file_paths.
+
+    Returns
+    -------
+    List[str]
+        The file paths written before the first run manifest, or every file path
+        when there are no run manifests.
+    """
+    manifest_names = _get_manifest_names(dr.get_manifests_directory(base_directory))
+    if len(manifest_names) == 0:
+        return file_paths
+
+    # e.g. 2021-01-02-03-04-05, as the files are named
+    cutover = manifest_names[0][: len("YYYY-mm-dd-HH-MM-SS")]
+    return [
+        path for path in file_paths if os.path.basename(path).split(".")[0] < cutover
+    ]
+
+
 def get_users_file(base_directory: str) -> Optional[str]:
     directory = dr.get_users_directory(base_directory)
     if directory is None:
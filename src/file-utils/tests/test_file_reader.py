@@ -357,3 +357,113 @@ def describe_when_reading_files_from_path():
             for count in range(len(methods_to_test)):
                 methods_to_test[count]("")
             assert mock_read_csv.call_count == len(methods_to_test)
+
+
+def describe_when_reading_a_parquet_file():
+    @pytest.fixture
+    def result(mocker) -> pd.DataFrame:
+        mocker.patch(
+            "pandas.read_parquet",
+            return_value=pd.DataFrame(
+                {
+                    "SourceSystemIdentifier": [1, 2, 3],
+                    "CreateDate": pd.to_datetime(["2021-03-01"] * 3),
+                    "DueDateTime": ["2021-03-02 10:00:00"] * 3,
+                }
+            ),
+        )
+        return _read_csv(
+            "base_dir/sections/2020-11-19-04-05-06.parquet",
+            nrows=2,
+            extra_date_columns=["DueDateTime"],
+        )
+
+    def it_should_read_the_requested_rows(result: pd.DataFrame):
+        assert len(result) == 2
+
+    def it_should_apply_the_data_types(result: pd.DataFrame):
+        assert result["SourceSystemIdentifier"].dtype == "string"
+
+    def it_should_convert_extra_date_columns(result: pd.DataFrame):
+        assert pd.api.types.is_datetime64_any_dtype(result["DueDateTime"])
+        assert pd.api.types.is_datetime64_any_dtype(result["CreateDate"])
+
+
+def describe_when_reading_a_compressed_csv_file():
+    @pytest.fixture
+    def mock_pandas_read_csv(mocker) -> Mock:
+        return mocker.patch("pandas.read_csv", return_value=pd.DataFrame())
+
+    def it_should_infer_gzip_compression(mock_pandas_read_csv: Mock):
+        _read_csv("base_dir/sections/2020-11-19-04-05-06.csv.gz")
+        assert mock_pandas_read_csv.call_args[1]["compression"] == "infer"
+
+    def it_should_read_zstd_compression(mock_pandas_read_csv: Mock):
+        _read_csv("base_dir/sections/2020-11-19-04-05-06.csv.zst")
+        assert mock_pandas_read_csv.call_args[1]["compression"] == "zstd"
+
+
+def describe_when_reading_the_consolidated_layout():
+    GRADES_SHARD_1 = "base_dir/grades/2020-11-19-04-05-06.part-0001.csv"
+    GRADES_SHARD_2 = "base_dir/grades/2020-11-19-04-05-06.part-0002.csv"
+
+    @pytest.fixture(autouse=True)
+    def consolidated_files(mocker):
+        mocker.patch(
+            "edfi_lms_file_utils.file_repository.get_consolidated_files",
+            lambda _, resource: [GRADES_SHARD_1, GRADES_SHARD_2]
+            if resource == GRADES
+            else [],
+        )
+        shards = {
+            GRADES_SHARD_1: pd.DataFrame(
+                {"SourceSystemIdentifier": ["a", "b"], "section": ["1", "2"]}
+            ),
+            GRADES_SHARD_2: pd.DataFrame(
+                {"SourceSystemIdentifier": ["c"], "section": ["3"]}
+            ),
+        }
+        mocker.patch(
+            "pandas.read_csv",
+            side_effect=lambda file, nrows=None, **_: shards[file]
+            if nrows is None
+            else shards[file].head(nrows),
+        )
+
+    def describe_when_getting_all_grades():
+        def it_should_read_the_given_sections_from_every_shard():
+            df = get_all_grades(
+                BASE_DIRECTORY, pd.DataFrame({"SourceSystemIdentifier": ["1", "3"]})
+            )
+
+            assert df["SourceSystemIdentifier"].tolist() == ["a", "c"]
+
+        def it_should_remove_the_partition_columns():
+            df = get_all_grades(
+                BASE_DIRECTORY, pd.DataFrame({"SourceSystemIdentifier": ["1"]})
+            )
+
+            assert df.columns.tolist() == ["SourceSystemIdentifier"]
+
+        def it_should_limit_the_rows_after_keeping_the_given_sections():
+            df = get_all_grades(
+                BASE_DIRECTORY, pd.DataFrame({"SourceSystemIdentifier": ["2"]}), nrows=1
+            )
+
+            assert df["SourceSystemIdentifier"].tolist() == ["b"]
+
+        def it_should_limit_the_rows_across_shards():
+            df = get_all_grades(
+                BASE_DIRECTORY,
+                pd.DataFrame({"SourceSystemIdentifier": ["1", "2", "3"]}),
+                nrows=2,
+            )
+
+            assert df["SourceSystemIdentifier"].tolist() == ["a", "b"]
+
+    def describe_when_reading_a_consolidated_file():
+        def it_should_remove_the_partition_columns():
+            df = read_grades_file(GRADES_SHARD_1)
+
+            assert df.columns.tolist() == ["SourceSystemIdentifier"]
+            assert len(df) == 2
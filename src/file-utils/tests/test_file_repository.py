@@ -3,6 +3,7 @@
 # The Ed-Fi Alliance licenses this file to you under the Apache License, Version 2.0.
 # See the LICENSE and NOTICES files in the project root for more information.
 
+import json
 
 import pytest
 
@@ -19,6 +20,11 @@ from edfi_lms_file_utils.file_repository import (
     get_submissions_file,
     get_system_activities_files,
     _get_newest_file,
+    get_consolidated_files,
+    get_consolidated_file_paths,
+    get_empty_partition_section,
+    get_manifest_file_paths,
+    get_paths_written_before_manifests,
 )
 from .constants import BASE_DIRECTORY
 
@@ -451,3 +457,200 @@ def describe_when_getting_file_paths():
         def it_returns_the_valid_paths(init_fs):
             result = _get_file_paths(f"{BASE_DIRECTORY}/sections")
             assert len(result) == 2
+
+
+def describe_when_scanning_files_written_in_more_than_one_format():
+    csv = f"{BASE_DIRECTORY}/sections/2020-11-19-04-05-06.csv"
+    parquet = f"{BASE_DIRECTORY}/sections/2020-11-19-04-05-06.parquet"
+    older_csv = f"{BASE_DIRECTORY}/sections/2020-11-18-04-05-06.csv"
+    other = f"{BASE_DIRECTORY}/sections/2020-11-20-04-05-06.txt"
+
+    @pytest.fixture
+    def init_fs(init_fs, fs):
+        fs.create_dir(f"{BASE_DIRECTORY}/sections")
+        fs.create_file(csv, contents="content\n\n")
+        fs.create_file(parquet, contents="parquet content")
+        fs.create_file(older_csv, contents="content\n\n")
+        fs.create_file(other, contents="content\n\n")
+
+    def it_should_prefer_the_parquet_file(init_fs):
+        assert _get_file_paths(f"{BASE_DIRECTORY}/sections") == [older_csv, parquet]
+
+    def it_should_return_the_newest_parquet_file(init_fs):
+        assert _get_newest_file(f"{BASE_DIRECTORY}/sections") == parquet
+
+
+def describe_when_scanning_compressed_csv_files():
+    gzip = f"{BASE_DIRECTORY}/sections/2020-11-18-04-05-06.csv.gz"
+    zstd = f"{BASE_DIRECTORY}/sections/2020-11-19-04-05-06.csv.zst"
+    empty_gzip = f"{BASE_DIRECTORY}/sections/2020-11-20-04-05-06.csv.gz"
+
+    @pytest.fixture
+    def init_fs(init_fs, fs):
+        fs.create_dir(f"{BASE_DIRECTORY}/sections")
+        fs.create_file(gzip, contents="compressed content")
+        fs.create_file(zstd, contents="compressed content")
+        fs.create_file(empty_gzip, contents="")
+
+    def it_should_return_the_compressed_files_with_contents(init_fs):
+        assert _get_file_paths(f"{BASE_DIRECTORY}/sections") == [gzip, zstd]
+
+    def it_should_return_the_newest_compressed_file_with_contents(init_fs):
+        assert _get_newest_file(f"{BASE_DIRECTORY}/sections") == zstd
+
+
+def describe_when_scanning_the_consolidated_layout():
+    older = f"{BASE_DIRECTORY}/grades/2020-11-18-04-05-06.csv"
+    shard_1 = f"{BASE_DIRECTORY}/grades/2020-11-19-04-05-06.part-0001.csv"
+    shard_2 = f"{BASE_DIRECTORY}/grades/2020-11-19-04-05-06.part-0002.csv"
+    empty = f"{BASE_DIRECTORY}/grades/2020-11-20-04-05-06.csv"
+
+    @pytest.fixture
+    def init_fs(init_fs, fs):
+        fs.create_dir(f"{BASE_DIRECTORY}/grades")
+        fs.create_file(older, contents="content\n\n")
+        fs.create_file(shard_1, contents="content\n\n")
+        fs.create_file(shard_2, contents="content\n\n")
+        fs.create_file(empty, contents="\n\n")
+
+    def it_should_return_every_shard_of_the_newest_write(init_fs):
+        assert get_consolidated_files(BASE_DIRECTORY, "grades") == [shard_1, shard_2]
+
+    def it_should_return_all_of_the_files_with_contents(init_fs):
+        assert get_consolidated_file_paths(BASE_DIRECTORY, "grades") == [
+            older,
+            shard_1,
+            shard_2,
+        ]
+
+    def describe_given_a_resource_without_consolidated_files():
+        def it_should_return_an_empty_list(init_fs):
+            assert get_consolidated_files(BASE_DIRECTORY, "assignments") == []
+
+
+def _manifest_entry(path: str, rows: int = 1) -> dict:
+    partitions = dict(
+        directory.split("=") for directory in path.split("/")[:-1] if "=" in directory
+    )
+    resource = [directory for directory in path.split("/")[:-1] if "=" not in directory][0]
+    return {
+        "path": path,
+        "resource": resource,
+        "partitions": partitions,
+        "rows": rows,
+        "size": 10,
+        "sha256": "",
+    }
+
+
+def describe_when_planning_from_run_manifests():
+    @pytest.fixture
+    def init_fs(init_fs, fs):
+        fs.create_file(
+            f"{BASE_DIRECTORY}/manifests/2020-11-18-04-05-06.json",
+            contents=json.dumps(
+                {
+                    "files": [
+                        _manifest_entry("section=1/grades/2020-11-18-04-05-06.csv"),
+                        _manifest_entry("section=2/grades/2020-11-18-04-05-06.csv"),
+                        _manifest_entry("section=3/grades/2020-11-18-04-05-06.csv", rows=0),
+                        _manifest_entry("users/2020-11-18-04-05-06.csv"),
+                    ]
+                }
+            ),
+        )
+        fs.create_file(
+            f"{BASE_DIRECTORY}/manifests/2020-11-19-04-05-06.json",
+            contents=json.dumps(
+                {
+                    "files": [
+                        _manifest_entry("section=1/grades/2020-11-19-04-05-06.csv"),
+                        _manifest_entry("section=1/grades/2020-11-19-04-05-06.parquet"),
+                        _manifest_entry("grades/2020-11-19-04-05-06.part-0001.csv"),
+                    ]
+                }
+            ),
+        )
+        fs.create_file(
+            f"{BASE_DIRECTORY}/manifests/2020-11-19-05-05-06.json",
+            contents=json.dumps(
+                {
+                    "files": [],
+                    "empty_partitions": [
+                        {
+                            "path": "section=2/grades/2020-11-19-05-05-06",
+                            "resource": "grades",
+                            "partitions": {"section": "2"},
+                        }
+                    ],
+                }
+            ),
+        )
+        # not yet renamed, so not a manifest
+        fs.create_file(f"{BASE_DIRECTORY}/manifests/2020-11-20-04-05-06.json.tmp")
+
+    def it_should_list_the_files_of_the_resource_with_records(init_fs):
+        assert get_manifest_file_paths(BASE_DIRECTORY, "grades") == [
+            f"{BASE_DIRECTORY}/section=1/grades/2020-11-18-04-05-06.csv",
+            f"{BASE_DIRECTORY}/section=2/grades/2020-11-18-04-05-06.csv",
+            f"{BASE_DIRECTORY}/section=1/grades/2020-11-19-04-05-06.parquet",
+            f"{BASE_DIRECTORY}/grades/2020-11-19-04-05-06.part-0001.csv",
+        ]
+
+    def it_should_list_the_empty_partitions_when_requested(init_fs):
+        paths = get_manifest_file_paths(BASE_DIRECTORY, "grades", [(2,)], True)
+
+        assert paths == [
+            f"{BASE_DIRECTORY}/section=2/grades/2020-11-18-04-05-06.csv",
+            f"{BASE_DIRECTORY}/grades/2020-11-19-04-05-06.part-0001.csv",
+            f"{BASE_DIRECTORY}/section=2/grades/2020-11-19-05-05-06.empty",
+        ]
+        assert [get_empty_partition_section(path) for path in paths] == [None, None, "2"]
+
+    def it_should_only_list_the_requested_partitions(init_fs):
+        assert get_manifest_file_paths(BASE_DIRECTORY, "grades", [(2,)]) == [
+            f"{BASE_DIRECTORY}/section=2/grades/2020-11-18-04-05-06.csv",
+            f"{BASE_DIRECTORY}/grades/2020-11-19-04-05-06.part-0001.csv",
+        ]
+
+
+def describe_when_planning_without_run_manifests():
+    @pytest.fixture
+    def init_fs(init_fs, fs):
+        fs.create_dir(f"{BASE_DIRECTORY}/sections")
+
+    def it_should_return_none(init_fs):
+        assert get_manifest_file_paths(BASE_DIRECTORY, "sections") is None
+
+
+def describe_when_finding_files_written_before_run_manifests():
+    FILE_PATHS = [
+        f"{BASE_DIRECTORY}/users/2020-11-17-04-05-06.csv",
+        f"{BASE_DIRECTORY}/users/2020-11-18-04-05-05.csv",
+        f"{BASE_DIRECTORY}/users/2020-11-18-04-05-06.csv",
+        f"{BASE_DIRECTORY}/users/2020-11-19-04-05-06.csv",
+        f"{BASE_DIRECTORY}/grades/2020-11-17-04-05-06.part-0001.csv",
+    ]
+
+    def describe_given_run_manifests():
+        @pytest.fixture
+        def init_fs(init_fs, fs):
+            fs.create_file(
+                f"{BASE_DIRECTORY}/manifests/2020-11-19-04-05-06-0a1b2c3d.json",
+                contents=json.dumps({"files": []}),
+            )
+            fs.create_file(
+                f"{BASE_DIRECTORY}/manifests/2020-11-18-04-05-06-1a2b3c4d.json",
+                contents=json.dumps({"files": []}),
+            )
+
+        def it_should_only_return_the_files_before_the_first_run(init_fs):
+            assert get_paths_written_before_manifests(BASE_DIRECTORY, FILE_PATHS) == [
+                f"{BASE_DIRECTORY}/users/2020-11-17-04-05-06.csv",
+                f"{BASE_DIRECTORY}/users/2020-11-18-04-05-05.csv",
+                f"{BASE_DIRECTORY}/grades/2020-11-17-04-05-06.part-0001.csv",
+            ]
+
+    def describe_given_no_run_manifests():
+        def it_should_return_every_file(init_fs):
+            assert get_paths_written_before_manifests(BASE_DIRECTORY, FILE_PATHS) == FILE_PATHS
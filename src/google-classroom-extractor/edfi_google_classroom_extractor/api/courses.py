@@ -6,9 +6,9 @@
 import logging
 from typing import List, Dict, Optional, cast
 from pandas import DataFrame, json_normalize
-import sqlalchemy
 from googleapiclient.discovery import Resource
 from edfi_google_classroom_extractor.api.api_caller import call_api, ResourceType
+from edfi_lms_extractor_lib.api.sync_store import SyncDb
 from edfi_lms_extractor_lib.api.resource_sync import (
     cleanup_after_sync,
     sync_to_db_without_cleanup,
@@ -87,7 +87,7 @@ def request_latest_courses_as_df(resource: Optional[Resource]) -> DataFrame:
 
 
 def request_all_courses_as_df(
-    resource: Optional[Resource], sync_db: sqlalchemy.engine.base.Engine
+    resource: Optional[Resource], sync_db: SyncDb
 ) -> DataFrame:
     """
     Fetch Course API data for all courses and return a Courses API DataFrame
@@ -96,8 +96,8 @@ def request_all_courses_as_df(
     ----------
     resource: Optional[Resource]
         a Google Classroom SDK Resource
-    sync_db: sqlalchemy.engine.base.Engine
-        an Engine instance for creating database connections
+    sync_db: SyncDb
+        the sync store, or an Engine instance for creating database connections
 
     Returns
     -------
@@ -138,7 +138,7 @@ def request_all_courses_as_df(
 
 
 def _sync_without_cleanup(
-    resource_df: DataFrame, sync_db: sqlalchemy.engine.base.Engine
+    resource_df: DataFrame, sync_db: SyncDb
 ) -> DataFrame:
     """
     Take fetched API data and sync with database. Creates tables when necessary,
@@ -149,8 +149,8 @@ def _sync_without_cleanup(
     resource_df: DataFrame
         a Courses API DataFrame with the current fetched data which
         will be mutated, adding Hash and CreateDate/LastModifiedDate
-    sync_db: sqlalchemy.engine.base.Engine
-        an Engine instance for creating database connections
+    sync_db: SyncDb
+        the sync store, or an Engine instance for creating database connections
 
     Returns
     -------
@@ -6,9 +6,9 @@
 import logging
 from typing import List, Dict, Optional, cast
 from pandas import DataFrame, json_normalize
-import sqlalchemy
 from googleapiclient.discovery import Resource
 from .api_caller import call_api, ResourceType
+from edfi_lms_extractor_lib.api.sync_store import SyncDb
 from edfi_lms_extractor_lib.api.resource_sync import (
     cleanup_after_sync,
     sync_to_db_without_cleanup,
@@ -130,7 +130,7 @@ def request_latest_coursework_as_df(
 def request_all_coursework_as_df(
     resource: Optional[Resource],
     course_ids: List[str],
-    sync_db: sqlalchemy.engine.base.Engine,
+    sync_db: SyncDb,
 ) -> DataFrame:
     """
     Fetch Coursework API data for all courses and return a Coursework API DataFrame
@@ -141,8 +141,8 @@ def request_all_coursework_as_df(
         a Google Classroom SDK Resource
     course_ids: List[str]
         a list of course ids to retrieve coursework for
-    sync_db: sqlalchemy.engine.base.Engine
-        an Engine instance for creating database connections
+    sync_db: SyncDb
+        the sync store, or an Engine instance for creating database connections
 
     Returns
     -------
@@ -185,7 +185,7 @@ def request_all_coursework_as_df(
 
 
 def _sync_without_cleanup(
-    resource_df: DataFrame, sync_db: sqlalchemy.engine.base.Engine
+    resource_df: DataFrame, sync_db: SyncDb
 ) -> DataFrame:
     """
     Take fetched API data and sync with database. Creates tables when necessary,
@@ -196,8 +196,8 @@ def _sync_without_cleanup(
     resource_df: DataFrame
         a courseworks API DataFrame with the current fetched data which
         will be mutated, adding Hash and CreateDate/LastModifiedDate
-    sync_db: sqlalchemy.engine.base.Engine
-        an Engine instance for creating database connections
+    sync_db: SyncDb
+        the sync store, or an Engine instance for creating database connections
 
 
     Returns
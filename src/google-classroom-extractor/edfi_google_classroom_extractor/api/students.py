@@ -6,9 +6,9 @@
 import logging
 from typing import List, Dict, Optional, cast
 from pandas import DataFrame, json_normalize
-import sqlalchemy
 from googleapiclient.discovery import Resource
 from edfi_google_classroom_extractor.api.api_caller import call_api, ResourceType
+from edfi_lms_extractor_lib.api.sync_store import SyncDb
 from edfi_lms_extractor_lib.api.resource_sync import (
     cleanup_after_sync,
     sync_to_db_without_cleanup,
@@ -90,7 +90,7 @@ def request_latest_students_as_df(
 def request_all_students_as_df(
     resource: Optional[Resource],
     course_ids: List[str],
-    sync_db: sqlalchemy.engine.base.Engine,
+    sync_db: SyncDb,
 ) -> DataFrame:
     """
     Fetch Students API data for a range of courses and return a Students API DataFrame
@@ -102,8 +102,8 @@ def request_all_students_as_df(
         a Google Classroom SDK Resource or None
     course_ids: List[str]
         a list of Google Classroom course ids as a string array
-    sync_db: sqlalchemy.engine.base.Engine
-        an Engine instance for creating database connections
+    sync_db: SyncDb
+        the sync store, or an Engine instance for creating database connections
 
     Returns
     -------
@@ -130,7 +130,7 @@ def request_all_students_as_df(
 
 
 def _sync_without_cleanup(
-    resource_df: DataFrame, sync_db: sqlalchemy.engine.base.Engine
+    resource_df: DataFrame, sync_db: SyncDb
 ) -> DataFrame:
     """
     Take fetched API data and sync with database. Creates tables when necessary,
@@ -141,8 +141,8 @@ def _sync_without_cleanup(
     resource_df: DataFrame
         a Students API DataFrame with the current fetched data which
         will be mutated, adding Hash and CreateDate/LastModifiedDate
-    sync_db: sqlalchemy.engine.base.Engine
-        an Engine instance for creating database connections
+    sync_db: SyncDb
+        the sync store, or an Engine instance for creating database connections
 
     Returns
     -------
@@ -6,9 +6,9 @@
 import logging
 from typing import List, Dict, Optional, cast
 from pandas import DataFrame, json_normalize
-import sqlalchemy
 from googleapiclient.discovery import Resource
 from .api_caller import call_api, ResourceType
+from edfi_lms_extractor_lib.api.sync_store import SyncDb
 from edfi_lms_extractor_lib.api.resource_sync import (
     cleanup_after_sync,
     sync_to_db_without_cleanup,
@@ -123,7 +123,7 @@ def request_latest_submissions_as_df(
 def request_all_submissions_as_df(
     resource: Optional[Resource],
     course_ids: List[str],
-    sync_db: sqlalchemy.engine.base.Engine,
+    sync_db: SyncDb,
 ) -> DataFrame:
     """
     Fetch StudentSubmissions API data for the given coursework
@@ -177,7 +177,7 @@ def request_all_submissions_as_df(
 
 
 def _sync_without_cleanup(
-    resource_df: DataFrame, sync_db: sqlalchemy.engine.base.Engine
+    resource_df: DataFrame, sync_db: SyncDb
 ) -> DataFrame:
     """
     Take fetched API data and sync with database. Creates tables when necessary,
@@ -188,8 +188,8 @@ def _sync_without_cleanup(
     resource_df: DataFrame
         a courseworks API DataFrame with the current fetched data which
         will be mutated, adding Hash and CreateDate/LastModifiedDate
-    sync_db: sqlalchemy.engine.base.Engine
-        an Engine instance for creating database connections
+    sync_db: SyncDb
+        the sync store, or an Engine instance for creating database connections
 
     Returns
     -------
@@ -7,8 +7,8 @@ import logging
 import os
 
 from google.oauth2 import service_account
-from sqlalchemy import create_engine
-import sqlalchemy
+from edfi_lms_extractor_lib.api import sync_store
+from edfi_lms_extractor_lib.api.sync_store import SYNC_STORES, SyncStore
 
 
 logger = logging.getLogger(__name__)
@@ -27,20 +27,20 @@ def _is_running_in_notebook() -> bool:
     return not hasattr(main, "__file__")
 
 
-def get_sync_db_engine(sync_database_directory: str) -> sqlalchemy.engine.base.Engine:
+def get_sync_store(
+    sync_database_directory: str, store: str = SYNC_STORES.SQLITE
+) -> SyncStore:
     """
-    Create a SQL Alchemy Engine for a SQLite file
+    Create the sync store, one of SYNC_STORES, in the sync database directory
 
     Returns
     -------
-    sqlalchemy.engine.base.Engine
-        a SQL Alchemy Engine
+    SyncStore
+        the sync store
     """
     running_in_notebook: bool = _is_running_in_notebook()
     logger.debug("Running in Jupyter Notebook: %s", running_in_notebook)
-    logger.debug("Ensuring database directory at %s", os.path.abspath(sync_database_directory))
-    os.makedirs(sync_database_directory, exist_ok=True)
-    return create_engine(f"sqlite:///{sync_database_directory}/sync.sqlite")
+    return sync_store.get_sync_store(sync_database_directory, store)
 
 
 def get_credentials(classroom_account: str) -> service_account.Credentials:
@@ -11,7 +11,6 @@ import sys
 from googleapiclient.discovery import build, Resource
 from google.oauth2 import service_account
 from pandas import DataFrame
-import sqlalchemy
 
 
 from edfi_google_classroom_extractor.api.courses import request_all_courses_as_df
@@ -22,22 +21,27 @@ from edfi_google_classroom_extractor.api.submissions import (
     request_all_submissions_as_df,
 )
 from edfi_google_classroom_extractor.helpers.arg_parser import MainArguments
-from edfi_google_classroom_extractor.config import get_credentials, get_sync_db_engine
+from edfi_google_classroom_extractor.config import get_credentials, get_sync_store
 from edfi_google_classroom_extractor.mapping.users import (
     students_and_teachers_to_users_df,
 )
 from edfi_google_classroom_extractor.mapping.user_section_associations import (
-    students_and_teachers_to_user_section_associations_dfs,
+    students_and_teachers_to_user_section_associations_by_section,
 )
 from edfi_google_classroom_extractor.mapping.sections import courses_to_sections_df
 from edfi_google_classroom_extractor.mapping.assignments import (
-    coursework_to_assignments_dfs,
+    coursework_to_assignments_by_section,
 )
 from edfi_google_classroom_extractor.mapping.assignment_submissions import (
-    submissions_to_assignment_submissions_dfs,
+    submissions_to_assignment_submissions_by_section,
 )
 from edfi_google_classroom_extractor.mapping.user_submission_activities import (
-    submissions_to_user_submission_activities_dfs,
+    submissions_to_user_submission_activities_by_section,
+)
+from edfi_lms_extractor_lib.api.sync_store import SyncDb
+from edfi_lms_extractor_lib.csv_generation.manifest import (
+    finish_run_manifest,
+    start_run_manifest,
 )
 from edfi_lms_extractor_lib.csv_generation.write import (
     write_grades,
@@ -48,6 +52,17 @@ from edfi_lms_extractor_lib.csv_generation.write import (
     write_assignments,
     write_assignment_submissions,
     write_system_activities,
+    set_csv_compression,
+    set_output_format,
+    set_output_layout,
+    set_skip_unchanged_files,
+)
+from edfi_lms_extractor_lib.api.resource_sync import set_hash_workers
+from edfi_lms_extractor_lib.api.sync_payload import set_payload_mode
+from edfi_lms_extractor_lib.api.sync_metrics import (
+    SyncRunSummary,
+    add_sync_metrics_listener,
+    remove_sync_metrics_listener,
 )
 from edfi_lms_extractor_lib.helpers.decorators import catch_exceptions
 
@@ -69,7 +84,7 @@ def _break_execution(failing_extraction: str) -> None:
 @catch_exceptions
 def _get_courses(
     classroom_resource: Resource,
-    sync_db: sqlalchemy.engine.base.Engine,
+    sync_db: SyncDb,
     output_directory: str,
 ):
     courses_df: DataFrame = request_all_courses_as_df(classroom_resource, sync_db)
@@ -88,7 +103,7 @@ def _get_courses(
 @catch_exceptions
 def _get_users(
     classroom_resource: Resource,
-    sync_db: sqlalchemy.engine.base.Engine,
+    sync_db: SyncDb,
     output_directory: str,
 ):
     course_ids: List[str] = result_bucket["course_ids"]
@@ -115,7 +130,7 @@ def _get_section_associations(classroom_resource: Resource, output_directory: st
     all_section_ids = result_bucket["section_ids"]
 
     write_section_associations(
-        students_and_teachers_to_user_section_associations_dfs(
+        students_and_teachers_to_user_section_associations_by_section(
             students_df, teachers_df
         ),
         all_section_ids,
@@ -127,7 +142,7 @@ def _get_section_associations(classroom_resource: Resource, output_directory: st
 @catch_exceptions
 def _get_assignments(
     classroom_resource: Resource,
-    sync_db: sqlalchemy.engine.base.Engine,
+    sync_db: SyncDb,
     output_directory: str,
 ):
     logger.info("Writing LMS UDM Assignments to CSV files")
@@ -139,7 +154,7 @@ def _get_assignments(
     )
 
     write_assignments(
-        coursework_to_assignments_dfs(courseworks_df),
+        coursework_to_assignments_by_section(courseworks_df),
         all_section_ids,
         now,
         output_directory,
@@ -149,7 +164,7 @@ def _get_assignments(
 @catch_exceptions
 def _get_assignment_submissions(
     classroom_resource: Resource,
-    sync_db: sqlalchemy.engine.base.Engine,
+    sync_db: SyncDb,
     output_directory: str,
 ):
     logger.info("Writing LMS UDM AssignmentSubmissions to CSV files")
@@ -161,7 +176,7 @@ def _get_assignment_submissions(
     result_bucket["submissions_df"] = submissions_df
 
     write_assignment_submissions(
-        submissions_to_assignment_submissions_dfs(submissions_df),
+        submissions_to_assignment_submissions_by_section(submissions_df),
         now,
         output_directory,
     )
@@ -174,7 +189,7 @@ def _get_section_activities(output_directory: str):
     submissions_df: DataFrame = result_bucket["submissions_df"]
     all_section_ids = result_bucket["section_ids"]
     write_section_activities(
-        submissions_to_user_submission_activities_dfs(submissions_df),
+        submissions_to_user_submission_activities_by_section(submissions_df),
         all_section_ids,
         now,
         output_directory,
@@ -207,15 +222,24 @@ def _get_grades(output_directory: str):
 
 def run(arguments: MainArguments):
     logger.info("Starting Ed-Fi LMS Google Classroom Extractor")
+    set_hash_workers(arguments.hash_workers)
+    set_output_format(arguments.output_format)
+    set_csv_compression(arguments.csv_compression)
+    set_skip_unchanged_files(arguments.skip_unchanged_files)
+    set_output_layout(arguments.output_layout, arguments.max_rows_per_file)
+    sync_summary = SyncRunSummary()
+    add_sync_metrics_listener(sync_summary)
+    start_run_manifest(arguments.output_directory)
     credentials: service_account.Credentials = get_credentials(
         arguments.classroom_account
     )
     classroom_resource: Resource = build(
         "classroom", "v1", credentials=credentials, cache_discovery=False
     )
-    sync_db: sqlalchemy.engine.base.Engine = get_sync_db_engine(
-        arguments.sync_database_directory
+    sync_db: SyncDb = get_sync_store(
+        arguments.sync_database_directory, arguments.sync_store
     )
+    set_payload_mode(sync_db, arguments.sync_payload_mode)
 
     succeeded: bool = False
 
@@ -249,4 +273,8 @@ def run(arguments: MainArguments):
     if arguments.extract_grades:
         _get_grades(arguments.output_directory)
 
+    finish_run_manifest()
+    remove_sync_metrics_listener(sync_summary)
+    sync_summary.log(logger)
+
     logger.info("Finishing Ed-Fi LMS Google Classroom Extractor")
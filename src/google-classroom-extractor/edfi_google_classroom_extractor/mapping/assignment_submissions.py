@@ -3,7 +3,7 @@
 # The Ed-Fi Alliance licenses this file to you under the Apache License, Version 2.0.
 # See the LICENSE and NOTICES files in the project root for more information.
 
-from typing import Dict, Tuple, Any
+from typing import Dict, Iterator, Tuple
 from pandas import DataFrame, Series, isna
 from edfi_google_classroom_extractor.mapping.constants import SOURCE_SYSTEM
 
@@ -63,11 +63,11 @@ def derive_state(submission_row: Series) -> str:
     return api_state
 
 
-def submissions_to_assignment_submissions_dfs(
+def submissions_to_assignment_submissions_by_section(
     submissions_df: DataFrame,
-) -> Dict[Tuple[str, str], DataFrame]:
+) -> Iterator[Tuple[Tuple[str, str], DataFrame]]:
     """
-    Convert a Submission API DataFrame to a Dict of AssignmentSubmission UDM DataFrames
+    Convert a Submission API DataFrame to AssignmentSubmission UDM DataFrames
     grouped by source system section id/assignment id tuple pairs
 
     Parameters
@@ -77,9 +77,9 @@ def submissions_to_assignment_submissions_dfs(
 
     Returns
     -------
-    Dict[Tuple[str, str], DataFrame]
+    Iterator[Tuple[Tuple[str, str], DataFrame]]
         LMS UDM AssignmentSubmission DataFrames grouped by
-            source system section id/assignment id tuple pairs
+            source system section id/assignment id tuple pairs, one group at a time
 
     Notes
     -----
@@ -149,22 +149,29 @@ def submissions_to_assignment_submissions_dfs(
 
     assignment_submissions_df["SourceSystem"] = SOURCE_SYSTEM
 
-    # group by section id and assignment id as a Dict of DataFrames
-    result: Dict[
-        Any, DataFrame
-    ] = dict(  # Any because Pylance doesn't believe Tuple[str, str]
-        tuple(
-            assignment_submissions_df.groupby(
-                [
-                    "SourceSystemSectionIdentifier",
-                    "AssignmentSourceSystemIdentifier",
-                ]
-            )
-        )
-    )
+    # group by section id and assignment id, one pair at a time
+    for key, grouped_df in assignment_submissions_df.groupby(
+        [
+            "SourceSystemSectionIdentifier",
+            "AssignmentSourceSystemIdentifier",
+        ]
+    ):
+        # no longer need group by column
+        yield (key, grouped_df.drop(columns=["SourceSystemSectionIdentifier"]))
 
-    # no longer need group by column
-    for grouped_df in result.values():
-        grouped_df.drop(columns=["SourceSystemSectionIdentifier"], inplace=True)
 
-    return result
+def submissions_to_assignment_submissions_dfs(
+    submissions_df: DataFrame,
+) -> Dict[Tuple[str, str], DataFrame]:
+    """
+    Convert a Submission API DataFrame to a Dict of AssignmentSubmission UDM DataFrames
+    grouped by source system section id/assignment id tuple pairs
+
+    See submissions_to_assignment_submissions_by_section for the parameters and columns.
+
+    Returns
+    -------
+    Dict[Tuple[str, str], DataFrame]
+        submissions_to_assignment_submissions_by_section results as a Dict
+    """
+    return dict(submissions_to_assignment_submissions_by_section(submissions_df))
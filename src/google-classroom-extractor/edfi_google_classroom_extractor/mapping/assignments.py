@@ -3,18 +3,18 @@
 # The Ed-Fi Alliance licenses this file to you under the Apache License, Version 2.0.
 # See the LICENSE and NOTICES files in the project root for more information.
 
-from typing import Dict
+from typing import Dict, Iterator, Tuple
 from datetime import datetime
 from pandas import DataFrame
 from edfi_google_classroom_extractor.mapping.constants import SOURCE_SYSTEM
 
 
-def coursework_to_assignments_dfs(
+def coursework_to_assignments_by_section(
     coursework_df: DataFrame,
-) -> Dict[str, DataFrame]:
+) -> Iterator[Tuple[str, DataFrame]]:
     """
-    Convert a Coursework API DataFrame to a Dict of Assignment UDM DataFrames
-    grouped by source system section id pairs
+    Convert a Coursework API DataFrame to Assignment UDM DataFrames
+    grouped by source system section id
 
     Parameters
     ----------
@@ -23,8 +23,9 @@ def coursework_to_assignments_dfs(
 
     Returns
     -------
-    Dict[str, DataFrame]
-        LMS UDM Assignment DataFrames grouped by source system section id
+    Iterator[Tuple[str, DataFrame]]
+        LMS UDM Assignment DataFrames grouped by source system section id,
+            one section at a time
 
     Notes
     -----
@@ -115,9 +116,22 @@ def coursework_to_assignments_dfs(
     assignments_df["SourceSystem"] = SOURCE_SYSTEM
     assignments_df["EndDateTime"] = ""  # No EndDateTime available from API
 
-    # group by section id as a Dict of DataFrames
-    result: Dict[str, DataFrame] = dict(
-        tuple(assignments_df.groupby(["LMSSectionSourceSystemIdentifier"]))
-    )
+    # group by section id, one section at a time
+    yield from assignments_df.groupby(["LMSSectionSourceSystemIdentifier"])
 
-    return result
+
+def coursework_to_assignments_dfs(
+    coursework_df: DataFrame,
+) -> Dict[str, DataFrame]:
+    """
+    Convert a Coursework API DataFrame to a Dict of Assignment UDM DataFrames
+    grouped by source system section id
+
+    See coursework_to_assignments_by_section for the parameters and columns.
+
+    Returns
+    -------
+    Dict[str, DataFrame]
+        coursework_to_assignments_by_section results as a Dict
+    """
+    return dict(coursework_to_assignments_by_section(coursework_df))
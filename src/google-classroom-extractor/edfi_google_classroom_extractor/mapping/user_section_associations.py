@@ -3,7 +3,7 @@
 # The Ed-Fi Alliance licenses this file to you under the Apache License, Version 2.0.
 # See the LICENSE and NOTICES files in the project root for more information.
 
-from typing import Dict
+from typing import Dict, Iterator, Tuple
 from pandas import DataFrame, concat
 from edfi_google_classroom_extractor.mapping.constants import SOURCE_SYSTEM
 
@@ -75,11 +75,11 @@ def _students_or_teachers_to_user_section_associations_df(
     return user_section_associations_df
 
 
-def students_and_teachers_to_user_section_associations_dfs(
+def students_and_teachers_to_user_section_associations_by_section(
     students_df: DataFrame, teachers_df: DataFrame
-) -> Dict[str, DataFrame]:
+) -> Iterator[Tuple[str, DataFrame]]:
     """
-    Convert Student and Teacher API DataFrames to a Dict of
+    Convert Student and Teacher API DataFrames to
     UserSectionAssociation UDM DataFrames grouped by source system
     section id
 
@@ -92,9 +92,9 @@ def students_and_teachers_to_user_section_associations_dfs(
 
     Returns
     -------
-    Dict[str, DataFrame]
+    Iterator[Tuple[str, DataFrame]]
         LMS UDM UserSectionAssociation DataFrames grouped by
-            source system section id
+            source system section id, one section at a time
 
     Notes
     -----
@@ -133,15 +133,27 @@ def students_and_teachers_to_user_section_associations_dfs(
         sort=False,
     )
 
-    # group by section id as a Dict of DataFrames
-    result: Dict[str, DataFrame] = dict(
-        tuple(
-            user_section_associations_df.groupby(
-                [
-                    "LMSSectionSourceSystemIdentifier",
-                ]
-            )
-        )
+    # group by section id, one section at a time
+    yield from user_section_associations_df.groupby(
+        [
+            "LMSSectionSourceSystemIdentifier",
+        ]
     )
 
-    return result
+
+def students_and_teachers_to_user_section_associations_dfs(
+    students_df: DataFrame, teachers_df: DataFrame
+) -> Dict[str, DataFrame]:
+    """
+    Convert Student and Teacher API DataFrames to a Dict of
+    UserSectionAssociation UDM DataFrames grouped by source system
+    section id
+
+    See students_and_teachers_to_user_section_associations_by_section for the parameters and columns.
+
+    Returns
+    -------
+    Dict[str, DataFrame]
+        students_and_teachers_to_user_section_associations_by_section results as a Dict
+    """
+    return dict(students_and_teachers_to_user_section_associations_by_section(students_df, teachers_df))
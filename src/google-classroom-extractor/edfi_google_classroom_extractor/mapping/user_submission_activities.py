@@ -4,7 +4,7 @@
 # See the LICENSE and NOTICES files in the project root for more information.
 
 import json
-from typing import Dict
+from typing import Dict, Iterator, Tuple
 from pandas import DataFrame, concat, Series
 from edfi_google_classroom_extractor.mapping.constants import SOURCE_SYSTEM
 
@@ -12,11 +12,11 @@ ACTIVITY_TYPE_STATE = "Submission State Change"
 ACTIVITY_TYPE_GRADE = "Submission Grade Change"
 
 
-def submissions_to_user_submission_activities_dfs(
+def submissions_to_user_submission_activities_by_section(
     submissions_df: DataFrame,
-) -> Dict[str, DataFrame]:
+) -> Iterator[Tuple[str, DataFrame]]:
     """
-    Convert a Submission API DataFrame to a Dict of UserActivity
+    Convert a Submission API DataFrame to UserActivity
     UDM DataFrames grouped by source system section id.
 
     Parameters
@@ -26,8 +26,8 @@ def submissions_to_user_submission_activities_dfs(
 
     Returns
     -------
-    Dict[str, DataFrame] LMS UDM UserActivity DataFrames
-        grouped by source system section id
+    Iterator[Tuple[str, DataFrame]] LMS UDM UserActivity DataFrames
+        grouped by source system section id, one section at a time
 
     Notes
     -----
@@ -146,9 +146,22 @@ def submissions_to_user_submission_activities_dfs(
     user_submission_df["SourceCreateDate"] = ""  # No create date available from API
     user_submission_df["SourceLastModifiedDate"] = ""  # No modified date available from API
 
-    # group by section id as a Dict of DataFrames
-    result: Dict[str, DataFrame] = dict(
-        tuple(user_submission_df.groupby(["LMSSectionIdentifier"]))
-    )
+    # group by section id, one section at a time
+    yield from user_submission_df.groupby(["LMSSectionIdentifier"])
 
-    return result
+
+def submissions_to_user_submission_activities_dfs(
+    submissions_df: DataFrame,
+) -> Dict[str, DataFrame]:
+    """
+    Convert a Submission API DataFrame to a Dict of UserActivity
+    UDM DataFrames grouped by source system section id
+
+    See submissions_to_user_submission_activities_by_section for the parameters and columns.
+
+    Returns
+    -------
+    Dict[str, DataFrame]
+        submissions_to_user_submission_activities_by_section results as a Dict
+    """
+    return dict(submissions_to_user_submission_activities_by_section(submissions_df))
@@ -83,6 +83,33 @@ def upload_file(
     logger.info(f"Done with {table} file.")
 
 
+def soft_delete_empty_section(
+    db_adapter: MssqlLmsOperations,
+    table: str,
+    section_source_system_identifier: str,
+    source_system: str,
+) -> None:
+    """
+    Soft deletes the records of a section which the extractor recorded as having
+    no records, in place of writing an empty file.
+
+    Parameters
+    ----------
+    db_adapter: MssqlLmsOperations
+        Database engine-specific adapter/wrapper for database operations.
+    table: str
+        The table of the resource, which must be a child of section.
+    section_source_system_identifier: str
+        The SourceSystemIdentifier of the section.
+    source_system: str
+        The SourceSystem of the section.
+    """
+    logger.info(f"Soft deleting {table} records of empty section {section_source_system_identifier} ...")
+    db_adapter.soft_delete_from_production_for_empty_section(
+        table, section_source_system_identifier, source_system
+    )
+
+
 def upload_users(db_adapter: MssqlLmsOperations, users_df: pd.DataFrame) -> None:
     """
     Uploads a User DataFrame to the User table.
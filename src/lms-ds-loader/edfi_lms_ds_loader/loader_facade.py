@@ -10,16 +10,17 @@
 
 import logging
 from os.path import abspath
-from typing import Callable, List
+from typing import Callable, Dict, List, Optional, Tuple
 from functools import lru_cache
 
 from pandas import DataFrame
 
 from edfi_lms_ds_loader.helpers.argparser import MainArguments
 from edfi_lms_ds_loader import migrator
-from edfi_lms_file_utils import file_reader, file_repository
+from edfi_lms_file_utils import directory_repository, file_reader, file_repository
 from edfi_lms_file_utils.constants import Resources
 from edfi_lms_ds_loader import df_to_db
+from edfi_lms_ds_loader.helpers.constants import Table
 from edfi_lms_ds_loader.mssql_lms_operations import MssqlLmsOperations
 
 logger = logging.getLogger(__name__)
@@ -52,6 +53,12 @@ def _get_assignments_df(csv_path: str) -> DataFrame:
     return file_reader.get_all_assignments(csv_path, sections_df)
 
 
+@lru_cache()
+def _get_section_source_systems(csv_path: str) -> Dict[str, str]:
+    sections_df: DataFrame = _get_sections_df(csv_path)
+    return dict(zip(sections_df["SourceSystemIdentifier"], sections_df["SourceSystem"]))
+
+
 def _get_unprocessed_file_paths(
     db_adapter: MssqlLmsOperations,
     resource_name: str,
@@ -62,27 +69,77 @@ def _get_unprocessed_file_paths(
     return sorted(all_paths - processed_files)
 
 
+def _plan_file_paths(
+    db_adapter: MssqlLmsOperations,
+    base_directory: str,
+    resource_name: str,
+    manifest_paths: Optional[List[str]],
+    scan_directories: Callable[[], List[str]],
+) -> Tuple[List[str], Optional[str]]:
+    if manifest_paths is None:
+        return (scan_directories(), None)
+
+    # files written before the first run manifest are in none, so the directories
+    # are scanned for them once, recorded as processed under the manifests directory
+    scan_marker: str = directory_repository.get_manifests_directory(base_directory)
+    if scan_marker in db_adapter.get_processed_files(resource_name):
+        return (manifest_paths, None)
+
+    return (
+        file_repository.get_paths_written_before_manifests(
+            base_directory, scan_directories()
+        )
+        + manifest_paths,
+        scan_marker,
+    )
+
+
 def _upload_files_from_paths(
     db_adapter: MssqlLmsOperations,
     file_paths: List[str],
     resource_name: str,
     read_file_callback: Callable[[str], DataFrame],
     upload_function: Callable[[MssqlLmsOperations, DataFrame], None],
+    table: Optional[str] = None,
+    section_source_systems: Optional[Dict[str, str]] = None,
+    scan_marker: Optional[str] = None,
 ) -> None:
     unprocessed_files: List[str] = _get_unprocessed_file_paths(
         db_adapter, resource_name, file_paths
     )
 
     for path in unprocessed_files:
+        # sections recorded as empty in a run manifest, which are only planned for
+        # resources that are children of section
+        empty_section: Optional[str] = file_repository.get_empty_partition_section(path)
+        if empty_section is not None:
+            assert (
+                table is not None and section_source_systems is not None
+            ), "Empty sections require the table of the resource and the section source systems"
+            df_to_db.soft_delete_empty_section(
+                db_adapter, table, empty_section, section_source_systems[empty_section]
+            )
+            db_adapter.add_processed_file(path, resource_name, 0)
+            continue
+
         data: DataFrame = read_file_callback(path)
         rows = data.shape[0]
         if rows != 0:
             upload_function(db_adapter, data)
         db_adapter.add_processed_file(path, resource_name, rows)
 
+    if scan_marker is not None:
+        db_adapter.add_processed_file(scan_marker, resource_name, 0)
+
 
 def _load_users(csv_path: str, db_adapter: MssqlLmsOperations) -> None:
-    file_paths = file_repository.get_users_file_paths(abspath(csv_path))
+    (file_paths, scan_marker) = _plan_file_paths(
+        db_adapter,
+        abspath(csv_path),
+        Resources.USERS,
+        file_repository.get_manifest_file_paths(abspath(csv_path), Resources.USERS),
+        lambda: file_repository.get_users_file_paths(abspath(csv_path)),
+    )
 
     _upload_files_from_paths(
         db_adapter,
@@ -90,11 +147,18 @@ def _load_users(csv_path: str, db_adapter: MssqlLmsOperations) -> None:
         Resources.USERS,
         file_reader.read_users_file,
         df_to_db.upload_users,
+        scan_marker=scan_marker,
     )
 
 
 def _load_sections(csv_path: str, db_adapter: MssqlLmsOperations) -> None:
-    file_paths = file_repository.get_sections_file_paths(abspath(csv_path))
+    (file_paths, scan_marker) = _plan_file_paths(
+        db_adapter,
+        abspath(csv_path),
+        Resources.SECTIONS,
+        file_repository.get_manifest_file_paths(abspath(csv_path), Resources.SECTIONS),
+        lambda: file_repository.get_sections_file_paths(abspath(csv_path)),
+    )
 
     _upload_files_from_paths(
         db_adapter,
@@ -102,6 +166,7 @@ def _load_sections(csv_path: str, db_adapter: MssqlLmsOperations) -> None:
         Resources.SECTIONS,
         file_reader.read_sections_file,
         df_to_db.upload_sections,
+        scan_marker=scan_marker,
     )
 
 
@@ -115,11 +180,30 @@ def _load_assignments(csv_path: str, db_adapter: MssqlLmsOperations) -> None:
     )  # we only need to access the last file
 
     formatted_path = abspath(csv_path)
-    file_paths: List[str] = []
-    for section in sections:
-        file_paths = file_paths + file_repository.get_assignments_file_paths(
-            formatted_path, section
+
+    def _scan_directories() -> List[str]:
+        # files in the consolidated layout hold every section
+        file_paths: List[str] = file_repository.get_consolidated_file_paths(
+            formatted_path, Resources.ASSIGNMENTS
         )
+        for section in sections:
+            file_paths = file_paths + file_repository.get_assignments_file_paths(
+                formatted_path, section
+            )
+        return file_paths
+
+    (file_paths, scan_marker) = _plan_file_paths(
+        db_adapter,
+        formatted_path,
+        Resources.ASSIGNMENTS,
+        file_repository.get_manifest_file_paths(
+            formatted_path,
+            Resources.ASSIGNMENTS,
+            [(section,) for section in sections],
+            include_empty_partitions=True,
+        ),
+        _scan_directories,
+    )
 
     _upload_files_from_paths(
         db_adapter,
@@ -127,6 +211,9 @@ def _load_assignments(csv_path: str, db_adapter: MssqlLmsOperations) -> None:
         Resources.ASSIGNMENTS,
         file_reader.read_assignments_file,
         df_to_db.upload_assignments,
+        Table.ASSIGNMENT,
+        _get_section_source_systems(csv_path),
+        scan_marker=scan_marker,
     )
 
 
@@ -138,11 +225,30 @@ def _load_attendance_events(csv_path: str, db_adapter: MssqlLmsOperations) -> No
     sections = set(sections_df["SourceSystemIdentifier"])
 
     formatted_path = abspath(csv_path)
-    file_paths: List[str] = []
-    for section in sections:
-        file_paths = file_paths + file_repository.get_attendance_events_paths(
-            formatted_path, section
+
+    def _scan_directories() -> List[str]:
+        # files in the consolidated layout hold every section
+        file_paths: List[str] = file_repository.get_consolidated_file_paths(
+            formatted_path, Resources.ATTENDANCE_EVENTS
         )
+        for section in sections:
+            file_paths = file_paths + file_repository.get_attendance_events_paths(
+                formatted_path, section
+            )
+        return file_paths
+
+    (file_paths, scan_marker) = _plan_file_paths(
+        db_adapter,
+        formatted_path,
+        Resources.ATTENDANCE_EVENTS,
+        file_repository.get_manifest_file_paths(
+            formatted_path,
+            Resources.ATTENDANCE_EVENTS,
+            [(section,) for section in sections],
+            include_empty_partitions=True,
+        ),
+        _scan_directories,
+    )
 
     _upload_files_from_paths(
         db_adapter,
@@ -150,6 +256,9 @@ def _load_attendance_events(csv_path: str, db_adapter: MssqlLmsOperations) -> No
         Resources.ATTENDANCE_EVENTS,
         file_reader.read_attendance_events_file,
         df_to_db.upload_attendance_events,
+        Table.ATTENDANCE,
+        _get_section_source_systems(csv_path),
+        scan_marker=scan_marker,
     )
 
 
@@ -161,11 +270,30 @@ def _load_section_associations(csv_path: str, db_adapter: MssqlLmsOperations) ->
     sections = set(sections_df["SourceSystemIdentifier"])
 
     formatted_path = abspath(csv_path)
-    file_paths: List[str] = []
-    for section in sections:
-        file_paths = file_paths + file_repository.get_section_associations_file_paths(
-            formatted_path, section
+
+    def _scan_directories() -> List[str]:
+        # files in the consolidated layout hold every section
+        file_paths: List[str] = file_repository.get_consolidated_file_paths(
+            formatted_path, Resources.SECTION_ASSOCIATIONS
         )
+        for section in sections:
+            file_paths = file_paths + file_repository.get_section_associations_file_paths(
+                formatted_path, section
+            )
+        return file_paths
+
+    (file_paths, scan_marker) = _plan_file_paths(
+        db_adapter,
+        formatted_path,
+        Resources.SECTION_ASSOCIATIONS,
+        file_repository.get_manifest_file_paths(
+            formatted_path,
+            Resources.SECTION_ASSOCIATIONS,
+            [(section,) for section in sections],
+            include_empty_partitions=True,
+        ),
+        _scan_directories,
+    )
 
     _upload_files_from_paths(
         db_adapter,
@@ -173,6 +301,9 @@ def _load_section_associations(csv_path: str, db_adapter: MssqlLmsOperations) ->
         Resources.SECTION_ASSOCIATIONS,
         file_reader.read_section_associations_file,
         df_to_db.upload_section_associations,
+        Table.SECTION_ASSOCIATION,
+        _get_section_source_systems(csv_path),
+        scan_marker=scan_marker,
     )
 
 
@@ -183,16 +314,35 @@ def _load_assignment_submissions(csv_path: str, db_adapter: MssqlLmsOperations)
         return
 
     formatted_path = abspath(csv_path)
-    file_paths: List[str] = []
-    for section_id, assignment_id in zip(
-        assignments_df.LMSSectionSourceSystemIdentifier,
-        assignments_df.SourceSystemIdentifier,
-    ):
-        file_paths = file_paths + file_repository.get_submissions_file_paths(
-            formatted_path,
-            section_id,
-            assignment_id,
+    assignment_keys = list(
+        zip(
+            assignments_df.LMSSectionSourceSystemIdentifier,
+            assignments_df.SourceSystemIdentifier,
+        )
+    )
+
+    def _scan_directories() -> List[str]:
+        # files in the consolidated layout hold every section
+        file_paths: List[str] = file_repository.get_consolidated_file_paths(
+            formatted_path, Resources.SUBMISSIONS
         )
+        for section_id, assignment_id in assignment_keys:
+            file_paths = file_paths + file_repository.get_submissions_file_paths(
+                formatted_path,
+                section_id,
+                assignment_id,
+            )
+        return file_paths
+
+    (file_paths, scan_marker) = _plan_file_paths(
+        db_adapter,
+        formatted_path,
+        Resources.SUBMISSIONS,
+        file_repository.get_manifest_file_paths(
+            formatted_path, Resources.SUBMISSIONS, assignment_keys
+        ),
+        _scan_directories,
+    )
 
     _upload_files_from_paths(
         db_adapter,
@@ -200,6 +350,7 @@ def _load_assignment_submissions(csv_path: str, db_adapter: MssqlLmsOperations)
         Resources.SUBMISSIONS,
         file_reader.read_submissions_file,
         df_to_db.upload_assignment_submissions,
+        scan_marker=scan_marker,
     )
 
 
@@ -211,11 +362,30 @@ def _load_section_activities(csv_path: str, db_adapter: MssqlLmsOperations) -> N
     sections = set(sections_df["SourceSystemIdentifier"])
 
     formatted_path = abspath(csv_path)
-    file_paths: List[str] = []
-    for section in sections:
-        file_paths = file_paths + file_repository.get_section_activities_file_paths(
-            formatted_path, section
+
+    def _scan_directories() -> List[str]:
+        # files in the consolidated layout hold every section
+        file_paths: List[str] = file_repository.get_consolidated_file_paths(
+            formatted_path, Resources.SECTION_ACTIVITIES
         )
+        for section in sections:
+            file_paths = file_paths + file_repository.get_section_activities_file_paths(
+                formatted_path, section
+            )
+        return file_paths
+
+    (file_paths, scan_marker) = _plan_file_paths(
+        db_adapter,
+        formatted_path,
+        Resources.SECTION_ACTIVITIES,
+        file_repository.get_manifest_file_paths(
+            formatted_path,
+            Resources.SECTION_ACTIVITIES,
+            [(section,) for section in sections],
+            include_empty_partitions=True,
+        ),
+        _scan_directories,
+    )
 
     _upload_files_from_paths(
         db_adapter,
@@ -223,11 +393,20 @@ def _load_section_activities(csv_path: str, db_adapter: MssqlLmsOperations) -> N
         Resources.SECTION_ACTIVITIES,
         file_reader.read_section_activities_file,
         df_to_db.upload_section_activities,
+        Table.SECTION_ACTIVITY,
+        _get_section_source_systems(csv_path),
+        scan_marker=scan_marker,
     )
 
 
 def _load_system_activities(csv_path: str, db_adapter: MssqlLmsOperations) -> None:
-    file_paths = file_repository.get_system_activities_file_paths(abspath(csv_path))
+    (file_paths, scan_marker) = _plan_file_paths(
+        db_adapter,
+        abspath(csv_path),
+        Resources.SYSTEM_ACTIVITIES,
+        file_repository.get_manifest_file_paths(abspath(csv_path), Resources.SYSTEM_ACTIVITIES),
+        lambda: file_repository.get_system_activities_file_paths(abspath(csv_path)),
+    )
 
     _upload_files_from_paths(
         db_adapter,
@@ -235,6 +414,7 @@ def _load_system_activities(csv_path: str, db_adapter: MssqlLmsOperations) -> No
         Resources.SYSTEM_ACTIVITIES,
         file_reader.read_system_activities_file,
         df_to_db.upload_system_activities,
+        scan_marker=scan_marker,
     )
 
 
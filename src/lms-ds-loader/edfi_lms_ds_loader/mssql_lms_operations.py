@@ -668,6 +668,51 @@ AND
         row_count = self._exec(statement)
         logger.debug(f"Soft-deleted {row_count} records in table `{table}`")
 
+    def soft_delete_from_production_for_empty_section(
+        self, table: str, section_source_system_identifier: str, source_system: str
+    ) -> None:
+        """
+        Updates all of the production records of a section, which had no records
+        in its latest extract, by setting their `deletedat` value to the current
+        timestamp.
+
+        Parameters
+        ----------
+        table: str
+            Name of the table to soft delete on.
+        section_source_system_identifier: str
+            The SourceSystemIdentifier of the section.
+        source_system: str
+            The SourceSystem of the section, since SourceSystemIdentifiers are
+            only unique within a source system.
+        """
+
+        assert table.strip() != "", "Argument `table` cannot be whitespace"
+
+        statement = f"""
+UPDATE
+    t
+SET
+    t.DeletedAt = getdate()
+FROM
+    lms.{table} as t
+INNER JOIN
+    lms.LMSSection as s
+ON
+    t.LMSSectionIdentifier = s.LMSSectionIdentifier
+AND
+    t.SourceSystem = s.SourceSystem
+WHERE
+    s.SourceSystemIdentifier = '{section_source_system_identifier}'
+AND
+    t.SourceSystem = '{source_system}'
+AND
+    t.DeletedAt IS NULL
+"""
+
+        row_count = self._exec(statement)
+        logger.debug(f"Soft-deleted {row_count} records in table `{table}`")
+
     def soft_delete_from_production_for_assignment_relation(
         self, table: str, source_system: str
     ) -> None:
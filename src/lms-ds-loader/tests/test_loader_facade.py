@@ -3,6 +3,7 @@
 # The Ed-Fi Alliance licenses this file to you under the Apache License, Version 2.0.
 # See the LICENSE and NOTICES files in the project root for more information.
 
+from os.path import abspath, join
 from typing import Dict, Tuple
 
 import pandas as pd
@@ -11,7 +12,12 @@ from unittest.mock import MagicMock, Mock
 
 from edfi_lms_ds_loader import migrator
 from edfi_lms_ds_loader.helpers.argparser import MainArguments
-from edfi_lms_ds_loader.loader_facade import run_loader
+from edfi_lms_ds_loader import loader_facade
+from edfi_lms_ds_loader.helpers.constants import Table
+from edfi_lms_ds_loader.loader_facade import _load_assignments, _load_users, run_loader
+
+CSV_PATH = "/some/path"
+MANIFESTS_DIRECTORY = join(abspath(CSV_PATH), "manifests")
 
 
 def describe_when_uploading_extractor_files() -> None:
@@ -41,7 +47,9 @@ def describe_when_uploading_extractor_files() -> None:
                 return_value=fake_df_users,
             )
 
-            fake_df_sections = pd.DataFrame([{"SourceSystemIdentifier": "a"}])
+            fake_df_sections = pd.DataFrame(
+                [{"SourceSystemIdentifier": "a", "SourceSystem": "Canvas"}]
+            )
             mocker.patch(
                 "edfi_lms_file_utils.file_reader.read_sections_file",
                 return_value=fake_df_sections,
@@ -309,3 +317,169 @@ def describe_when_uploading_extractor_files() -> None:
     # Since we're not doing anything special to have that error bubble up,
     # additional tests for exceptions on other methods would not add much value
     # here.
+
+
+def describe_when_loading_users_with_run_manifests() -> None:
+    @pytest.fixture
+    def arrange(mocker):
+        def _arrange(processed_files, manifest_paths) -> Dict[str, MagicMock]:
+            db_adapter_mock = Mock()
+            db_adapter_mock.get_processed_files = Mock(return_value=processed_files)
+
+            mocker.patch("edfi_lms_ds_loader.df_to_db.upload_users")
+            mocker.patch(
+                "edfi_lms_file_utils.file_repository.get_manifest_file_paths",
+                return_value=manifest_paths,
+            )
+
+            return {
+                "db_adapter": db_adapter_mock,
+                "get_users_file_paths": mocker.patch(
+                    "edfi_lms_file_utils.file_repository.get_users_file_paths",
+                    return_value=["before_manifests", "in_manifest"],
+                ),
+                "get_paths_written_before_manifests": mocker.patch(
+                    "edfi_lms_file_utils.file_repository.get_paths_written_before_manifests",
+                    return_value=["before_manifests"],
+                ),
+                "read_users_file": mocker.patch(
+                    "edfi_lms_file_utils.file_reader.read_users_file",
+                    return_value=pd.DataFrame({"generic_df": [1, 2, 3]}),
+                ),
+            }
+
+        return _arrange
+
+    def describe_given_no_run_manifests() -> None:
+        @pytest.fixture
+        def fixture(arrange) -> Dict[str, MagicMock]:
+            mocks = arrange(set(), None)
+
+            # Act
+            _load_users(CSV_PATH, mocks["db_adapter"])
+
+            return mocks
+
+        def it_loads_every_scanned_file(fixture) -> None:
+            assert [
+                call[0][0] for call in fixture["read_users_file"].call_args_list
+            ] == ["before_manifests", "in_manifest"]
+
+        def it_does_not_record_a_scan(fixture) -> None:
+            assert [
+                call[0][0] for call in fixture["db_adapter"].add_processed_file.call_args_list
+            ] == ["before_manifests", "in_manifest"]
+
+    def describe_given_the_files_before_the_manifests_were_not_scanned_for() -> None:
+        @pytest.fixture
+        def fixture(arrange) -> Dict[str, MagicMock]:
+            mocks = arrange(set(), ["in_manifest"])
+
+            # Act
+            _load_users(CSV_PATH, mocks["db_adapter"])
+
+            return mocks
+
+        def it_plans_the_files_before_the_manifests_and_in_the_manifests(
+            fixture,
+        ) -> None:
+            fixture["get_paths_written_before_manifests"].assert_called_once_with(
+                abspath(CSV_PATH), ["before_manifests", "in_manifest"]
+            )
+            assert [
+                call[0][0] for call in fixture["read_users_file"].call_args_list
+            ] == ["before_manifests", "in_manifest"]
+
+        def it_records_the_scan_after_loading_the_files(fixture) -> None:
+            fixture["db_adapter"].add_processed_file.assert_called_with(
+                MANIFESTS_DIRECTORY, "users", 0
+            )
+
+    def describe_given_the_files_before_the_manifests_were_scanned_for() -> None:
+        @pytest.fixture
+        def fixture(arrange) -> Dict[str, MagicMock]:
+            mocks = arrange(set([MANIFESTS_DIRECTORY]), ["in_manifest"])
+
+            # Act
+            _load_users(CSV_PATH, mocks["db_adapter"])
+
+            return mocks
+
+        def it_does_not_scan_the_directories(fixture) -> None:
+            fixture["get_users_file_paths"].assert_not_called()
+
+        def it_loads_the_manifest_files_only(fixture) -> None:
+            fixture["read_users_file"].assert_called_once_with("in_manifest")
+
+        def it_does_not_record_the_scan_again(fixture) -> None:
+            fixture["db_adapter"].add_processed_file.assert_called_once_with(
+                "in_manifest", "users", 3
+            )
+
+
+def describe_when_loading_assignments_with_an_empty_section_in_a_run_manifest() -> None:
+    EMPTY_SECTION_PATH = join(
+        abspath(CSV_PATH), "section=b", "assignments", "2021-01-02-03-04-05.empty"
+    )
+
+    @pytest.fixture
+    def fixture(mocker) -> Dict[str, MagicMock]:
+        # Arrange
+        db_adapter_mock = Mock()
+        db_adapter_mock.get_processed_files = Mock(
+            return_value=set([MANIFESTS_DIRECTORY])
+        )
+
+        loader_facade._get_section_source_systems.cache_clear()
+        mocker.patch(
+            "edfi_lms_ds_loader.loader_facade._get_sections_df",
+            return_value=pd.DataFrame(
+                [
+                    {"SourceSystemIdentifier": "a", "SourceSystem": "Canvas"},
+                    {"SourceSystemIdentifier": "b", "SourceSystem": "Schoology"},
+                ]
+            ),
+        )
+        get_manifest_file_paths_mock = mocker.patch(
+            "edfi_lms_file_utils.file_repository.get_manifest_file_paths",
+            return_value=["in_manifest", EMPTY_SECTION_PATH],
+        )
+        fake_df_assignments = pd.DataFrame([{"SourceSystemIdentifier": "c"}])
+        mocker.patch(
+            "edfi_lms_file_utils.file_reader.read_assignments_file",
+            return_value=fake_df_assignments,
+        )
+        mocks = {
+            "db_adapter": db_adapter_mock,
+            "get_manifest_file_paths": get_manifest_file_paths_mock,
+            "upload_assignments": mocker.patch(
+                "edfi_lms_ds_loader.df_to_db.upload_assignments"
+            ),
+            "soft_delete_empty_section": mocker.patch(
+                "edfi_lms_ds_loader.df_to_db.soft_delete_empty_section"
+            ),
+        }
+
+        # Act
+        _load_assignments(CSV_PATH, db_adapter_mock)
+
+        loader_facade._get_section_source_systems.cache_clear()
+        return mocks
+
+    def it_plans_the_empty_sections_of_the_manifests(fixture) -> None:
+        (args, kwargs) = fixture["get_manifest_file_paths"].call_args
+        assert sorted(args[2]) == [("a",), ("b",)]
+        assert kwargs == {"include_empty_partitions": True}
+
+    def it_uploads_the_files(fixture) -> None:
+        fixture["upload_assignments"].assert_called_once()
+
+    def it_soft_deletes_the_section_with_its_source_system(fixture) -> None:
+        fixture["soft_delete_empty_section"].assert_called_once_with(
+            fixture["db_adapter"], Table.ASSIGNMENT, "b", "Schoology"
+        )
+
+    def it_records_the_empty_section_as_processed_with_no_rows(fixture) -> None:
+        fixture["db_adapter"].add_processed_file.assert_any_call(
+            EMPTY_SECTION_PATH, "assignments", 0
+        )
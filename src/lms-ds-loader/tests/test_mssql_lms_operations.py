@@ -276,6 +276,50 @@ AND
             exec_mock.assert_called_with(expected)
 
 
+def describe_when_soft_deleting_the_records_of_an_empty_section() -> None:
+    def describe_given_table_is_whitespace() -> None:
+        def it_raises_an_error() -> None:
+            with pytest.raises(AssertionError):
+                MssqlLmsOperations(Mock()).soft_delete_from_production_for_empty_section(
+                    "   ", "a", "Canvas"
+                )
+
+    def describe_given_valid_input() -> None:
+        def it_updates_every_record_of_the_section(mocker) -> None:
+
+            expected = """
+UPDATE
+    t
+SET
+    t.DeletedAt = getdate()
+FROM
+    lms.Fake as t
+INNER JOIN
+    lms.LMSSection as s
+ON
+    t.LMSSectionIdentifier = s.LMSSectionIdentifier
+AND
+    t.SourceSystem = s.SourceSystem
+WHERE
+    s.SourceSystemIdentifier = '123'
+AND
+    t.SourceSystem = 'Canvas'
+AND
+    t.DeletedAt IS NULL
+"""
+
+            # Arrange
+            exec_mock = mocker.patch.object(MssqlLmsOperations, "_exec")
+
+            # Act
+            MssqlLmsOperations(Mock()).soft_delete_from_production_for_empty_section(
+                "Fake", "123", "Canvas"
+            )
+
+            # Assert
+            exec_mock.assert_called_with(expected)
+
+
 def describe_given_assignment_submission_types() -> None:
     def describe_when_inserting_new_records() -> None:
         def it_issues_insert_statement(mocker) -> None:
@@ -8,6 +8,7 @@ import logging
 from typing import Any, Dict, List, Union
 
 from pandas import DataFrame, concat
+from edfi_lms_extractor_lib.api.sync_store import SyncDb, SyncStore
 import sqlalchemy
 
 from edfi_schoology_extractor.helpers import sync
@@ -38,13 +39,13 @@ class ClientFacade:
         Instance of a Schoology request client
     page_size : int
         Number of records to retrieve with each API call
-    db_engine : sqlalchemy.engine.base.Engine
-        Database connectivity for sync process
+    db_engine : SyncDb
+        Sync store, or database connectivity, for sync process
     """
 
     request_client: RequestClient
     page_size: int
-    db_engine: sqlalchemy.engine.base.Engine
+    db_engine: SyncDb
 
     @property
     def _client(self) -> RequestClient:
@@ -57,8 +58,8 @@ class ClientFacade:
         return self.page_size
 
     @property
-    def _db_engine(self) -> sqlalchemy.engine.base.Engine:
-        assert isinstance(self.db_engine, sqlalchemy.engine.base.Engine)
+    def _db_engine(self) -> SyncDb:
+        assert isinstance(self.db_engine, (sqlalchemy.engine.base.Engine, SyncStore))
         return self.db_engine
 
     def get_users(self) -> DataFrame:
@@ -137,6 +138,8 @@ class ClientFacade:
             RESOURCE_NAMES.ASSIGNMENT,
             self._db_engine,
             self._client.get_assignments(section_id, self._page_size).get_all_pages(),
+            "id",
+            str(section_id),
         )
 
         return assignmentsMap.map_to_udm(assignments_df, section_id)
@@ -169,7 +172,11 @@ class ClientFacade:
         ]
 
         submissions_df: DataFrame = sync.sync_resource(
-            RESOURCE_NAMES.SUBMISSION, self._db_engine, all_submissions
+            RESOURCE_NAMES.SUBMISSION,
+            self._db_engine,
+            all_submissions,
+            "id",
+            f"{section_id}#{assignment_id}",
         )
         return submissionsMap.map_to_udm(submissions_df)
 
@@ -192,6 +199,8 @@ class ClientFacade:
             RESOURCE_NAMES.ENROLLMENT,
             self._db_engine,
             self._client.get_enrollments(section_id).get_all_pages(),
+            "id",
+            str(section_id),
         )
 
         return sectionAssocMap.map_to_udm(enrollments_df, section_id)
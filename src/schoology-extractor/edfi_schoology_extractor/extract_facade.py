@@ -16,8 +16,24 @@ from edfi_schoology_extractor.api.request_client import RequestClient
 from edfi_schoology_extractor.helpers import csv_writer
 from edfi_schoology_extractor import usage_analytics_facade
 import edfi_schoology_extractor.lms_filesystem as lms
-from edfi_schoology_extractor.helpers.sync import get_sync_db_engine
+from edfi_schoology_extractor.helpers.sync import get_sync_store, get_usage_db_engine
 from edfi_schoology_extractor.client_facade import ClientFacade
+from edfi_lms_extractor_lib.api.resource_sync import set_hash_workers
+from edfi_lms_extractor_lib.api.sync_payload import set_payload_mode
+from edfi_lms_extractor_lib.api.sync_metrics import (
+    SyncRunSummary,
+    add_sync_metrics_listener,
+    remove_sync_metrics_listener,
+)
+from edfi_lms_extractor_lib.csv_generation.manifest import (
+    finish_run_manifest,
+    start_run_manifest,
+)
+from edfi_lms_extractor_lib.csv_generation.write import (
+    set_csv_compression,
+    set_output_format,
+    set_skip_unchanged_files,
+)
 from edfi_lms_extractor_lib.helpers.decorators import catch_exceptions
 
 logger = logging.getLogger(__name__)
@@ -36,9 +52,11 @@ def _initialize(
         request_client: RequestClient = RequestClient(
             arguments.client_key, arguments.client_secret
         )
-        db_engine = get_sync_db_engine(arguments.sync_database_directory)
+        sync_db = get_sync_store(arguments.sync_database_directory, arguments.sync_store)
+        set_payload_mode(sync_db, arguments.sync_payload_mode)
+        db_engine = get_usage_db_engine(sync_db, arguments.sync_database_directory)
 
-        facade = ClientFacade(request_client, arguments.page_size, db_engine)
+        facade = ClientFacade(request_client, arguments.page_size, sync_db)
 
         # Will generate an exception if directory is not valid
         os.lstat(arguments.output_directory)
@@ -179,6 +197,13 @@ def _get_system_activities(
 
 def run(arguments: MainArguments) -> None:
     logger.info("Starting Ed-Fi LMS Schoology Extractor")
+    set_hash_workers(arguments.hash_workers)
+    set_output_format(arguments.output_format)
+    set_csv_compression(arguments.csv_compression)
+    set_skip_unchanged_files(arguments.skip_unchanged_files)
+    sync_summary = SyncRunSummary()
+    add_sync_metrics_listener(sync_summary)
+    start_run_manifest(arguments.output_directory)
     facade, db_engine = _initialize(arguments)
 
     _get_users(facade, arguments.output_directory)
@@ -209,4 +234,8 @@ def run(arguments: MainArguments) -> None:
     if arguments.extract_activities:
         _get_system_activities(arguments, db_engine)
 
+    finish_run_manifest()
+    remove_sync_metrics_listener(sync_summary)
+    sync_summary.log(logger)
+
     logger.info("Finishing Ed-Fi LMS Schoology Extractor")
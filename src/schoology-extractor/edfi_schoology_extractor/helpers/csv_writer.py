@@ -3,15 +3,44 @@
 # The Ed-Fi Alliance licenses this file to you under the Apache License, Version 2.0.
 # See the LICENSE and NOTICES files in the project root for more information.
 
+import os
+from typing import Callable, Optional
+
 import pandas as pd
 import logging
 
+from edfi_lms_extractor_lib.csv_generation.manifest import (
+    record_empty_partition,
+    record_written_file,
+)
+from edfi_lms_extractor_lib.csv_generation.write import (
+    CSV_COMPRESSIONS,
+    OUTPUT_FORMATS,
+    csv_file_extension,
+    dataframe_fingerprint,
+    get_csv_compression,
+    get_output_format,
+    get_skip_unchanged_files,
+    is_unchanged_file,
+    record_fingerprint,
+    write_csv_file,
+    write_parquet_file,
+)
+
 logger = logging.getLogger(__name__)
 
 
 def df_to_csv(df: pd.DataFrame, output_path: str) -> None:
     """
-    Exports a DataFrame to CSV
+    Exports a DataFrame to CSV, or to Parquet at the same path with a .parquet
+    extension, or both, depending on the output format. Compressed CSV files
+    are written with the extension of the compression, e.g. .csv.gz
+
+    When skipping unchanged files, a file is not written if its contents match the
+    newest file of the same type in the directory.
+
+    When a run manifest has been started, an empty DataFrame for a section is
+    recorded as an empty partition of the manifest rather than written.
 
     Parameters
     ----------
@@ -21,6 +50,36 @@ def df_to_csv(df: pd.DataFrame, output_path: str) -> None:
         The path and name where you want your csv to be generated.
 
     """
+    if df.empty and record_empty_partition(output_path):
+        logger.debug("Recorded empty partition => %s" % output_path)
+        return
+
+    output_format = get_output_format()
+    fingerprint = dataframe_fingerprint(df) if get_skip_unchanged_files() else None
+
+    if output_format != OUTPUT_FORMATS.PARQUET:
+        csv_path = output_path
+        if get_csv_compression() != CSV_COMPRESSIONS.NONE:
+            csv_path = os.path.splitext(output_path)[0] + "." + csv_file_extension()
+        _write_file(df, csv_path, write_csv_file, fingerprint)
+
+    if output_format != OUTPUT_FORMATS.CSV:
+        parquet_path = os.path.splitext(output_path)[0] + ".parquet"
+        _write_file(df, parquet_path, write_parquet_file, fingerprint)
+
+
+def _write_file(
+    df: pd.DataFrame,
+    path: str,
+    write_file: Callable[[pd.DataFrame, str], None],
+    fingerprint: Optional[str],
+) -> None:
+    if fingerprint is not None and is_unchanged_file(fingerprint, path):
+        logger.info("Skipped unchanged file => %s" % path)
+        return
 
-    df.to_csv(output_path, index=False)
-    logger.info("The file has been generated => %s" % output_path)
+    write_file(df, path)
+    if fingerprint is not None:
+        record_fingerprint(fingerprint, path)
+    record_written_file(path, len(df))
+    logger.info("The file has been generated => %s" % path)
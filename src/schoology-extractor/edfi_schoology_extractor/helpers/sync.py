@@ -2,13 +2,14 @@
 # Licensed to the Ed-Fi Alliance under one or more agreements.
 # The Ed-Fi Alliance licenses this file to you under the Apache License, Version 2.0.
 # See the LICENSE and NOTICES files in the project root for more information.
-import os
 import logging
-from typing import Any, Dict, List, Union
+from typing import Any, Dict, List, Optional, Union
 
 from pandas import DataFrame
 import sqlalchemy
 from sqlalchemy.engine import ResultProxy
+from edfi_lms_extractor_lib.api import sync_store
+from edfi_lms_extractor_lib.api.sync_store import SYNC_STORES, SyncDb, SyncStore
 from edfi_lms_extractor_lib.api.resource_sync import (
     cleanup_after_sync,
     sync_to_db_without_cleanup,
@@ -28,19 +29,44 @@ def get_sync_db_engine(sync_database_directory: str) -> sqlalchemy.engine.base.E
     sqlalchemy.engine.base.Engine
         a SQL Alchemy Engine
     """
-    logger.debug(
-        "Ensuring database directory at %s", os.path.abspath(sync_database_directory)
-    )
-    os.makedirs(sync_database_directory, exist_ok=True)
+    return sync_store.get_sync_db_engine(sync_database_directory)
+
 
-    return sqlalchemy.create_engine(f"sqlite:///{sync_database_directory}/sync.sqlite")
+def get_sync_store(
+    sync_database_directory: str, store: str = SYNC_STORES.SQLITE
+) -> SyncStore:
+    """
+    Create the sync store, one of SYNC_STORES, in the sync database directory
+
+    Returns
+    -------
+    SyncStore
+        the sync store
+    """
+    return sync_store.get_sync_store(sync_database_directory, store)
+
+
+def get_usage_db_engine(
+    db_engine: SyncDb, sync_database_directory: str
+) -> sqlalchemy.engine.base.Engine:
+    """
+    Get a SQL Alchemy Engine for the table of processed usage files, which is
+    kept in the SQLite sync database whichever sync store is used
+
+    Returns
+    -------
+    sqlalchemy.engine.base.Engine
+        a SQL Alchemy Engine
+    """
+    return sync_store.get_extractor_db_engine(db_engine, sync_database_directory)
 
 
 def sync_resource(
     resource_name: str,
-    db_engine: sqlalchemy.engine.base.Engine,
+    db_engine: SyncDb,
     data: List[Dict[str, Any]],
     id_column: str = "id",
+    partition_key: Optional[str] = None,
 ) -> DataFrame:
     if len(data) == 0:
         return DataFrame()
@@ -51,6 +77,7 @@ def sync_resource(
         identity_columns=[id_column],
         resource_name=resource_name,
         sync_db=db_engine,
+        partition_key=partition_key,
     )
     cleanup_after_sync(resource_name, db_engine)
     return synced_df
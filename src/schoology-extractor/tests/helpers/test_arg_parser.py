@@ -19,6 +19,11 @@ FAKE_OUTPUT_DIRECTORY = "output_directory"
 FAKE_INPUT_DIRECTORY = "output_input"
 LOG_LEVEL = "DEBUG"
 TEST_SYNC_DATABASE_DIRECTORY = "test_sync_database_directory"
+TEST_SYNC_STORE = "duckdb"
+TEST_SYNC_PAYLOAD_MODE = "hash-only"
+TEST_HASH_WORKERS = 4
+TEST_OUTPUT_FORMAT = "both"
+TEST_CSV_COMPRESSION = "gzip"
 TEST_FEATURES = "activities attendance assignments grades"
 
 
@@ -54,6 +59,24 @@ def describe_when_parsing_arguments():
         def it_should_default_to_current_directory(result: MainArguments):
             assert result.output_directory == ""
 
+        def it_should_default_to_the_sqlite_sync_store(result: MainArguments):
+            assert result.sync_store == "sqlite"
+
+        def it_should_default_to_storing_full_payloads(result: MainArguments):
+            assert result.sync_payload_mode == "full"
+
+        def it_should_default_to_hashing_in_process(result: MainArguments):
+            assert result.hash_workers == 1
+
+        def it_should_default_to_csv_output(result: MainArguments):
+            assert result.output_format == "csv"
+
+        def it_should_default_to_uncompressed_csv(result: MainArguments):
+            assert result.csv_compression == "none"
+
+        def it_should_default_to_writing_every_file(result: MainArguments):
+            assert result.skip_unchanged_files is False
+
     def describe_given_optional_parameters():
         @pytest.fixture
         def result() -> MainArguments:
@@ -73,6 +96,17 @@ def describe_when_parsing_arguments():
                 FAKE_INPUT_DIRECTORY,
                 "-d",
                 TEST_SYNC_DATABASE_DIRECTORY,
+                "--sync-store",
+                TEST_SYNC_STORE,
+                "--sync-payload-mode",
+                TEST_SYNC_PAYLOAD_MODE,
+                "--hash-workers",
+                str(TEST_HASH_WORKERS),
+                "--output-format",
+                TEST_OUTPUT_FORMAT,
+                "--csv-compression",
+                TEST_CSV_COMPRESSION,
+                "--skip-unchanged-files",
                 "-f",
                 *TEST_FEATURES.split(),  # Split to convert it into a list and use * to unpack the list into separated values
             ]
@@ -95,6 +129,24 @@ def describe_when_parsing_arguments():
         def it_should_load_the_sync_database_directory(result: MainArguments):
             assert result.sync_database_directory == TEST_SYNC_DATABASE_DIRECTORY
 
+        def it_should_load_the_sync_store(result: MainArguments):
+            assert result.sync_store == TEST_SYNC_STORE
+
+        def it_should_load_the_sync_payload_mode(result: MainArguments):
+            assert result.sync_payload_mode == TEST_SYNC_PAYLOAD_MODE
+
+        def it_should_load_the_hash_workers(result: MainArguments):
+            assert result.hash_workers == TEST_HASH_WORKERS
+
+        def it_should_load_the_output_format(result: MainArguments):
+            assert result.output_format == TEST_OUTPUT_FORMAT
+
+        def it_should_load_the_csv_compression(result: MainArguments):
+            assert result.csv_compression == TEST_CSV_COMPRESSION
+
+        def it_should_load_skip_unchanged_files(result: MainArguments):
+            assert result.skip_unchanged_files is True
+
         def it_should_load_the_features_array(result: MainArguments):
             assert result.extract_attendance
             assert result.extract_activities
@@ -6,7 +6,13 @@
 import os
 
 import pandas as pd
+import pytest
 
+from edfi_lms_extractor_lib.csv_generation import write
+from edfi_lms_extractor_lib.csv_generation.manifest import (
+    finish_run_manifest,
+    start_run_manifest,
+)
 from edfi_schoology_extractor.helpers.csv_writer import df_to_csv
 
 
@@ -50,3 +56,96 @@ def describe_when_writing_dataframe_to_csv():
             with open(path) as f:
                 contents = f.read()
                 assert "\n" == contents
+
+
+def describe_when_writing_dataframe_in_both_output_formats():
+    @pytest.fixture
+    def both_formats(monkeypatch):
+        monkeypatch.setattr(write, "find_spec", lambda _: object())
+        write.set_output_format(write.OUTPUT_FORMATS.BOTH)
+        yield
+        write.set_output_format(write.OUTPUT_FORMATS.CSV)
+
+    def it_should_write_a_parquet_file_next_to_the_csv(fs, both_formats):
+        # Arrange
+        fs.create_dir("a")
+
+        # Act
+        df_to_csv(pd.DataFrame(), "a/b.csv")
+
+        # Assert
+        assert os.path.exists("a/b.csv")
+        assert os.path.exists("a/b.parquet")
+
+
+def describe_when_writing_dataframe_to_compressed_csv():
+    @pytest.fixture
+    def gzip_compression():
+        write.set_csv_compression(write.CSV_COMPRESSIONS.GZIP)
+        yield
+        write.set_csv_compression(write.CSV_COMPRESSIONS.NONE)
+
+    def it_should_write_a_csv_gz_file(fs, gzip_compression):
+        # Arrange
+        fs.create_dir("a")
+
+        # Act
+        df_to_csv(pd.DataFrame([{"a": 1}]), "a/b.csv")
+
+        # Assert
+        assert pd.read_csv("a/b.csv.gz")["a"].tolist() == [1]
+        assert not os.path.exists("a/b.csv")
+
+
+def describe_when_writing_an_unchanged_dataframe():
+    @pytest.fixture
+    def skip_unchanged_files():
+        write.set_skip_unchanged_files(True)
+        yield
+        write.set_skip_unchanged_files(False)
+
+    def it_should_skip_the_file(fs, skip_unchanged_files):
+        # Arrange
+        fs.create_dir("a")
+        df_to_csv(pd.DataFrame([{"a": 1}]), "a/2021-01-01-00-00-00.csv")
+
+        # Act
+        df_to_csv(pd.DataFrame([{"a": 1}]), "a/2021-01-02-00-00-00.csv")
+
+        # Assert
+        assert os.path.exists("a/2021-01-01-00-00-00.csv")
+        assert not os.path.exists("a/2021-01-02-00-00-00.csv")
+
+
+def describe_when_recording_a_run_manifest():
+    @pytest.fixture
+    def manifest(fs):
+        fs.create_dir("output/users")
+        manifest = start_run_manifest("output")
+        yield manifest
+        finish_run_manifest()
+
+    def it_should_record_the_file(manifest):
+        # Act
+        df_to_csv(pd.DataFrame([{"a": 1}, {"a": 2}]), "output/users/2021-01-01-00-00-00.csv")
+
+        # Assert
+        [entry] = manifest.entries
+        assert (entry.path, entry.resource, entry.rows) == (
+            "users/2021-01-01-00-00-00.csv",
+            "users",
+            2,
+        )
+
+    def it_should_record_an_empty_section_instead_of_writing_it(manifest):
+        # Arrange
+        path = "output/section=1/section-activities/2021-01-01-00-00-00.csv"
+
+        # Act
+        df_to_csv(pd.DataFrame(), path)
+
+        # Assert
+        assert [empty.path for empty in manifest.empty_partitions] == [
+            "section=1/section-activities/2021-01-01-00-00-00"
+        ]
+        assert not os.path.exists(path)